@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import AuditorApplication, AuditorProfile, Profile, User
+from .models import AuditorApplication, AuditorProfile, BalanceLedgerEntry, Profile, User
 
 
 @admin.register(User)
@@ -15,6 +15,23 @@ class UserAdmin(admin.ModelAdmin):
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "company_name", "farm_name", "location")
     search_fields = ("user__username", "company_name", "farm_name", "location")
+    # Saldo só muda por lançamentos no ledger
+    readonly_fields = ("balance",)
+
+
+@admin.register(BalanceLedgerEntry)
+class BalanceLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "amount", "transaction", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("user__username",)
+    raw_id_fields = ("user", "transaction")
+
+    # Somente INSERT: correções entram como novo lançamento (ADJUSTMENT)
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(AuditorApplication)
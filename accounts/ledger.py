@@ -0,0 +1,196 @@
+"""
+Ledger da carteira virtual.
+
+Cada movimentação de saldo é um `BalanceLedgerEntry` (somente INSERT) e, na
+mesma transação, um UPDATE atômico do saldo em cache (`Profile.balance =
+balance + valor`). Não há leitura-modificação-escrita em Python, então
+depósitos concorrentes não se perdem.
+
+`BalanceCheckpoint` registra periodicamente o saldo de cada usuário após um
+lançamento; o saldo em qualquer ponto é o checkpoint anterior somado aos
+lançamentos seguintes (`balance_from_ledger`), e `verify_users` confere a
+cadeia de checkpoints contra os lançamentos e o saldo em cache.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Iterable
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, Count, DecimalField, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import BalanceCheckpoint, BalanceLedgerEntry, Profile
+
+ZERO = Decimal("0.00")
+
+
+class InsufficientBalance(ValueError):
+    """Débito maior que o saldo disponível."""
+
+    def __init__(self) -> None:
+        super().__init__("Saldo insuficiente")
+
+
+def _user_id(user: Any) -> int:
+    return user if isinstance(user, int) else user.pk
+
+
+def move_balance(user: Any, amount: Decimal) -> bool:
+    """
+    Aplica `amount` ao saldo em cache com um UPDATE atômico.
+
+    Débitos só são aplicados se houver saldo (`balance >= -amount`); retorna
+    False caso contrário. Não grava lançamento: quem chama grava o
+    `BalanceLedgerEntry` na mesma transação.
+    """
+    profiles = Profile.objects.filter(user_id=_user_id(user))
+    if amount < 0:
+        profiles = profiles.filter(balance__gte=-amount)
+    return bool(profiles.update(balance=F("balance") + amount))
+
+
+def credit_balances(amounts: dict[int, Decimal]) -> int:
+    """
+    Soma `amounts` (user_id -> valor) aos saldos em cache com um único
+    UPDATE. Sem a checagem de saldo de `move_balance`: para valores
+    negativos, quem chama travou os Profiles (`select_for_update`) e
+    conferiu o saldo dentro da transação. Como em
+    `move_balance`, os lançamentos são gravados por quem chama, na mesma
+    transação. Retorna quantos saldos mudaram.
+    """
+    if not amounts:
+        return 0
+    increment = Case(
+        *[When(user_id=user_id, then=Value(amounts[user_id])) for user_id in sorted(amounts)],
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    return Profile.objects.filter(user_id__in=amounts).update(balance=F("balance") + increment)
+
+
+def post_entry(
+    user: Any,
+    amount: Decimal,
+    kind: str,
+    *,
+    transaction: Any = None,
+    note: str = "",
+) -> BalanceLedgerEntry:
+    """Grava um lançamento e atualiza o saldo em cache, atomicamente."""
+    amount = Decimal(amount)
+    with db_transaction.atomic():
+        # O UPDATE vem antes: trava a linha do Profile, então os lançamentos
+        # de um usuário recebem ids na ordem em que foram aplicados
+        if not move_balance(user, amount):
+            raise InsufficientBalance()
+        return BalanceLedgerEntry.objects.create(
+            user_id=_user_id(user),
+            kind=kind,
+            amount=amount,
+            transaction=transaction,
+            note=note,
+        )
+
+
+def balance_from_ledger(user: Any) -> Decimal:
+    """Saldo pelo ledger: último checkpoint + lançamentos posteriores."""
+    user_id = _user_id(user)
+    checkpoint = (
+        BalanceCheckpoint.objects.filter(user_id=user_id)
+        .order_by("-last_entry_id")
+        .values("last_entry_id", "balance")
+        .first()
+    ) or {"last_entry_id": 0, "balance": ZERO}
+    tail = BalanceLedgerEntry.objects.filter(
+        user_id=user_id, id__gt=checkpoint["last_entry_id"]
+    ).aggregate(total=Coalesce(Sum("amount"), Value(ZERO)))["total"]
+    return _money(checkpoint["balance"] + tail)
+
+
+def _money(value: Any) -> Decimal:
+    # SQLite soma decimais em ponto flutuante
+    return Decimal(value).quantize(Decimal("0.01"))
+
+
+def create_checkpoints(user_ids: Iterable[int], min_entries: int = 1) -> int:
+    """
+    Grava um checkpoint para cada usuário com `min_entries` lançamentos ou
+    mais desde o último checkpoint. Retorna quantos foram criados.
+
+    O saldo do checkpoint é o saldo em cache, lido com as linhas de Profile
+    travadas: nenhum lançamento desses usuários está em andamento, então o
+    saldo corresponde exatamente ao último lançamento gravado.
+    """
+    user_ids = list(user_ids)
+    latest = BalanceCheckpoint.objects.filter(user=OuterRef("user")).order_by("-last_entry_id")
+    due = [
+        row["user"]
+        for row in BalanceLedgerEntry.objects.filter(user_id__in=user_ids)
+        .annotate(since=Coalesce(Subquery(latest.values("last_entry_id")[:1]), Value(0)))
+        .filter(id__gt=F("since"))
+        .values("user")
+        .annotate(pending=Count("id"))
+        .filter(pending__gte=min_entries)
+    ]
+    if not due:
+        return 0
+
+    with db_transaction.atomic():
+        balances = dict(
+            Profile.objects.select_for_update()
+            .filter(user_id__in=due)
+            .values_list("user_id", "balance")
+        )
+        last_entries = dict(
+            BalanceLedgerEntry.objects.filter(user_id__in=due)
+            .values("user")
+            .annotate(last=Max("id"))
+            .values_list("user", "last")
+        )
+        BalanceCheckpoint.objects.bulk_create([
+            BalanceCheckpoint(user_id=user_id, last_entry_id=last_entries[user_id], balance=balances[user_id])
+            for user_id in due
+        ], ignore_conflicts=True)
+    return len(due)
+
+
+def verify_users(user_ids: Iterable[int]) -> list[str]:
+    """
+    Confere, para cada usuário, a cadeia completa:
+
+    - cada checkpoint = soma dos lançamentos até ele (inclusive);
+    - saldo em cache = soma de todos os lançamentos.
+
+    Retorna as divergências encontradas (vazio se tudo confere).
+    """
+    user_ids = list(user_ids)
+    checkpoints: dict[int, dict[int, Decimal]] = defaultdict(dict)
+    for user_id, entry_id, balance in BalanceCheckpoint.objects.filter(
+        user_id__in=user_ids
+    ).values_list("user_id", "last_entry_id", "balance"):
+        checkpoints[user_id][entry_id] = balance
+
+    running: dict[int, Decimal] = defaultdict(lambda: ZERO)
+    problems = []
+    entries = (
+        BalanceLedgerEntry.objects.filter(user_id__in=user_ids)
+        .order_by("user_id", "id")
+        .values_list("user_id", "id", "amount")
+    )
+    for user_id, entry_id, amount in entries.iterator(chunk_size=5000):
+        running[user_id] += amount
+        expected = checkpoints[user_id].get(entry_id)
+        if expected is not None and expected != running[user_id]:
+            problems.append(
+                f"usuário {user_id}: checkpoint após lançamento {entry_id} = {expected}, "
+                f"lançamentos somam {running[user_id]}"
+            )
+
+    for user_id, balance in Profile.objects.filter(user_id__in=user_ids).values_list("user_id", "balance"):
+        if balance != running[user_id]:
+            problems.append(
+                f"usuário {user_id}: saldo em cache = {balance}, lançamentos somam {running[user_id]}"
+            )
+    return problems
@@ -0,0 +1,38 @@
+"""
+Management command para gravar checkpoints de saldo (rodar periodicamente).
+Uso: python manage.py checkpoint_balances [--min-entries N] [--chunk-size N]
+"""
+from django.core.management.base import BaseCommand
+
+from accounts.ledger import create_checkpoints
+from accounts.models import BalanceLedgerEntry
+from ecotrade.seeding import batched
+
+
+class Command(BaseCommand):
+    help = 'Grava um BalanceCheckpoint para usuários com lançamentos novos no ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-entries',
+            type=int,
+            default=50,
+            help='Lançamentos desde o último checkpoint para gravar um novo (default: 50)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Usuários travados por transação (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = (
+            BalanceLedgerEntry.objects.order_by('user_id')
+            .values_list('user_id', flat=True).distinct().iterator()
+        )
+        created = sum(
+            create_checkpoints(chunk, min_entries=options['min_entries'])
+            for chunk in batched(user_ids, options['chunk_size'])
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ {created} checkpoint(s) gravado(s)'))
@@ -0,0 +1,60 @@
+"""
+Management command para reconciliar saldos com o ledger.
+Uso: python manage.py reconcile_balances [--workers N] [--chunk-size N]
+
+Confere, em blocos de usuários processados em paralelo, que cada checkpoint
+e cada saldo em cache batem com a soma dos lançamentos.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.ledger import verify_users
+from accounts.models import Profile
+from ecotrade.seeding import batched
+
+
+def _verify_chunk(user_ids):
+    """Executado em uma thread: usa (e fecha) a própria conexão."""
+    try:
+        return verify_users(user_ids)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Verifica checkpoints e saldos em cache contra os lançamentos do ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Blocos verificados em paralelo (default: 4; 1 = sem threads)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Usuários por bloco (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = Profile.objects.order_by('user_id').values_list('user_id', flat=True)
+        chunks = list(batched(user_ids.iterator(), options['chunk_size']))
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(_verify_chunk, chunks))
+        else:
+            results = [verify_users(chunk) for chunk in chunks]
+
+        problems = [problem for result in results for problem in result]
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(problem))
+        if problems:
+            raise CommandError(f'{len(problems)} divergência(s) no ledger')
+
+        users = sum(len(chunk) for chunk in chunks)
+        self.stdout.write(self.style.SUCCESS(f'✓ Ledger consistente ({users} usuário(s), {len(chunks)} bloco(s))'))
@@ -1,7 +1,21 @@
 """Management command to seed User and Profile data."""
+from contextlib import nullcontext
+
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
 from faker import Faker
-from accounts.models import User, Profile
+from accounts.models import BalanceLedgerEntry, User, Profile
+from ecotrade.seeding import (
+    FAST_PASSWORD_HASHERS,
+    add_seed_arguments,
+    batched,
+    finish_bulk_seed,
+    seed_random,
+)
+
+SEED_PASSWORD = 'password123'
 
 
 class Command(BaseCommand):
@@ -14,15 +28,36 @@ class Command(BaseCommand):
             default=35,
             help='Number of users to create (default: 35)'
         )
+        add_seed_arguments(parser)
+        parser.add_argument(
+            '--fast-hasher',
+            action='store_true',
+            help='Hash passwords with a low-iteration PBKDF2 (upgraded on first login)'
+        )
 
     def handle(self, *args, **options):
-        fake = Faker('pt_BR')
-        count = options['count']
+        seed_random(options['seed'])
+        hashers = (
+            override_settings(PASSWORD_HASHERS=FAST_PASSWORD_HASHERS)
+            if options['fast_hasher'] else nullcontext()
+        )
+        with hashers:
+            if options['bulk']:
+                self._handle_bulk(options)
+            else:
+                self._handle(options)
 
+    @staticmethod
+    def _split(count):
         # Distribution: ~60% companies, ~35% producers, ~5% admins
         company_count = int(count * 0.6)
         producer_count = int(count * 0.35)
         admin_count = max(1, count - company_count - producer_count)
+        return company_count, producer_count, admin_count
+
+    def _handle(self, options):
+        fake = Faker('pt_BR')
+        company_count, producer_count, admin_count = self._split(options['count'])
 
         created_users = []
 
@@ -33,7 +68,7 @@ class Command(BaseCommand):
             user = User.objects.create_user(
                 username=username,
                 email=fake.company_email(),
-                password='password123',
+                password=SEED_PASSWORD,
                 role=User.Roles.COMPANY,
                 is_verified=fake.boolean(chance_of_getting_true=85)
             )
@@ -44,8 +79,9 @@ class Command(BaseCommand):
             profile.location = f"{fake.city()}, {fake.state_abbr()}"
             profile.tax_id = fake.cnpj()
             profile.phone = fake.phone_number()
-            profile.balance = fake.pydecimal(left_digits=5, right_digits=2, positive=True, min_value=1000, max_value=50000)
+            balance = fake.pydecimal(left_digits=5, right_digits=2, positive=True, min_value=1000, max_value=50000)
             profile.save()
+            profile.add_balance(balance, kind=BalanceLedgerEntry.Kind.OPENING)
 
             created_users.append(user)
 
@@ -56,7 +92,7 @@ class Command(BaseCommand):
             user = User.objects.create_user(
                 username=username,
                 email=fake.email(),
-                password='password123',
+                password=SEED_PASSWORD,
                 role=User.Roles.PRODUCER,
                 is_verified=fake.boolean(chance_of_getting_true=90)
             )
@@ -67,8 +103,7 @@ class Command(BaseCommand):
             profile.location = f"{fake.city()}, {fake.state_abbr()}"
             profile.tax_id = fake.cpf()
             profile.phone = fake.phone_number()
-            profile.balance = 0  # Producers don't need balance
-            profile.save()
+            profile.save()  # Producers don't need balance
 
             created_users.append(user)
 
@@ -79,7 +114,7 @@ class Command(BaseCommand):
             user = User.objects.create_user(
                 username=username,
                 email=fake.email(),
-                password='password123',
+                password=SEED_PASSWORD,
                 role=User.Roles.ADMIN,
                 is_staff=True,
                 is_superuser=True,
@@ -94,3 +129,89 @@ class Command(BaseCommand):
                 f'({company_count} companies, {producer_count} producers, {admin_count} admins)'
             )
         )
+
+    def _handle_bulk(self, options):
+        """
+        Bulk path: users, their Profile rows and the OPENING ledger entries
+        for seeded balances via bulk_create.
+
+        All seeded users share the same password, so it is hashed once.
+        Only the Profile rows are written here: seed_users creates no
+        auditors or superusers with a non-ADMIN role, so the profile signal
+        has nothing else to do.
+        """
+        fake = Faker('pt_BR')
+        batch_size = options['batch_size']
+        company_count, producer_count, admin_count = self._split(options['count'])
+        password = make_password(SEED_PASSWORD)
+
+        def users():
+            for i in range(company_count):
+                yield User(
+                    username=f"company_{fake.user_name()}_{i}",
+                    email=fake.company_email(),
+                    password=password,
+                    role=User.Roles.COMPANY,
+                    is_verified=fake.boolean(chance_of_getting_true=85),
+                ), Profile(
+                    company_name=fake.company(),
+                    location=f"{fake.city()}, {fake.state_abbr()}",
+                    tax_id=fake.cnpj(),
+                    phone=fake.phone_number(),
+                    balance=fake.pydecimal(
+                        left_digits=5, right_digits=2, positive=True,
+                        min_value=1000, max_value=50000
+                    ),
+                )
+            for i in range(producer_count):
+                yield User(
+                    username=f"producer_{fake.user_name()}_{i}",
+                    email=fake.email(),
+                    password=password,
+                    role=User.Roles.PRODUCER,
+                    is_verified=fake.boolean(chance_of_getting_true=90),
+                ), Profile(
+                    farm_name=f"Fazenda {fake.last_name()}",
+                    location=f"{fake.city()}, {fake.state_abbr()}",
+                    tax_id=fake.cpf(),
+                    phone=fake.phone_number(),
+                    balance=0,
+                )
+            for i in range(admin_count):
+                yield User(
+                    username=f"admin_{fake.user_name()}_{i}",
+                    email=fake.email(),
+                    password=password,
+                    role=User.Roles.ADMIN,
+                    is_staff=True,
+                    is_superuser=True,
+                    is_verified=True,
+                ), Profile()
+
+        total = 0
+        with transaction.atomic():
+            for batch in batched(users(), batch_size):
+                new_users = User.objects.bulk_create([user for user, _ in batch])
+                profiles = []
+                for user, (_, profile) in zip(new_users, batch):
+                    profile.user = user
+                    profiles.append(profile)
+                Profile.objects.bulk_create(profiles)
+                # Seeded balances enter the ledger as OPENING entries
+                BalanceLedgerEntry.objects.bulk_create([
+                    BalanceLedgerEntry(
+                        user=profile.user,
+                        kind=BalanceLedgerEntry.Kind.OPENING,
+                        amount=profile.balance,
+                    )
+                    for profile in profiles if profile.balance
+                ])
+                total += len(new_users)
+            finish_bulk_seed()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Bulk-created {total} users with profiles '
+                f'({company_count} companies, {producer_count} producers, {admin_count} admins)'
+            )
+        )
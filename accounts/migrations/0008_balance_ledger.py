@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_balances(apps, schema_editor):
+    """Um lançamento OPENING por saldo existente: saldo = soma do ledger."""
+    Profile = apps.get_model("accounts", "Profile")
+    BalanceLedgerEntry = apps.get_model("accounts", "BalanceLedgerEntry")
+    entries = [
+        BalanceLedgerEntry(user_id=user_id, kind="OPENING", amount=balance, note="Saldo anterior ao ledger")
+        for user_id, balance in Profile.objects.exclude(balance=0).values_list("user_id", "balance").iterator()
+    ]
+    BalanceLedgerEntry.objects.bulk_create(entries, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_remove_user_approved_at_alter_user_role_profile'),
+        ('transactions', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('OPENING', 'Saldo inicial'), ('TOP_UP', 'Depósito'), ('PURCHASE', 'Compra'), ('SALE', 'Venda'), ('ADJUSTMENT', 'Ajuste')], max_length=16)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lançamento de saldo',
+                'verbose_name_plural': 'Lançamentos de saldo',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='balance_checkpoints', to=settings.AUTH_USER_MODEL)),
+                ('last_entry', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounts.balanceledgerentry')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de saldo',
+                'verbose_name_plural': 'Checkpoints de saldo',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='balanceledgerentry',
+            index=models.Index(fields=['user', 'id'], name='ledger_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='balancecheckpoint',
+            constraint=models.UniqueConstraint(fields=('user', 'last_entry'), name='checkpoint_user_entry_uniq'),
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
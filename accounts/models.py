@@ -66,26 +66,119 @@ class Profile(models.Model):
         help_text="Saldo virtual para compra de créditos (R$)"
     )
 
+    def save(self, *args, **kwargs):
+        # `balance` só muda via ledger (UPDATE com F()): um save() da linha
+        # inteira, como o do ProfileForm, regravaria um saldo desatualizado
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "balance"
+            ]
+        super().save(*args, **kwargs)
+
     def can_buy(self, amount):
         """Verifica se tem saldo suficiente para comprar."""
         return self.balance >= amount
     
-    def add_balance(self, amount):
-        """Adiciona saldo à carteira."""
-        self.balance += amount
-        self.save()
-    
-    def deduct_balance(self, amount):
-        """Deduz saldo da carteira."""
-        if not self.can_buy(amount):
-            raise ValueError("Saldo insuficiente")
-        self.balance -= amount
-        self.save()
+    def add_balance(self, amount, kind=None, note=""):
+        """Adiciona saldo à carteira (lançamento no ledger)."""
+        from .ledger import post_entry
+
+        post_entry(self.user_id, amount, kind or BalanceLedgerEntry.Kind.TOP_UP, note=note)
+        self.refresh_from_db(fields=["balance"])
+
+    def deduct_balance(self, amount, kind=None, note=""):
+        """Deduz saldo da carteira; levanta ValueError se não houver saldo."""
+        from .ledger import post_entry
+
+        post_entry(self.user_id, -amount, kind or BalanceLedgerEntry.Kind.ADJUSTMENT, note=note)
+        self.refresh_from_db(fields=["balance"])
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"Profile<{self.user.username}>"
 
 
+class BalanceLedgerEntry(models.Model):
+    """
+    Lançamento imutável na carteira virtual (somente INSERT).
+
+    `Profile.balance` é o saldo em cache: a soma de todos os lançamentos do
+    usuário, atualizada com F() na mesma transação do INSERT (ver
+    `accounts.ledger`).
+    """
+
+    class Kind(models.TextChoices):
+        OPENING = "OPENING", _("Saldo inicial")
+        TOP_UP = "TOP_UP", _("Depósito")
+        PURCHASE = "PURCHASE", _("Compra")
+        SALE = "SALE", _("Venda")
+        ADJUSTMENT = "ADJUSTMENT", _("Ajuste")
+
+    user = models.ForeignKey(
+        "accounts.User", on_delete=models.PROTECT, related_name="ledger_entries"
+    )
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    # Positivo entra na carteira, negativo sai
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    transaction = models.ForeignKey(
+        "transactions.Transaction",
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="ledger_entries",
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = _("Lançamento de saldo")
+        verbose_name_plural = _("Lançamentos de saldo")
+        indexes = [
+            # Extrato e reconciliação por usuário, na ordem de inserção
+            models.Index(fields=["user", "id"], name="ledger_user_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Lançamentos do ledger são imutáveis")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Lançamentos do ledger são imutáveis")
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"Ledger<{self.id}> {self.user_id} {self.kind} {self.amount}"
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Saldo de um usuário após o lançamento `last_entry` (inclusive).
+
+    Saldo em qualquer ponto = checkpoint anterior + lançamentos seguintes,
+    sem somar o histórico inteiro.
+    """
+
+    user = models.ForeignKey(
+        "accounts.User", on_delete=models.PROTECT, related_name="balance_checkpoints"
+    )
+    last_entry = models.ForeignKey(
+        BalanceLedgerEntry, on_delete=models.PROTECT, related_name="+"
+    )
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Checkpoint de saldo")
+        verbose_name_plural = _("Checkpoints de saldo")
+        constraints = [
+            models.UniqueConstraint(fields=["user", "last_entry"], name="checkpoint_user_entry_uniq"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"Checkpoint<{self.user_id}@{self.last_entry_id}> {self.balance}"
+
+
 class AuditorProfile(models.Model):
     """Perfil específico para Auditor, preenchido no cadastro."""
     user = models.OneToOneField("accounts.User", on_delete=models.CASCADE, related_name="auditor_profile")
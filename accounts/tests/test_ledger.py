@@ -0,0 +1,131 @@
+"""Testes do ledger de saldo (accounts.ledger)."""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from accounts.ledger import balance_from_ledger, create_checkpoints, post_entry
+from accounts.models import BalanceCheckpoint, BalanceLedgerEntry, Profile, User
+from credits.models import CarbonCredit, CreditListing
+from transactions.services import purchase_credit
+
+
+class BalanceLedgerTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.profile = self.company.profile
+
+    def test_add_balance_posts_entry(self):
+        self.profile.add_balance(Decimal("100.00"))
+        self.profile.add_balance(Decimal("50.50"))
+
+        self.assertEqual(self.profile.balance, Decimal("150.50"))
+        entries = self.company.ledger_entries.all()
+        self.assertEqual([e.kind for e in entries], [BalanceLedgerEntry.Kind.TOP_UP] * 2)
+        self.assertEqual(balance_from_ledger(self.company), Decimal("150.50"))
+
+    def test_deduct_without_funds_changes_nothing(self):
+        self.profile.add_balance(Decimal("10.00"))
+        with self.assertRaisesMessage(ValueError, "Saldo insuficiente"):
+            self.profile.deduct_balance(Decimal("10.01"))
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal("10.00"))
+        self.assertEqual(self.company.ledger_entries.count(), 1)
+
+    def test_entries_are_immutable(self):
+        entry = post_entry(self.company, Decimal("5.00"), BalanceLedgerEntry.Kind.TOP_UP)
+        entry.amount = Decimal("500.00")
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_stale_profile_save_keeps_balance(self):
+        """Um save() do Profile (ex.: ProfileForm) não regrava o saldo."""
+        stale = Profile.objects.get(pk=self.profile.pk)
+        self.profile.add_balance(Decimal("75.00"))
+
+        stale.company_name = "ACME"
+        stale.save()
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.balance, Decimal("75.00"))
+        self.assertEqual(self.profile.company_name, "ACME")
+
+    def test_purchase_posts_both_sides(self):
+        producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.profile.add_balance(Decimal("1000.00"))
+        credit = CarbonCredit.objects.create(
+            owner=producer,
+            amount=Decimal("10.00"),
+            origin="Farm",
+            generation_date="2025-10-01",
+            status=CarbonCredit.Status.LISTED,
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        CreditListing.objects.create(credit=credit, price_per_unit=Decimal("20.00"))
+
+        txn = purchase_credit(self.company, credit.pk)
+
+        entries = {e.kind: e for e in txn.ledger_entries.all()}
+        self.assertEqual(entries[BalanceLedgerEntry.Kind.PURCHASE].amount, Decimal("-200.00"))
+        self.assertEqual(entries[BalanceLedgerEntry.Kind.PURCHASE].user, self.company)
+        self.assertEqual(entries[BalanceLedgerEntry.Kind.SALE].amount, Decimal("200.00"))
+        self.assertEqual(entries[BalanceLedgerEntry.Kind.SALE].user, producer)
+        self.assertEqual(balance_from_ledger(producer), Decimal("200.00"))
+
+
+class BalanceCheckpointTests(TestCase):
+    def setUp(self):
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        for amount in ("10.00", "20.00", "30.00"):
+            self.company.profile.add_balance(Decimal(amount))
+
+    def _reconcile(self):
+        call_command("reconcile_balances", workers=1, chunk_size=1, stdout=StringIO())
+
+    def test_checkpoint_then_tail(self):
+        self.assertEqual(create_checkpoints([self.company.pk]), 1)
+        checkpoint = BalanceCheckpoint.objects.get()
+        self.assertEqual(checkpoint.balance, Decimal("60.00"))
+        self.assertEqual(checkpoint.last_entry, self.company.ledger_entries.last())
+
+        self.company.profile.deduct_balance(Decimal("15.00"))
+        self.assertEqual(balance_from_ledger(self.company), Decimal("45.00"))
+
+    def test_min_entries(self):
+        self.assertEqual(create_checkpoints([self.company.pk], min_entries=4), 0)
+        self.assertEqual(create_checkpoints([self.company.pk], min_entries=3), 1)
+        # Nada novo desde o último checkpoint
+        self.assertEqual(create_checkpoints([self.company.pk]), 0)
+
+    def test_checkpoint_command(self):
+        out = StringIO()
+        call_command("checkpoint_balances", min_entries=1, stdout=out)
+        self.assertIn("1 checkpoint(s)", out.getvalue())
+
+    def test_reconcile_passes(self):
+        create_checkpoints([self.company.pk])
+        self.company.profile.add_balance(Decimal("1.00"))
+        self._reconcile()
+
+    def test_reconcile_detects_cached_balance_drift(self):
+        Profile.objects.filter(user=self.company).update(balance=Decimal("999.00"))
+        with self.assertRaisesMessage(CommandError, "1 divergência(s)"):
+            self._reconcile()
+
+    def test_reconcile_detects_bad_checkpoint(self):
+        create_checkpoints([self.company.pk])
+        BalanceCheckpoint.objects.update(balance=Decimal("61.00"))
+        with self.assertRaisesMessage(CommandError, "1 divergência(s)"):
+            self._reconcile()
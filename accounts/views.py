@@ -273,10 +273,8 @@ def auditor_application_view(request: HttpRequest) -> HttpResponse:
 @login_required
 def admin_dashboard_view(request: HttpRequest) -> HttpResponse:
     """Dashboard administrativo para gerenciar candidaturas e usuários."""
-    from django.db.models import Count, Q
     from .models import AuditorApplication
-    from credits.models import CarbonCredit
-    from transactions.models import Transaction
+    from dashboard.models import PlatformStats
     
     user = cast(User, request.user)
     
@@ -295,19 +293,20 @@ def admin_dashboard_view(request: HttpRequest) -> HttpResponse:
         'user', 'reviewed_by'
     ).order_by('-created_at')[:50]
     
-    # Estatísticas gerais
+    # Estatísticas gerais (linha materializada, uma leitura por PK)
+    platform = PlatformStats.load()
     stats = {
-        'total_users': User.objects.count(),
-        'total_producers': User.objects.filter(role=User.Roles.PRODUCER).count(),
-        'total_companies': User.objects.filter(role=User.Roles.COMPANY).count(),
-        'total_auditors': User.objects.filter(role=User.Roles.AUDITOR).count(),
-        'pending_applications': pending_applications.count(),
-        'approved_applications': AuditorApplication.objects.filter(status=AuditorApplication.Status.APPROVED).count(),
-        'rejected_applications': AuditorApplication.objects.filter(status=AuditorApplication.Status.REJECTED).count(),
-        'total_credits': CarbonCredit.objects.count(),
-        'pending_validation': CarbonCredit.objects.filter(validation_status='PENDING').count(),
-        'approved_credits': CarbonCredit.objects.filter(validation_status='APPROVED').count(),
-        'total_transactions': Transaction.objects.filter(status='COMPLETED').count(),
+        'total_users': platform.users_total,
+        'total_producers': platform.producers,
+        'total_companies': platform.companies,
+        'total_auditors': platform.auditors,
+        'pending_applications': platform.applications_pending,
+        'approved_applications': platform.applications_approved,
+        'rejected_applications': platform.applications_rejected,
+        'total_credits': platform.credits_total,
+        'pending_validation': platform.credits_pending_validation,
+        'approved_credits': platform.credits_approved,
+        'total_transactions': platform.transactions_completed,
     }
     
     # Usuários recentes
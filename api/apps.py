@@ -5,3 +5,13 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
     verbose_name = 'API Pública'
+
+    def ready(self):
+        """Conecta a invalidação do cache de /api/stats/ aos contadores."""
+        from dashboard.signals import platform_stats_changed
+
+        from .cache import on_platform_stats_changed
+
+        platform_stats_changed.connect(
+            on_platform_stats_changed, dispatch_uid="api_cache_platform_stats"
+        )
@@ -0,0 +1,233 @@
+"""
+Cache de respostas da API pública com invalidação por eventos.
+
+As respostas de /api/stats/ e da primeira página de /api/credits/ (sem
+cursor/offset) ficam prontas no cache `api`, junto com a ETag. Um acerto não
+toca o banco: nem para a ETag, nem para o corpo.
+
+Cada chave inclui a "geração" do seu escopo (`stats`, `credits:all`,
+`credits:<STATUS>`). Invalidar um escopo troca a geração, tornando as
+entradas antigas inalcançáveis, de modo que só as páginas afetadas por uma
+mudança são descartadas (ex.: vender um crédito LISTED não invalida as
+páginas filtradas por AVAILABLE).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import uuid
+from functools import wraps
+from typing import Any, Callable, Iterable
+
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+
+API_CACHE_ALIAS = "api"
+
+STATS_SCOPE = "stats"
+CREDITS_ALL_SCOPE = "credits:all"
+
+# Contadores de PlatformStats expostos por /api/stats/
+STATS_FIELDS = frozenset({
+    "credits_approved",
+    "approved_co2",
+    "approved_available",
+    "approved_listed",
+    "approved_sold",
+    "producers",
+    "companies",
+    "transactions_completed",
+})
+
+ENDPOINTS = ("stats", "credits")
+
+
+def api_cache():
+    return caches[API_CACHE_ALIAS]
+
+
+def credits_scope(status: str | None) -> str:
+    """Escopo das páginas de /api/credits/ filtradas por `status` (None = todas)."""
+    return f"credits:{status}" if status else CREDITS_ALL_SCOPE
+
+
+# ---------------------------------------------------------------------------
+# Gerações
+# ---------------------------------------------------------------------------
+
+def _generation_key(scope: str) -> str:
+    return f"api:gen:{scope}"
+
+
+def _generation(scope: str) -> str:
+    """
+    Geração atual do escopo.
+
+    Usa um token aleatório (e não um contador): se a chave da geração for
+    despejada do cache, a nova geração nunca coincide com uma antiga.
+    """
+    cache = api_cache()
+    generation = cache.get(_generation_key(scope))
+    if generation is None:
+        generation = uuid.uuid4().hex[:12]
+        if not cache.add(_generation_key(scope), generation, timeout=None):
+            generation = cache.get(_generation_key(scope), generation)
+    return generation
+
+
+def invalidate(scopes: Iterable[str]) -> None:
+    """Descarta todas as respostas dos escopos informados."""
+    api_cache().set_many(
+        {_generation_key(scope): uuid.uuid4().hex[:12] for scope in scopes},
+        timeout=None,
+    )
+
+
+def invalidate_credit_statuses(statuses: Iterable[str]) -> None:
+    """Invalida a listagem completa e as listagens filtradas pelos status dados."""
+    invalidate({CREDITS_ALL_SCOPE, *(credits_scope(status) for status in statuses)})
+
+
+def invalidate_all() -> None:
+    """Descarta todas as respostas (ex.: alterações em massa fora dos signals)."""
+    from credits.models import CarbonCredit
+
+    invalidate([
+        STATS_SCOPE,
+        CREDITS_ALL_SCOPE,
+        *(credits_scope(status) for status in CarbonCredit.Status.values),
+    ])
+
+
+def on_platform_stats_changed(sender, fields, **kwargs) -> None:
+    """Receiver de `platform_stats_changed`: só invalida se /api/stats/ mudou."""
+    if STATS_FIELDS & set(fields):
+        transaction.on_commit(lambda: invalidate([STATS_SCOPE]))
+
+
+# ---------------------------------------------------------------------------
+# Métricas de acerto
+# ---------------------------------------------------------------------------
+
+def _counter_key(endpoint: str, outcome: str) -> str:
+    return f"api:metrics:{endpoint}:{outcome}"
+
+
+def record(endpoint: str, hit: bool) -> None:
+    """Incrementa o contador de hits/misses do endpoint (atômico no backend)."""
+    cache = api_cache()
+    key = _counter_key(endpoint, "hits" if hit else "misses")
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Chave despejada entre o add e o incr
+        cache.add(key, 1, timeout=None)
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Hits, misses e taxa de acerto por endpoint."""
+    keys = [
+        _counter_key(endpoint, outcome)
+        for endpoint in ENDPOINTS
+        for outcome in ("hits", "misses")
+    ]
+    values = api_cache().get_many(keys)
+    report = {}
+    for endpoint in ENDPOINTS:
+        hits = values.get(_counter_key(endpoint, "hits"), 0)
+        misses = values.get(_counter_key(endpoint, "misses"), 0)
+        total = hits + misses
+        report[endpoint] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+        }
+    return report
+
+
+def reset_cache_stats() -> None:
+    api_cache().delete_many([
+        _counter_key(endpoint, outcome)
+        for endpoint in ENDPOINTS
+        for outcome in ("hits", "misses")
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Chaves e decorator
+# ---------------------------------------------------------------------------
+
+def _params_hash(request: HttpRequest) -> str:
+    # Ordena os parâmetros: ?a=1&b=2 e ?b=2&a=1 compartilham a entrada
+    query = "&".join(sorted(request.GET.urlencode().split("&")))
+    return hashlib.sha1(query.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def stats_key(request: HttpRequest) -> str:
+    return f"api:stats:{_generation(STATS_SCOPE)}"
+
+
+def credits_page_key(request: HttpRequest) -> str | None:
+    """
+    Chave da primeira página de /api/credits/; None para páginas seguintes.
+
+    Páginas via cursor/offset são lidas uma vez por cliente e não compensam
+    o espaço no cache.
+    """
+    from credits.models import CarbonCredit
+
+    if request.GET.get("cursor") or request.GET.get("offset", "0") not in ("", "0"):
+        return None
+    status = request.GET.get("status")
+    if status not in CarbonCredit.Status.values:
+        status = None
+    scope = credits_scope(status)
+    return f"api:{scope}:{_generation(scope)}:{_params_hash(request)}"
+
+
+def cached_api_response(
+    endpoint: str, key_func: Callable[..., str | None]
+) -> Callable[[Callable[..., HttpResponse]], Callable[..., HttpResponse]]:
+    """
+    Serve respostas 200 do cache `api`, inclusive 304 para If-None-Match.
+
+    Deve envolver o `@condition` da view: num acerto, a ETag guardada é usada
+    diretamente e nem a view nem a função de ETag são executadas.
+    """
+    def decorator(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            key = key_func(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            cache = api_cache()
+            entry = cache.get(key)
+            if entry is not None:
+                record(endpoint, hit=True)
+                response = get_conditional_response(request, etag=entry["etag"])
+                if response is None:
+                    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+                response["ETag"] = entry["etag"]
+                response["X-Cache"] = "HIT"
+                return response
+
+            record(endpoint, hit=False)
+            response = view(request, *args, **kwargs)
+            # A chave foi calculada antes da view: se houve invalidação no meio,
+            # a entrada fica numa geração antiga e nunca é lida
+            if response.status_code == 200 and response.has_header("ETag"):
+                cache.set(key, {
+                    "etag": response["ETag"],
+                    "content": response.content,
+                    "content_type": response["Content-Type"],
+                })
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,40 @@
+"""
+Management command para inspecionar o cache de respostas da API pública.
+Uso: python manage.py api_cache_stats [--reset] [--invalidate]
+"""
+from django.core.management.base import BaseCommand
+
+from api.cache import cache_stats, invalidate_all, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Mostra hits, misses e taxa de acerto do cache da API pública'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Zera os contadores após exibi-los'
+        )
+        parser.add_argument(
+            '--invalidate',
+            action='store_true',
+            help='Descarta todas as respostas em cache (ex.: após alterações em massa)'
+        )
+
+    def handle(self, *args, **options):
+        for endpoint, metrics in cache_stats().items():
+            ratio = metrics['hit_ratio']
+            ratio_display = f'{ratio:.1%}' if ratio is not None else '-'
+            self.stdout.write(
+                f'{endpoint:<10} hits={metrics["hits"]:<8} misses={metrics["misses"]:<8} '
+                f'taxa de acerto={ratio_display}'
+            )
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('✓ Contadores zerados'))
+
+        if options['invalidate']:
+            invalidate_all()
+            self.stdout.write(self.style.SUCCESS('✓ Cache da API invalidado'))
@@ -1,9 +1,11 @@
 """Testes da API pública."""
 
 import json
+from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -17,6 +19,7 @@ class PublicAPITests(TestCase):
 
     def setUp(self):
         """Configura dados para testes."""
+        caches['api'].clear()
         self.client = Client()
 
         # Criar produtor
@@ -119,6 +122,134 @@ class PublicAPITests(TestCase):
         self.assertEqual(data['offset'], 0)
         self.assertIn('next_offset', data)
 
+    def test_credits_list_cursor_pagination(self):
+        """Paginação por cursor percorre todos os créditos sem repetir."""
+        for i in range(4):
+            CarbonCredit.objects.create(
+                owner=self.producer,
+                amount=Decimal("10.00"),
+                origin=f"Fazenda {i}",
+                generation_date="2025-10-01",
+                validation_status=CarbonCredit.ValidationStatus.APPROVED,
+            )
+
+        seen = []
+        url = '/api/credits/?limit=2'
+        while url:
+            data = json.loads(self.client.get(url).content)
+            self.assertIsNone(data['total'])
+            seen.extend(credit['id'] for credit in data['data'])
+            url = f"/api/credits/?limit=2&cursor={data['next_cursor']}" if data['next_cursor'] else None
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_credits_list_include_total(self):
+        """Total só é calculado quando solicitado."""
+        data = json.loads(self.client.get('/api/credits/?include_total=true').content)
+        self.assertEqual(data['total'], 1)
+
+    def test_credits_list_invalid_cursor(self):
+        """Cursor inválido retorna 400."""
+        response = self.client.get('/api/credits/?cursor=invalido')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json.loads(response.content)['success'])
+
+    def test_credits_list_clamps_limit_and_offset(self):
+        """limit abaixo de 1 vira 1 e offset negativo vira 0."""
+        for query in ('limit=0', 'limit=-5', 'limit=-5&offset=-3'):
+            response = self.client.get(f'/api/credits/?{query}')
+            self.assertEqual(response.status_code, 200, query)
+            data = json.loads(response.content)
+            self.assertEqual((data['limit'], data['offset'], data['count']), (1, 0, 1), query)
+
+    def test_credits_export_ndjson(self):
+        """Exportação NDJSON traz apenas créditos aprovados, um por linha."""
+        response = self.client.get('/api/credits/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows], [self.approved_credit.id])
+        self.assertNotIn('origin', rows[0])
+        self.assertEqual(rows[0]['owner_type'], 'PRODUCER')
+        self.assertTrue(rows[0]['is_validated'])
+
+    def test_credits_export_csv(self):
+        """Exportação CSV tem cabeçalho e uma linha por crédito."""
+        response = self.client.get('/api/credits/export/?format=csv')
+        self.assertEqual(response.status_code, 200)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'id')
+        self.assertEqual(len(lines), 2)
+
+    def test_credits_export_not_modified(self):
+        """If-None-Match sem alterações retorna 304 sem ler os créditos."""
+        response = self.client.get('/api/credits/export/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/credits/export/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_credits_export_if_modified_since(self):
+        """Só If-Modified-Since (sem ETag) também recebe 304."""
+        last_modified = self.client.get('/api/credits/export/')['Last-Modified']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/credits/export/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_credits_export_sees_same_second_change(self):
+        """Alteração no mesmo segundo da coleta anterior muda o ETag."""
+        etag = self.client.get('/api/credits/export/')['ETag']
+        last = CarbonCredit.objects_all.order_by('-updated_at').first().updated_at
+        CarbonCredit.objects.filter(pk=self.approved_credit.pk).update(
+            updated_at=last + timedelta(microseconds=1)
+        )
+
+        response = self.client.get('/api/credits/export/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_credits_export_invalid_format(self):
+        """Formato desconhecido retorna 400."""
+        response = self.client.get('/api/credits/export/?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_conditional_get_returns_304(self):
+        """ETag fraca: If-None-Match igual responde 304 (sem consultas se cacheado)."""
+        for url, queries in (
+            ('/api/credits/?limit=10', 0),
+            (f'/api/credits/{self.approved_credit.id}/', 1),
+            ('/api/stats/', 0),
+        ):
+            etag = self.client.get(url)['ETag']
+            self.assertTrue(etag.startswith('W/"'))
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_etag_changes_when_credit_changes(self):
+        """Alterar o crédito invalida a ETag da listagem e do detalhe."""
+        list_etag = self.client.get('/api/credits/')['ETag']
+        detail_url = f'/api/credits/{self.approved_credit.id}/'
+        detail_etag = self.client.get(detail_url)['ETag']
+
+        self.approved_credit.status = CarbonCredit.Status.LISTED
+        with self.captureOnCommitCallbacks(execute=True):
+            self.approved_credit.save(update_fields=['status'])
+
+        response = self.client.get('/api/credits/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['data']['status'], 'LISTED')
+
     def test_credit_detail_endpoint(self):
         """Testa endpoint de detalhe do crédito (anonimizado)."""
         response = self.client.get(f'/api/credits/{self.approved_credit.id}/')
@@ -0,0 +1,136 @@
+"""Testes do cache de respostas da API pública."""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api.cache import cache_stats
+from credits.models import CarbonCredit, CreditListing
+
+User = get_user_model()
+
+
+class APIResponseCacheTests(TestCase):
+    """Respostas cacheadas e invalidação precisa por eventos."""
+
+    def setUp(self):
+        caches["api"].clear()
+        self.client = Client()
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.available = self._credit(CarbonCredit.Status.AVAILABLE)
+        self.listed = self._credit(CarbonCredit.Status.LISTED)
+        CreditListing.objects.create(
+            credit=self.listed, price_per_unit=Decimal("50.00"), is_active=True
+        )
+
+    def _credit(self, status, validation_status=CarbonCredit.ValidationStatus.APPROVED):
+        return CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal("10.00"),
+            origin="Fazenda Teste",
+            generation_date="2025-10-01",
+            status=status,
+            validation_status=validation_status,
+        )
+
+    def _get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        """Segunda leitura vem do cache, sem consultas, com a mesma ETag."""
+        for url in ("/api/stats/", "/api/credits/?limit=10"):
+            first = self._get(url)
+            self.assertEqual(first["X-Cache"], "MISS")
+            with self.assertNumQueries(0):
+                second = self._get(url)
+            self.assertEqual(second["X-Cache"], "HIT")
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_cursor_pages_are_not_cached(self):
+        """Apenas a primeira página é cacheada."""
+        cursor = self._get("/api/credits/?limit=1").json()["next_cursor"]
+        response = self._get(f"/api/credits/?limit=1&cursor={cursor}")
+        self.assertNotIn("X-Cache", response)
+
+    def test_approval_invalidates_stats_and_pages(self):
+        """Aprovar um crédito torna-o visível imediatamente."""
+        pending = self._credit(
+            CarbonCredit.Status.AVAILABLE, CarbonCredit.ValidationStatus.PENDING
+        )
+        self._get("/api/stats/")
+        self._get("/api/credits/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.approve_validation(self.auditor)
+
+        stats = self._get("/api/stats/")
+        self.assertEqual(stats["X-Cache"], "MISS")
+        self.assertEqual(stats.json()["data"]["total_credits_registered"], 3)
+        credits = self._get("/api/credits/")
+        self.assertEqual(credits["X-Cache"], "MISS")
+        self.assertEqual(credits.json()["count"], 3)
+
+    def test_non_public_changes_keep_cache(self):
+        """Crédito pendente/rejeitado não aparece na API: nada é invalidado."""
+        self._get("/api/stats/")
+        self._get("/api/credits/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending = self._credit(
+                CarbonCredit.Status.AVAILABLE, CarbonCredit.ValidationStatus.PENDING
+            )
+            pending.reject_validation(self.auditor, "Documentação incompleta")
+
+        self.assertEqual(self._get("/api/stats/")["X-Cache"], "HIT")
+        self.assertEqual(self._get("/api/credits/")["X-Cache"], "HIT")
+
+    def test_purchase_invalidates_only_affected_statuses(self):
+        """Venda de um crédito LISTED não descarta as páginas de AVAILABLE."""
+        urls = {
+            status: f"/api/credits/?status={status}"
+            for status in ("AVAILABLE", "LISTED", "SOLD")
+        }
+        for url in urls.values():
+            self._get(url)
+        self._get("/api/stats/")
+
+        self.company.profile.add_balance(Decimal("1000.00"))
+        self.client.force_login(self.company)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("credits:credit_buy", kwargs={"pk": self.listed.id}))
+        self.client.logout()
+
+        self.assertEqual(self._get(urls["AVAILABLE"])["X-Cache"], "HIT")
+        self.assertEqual(self._get(urls["LISTED"]).json()["count"], 0)
+        self.assertEqual(self._get(urls["SOLD"]).json()["count"], 1)
+        stats = self._get("/api/stats/").json()["data"]
+        self.assertEqual(stats["total_transactions"], 1)
+        self.assertEqual(stats["credits_sold"], 1)
+
+    def test_hit_ratio_counters_and_command(self):
+        """Contadores de hit/miss por endpoint e comando de inspeção."""
+        for _ in range(3):
+            self._get("/api/stats/")
+
+        self.assertEqual(cache_stats()["stats"], {"hits": 2, "misses": 1, "hit_ratio": 0.6667})
+
+        out = StringIO()
+        call_command("api_cache_stats", "--reset", stdout=out)
+        self.assertIn("hits=2", out.getvalue())
+        self.assertEqual(cache_stats()["stats"]["hits"], 0)
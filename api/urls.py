@@ -14,9 +14,18 @@ urlpatterns = [
     # Lista de créditos
     path('credits/', views.credits_list, name='credits_list'),
     
+    # Exportação completa em streaming (NDJSON/CSV)
+    path('credits/export/', views.credits_export, name='credits_export'),
+    
     # Detalhe de crédito específico
     path('credits/<int:credit_id>/', views.credit_detail, name='credit_detail'),
     
     # Estatísticas públicas
     path('stats/', views.stats, name='stats'),
+
+    # Candles de preço (OHLC, VWAP e volume) por hora ou dia
+    path('market/candles/', views.market_candles, name='market_candles'),
+
+    # Prova de inclusão de um registro do histórico de propriedade
+    path('history/<int:record_id>/proof/', views.history_proof, name='history_proof'),
 ]
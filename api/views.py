@@ -5,32 +5,82 @@ Promove transparência permitindo consulta pública dos créditos registrados.
 
 from __future__ import annotations
 
+import base64
+import binascii
+import csv
+import hashlib
 import json
-from typing import Any
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Iterator
 
-from django.db.models import QuerySet
-from django.http import HttpRequest, JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_http_methods
 
 from credits.models import CarbonCredit
 
+from .cache import cached_api_response, credits_page_key, stats_key
+
+
+def _encode_cursor(credit: CarbonCredit) -> str:
+    """Cursor opaco com a posição (created_at, id) do último item da página."""
+    raw = f"{credit.created_at.isoformat()}|{credit.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decodifica um cursor gerado por `_encode_cursor` (ValueError se inválido)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, credit_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(credit_id)
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("cursor inválido") from exc
+
+
+def _credits_version(request: HttpRequest) -> str:
+    """
+    Versão barata do conjunto de créditos: maior `updated_at` (via índice).
+
+    Toda alteração pública de um crédito (criação, validação, listagem,
+    venda, soft delete) passa por `save()` e atualiza `updated_at`.
+    """
+    last = _credits_last_modified(request)
+    return f"{last.timestamp():.6f}" if last else "0"
+
+
+def _credits_list_etag(request: HttpRequest) -> str:
+    """ETag fraca da listagem: versão dos créditos + parâmetros da consulta."""
+    params = hashlib.sha1(request.GET.urlencode().encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'W/"credits-{_credits_version(request)}-{params}"'
+
 
 @require_http_methods(["GET"])
-def credits_list(request: HttpRequest) -> JsonResponse:
+@cached_api_response("credits", credits_page_key)
+@condition(etag_func=_credits_list_etag)
+def credits_list(request: HttpRequest) -> HttpResponse:
     """
     Lista todos os créditos de carbono registrados no sistema.
     
     Endpoint público que promove transparência.
-    Retorna apenas créditos aprovados e não deletados.
+    Retorna apenas créditos aprovados e não deletados, do mais recente ao
+    mais antigo.
     
     Query params:
         - status: filtrar por status (AVAILABLE, LISTED, SOLD)
         - validation_status: filtrar por status de validação (APPROVED, PENDING, etc)
         - limit: número máximo de resultados (padrão: 100, máx: 500)
-        - offset: pular N primeiros resultados (para paginação)
+        - cursor: valor de `next_cursor` da página anterior (paginação keyset)
+        - include_total: "true" para incluir `total` (exige COUNT completo)
+        - offset: pular N primeiros resultados (legado; prefira `cursor`)
+    
+    A paginação por cursor filtra por (created_at, id) em vez de pular linhas,
+    então a página 10.000 custa o mesmo que a primeira. A primeira página
+    (sem cursor/offset) é servida do cache `api` (ver api/cache.py).
     
     Exemplo:
         GET /api/credits/?status=LISTED&limit=10
+        GET /api/credits/?limit=10&cursor=<next_cursor>
     """
     # Filtrar apenas créditos aprovados e não deletados (transparência de dados confiáveis)
     queryset: QuerySet[CarbonCredit] = CarbonCredit.objects.filter(
@@ -47,20 +97,45 @@ def credits_list(request: HttpRequest) -> JsonResponse:
     if validation_status and validation_status in [choice[0] for choice in CarbonCredit.ValidationStatus.choices]:
         queryset = queryset.filter(validation_status=validation_status)
     
+    # Total apenas sob demanda (COUNT percorre todo o conjunto filtrado)
+    include_total = request.GET.get('include_total', '').lower() in ('1', 'true', 'yes')
+    total_count = queryset.count() if include_total else None
+    
     # Paginação
     try:
-        limit = min(int(request.GET.get('limit', 100)), 500)  # máximo 500
+        limit = int(request.GET.get('limit', 100))
         offset = int(request.GET.get('offset', 0))
     except ValueError:
         limit = 100
         offset = 0
+    limit = max(1, min(limit, 500))  # entre 1 e 500
+    offset = max(0, offset)
     
-    total_count = queryset.count()
-    queryset = queryset[offset:offset + limit]
+    queryset = queryset.order_by('-created_at', '-id')
+    
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = _decode_cursor(cursor)
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'Cursor inválido.',
+            }, status=400)
+        queryset = queryset.filter(
+            Q(created_at__lt=cursor_created_at)
+            | Q(created_at=cursor_created_at, id__lt=cursor_id)
+        )
+        offset = 0
+    
+    # Busca um item extra para saber se há próxima página sem COUNT
+    page = list(queryset[offset:offset + limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
     
     # Serializar dados (anonimizados para privacidade)
     credits_data = []
-    for credit in queryset:
+    for credit in page:
         credits_data.append({
             'id': credit.id,
             'amount': float(credit.amount),
@@ -82,12 +157,26 @@ def credits_list(request: HttpRequest) -> JsonResponse:
         'total': total_count,
         'limit': limit,
         'offset': offset,
-        'next_offset': offset + limit if offset + limit < total_count else None,
+        'next_offset': offset + limit if has_more and not cursor else None,
+        'next_cursor': _encode_cursor(page[-1]) if has_more and page else None,
         'data': credits_data,
     })
 
 
+def _credit_detail_etag(request: HttpRequest, credit_id: int) -> str | None:
+    """ETag fraca de um crédito público (None se não existir: segue para o 404)."""
+    updated_at = CarbonCredit.objects.filter(
+        id=credit_id,
+        validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        is_deleted=False,
+    ).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return f'W/"credit-{credit_id}-{updated_at.timestamp():.6f}"'
+
+
 @require_http_methods(["GET"])
+@condition(etag_func=_credit_detail_etag)
 def credit_detail(request: HttpRequest, credit_id: int) -> JsonResponse:
     """
     Retorna detalhes de um crédito específico.
@@ -139,39 +228,289 @@ def credit_detail(request: HttpRequest, credit_id: int) -> JsonResponse:
     })
 
 
+def _stats_etag(request: HttpRequest) -> str:
+    """
+    ETag fraca das estatísticas: `updated_at` da linha materializada.
+
+    A linha lida fica no request para a view não repetir a consulta.
+    """
+    from dashboard.models import PlatformStats
+
+    platform = PlatformStats.load()
+    request._platform_stats = platform  # type: ignore[attr-defined]
+    return f'W/"stats-{platform.updated_at.timestamp():.6f}"'
+
+
 @require_http_methods(["GET"])
-def stats(request: HttpRequest) -> JsonResponse:
+@cached_api_response("stats", stats_key)
+@condition(etag_func=_stats_etag)
+def stats(request: HttpRequest) -> HttpResponse:
     """
     Retorna estatísticas públicas do sistema.
     
-    Promove transparência mostrando números gerais.
+    Promove transparência mostrando números gerais. Servido do cache `api`
+    até que algum contador exposto mude.
     
     Exemplo:
         GET /api/stats/
     """
-    from django.db.models import Sum
-    from accounts.models import User
-    from transactions.models import Transaction
-    
-    approved_credits = CarbonCredit.objects.filter(
-        validation_status=CarbonCredit.ValidationStatus.APPROVED,
-        is_deleted=False
-    )
-    
-    total_co2 = approved_credits.aggregate(total=Sum('amount'))['total'] or 0
-    
+    from dashboard.models import PlatformStats
+
+    # Contadores materializados: uma única leitura por chave primária
+    # (já feita pelo cálculo do ETag)
+    platform = getattr(request, '_platform_stats', None) or PlatformStats.load()
+
     stats_data = {
-        'total_credits_registered': approved_credits.count(),
-        'total_co2_amount': float(total_co2),
-        'credits_available': approved_credits.filter(status=CarbonCredit.Status.AVAILABLE).count(),
-        'credits_listed': approved_credits.filter(status=CarbonCredit.Status.LISTED).count(),
-        'credits_sold': approved_credits.filter(status=CarbonCredit.Status.SOLD).count(),
-        'total_producers': User.objects.filter(role=User.Roles.PRODUCER).count(),
-        'total_companies': User.objects.filter(role=User.Roles.COMPANY).count(),
-        'total_transactions': Transaction.objects.filter(status=Transaction.Status.COMPLETED).count(),
+        'total_credits_registered': platform.credits_approved,
+        'total_co2_amount': float(platform.approved_co2),
+        'credits_available': platform.approved_available,
+        'credits_listed': platform.approved_listed,
+        'credits_sold': platform.approved_sold,
+        'total_producers': platform.producers,
+        'total_companies': platform.companies,
+        'total_transactions': platform.transactions_completed,
     }
     
     return JsonResponse({
         'success': True,
         'data': stats_data,
     })
+
+
+@require_http_methods(["GET"])
+def history_proof(request: HttpRequest, record_id: int) -> JsonResponse:
+    """
+    Prova de inclusão de um registro do histórico de propriedade.
+    
+    Retorna o hash do registro, o hash do registro anterior do mesmo crédito
+    e os hashes irmãos (O(log n)) que levam à raiz de Merkle do dia. Qualquer
+    pessoa pode recalcular a raiz a partir do `record_hash`: folha =
+    SHA-256(0x00 || hash), nó = SHA-256(0x01 || esquerda || direita).
+    
+    Disponível para créditos públicos, a partir do dia seguinte ao registro
+    (as raízes são gravadas uma vez por dia).
+    
+    Exemplo:
+        GET /api/history/42/proof/
+    """
+    from credits.integrity import inclusion_proof
+
+    proof = inclusion_proof(record_id)
+    if proof is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Registro não encontrado, não público ou ainda não incluído em uma raiz diária.',
+        }, status=404)
+
+    return JsonResponse({
+        'success': True,
+        'data': proof,
+    })
+
+
+def _parse_moment(value: str) -> datetime:
+    """Data ("2025-01-31") ou data/hora ISO 8601; sem fuso, UTC."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    return moment
+
+
+@require_http_methods(["GET"])
+def market_candles(request: HttpRequest) -> JsonResponse:
+    """
+    Candles de preço por tCO₂e: abertura, máxima, mínima, fechamento, VWAP e
+    volume das transações concluídas, por hora ou por dia (UTC).
+    
+    Lê apenas os candles pré-calculados (no máximo 500 linhas), nunca as
+    transações.
+    
+    Query params:
+        - interval: "day" (padrão) ou "hour"
+        - from: início (data ou data/hora ISO 8601, inclusive)
+        - to: fim (exclusive)
+        - limit: número máximo de candles (padrão e máximo: 500). Sem
+          `from`, devolve os mais recentes.
+    
+    Exemplo:
+        GET /api/market/candles/?interval=hour&from=2025-10-01
+    """
+    from transactions.candles import MAX_CANDLES, price_candles
+    from transactions.models import PriceCandle
+
+    interval = request.GET.get('interval', 'day').upper()
+    if interval not in PriceCandle.Interval.values:
+        return JsonResponse({
+            'success': False,
+            'error': 'Intervalo inválido (use "hour" ou "day").',
+        }, status=400)
+    try:
+        start = _parse_moment(request.GET['from']) if request.GET.get('from') else None
+        end = _parse_moment(request.GET['to']) if request.GET.get('to') else None
+        limit = int(request.GET.get('limit', MAX_CANDLES))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Parâmetros inválidos: from/to devem ser datas ISO 8601 e limit um inteiro.',
+        }, status=400)
+
+    candles = price_candles(interval, start, end, limit)
+    data = [
+        {
+            'time': candle.bucket_start.isoformat(),
+            'open': float(candle.open),
+            'high': float(candle.high),
+            'low': float(candle.low),
+            'close': float(candle.close),
+            'vwap': round(float(candle.vwap), 4),
+            'volume': float(candle.volume),
+            'trades': candle.trades,
+        }
+        for candle in candles
+    ]
+    return JsonResponse({
+        'success': True,
+        'interval': interval.lower(),
+        'count': len(data),
+        'data': data,
+    })
+
+
+# Linhas lidas do banco por ida ao cursor do servidor na exportação
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    'id',
+    'amount',
+    'unit',
+    'generation_date',
+    'status',
+    'validation_status',
+    'owner_type',
+    'is_validated',
+    'validated_at',
+    'created_at',
+]
+
+
+def _credits_last_modified(request: HttpRequest, *args: Any, **kwargs: Any) -> datetime | None:
+    """
+    Última alteração de qualquer crédito (inclui deletados, pois a remoção
+    também muda o registro público). Usa o índice de `updated_at`.
+    """
+    from django.db.models import Max
+
+    return CarbonCredit.objects_all.aggregate(last=Max('updated_at'))['last']
+
+
+def _export_state(request: HttpRequest) -> dict[str, Any]:
+    """Maior `updated_at` e número de créditos, uma consulta por requisição."""
+    from django.db.models import Count, Max
+
+    if not hasattr(request, '_credits_export_state'):
+        request._credits_export_state = CarbonCredit.objects_all.aggregate(
+            last=Max('updated_at'), count=Count('id')
+        )
+    return request._credits_export_state
+
+
+def _credits_export_etag(request: HttpRequest) -> str:
+    """
+    ETag fraca da exportação: maior `updated_at` (em microssegundos), número
+    de créditos e formato. Prefira-a a `Last-Modified`: com a resolução de
+    1 s do HTTP-date, uma alteração no mesmo segundo da coleta anterior
+    ainda responde 304 a If-Modified-Since.
+    """
+    state = _export_state(request)
+    version = f"{state['last'].timestamp():.6f}" if state['last'] else "0"
+    export_format = request.GET.get('format', 'ndjson').lower()
+    return f'W/"export-{version}-{state["count"]}-{export_format}"'
+
+
+def _credits_export_last_modified(request: HttpRequest) -> datetime | None:
+    """Maior `updated_at` em segundos inteiros (resolução do HTTP-date)."""
+    last = _export_state(request)['last']
+    return last.replace(microsecond=0) if last else None
+
+
+def _export_rows() -> Iterator[dict[str, Any]]:
+    """Créditos públicos como dicts, lidos em blocos via cursor do servidor."""
+    rows = CarbonCredit.objects.filter(
+        validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        is_deleted=False,
+    ).order_by('id').values(
+        'id', 'amount', 'unit', 'generation_date', 'status', 'validation_status',
+        'owner__role', 'validated_by_id', 'validated_at', 'created_at',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    for row in rows:
+        # Mesmos campos anonimizados de credits_list
+        yield {
+            'id': row['id'],
+            'amount': float(row['amount']),
+            'unit': row['unit'],
+            'generation_date': row['generation_date'].isoformat(),
+            'status': row['status'],
+            'validation_status': row['validation_status'],
+            'owner_type': row['owner__role'],
+            'is_validated': row['validated_by_id'] is not None,
+            'validated_at': row['validated_at'].isoformat() if row['validated_at'] else None,
+            'created_at': row['created_at'].isoformat(),
+        }
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devolve a linha em vez de armazená-la."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _ndjson_stream() -> Iterator[str]:
+    for row in _export_rows():
+        yield json.dumps(row) + '\n'
+
+
+def _csv_stream() -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in _export_rows():
+        yield writer.writerow([
+            '' if row[field] is None else row[field] for field in EXPORT_FIELDS
+        ])
+
+
+@require_http_methods(["GET"])
+@condition(etag_func=_credits_export_etag, last_modified_func=_credits_export_last_modified)
+def credits_export(request: HttpRequest) -> HttpResponse:
+    """
+    Exporta o registro público completo de créditos em streaming.
+    
+    Retorna todos os créditos aprovados e não deletados (mesmos campos
+    anonimizados de /api/credits/), linha a linha, com memória constante
+    independente do tamanho do registro.
+    
+    Query params:
+        - format: "ndjson" (padrão) ou "csv"
+    
+    Suporta If-None-Match (ETag) e If-Modified-Since: se nada mudou desde
+    a última coleta, responde 304 sem ler os créditos.
+    
+    Exemplo:
+        GET /api/credits/export/?format=csv
+    """
+    export_format = request.GET.get('format', 'ndjson').lower()
+    if export_format == 'csv':
+        response = StreamingHttpResponse(_csv_stream(), content_type='text/csv; charset=utf-8')
+        filename = 'credits.csv'
+    elif export_format == 'ndjson':
+        response = StreamingHttpResponse(_ndjson_stream(), content_type='application/x-ndjson')
+        filename = 'credits.ndjson'
+    else:
+        return JsonResponse({
+            'success': False,
+            'error': 'Formato inválido. Use "ndjson" ou "csv".',
+        }, status=400)
+    
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,10 @@
+"""
+Benchmarks de desempenho do EcoTrade.
+
+Scripts executados fora da suíte de testes, sempre contra um banco SQLite
+descartável (nunca o `db.sqlite3` de desenvolvimento):
+
+    python -m benchmarks.suite
+    python -m benchmarks.contention
+    python -m benchmarks.query_plans --rows 1000000
+"""
@@ -0,0 +1,34 @@
+"""Utilitários compartilhados pelos benchmarks."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database: Path) -> None:
+    """Inicializa o Django apontando para um banco SQLite descartável."""
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecotrade.settings")
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    # Nenhuma conexão foi aberta ainda: trocar o NAME é seguro
+    settings.DATABASES["default"]["NAME"] = str(database)
+    # Host usado pelo django.test.Client
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Percentil com interpolação linear (mesma definição do numpy)."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
@@ -0,0 +1,235 @@
+"""
+Benchmark de contenção da compra de créditos (`credits:credit_buy`).
+
+Várias empresas, cada uma em sua thread e com sua conexão, disputam as mesmas
+listagens via `django.test.Client`:
+
+- `hot`: a cada rodada todas as threads tentam comprar o mesmo crédito ao
+  mesmo tempo (uma deve vencer, as demais recebem "indisponível");
+- `spread`: cada thread compra créditos próprios, sem disputa de linha, mas
+  disputando o banco.
+
+Mede compras por segundo, erros (HTTP 500, ex.: "database is locked"),
+vendas duplicadas e o tempo bloqueado em escritas (soma da duração dos
+INSERT/UPDATE/DELETE/SELECT FOR UPDATE de cada requisição, onde a espera
+por lock aparece).
+
+Uso:
+    python -m benchmarks.contention
+    python -m benchmarks.contention --threads 16 --rounds 100 --output contention.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from .common import percentile, setup_django
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+class WriteTimer:
+    """Soma o tempo gasto em escritas (e SELECT FOR UPDATE) de uma requisição."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            statement = sql.lstrip().upper()
+            if statement.startswith(_WRITE_PREFIXES) or statement.endswith("FOR UPDATE"):
+                self.seconds += time.perf_counter() - started
+
+
+def prepare(threads: int, credits: int) -> tuple[Any, list[Any], list[int]]:
+    """Produtor, empresas com saldo e `credits` créditos aprovados e listados."""
+    from accounts.models import User
+    from credits.models import CarbonCredit, CreditListing
+
+    auditor = User.objects.create_user(username="bench_auditor", role=User.Roles.AUDITOR)
+    producer = User.objects.create_user(username="bench_producer", role=User.Roles.PRODUCER)
+    companies = []
+    for i in range(threads):
+        company = User.objects.create_user(username=f"bench_company_{i}", role=User.Roles.COMPANY)
+        company.profile.add_balance(Decimal("1000000.00"))
+        companies.append(company)
+
+    credit_ids = []
+    for _ in range(credits):
+        credit = CarbonCredit.objects.create(
+            owner=producer,
+            amount=Decimal("10.00"),
+            origin="Benchmark",
+            generation_date="2025-01-01",
+            status=CarbonCredit.Status.LISTED,
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+            validated_by=auditor,
+        )
+        CreditListing.objects.create(credit=credit, price_per_unit=Decimal("50.00"))
+        credit_ids.append(credit.id)
+    return producer, companies, credit_ids
+
+
+def run(companies: list[Any], plan: list[list[int]], synchronized: bool) -> dict[str, Any]:
+    """
+    Executa `plan[t]` (ids de créditos) na thread `t`.
+
+    Com `synchronized`, as threads esperam umas pelas outras antes de cada
+    tentativa, para colidirem no mesmo crédito.
+    """
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    barrier = threading.Barrier(len(companies))
+    results: list[tuple[str, float, float]] = []
+    lock = threading.Lock()
+
+    def worker(company, credit_ids: list[int]) -> None:
+        client = Client(raise_request_exception=False)
+        client.force_login(company)
+        local = []
+        try:
+            for credit_id in credit_ids:
+                if synchronized:
+                    barrier.wait()
+                timer = WriteTimer()
+                started = time.perf_counter()
+                with connection.execute_wrapper(timer):
+                    response = client.post(reverse("credits:credit_buy", kwargs={"pk": credit_id}))
+                elapsed = time.perf_counter() - started
+                if response.status_code >= 500:
+                    outcome = "error"
+                elif response.url == reverse("transactions:transaction_history"):
+                    outcome = "bought"
+                else:
+                    outcome = "rejected"
+                local.append((outcome, elapsed, timer.seconds))
+        finally:
+            connection.close()
+        with lock:
+            results.extend(local)
+
+    workers = [
+        threading.Thread(target=worker, args=(company, credit_ids))
+        for company, credit_ids in zip(companies, plan)
+    ]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    outcomes = [outcome for outcome, _, _ in results]
+    latencies = sorted(elapsed * 1000 for _, elapsed, _ in results)
+    waits = sorted(wait * 1000 for _, _, wait in results)
+    bought = outcomes.count("bought")
+    return {
+        "attempts": len(results),
+        "bought": bought,
+        "rejected": outcomes.count("rejected"),
+        "errors": outcomes.count("error"),
+        "wall_seconds": round(wall, 3),
+        "purchases_per_second": round(bought / wall, 2),
+        "latency_ms": _summary(latencies),
+        "lock_wait_ms": _summary(waits),
+    }
+
+
+def _summary(sorted_values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(sorted_values, 50), 3),
+        "p95": round(percentile(sorted_values, 95), 3),
+        "max": round(sorted_values[-1], 3),
+        "mean": round(statistics.fmean(sorted_values), 3),
+    }
+
+
+def check_integrity(credit_ids: list[int], initial_total: Decimal) -> dict[str, Any]:
+    """Vendas duplicadas, conservação do saldo total, ledger e histórico consistentes."""
+    from django.db.models import Count, Sum
+
+    from accounts.ledger import verify_users
+    from accounts.models import Profile
+    from credits.integrity import verify_history
+    from transactions.models import Transaction
+
+    double_sales = (
+        Transaction.objects.filter(credit_id__in=credit_ids, status=Transaction.Status.COMPLETED)
+        .values("credit_id").annotate(n=Count("id")).filter(n__gt=1).count()
+    )
+    total = Profile.objects.aggregate(total=Sum("balance"))["total"]
+    ledger_problems = verify_users(Profile.objects.values_list("user_id", flat=True))
+    return {
+        "double_sales": double_sales,
+        "balance_conserved": total == initial_total,
+        "ledger_problems": len(ledger_problems),
+        "history_problems": len(verify_history()[2]),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8, help="Empresas concorrentes")
+    parser.add_argument("--rounds", type=int, default=50, help="Créditos disputados no cenário hot")
+    parser.add_argument("--per-thread", type=int, default=25, help="Compras por thread no cenário spread")
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / "contention.sqlite3")
+
+        from django.core.management import call_command
+        from django.db import connection
+        from django.db.models import Sum
+
+        from accounts.models import Profile
+
+        call_command("migrate", verbosity=0)
+        total = args.rounds + args.threads * args.per_thread
+        _, companies, credit_ids = prepare(args.threads, total)
+        initial_total = Profile.objects.aggregate(total=Sum("balance"))["total"]
+        connection.close()
+
+        hot_ids = credit_ids[:args.rounds]
+        spread_ids = credit_ids[args.rounds:]
+        report = {
+            "meta": {"threads": args.threads, "rounds": args.rounds, "per_thread": args.per_thread},
+            "hot": run(companies, [hot_ids] * args.threads, synchronized=True),
+            "spread": run(
+                companies,
+                [spread_ids[t::args.threads] for t in range(args.threads)],
+                synchronized=False,
+            ),
+        }
+        report["integrity"] = check_integrity(credit_ids, initial_total)
+
+    for name in ("hot", "spread"):
+        result = report[name]
+        print(
+            f"{name:<7} compras/s={result['purchases_per_second']:>8.2f} "
+            f"compradas={result['bought']:>4} rejeitadas={result['rejected']:>4} "
+            f"erros={result['errors']:>4} p95={result['latency_ms']['p95']:>8.2f}ms "
+            f"lock p95={result['lock_wait_ms']['p95']:>8.2f}ms max={result['lock_wait_ms']['max']:>8.2f}ms"
+        )
+    print(f"integridade: {report['integrity']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nResultado salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Benchmark do motor de casamento de ordens (`transactions.matching`).
+
+- `book`: só o livro em memória (um núcleo, sem banco). Ordens de compra e
+  listagens aleatórias em torno do mesmo preço entram no livro e são casadas
+  em lotes de `--batch`; mede ordens/s e execuções/s;
+- `engine`: o motor inteiro num SQLite temporário. Ordens abertas e créditos
+  listados são gravados antes, e o motor liquida lote a lote até não haver
+  mais o que casar; mede execuções/s, consultas por lote e se saldos,
+  histórico e `PlatformStats` continuam batendo.
+
+Uso:
+    python -m benchmarks.matching
+    python -m benchmarks.matching --orders 200000 --fills 5000 --output matching.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from .common import percentile, setup_django
+
+
+def run_book(orders: int, batch: int, rng: random.Random) -> dict[str, Any]:
+    """Metade compras, metade vendas, casadas a cada `batch` ordens."""
+    from transactions.matching import BookAsk, BookBid, OrderBook
+
+    start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    generated = []
+    for i in range(orders):
+        at = start + timedelta(milliseconds=i)
+        price = Decimal(rng.randint(3500, 4500)) / 100
+        if i % 2:
+            generated.append(BookBid(i, rng.randint(1, 500), price, Decimal(rng.randint(1, 50) * 10), at))
+        else:
+            generated.append(BookAsk(i, i, rng.randint(1000, 1500), Decimal(rng.randint(1, 20) * 10), price, at))
+
+    book = OrderBook()
+    fills = 0
+    started = time.perf_counter()
+    for i, order in enumerate(generated, start=1):
+        if isinstance(order, BookBid):
+            book.add_bid(order)
+        else:
+            book.add_ask(order)
+        if i % batch == 0:
+            fills += len(book.match(limit=batch))
+    fills += len(book.match(limit=orders))
+    elapsed = time.perf_counter() - started
+    return {
+        "orders": orders,
+        "fills": fills,
+        "seconds": round(elapsed, 3),
+        "orders_per_second": round(orders / elapsed, 1),
+        "fills_per_second": round(fills / elapsed, 1),
+        "resting": len(book),
+    }
+
+
+def prepare_engine(fills: int, rng: random.Random) -> None:
+    """`fills` créditos listados de vários produtores e ordens que cruzam com todos."""
+    from accounts.models import User
+    from credits.models import CarbonCredit, CreditListing
+    from dashboard.models import PlatformStats
+    from transactions.models import Bid
+
+    producers = [User.objects.create_user(username=f"bench_producer{i}", role=User.Roles.PRODUCER) for i in range(20)]
+    companies = [User.objects.create_user(username=f"bench_company{i}", role=User.Roles.COMPANY) for i in range(20)]
+    for company in companies:
+        company.profile.add_balance(Decimal("100000000.00"))
+
+    for i in range(fills):
+        credit = CarbonCredit.objects.create(
+            owner=producers[i % len(producers)],
+            amount=10,
+            origin="Benchmark",
+            generation_date="2025-01-01",
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        CreditListing.objects.create(credit=credit, price_per_unit=Decimal(rng.randint(3500, 4500)) / 100)
+        credit.status = CarbonCredit.Status.LISTED
+        credit.save()
+
+    per_company = fills // len(companies) + 1
+    Bid.objects.bulk_create([
+        Bid(buyer=company, quantity=Decimal(per_company * 10), limit_price=Decimal("50.00"))
+        for company in companies
+    ])
+    PlatformStats.rebuild()
+
+
+def run_engine(batch: int) -> dict[str, Any]:
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    from transactions.matching import MatchingEngine
+
+    engine = MatchingEngine(batch_size=batch)
+    engine.load()
+    latencies = []
+    queries = []
+    settled = 0
+    started = time.perf_counter()
+    while True:
+        # O log de consultas é limitado; sem zerar, a contagem satura depois do preparo
+        reset_queries()
+        batch_started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            txns = engine.run_batch()
+        if not txns:
+            break
+        latencies.append((time.perf_counter() - batch_started) * 1000)
+        queries.append(len(ctx.captured_queries))
+        settled += len(txns)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "fills": settled,
+        "batches": len(latencies),
+        "seconds": round(elapsed, 3),
+        "fills_per_second": round(settled / elapsed, 1) if elapsed else 0.0,
+        "queries_per_batch": max(queries, default=0),
+        "batch_latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+        },
+    }
+
+
+def check_integrity() -> dict[str, Any]:
+    from accounts.ledger import verify_users
+    from accounts.models import User
+    from credits.integrity import verify_history
+    from dashboard.models import PlatformStats
+    from dashboard.stats import compute_platform_stats
+
+    stats = PlatformStats.load()
+    drift = [name for name, value in compute_platform_stats().items() if getattr(stats, name) != value]
+    return {
+        "ledger_problems": len(verify_users(User.objects.values_list("pk", flat=True))),
+        "history_problems": len(verify_history()[2]),
+        "stats_drift": drift,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000, help="Ordens no benchmark do livro")
+    parser.add_argument("--fills", type=int, default=2000, help="Créditos listados no benchmark do motor")
+    parser.add_argument("--batch", type=int, default=500, help="Execuções por lote")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / "matching.sqlite3")
+
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+        report = {
+            "meta": {"orders": args.orders, "fills": args.fills, "batch": args.batch},
+            "book": run_book(args.orders, args.batch, rng),
+        }
+        prepare_engine(args.fills, rng)
+        report["engine"] = run_engine(args.batch)
+        report["integrity"] = check_integrity()
+
+    book, engine = report["book"], report["engine"]
+    print(
+        f"livro:  ordens/s={book['orders_per_second']:>10.1f} execuções/s={book['fills_per_second']:>10.1f} "
+        f"execuções={book['fills']}"
+    )
+    print(
+        f"motor:  execuções/s={engine['fills_per_second']:>8.1f} lotes={engine['batches']} "
+        f"consultas/lote={engine['queries_per_batch']} p95 lote={engine['batch_latency_ms']['p95']:.2f}ms"
+    )
+    print(f"integridade: {report['integrity']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nResultado salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Planos de consulta das queries quentes antes e depois dos índices compostos.
+
+Cria um banco SQLite descartável com o schema atual sem os índices criados
+por `credits.0007`/`transactions.0003`, popula N créditos/transações com
+`bulk_create`, registra `EXPLAIN QUERY PLAN` e a latência de cada consulta,
+recria esses índices e mede novamente.
+
+Uso:
+    python -m benchmarks.query_plans --rows 1000000
+    python -m benchmarks.query_plans --rows 200000 --output plans.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+from .common import setup_django
+
+# Migrations que criaram os índices das consultas quentes. Os índices são
+# removidos do schema atual (em vez de voltar as migrations), para os models
+# atuais continuarem batendo com as tabelas
+INDEX_MIGRATIONS = (
+    ("credits", "0007_hot_query_indexes"),
+    ("transactions", "0003_hot_query_indexes"),
+)
+
+BATCH_SIZE = 5000
+
+
+def _chunks(total: int, size: int = BATCH_SIZE):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def populate(rows: int, transactions: int, users: int, rng: random.Random) -> dict[str, int]:
+    """Popula usuários, créditos, listagens e transações (sem signals)."""
+    from django.db import transaction
+
+    from accounts.models import User
+    from credits.models import CarbonCredit, CreditListing
+    from transactions.models import Transaction
+
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench_{role.lower()}_{i}",
+                    password="!",
+                    role=role,
+                )
+                for role in (User.Roles.PRODUCER, User.Roles.COMPANY)
+                for i in range(users)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    producers = list(User.objects.filter(role=User.Roles.PRODUCER).values_list("id", flat=True))
+    companies = list(User.objects.filter(role=User.Roles.COMPANY).values_list("id", flat=True))
+
+    validation = CarbonCredit.ValidationStatus
+    status = CarbonCredit.Status
+    base_date = date(2024, 1, 1)
+
+    for _, count in _chunks(rows):
+        with transaction.atomic():
+            CarbonCredit.objects.bulk_create(
+                [
+                    CarbonCredit(
+                        owner_id=rng.choice(producers),
+                        amount=Decimal(rng.randint(1000, 100000)) / 100,
+                        origin="Benchmark",
+                        generation_date=base_date + timedelta(days=rng.randint(0, 600)),
+                        status=rng.choices(
+                            [status.AVAILABLE, status.LISTED, status.SOLD], weights=[60, 30, 10]
+                        )[0],
+                        validation_status=rng.choices(
+                            [validation.PENDING, validation.UNDER_REVIEW,
+                             validation.APPROVED, validation.REJECTED],
+                            weights=[10, 2, 80, 8],
+                        )[0],
+                        is_deleted=rng.random() < 0.01,
+                    )
+                    for _ in range(count)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+    # Uma listagem por crédito LISTED (~70% ainda ativas)
+    listed = list(
+        CarbonCredit.objects_all.filter(status=status.LISTED)
+        .values_list("id", *CreditListing.CREDIT_FIELDS)
+    )
+    for start, count in _chunks(len(listed)):
+        with transaction.atomic():
+            CreditListing.objects.bulk_create(
+                [
+                    CreditListing(
+                        credit_id=credit_id,
+                        **dict(zip(CreditListing.CREDIT_FIELDS, credit_fields)),
+                        price_per_unit=Decimal(rng.randint(2000, 20000)) / 100,
+                        is_active=rng.random() < 0.7,
+                    )
+                    for credit_id, *credit_fields in listed[start:start + count]
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+    credit_ids = range(1, rows + 1)
+    for _, count in _chunks(transactions):
+        with transaction.atomic():
+            Transaction.objects.bulk_create(
+                [
+                    Transaction(
+                        buyer_id=rng.choice(companies),
+                        seller_id=rng.choice(producers),
+                        credit_id=rng.choice(credit_ids),
+                        amount=Decimal("10.00"),
+                        total_price=Decimal("500.00"),
+                        status=rng.choices(
+                            [Transaction.Status.COMPLETED, Transaction.Status.PENDING,
+                             Transaction.Status.CANCELLED],
+                            weights=[90, 5, 5],
+                        )[0],
+                    )
+                    for _ in range(count)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+    return {
+        "users": len(producers) + len(companies),
+        "credits": rows,
+        "listings": len(listed),
+        "transactions": transactions,
+    }
+
+
+def hot_queries(producer_id: int, company_id: int) -> dict[str, Callable[[], Any]]:
+    """Consultas das telas quentes, como as views as executam."""
+    from django.db.models import Sum
+
+    from credits.models import CarbonCredit
+    from credits.search import search_listings
+    from transactions.models import Transaction
+
+    validation = CarbonCredit.ValidationStatus
+    return {
+        "marketplace_page": lambda: list(search_listings({})[:10]),
+        "api_credits_by_status": lambda: list(
+            CarbonCredit.objects.filter(
+                validation_status=validation.APPROVED, status=CarbonCredit.Status.LISTED
+            ).order_by("-created_at", "-id")[:100]
+        ),
+        "auditor_pending_page": lambda: list(
+            CarbonCredit.objects.filter(validation_status=validation.PENDING)
+            .order_by("-created_at")[:12]
+        ),
+        "auditor_pending_count": lambda: CarbonCredit.objects.filter(
+            validation_status=validation.PENDING
+        ).count(),
+        "wallet_available_sum": lambda: CarbonCredit.objects.filter(
+            owner_id=producer_id, status=CarbonCredit.Status.AVAILABLE
+        ).aggregate(total=Sum("amount")),
+        "public_transactions": lambda: list(
+            Transaction.objects.filter(status=Transaction.Status.COMPLETED)
+            .order_by("-timestamp")[:10]
+        ),
+        "buyer_recent_transactions": lambda: list(
+            Transaction.objects.filter(buyer_id=company_id).order_by("-timestamp")[:5]
+        ),
+        "seller_completed_sum": lambda: Transaction.objects.filter(
+            seller_id=producer_id, status=Transaction.Status.COMPLETED
+        ).aggregate(total=Sum("total_price")),
+    }
+
+
+def hot_indexes() -> list[tuple[Any, Any]]:
+    """(model, índice) de cada AddIndex de INDEX_MIGRATIONS."""
+    from django.apps import apps
+    from django.db.migrations.loader import MigrationLoader
+    from django.db.migrations.operations import AddIndex
+
+    loader = MigrationLoader(None)
+    found = []
+    for app_label, name in INDEX_MIGRATIONS:
+        for operation in loader.get_migration(app_label, name).operations:
+            if isinstance(operation, AddIndex):
+                found.append((apps.get_model(app_label, operation.model_name), operation.index))
+    return found
+
+
+def measure(queries: dict[str, Callable[[], Any]], repeat: int) -> dict[str, Any]:
+    """Plano (EXPLAIN QUERY PLAN do SQL realmente executado) e latência."""
+    from django.db import connection
+
+    results = {}
+    for name, run in queries.items():
+        executed: list[tuple[str, Any]] = []
+
+        def capture(execute, sql, params, many, context):
+            executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            run()
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, params in executed:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plans.append([row[-1] for row in cursor.fetchall()])
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results[name] = {
+            "plan": plans[0] if len(plans) == 1 else plans,
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+        }
+    return results
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    from django.core.management import call_command
+    from django.db import connection
+
+    from accounts.models import User
+
+    call_command("migrate", verbosity=0)
+    indexes = hot_indexes()
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    dataset = populate(args.rows, args.transactions, args.users, rng)
+    populate_s = time.perf_counter() - started
+    print(f"Banco populado em {populate_s:.1f}s: {dataset}")
+
+    producer_id = User.objects.filter(role=User.Roles.PRODUCER).values_list("id", flat=True).first()
+    company_id = User.objects.filter(role=User.Roles.COMPANY).values_list("id", flat=True).first()
+    queries = hot_queries(producer_id, company_id)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    before = measure(queries, args.repeat)
+
+    started = time.perf_counter()
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+    index_build_s = time.perf_counter() - started
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    after = measure(queries, args.repeat)
+
+    return {
+        "dataset": dataset,
+        "seed": args.seed,
+        "populate_seconds": round(populate_s, 1),
+        "index_build_seconds": round(index_build_s, 1),
+        "queries": {
+            name: {"before": before[name], "after": after[name]} for name in queries
+        },
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"\nÍndices criados em {report['index_build_seconds']}s\n")
+    print(f"{'consulta':<28} {'antes (ms)':>12} {'depois (ms)':>12}")
+    for name, result in report["queries"].items():
+        print(
+            f"{name:<28} {result['before']['median_ms']:>12.3f} "
+            f"{result['after']['median_ms']:>12.3f}"
+        )
+        for label in ("before", "after"):
+            print(f"    {label:<7} {result[label]['plan']}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Créditos a criar")
+    parser.add_argument(
+        "--transactions", type=int, default=None, help="Transações a criar (padrão: --rows)"
+    )
+    parser.add_argument("--users", type=int, default=2000, help="Usuários por papel")
+    parser.add_argument("--repeat", type=int, default=20, help="Execuções por consulta")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo JSON de saída")
+    parser.add_argument(
+        "--database", type=Path, default=None,
+        help="Arquivo SQLite a usar (padrão: temporário, removido ao final)",
+    )
+    args = parser.parse_args(argv)
+    if args.transactions is None:
+        args.transactions = args.rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or Path(tmp) / "bench.sqlite3"
+        if database.exists():
+            parser.error(f"{database} já existe; use um arquivo novo")
+        setup_django(database)
+        report = run(args)
+
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\nResultado salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark da fila de revisão dos auditores (`credits.services`).
+
+Vários auditores, cada um em sua thread e com sua conexão, esvaziam a mesma
+fila: pegam os próximos `--batch` créditos livres (`claim_next_credits`) e
+aprovam o lote reservado (`bulk_review`), até a fila acabar.
+
+Mede créditos revisados por segundo, reservas duplicadas (um crédito
+entregue a dois auditores; deve ser 0), erros (ex.: "database is locked") e
+se os contadores de `PlatformStats` continuam batendo com o recálculo.
+
+Uso:
+    python -m benchmarks.review_queue
+    python -m benchmarks.review_queue --auditors 16 --credits 5000 --output review_queue.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from .common import percentile, setup_django
+
+
+def prepare(auditors: int, credits: int) -> list[Any]:
+    """Auditores e `credits` créditos pendentes."""
+    from accounts.models import User
+    from credits.models import CarbonCredit
+    from dashboard.models import PlatformStats
+
+    producer = User.objects.create_user(username="bench_producer", role=User.Roles.PRODUCER)
+    CarbonCredit.objects.bulk_create(
+        [
+            CarbonCredit(owner=producer, amount=10, origin="Benchmark", generation_date="2025-01-01")
+            for _ in range(credits)
+        ],
+        batch_size=1000,
+    )
+    PlatformStats.rebuild()
+    return [
+        User.objects.create_user(username=f"bench_auditor_{i}", role=User.Roles.AUDITOR)
+        for i in range(auditors)
+    ]
+
+
+def run(auditors: list[Any], batch: int) -> dict[str, Any]:
+    """Cada auditor reserva e aprova lotes de `batch` até a fila esvaziar."""
+    from django.db import connection
+
+    from credits.models import CarbonCredit
+    from credits.services import BulkAction, bulk_review, claim_next_credits
+
+    claims: list[int] = []
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def worker(auditor) -> None:
+        local_claims: list[int] = []
+        local_latencies: list[float] = []
+        local_errors: list[str] = []
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    ids = claim_next_credits(auditor, batch)
+                    if not ids:
+                        break
+                    bulk_review(
+                        auditor,
+                        BulkAction.APPROVE,
+                        CarbonCredit.objects.filter(pk__in=ids),
+                        "Benchmark",
+                    )
+                except Exception as exc:  # noqa: BLE001 - contabilizado no relatório
+                    local_errors.append(f"{type(exc).__name__}: {exc}")
+                    continue
+                local_latencies.append(time.perf_counter() - started)
+                local_claims.extend(ids)
+        finally:
+            connection.close()
+        with lock:
+            claims.extend(local_claims)
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    workers = [threading.Thread(target=worker, args=(auditor,)) for auditor in auditors]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies_ms = sorted(seconds * 1000 for seconds in latencies)
+    return {
+        "reviewed": len(claims),
+        "duplicate_claims": sum(1 for n in Counter(claims).values() if n > 1),
+        "errors": dict(Counter(errors)),
+        "wall_seconds": round(wall, 3),
+        "credits_per_second": round(len(claims) / wall, 2),
+        "batch_latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 3) if latencies_ms else 0,
+            "p95": round(percentile(latencies_ms, 95), 3) if latencies_ms else 0,
+        },
+    }
+
+
+def check_integrity() -> dict[str, Any]:
+    """Fila vazia e contadores consistentes com o recálculo."""
+    from credits.models import CarbonCredit
+    from dashboard.models import PlatformStats
+    from dashboard.stats import compute_platform_stats
+
+    stats = PlatformStats.objects.get()
+    mismatched = [name for name, value in compute_platform_stats().items() if getattr(stats, name) != value]
+    return {
+        "left_in_queue": CarbonCredit.objects.exclude(
+            validation_status=CarbonCredit.ValidationStatus.APPROVED
+        ).count(),
+        "stats_mismatched": mismatched,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--auditors", type=int, default=8, help="Auditores concorrentes")
+    parser.add_argument("--credits", type=int, default=2000, help="Créditos pendentes na fila")
+    parser.add_argument("--batch", type=int, default=25, help="Créditos por reserva")
+    parser.add_argument("--output", type=Path, default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / "review_queue.sqlite3")
+
+        from django.core.management import call_command
+        from django.db import connection
+
+        call_command("migrate", verbosity=0)
+        auditors = prepare(args.auditors, args.credits)
+        connection.close()
+
+        report = {
+            "meta": {"auditors": args.auditors, "credits": args.credits, "batch": args.batch},
+            "queue": run(auditors, args.batch),
+        }
+        report["integrity"] = check_integrity()
+
+    result = report["queue"]
+    print(
+        f"revisados={result['reviewed']:>6} créditos/s={result['credits_per_second']:>9.2f} "
+        f"duplicados={result['duplicate_claims']} erros={sum(result['errors'].values())} "
+        f"p95 lote={result['batch_latency_ms']['p95']:.2f}ms"
+    )
+    print(f"integridade: {report['integrity']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nResultado salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Suíte de benchmarks dos caminhos quentes (públicos e autenticados).
+
+Popula um banco SQLite descartável com os comandos `seed_users`,
+`seed_credits`, `seed_listings` e `seed_transactions`, e mede, por cenário,
+percentis de latência e número de consultas SQL por requisição. O resultado
+vai para um JSON que pode ser comparado entre commits.
+
+Uso:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --credits 20000 --output after.json
+    python -m benchmarks.suite --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+from .common import ROOT, percentile, setup_django
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# Variação acima da qual a comparação marca regressão
+REGRESSION_THRESHOLD = 0.20
+
+BENCH_PASSWORD = "bench-pass-123"
+
+
+@dataclass
+class Scenario:
+    """Uma requisição medida repetidamente."""
+
+    name: str
+    # Recebe o número da iteração e retorna a resposta
+    request: Callable[[int], Any]
+    # Executado antes de cada iteração, fora da medição
+    before_each: Callable[[], None] | None = None
+
+
+class QueryCounter:
+    """Conta consultas via `execute_wrapper` (sem o limite de `queries_log`)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def seed(args: argparse.Namespace) -> dict[str, int]:
+    """Popula o banco reaproveitando os comandos seed_*."""
+    from django.core.management import call_command
+
+    for command, count in (
+        ("seed_users", args.users),
+        ("seed_credits", args.credits),
+        ("seed_listings", args.listings),
+        ("seed_transactions", args.transactions),
+    ):
+        # Logins da suíte usam force_login: o custo do hash não interessa
+        extra = {"fast_hasher": True} if command == "seed_users" else {}
+        started = time.perf_counter()
+        call_command(
+            command, count=count, bulk=args.bulk, seed=args.seed,
+            verbosity=0, stdout=io.StringIO(), **extra,
+        )
+        print(f"{command} --count {count}: {time.perf_counter() - started:.1f}s")
+
+    return _dataset_counts()
+
+
+def _dataset_counts() -> dict[str, int]:
+    from accounts.models import User
+    from credits.models import CarbonCredit, CreditListing
+    from transactions.models import Transaction
+
+    return {
+        "users": User.objects.count(),
+        "credits": CarbonCredit.objects_all.count(),
+        "listings": CreditListing.objects.count(),
+        "transactions": Transaction.objects.count(),
+    }
+
+
+def prepare(args: argparse.Namespace, rng: random.Random) -> dict[str, Any]:
+    """
+    Completa o que os seeds não criam: auditor, validações e créditos à venda.
+
+    `seed_credits` cria tudo como PENDING; aprova ~80% para que a API e o
+    marketplace tenham dados públicos.
+    """
+    from django.core.cache import caches
+    from django.utils import timezone as dj_timezone
+
+    from accounts.models import User
+    from credits.models import CarbonCredit, CreditListing
+    from dashboard.models import PlatformStats
+
+    auditor = User.objects.create_user(
+        username="bench_auditor", password=BENCH_PASSWORD, role=User.Roles.AUDITOR
+    )
+    company = User.objects.create_user(
+        username="bench_company", password=BENCH_PASSWORD, role=User.Roles.COMPANY
+    )
+    company.profile.add_balance(Decimal("1000000000.00"))
+    producer = User.objects.filter(role=User.Roles.PRODUCER).order_by("id").first()
+
+    credit_ids = list(CarbonCredit.objects.order_by("id").values_list("id", flat=True))
+    approved = rng.sample(credit_ids, int(len(credit_ids) * 0.8))
+    now = dj_timezone.now()
+    for start in range(0, len(approved), 500):
+        CarbonCredit.objects.filter(id__in=approved[start:start + 500]).update(
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+            validated_by=auditor,
+            validated_at=now,
+            is_verified=True,
+            updated_at=now,
+        )
+
+    # Créditos dedicados ao cenário buy_credit (um por iteração)
+    for_sale = []
+    for _ in range(args.warmup + args.iterations):
+        credit = CarbonCredit.objects.create(
+            owner=producer,
+            amount=Decimal("10.00"),
+            origin="Benchmark",
+            generation_date="2025-01-01",
+            status=CarbonCredit.Status.LISTED,
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+            validated_by=auditor,
+        )
+        CreditListing.objects.create(credit=credit, price_per_unit=Decimal("50.00"))
+        for_sale.append(credit.id)
+
+    # .update() não passa pelos signals: recalcula os contadores
+    PlatformStats.rebuild()
+    caches["api"].clear()
+
+    return {
+        "auditor": auditor,
+        "company": company,
+        "producer": producer,
+        "for_sale": for_sale,
+        "sample_credit": approved[0],
+    }
+
+
+def build_scenarios(ctx: dict[str, Any]) -> list[Scenario]:
+    from django.core.cache import caches
+    from django.test import Client
+    from django.urls import reverse
+
+    from transactions.models import Transaction
+
+    anonymous = Client()
+    clients = {}
+    for role in ("company", "producer", "auditor"):
+        clients[role] = Client()
+        clients[role].force_login(ctx[role])
+
+    credit_id = ctx["sample_credit"]
+    for_sale = ctx["for_sale"]
+    completed = list(
+        Transaction.objects.filter(status=Transaction.Status.COMPLETED)
+        .order_by("-id").values_list("id", flat=True)[:6]
+    )
+    # Retoma com um cursor anterior a eventos conhecidos (replay do banco)
+    resume_from = completed[-1] if len(completed) > 1 else 0
+
+    def clear_api_cache() -> None:
+        caches["api"].clear()
+
+    def get(client, url):
+        return lambda i: client.get(url)
+
+    def buy(i: int):
+        return clients["company"].post(reverse("credits:credit_buy", kwargs={"pk": for_sale[i]}))
+
+    def sse_first_event(i: int):
+        response = anonymous.get(
+            reverse("transactions:public_transactions_sse"),
+            HTTP_LAST_EVENT_ID=str(resume_from),
+        )
+        try:
+            for chunk in response.streaming_content:
+                if chunk.startswith(b"id: "):
+                    break
+        finally:
+            response.close()
+        return response
+
+    marketplace = reverse("credits:credits_marketplace")
+    api_credits = reverse("api:credits_list") + "?limit=100"
+    api_stats = reverse("api:stats")
+    api_detail = reverse("api:credit_detail", kwargs={"credit_id": credit_id})
+    api_candles = reverse("api:market_candles")
+
+    return [
+        Scenario("marketplace", get(anonymous, marketplace)),
+        Scenario("marketplace_page_2", get(anonymous, marketplace + "?page=2")),
+        Scenario("marketplace_search", get(anonymous, marketplace + "?q=amazonia&sort=price")),
+        Scenario(
+            "marketplace_filtered",
+            get(anonymous, marketplace + "?min_price=60&max_price=90&min_amount=100&sort=-amount"),
+        ),
+        Scenario("dashboard_index_company", get(clients["company"], reverse("dashboard:index"))),
+        Scenario("dashboard_index_producer", get(clients["producer"], reverse("dashboard:index"))),
+        Scenario("auditor_dashboard", get(clients["auditor"], reverse("credits:auditor_dashboard"))),
+        Scenario(
+            "credit_history",
+            get(anonymous, reverse("credits:credit_history", kwargs={"pk": credit_id})),
+        ),
+        Scenario(
+            "transaction_history",
+            get(clients["company"], reverse("transactions:transaction_history")),
+        ),
+        Scenario("buy_credit", buy),
+        Scenario("api_stats", get(anonymous, api_stats)),
+        Scenario("api_stats_cold", get(anonymous, api_stats), before_each=clear_api_cache),
+        Scenario("api_credits", get(anonymous, api_credits)),
+        Scenario("api_credits_cold", get(anonymous, api_credits), before_each=clear_api_cache),
+        Scenario("api_credit_detail", get(anonymous, api_detail)),
+        Scenario("api_candles_day", get(anonymous, api_candles)),
+        Scenario("api_candles_hour", get(anonymous, api_candles + "?interval=hour")),
+        Scenario("sse_first_event", sse_first_event),
+    ]
+
+
+def run_scenario(scenario: Scenario, iterations: int, warmup: int) -> dict[str, Any]:
+    from django.db import connection
+
+    latencies: list[float] = []
+    queries: list[int] = []
+    statuses: set[int] = set()
+
+    for i in range(warmup + iterations):
+        if scenario.before_each:
+            scenario.before_each()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = scenario.request(i)
+            elapsed = (time.perf_counter() - started) * 1000
+        if i < warmup:
+            continue
+        latencies.append(elapsed)
+        queries.append(counter.count)
+        statuses.add(response.status_code)
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "status_codes": sorted(statuses),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3),
+            "mean": round(statistics.fmean(latencies), 3),
+        },
+        "queries": {
+            "median": statistics.median(queries),
+            "max": max(queries),
+        },
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """Imprime p50/p95/consultas lado a lado; retorna cenários que regrediram."""
+    regressions = []
+    print(f"\n{'cenário':<26} {'p50 antes':>10} {'p50 agora':>10} {'p95 antes':>10} "
+          f"{'p95 agora':>10} {'queries':>12}")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        p50_old, p50_new = before["latency_ms"]["p50"], result["latency_ms"]["p50"]
+        p95_old, p95_new = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        q_old, q_new = before["queries"]["median"], result["queries"]["median"]
+        regressed = q_new > q_old or p50_new > p50_old * (1 + REGRESSION_THRESHOLD)
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<26} {p50_old:>10.2f} {p50_new:>10.2f} {p95_old:>10.2f} "
+            f"{p95_new:>10.2f} {f'{q_old:g} → {q_new:g}':>12}{'  ⚠' if regressed else ''}"
+        )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--credits", type=int, default=2000)
+    parser.add_argument("--listings", type=int, default=600)
+    parser.add_argument("--transactions", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=50, help="Medições por cenário")
+    parser.add_argument("--warmup", type=int, default=5, help="Execuções descartadas por cenário")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos geradores aleatórios")
+    parser.add_argument(
+        "--bulk", action="store_true", help="Popula com o modo --bulk dos comandos seed_*"
+    )
+    parser.add_argument(
+        "--only", nargs="+", default=None, metavar="CENÁRIO", help="Executa só estes cenários"
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None,
+        help="Arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)",
+    )
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de referência")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(Path(tmp) / "bench.sqlite3")
+
+        import django
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+        dataset = seed(args)
+        ctx = prepare(args, random.Random(args.seed))
+
+        scenarios = build_scenarios(ctx)
+        if args.only:
+            scenarios = [s for s in scenarios if s.name in args.only]
+
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(scenario, args.iterations, args.warmup)
+            latency = results[scenario.name]["latency_ms"]
+            print(
+                f"{scenario.name:<26} p50={latency['p50']:>8.2f}ms p95={latency['p95']:>8.2f}ms "
+                f"queries={results[scenario.name]['queries']['median']:g}"
+            )
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "seed": args.seed,
+            "bulk_seed": args.bulk,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "dataset": dataset,
+        },
+        "scenarios": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{commit or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    print(f"\nResultado salvo em {output}")
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report)
+        if regressions:
+            raise SystemExit(f"Regressões: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
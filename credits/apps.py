@@ -6,6 +6,7 @@ class CreditsConfig(AppConfig):
     name = "credits"
 
     def ready(self):
-        """Importa signals quando o app está pronto."""
+        """Importa signals e system checks quando o app está pronto."""
+        import credits.checks  # noqa: F401
         import credits.signals  # noqa: F401
 
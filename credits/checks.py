@@ -0,0 +1,48 @@
+"""System checks do app credits."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core import checks
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from .search import FTS_TABLE
+
+# Migration que cria o índice de texto das listagens
+SEARCH_MIGRATION = ("credits", "0011_listing_search")
+SEARCH_TRIGGERS = {f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au"}
+
+
+@checks.register(checks.Tags.database)
+def check_search_triggers(app_configs: Any = None, databases: Any = None, **kwargs: Any) -> list[checks.CheckMessage]:
+    """
+    No SQLite, os triggers que mantêm `credits_listing_fts` existem.
+
+    Migrations que recriam `credits_creditlisting` os descartam sem erro, e a
+    busca por texto passa a ignorar as listagens novas.
+    """
+    problems: list[checks.CheckMessage] = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor != "sqlite":
+            continue
+        recorder = MigrationRecorder(connection)
+        if not recorder.has_table() or SEARCH_MIGRATION not in recorder.applied_migrations():
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'credits_creditlisting'"
+            )
+            missing = SEARCH_TRIGGERS - {name for (name,) in cursor.fetchall()}
+        if missing:
+            problems.append(checks.Warning(
+                f"Triggers da busca de listagens ausentes em '{alias}': {', '.join(sorted(missing))}.",
+                hint=(
+                    "Uma migration recriou credits_creditlisting; recrie os triggers "
+                    "(ver credits/migrations/0011_listing_search.py)."
+                ),
+                id="credits.W001",
+            ))
+    return problems
@@ -3,6 +3,7 @@
 Este módulo contém ModelForms usados para:
 - Criar um novo CarbonCredit (pelo produtor)
 - Criar uma CreditListing (listar um crédito para venda)
+- Buscar e filtrar listagens no marketplace
 """
 
 from __future__ import annotations
@@ -11,6 +12,11 @@ from django import forms
 
 from .models import CarbonCredit, CreditListing
 
+FILTER_INPUT_CLASS = (
+    "w-full px-3 py-2 bg-white/5 border border-white/10 rounded-lg text-sm text-white "
+    "placeholder-gray-500 focus:border-tucupi-green-500 focus:outline-none transition"
+)
+
 
 class CarbonCreditForm(forms.ModelForm):
     """Formulário para cadastro de um novo crédito de carbono.
@@ -62,3 +68,40 @@ class CreditListingForm(forms.ModelForm):
         fields = [
             "price_per_unit",
         ]
+
+
+class MarketplaceFilterForm(forms.Form):
+    """Busca, filtros por faixa e ordenação do marketplace (GET).
+
+    Todos os campos são opcionais; os inválidos são ignorados pela busca
+    (ver credits.search).
+    """
+    SORT_CHOICES = [
+        ("recent", "Mais recentes"),
+        ("price", "Menor preço"),
+        ("-price", "Maior preço"),
+        ("amount", "Menor volume"),
+        ("-amount", "Maior volume"),
+        ("-vintage", "Safra mais nova"),
+        ("vintage", "Safra mais antiga"),
+    ]
+
+    q = forms.CharField(required=False, max_length=100, label="Buscar origem")
+    # Escolhidos nas facetas; ocultos no formulário para sobreviver à busca
+    region = forms.CharField(required=False, max_length=255, widget=forms.HiddenInput)
+    vintage = forms.IntegerField(required=False, min_value=1900, max_value=2100, widget=forms.HiddenInput)
+    min_price = forms.DecimalField(required=False, min_value=0, decimal_places=2, label="Preço mínimo")
+    max_price = forms.DecimalField(required=False, min_value=0, decimal_places=2, label="Preço máximo")
+    min_amount = forms.DecimalField(required=False, min_value=0, decimal_places=2, label="Volume mínimo")
+    max_amount = forms.DecimalField(required=False, min_value=0, decimal_places=2, label="Volume máximo")
+    generated_from = forms.DateField(required=False, label="Gerado a partir de")
+    generated_to = forms.DateField(required=False, label="Gerado até")
+    sort = forms.ChoiceField(required=False, choices=SORT_CHOICES, label="Ordenar por")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            field.widget.attrs["class"] = FILTER_INPUT_CLASS
+            if isinstance(field, forms.DateField):
+                field.widget.input_type = "date"
+        self.fields["q"].widget.attrs["placeholder"] = "Ex: Amazônia, Cerrado..."
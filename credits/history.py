@@ -0,0 +1,203 @@
+"""
+Histórico de propriedade: encadeamento por hash, árvores de Merkle e backfill.
+
+Cada `CreditOwnershipHistory` guarda o SHA-256 do seu conteúdo
+(`record_hash`), que inclui o hash do registro anterior do mesmo crédito
+(`previous_hash`; vazio no GENESIS). Alterar ou remover um registro quebra
+todos os seguintes daquele crédito.
+
+As funções daqui recebem os modelos como parâmetro; as raízes diárias e a
+verificação ficam em `credits.integrity`. As migrações de dados (0008, 0009)
+têm cópias congeladas do backfill e do digest: mudar o formato aqui não muda
+o que elas gravam.
+
+Todo crédito tem ao menos o registro CREATION gravado na criação (pelo signal
+ou pelo seed em massa). Créditos anteriores ao histórico recebem o seu via
+migração de dados ou `backfill_genesis` (`backfill_ownership_history`); assim
+o signal de propriedade nunca precisa procurar histórico ausente.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+from typing import Any, Iterable
+
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from ecotrade.seeding import batched
+
+DEFAULT_BATCH_SIZE = 5000
+
+LEGACY_NOTE = "Entrada retroativa para crédito legado"
+
+# Créditos por consulta ao buscar os últimos hashes
+LOOKUP_CHUNK_SIZE = 500
+
+
+def record_digest(record: Any) -> str:
+    """SHA-256 (hex) do conteúdo de um registro, incluindo `previous_hash`."""
+    payload = json.dumps(
+        [
+            record.credit_id,
+            record.from_owner_id,
+            record.to_owner_id,
+            record.transfer_type,
+            record.transaction_id,
+            None if record.price is None else f"{record.price:.2f}",
+            record.timestamp.astimezone(datetime.timezone.utc).isoformat(),
+            record.notes,
+            record.previous_hash,
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def latest_hashes(history_model: Any, credit_ids: Iterable[int], before_id: int | None = None) -> dict[int, str]:
+    """`record_hash` do último registro de cada crédito (anterior a `before_id`)."""
+    heads: dict[int, str] = {}
+    for chunk in batched(credit_ids, LOOKUP_CHUNK_SIZE):
+        records = history_model.objects.filter(credit_id__in=chunk)
+        if before_id is not None:
+            records = records.filter(id__lt=before_id)
+        last_ids = records.values("credit_id").annotate(last=Max("id")).values("last")
+        heads.update(
+            history_model.objects.filter(id__in=last_ids).values_list("credit_id", "record_hash")
+        )
+    return heads
+
+
+class HistoryChain:
+    """
+    Encadeia registros novos (ainda não gravados) ao histórico existente.
+
+    Lembra o último hash de cada crédito já visto, então vários lotes de
+    `bulk_create` (ou vários registros do mesmo crédito num lote) formam uma
+    cadeia contínua com uma consulta por lote, no máximo.
+    """
+
+    def __init__(self, history_model: Any) -> None:
+        self.history_model = history_model
+        self.heads: dict[int, str] = {}
+
+    def seal(self, records: list[Any]) -> list[Any]:
+        """Preenche `previous_hash` e `record_hash`, na ordem da lista."""
+        # Registros CREATION iniciam a cadeia: não há o que buscar
+        missing = {
+            record.credit_id for record in records
+            if record.transfer_type != "CREATION" and record.credit_id not in self.heads
+        }
+        if missing:
+            self.heads.update(latest_hashes(self.history_model, missing))
+
+        for record in records:
+            if record.timestamp is None:
+                record.timestamp = timezone.now()
+            if record.transfer_type == "CREATION":
+                record.previous_hash = ""
+            else:
+                record.previous_hash = self.heads.get(record.credit_id, "")
+            record.record_hash = record_digest(record)
+            self.heads[record.credit_id] = record.record_hash
+        return records
+
+
+def _leaf(record_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(record_hash)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_levels(record_hashes: list[str]) -> list[list[bytes]]:
+    """
+    Níveis da árvore de Merkle, das folhas à raiz.
+
+    Folhas e nós internos usam prefixos distintos (0x00/0x01), e um nó sem
+    par sobe inalterado para o nível seguinte (não é duplicado).
+    """
+    if not record_hashes:
+        raise ValueError("árvore de Merkle sem folhas")
+    level = [_leaf(record_hash) for record_hash in record_hashes]
+    levels = [level]
+    while len(level) > 1:
+        level = [
+            _node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(level)
+    return levels
+
+
+def merkle_root(record_hashes: list[str]) -> str:
+    return merkle_levels(record_hashes)[-1][0].hex()
+
+
+def proof_path(leaf_count: int, index: int) -> list[tuple[int, int, str]]:
+    """
+    (nível, posição, lado) dos irmãos da folha `index` até a raiz, numa
+    árvore de `leaf_count` folhas: quais nós formam a prova de inclusão.
+    """
+    path = []
+    level, size = 0, leaf_count
+    while size > 1:
+        sibling = index ^ 1
+        if sibling < size:
+            path.append((level, sibling, "left" if sibling < index else "right"))
+        level, size, index = level + 1, (size + 1) // 2, index // 2
+    return path
+
+
+def merkle_proof(levels: list[list[bytes]], index: int) -> list[dict[str, str]]:
+    """Irmãos da folha `index` até a raiz: O(log n) hashes."""
+    return [
+        {"position": side, "hash": levels[level][position].hex()}
+        for level, position, side in proof_path(len(levels[0]), index)
+    ]
+
+
+def verify_proof(record_hash: str, proof: list[dict[str, str]], root_hash: str) -> bool:
+    """Confere uma prova de inclusão gerada por `merkle_proof`."""
+    node = _leaf(record_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = _node(sibling, node) if step["position"] == "left" else _node(node, sibling)
+    return node.hex() == root_hash
+
+
+def backfill_genesis(credit_model: Any, history_model: Any, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Grava o registro CREATION de cada crédito (inclusive deletados) sem
+    histórico. Retorna quantos foram criados.
+
+    Percorre os créditos por id (keyset), um lote por consulta.
+    """
+    missing = (
+        credit_model._base_manager
+        .filter(~Exists(history_model.objects.filter(credit=OuterRef("pk"))))
+        .order_by("pk")
+    )
+    chain = HistoryChain(history_model)
+    created = 0
+    last_pk = 0
+    while True:
+        batch = list(missing.filter(pk__gt=last_pk).values_list("pk", "owner_id")[:batch_size])
+        if not batch:
+            return created
+        history_model.objects.bulk_create(chain.seal([
+            history_model(
+                credit_id=credit_id,
+                from_owner=None,  # GENESIS
+                to_owner_id=owner_id,
+                transfer_type="CREATION",
+                notes=LEGACY_NOTE,
+            )
+            for credit_id, owner_id in batch
+        ]))
+        created += len(batch)
+        last_pk = batch[-1][0]
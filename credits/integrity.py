@@ -0,0 +1,211 @@
+"""
+Integridade do histórico de propriedade: raízes diárias, provas e verificação.
+
+- `seal_daily_roots` (cron diário, `seal_ownership_history`) grava uma
+  `OwnershipHistoryRoot` por dia encerrado, sobre os registros novos desde a
+  raiz anterior, com os nós da árvore (`OwnershipHistoryNode`);
+- `inclusion_proof` lê os O(log n) nós que ligam um registro à raiz do seu
+  dia (endpoint público /api/history/<id>/proof/);
+- `verify_history` (`verify_ownership_history`) confere hash, encadeamento e
+  raiz somente das raízes ainda não verificadas e dos registros posteriores
+  à última raiz, então a verificação noturna custa o volume do dia e não o
+  histórico inteiro.
+"""
+
+from __future__ import annotations
+
+import datetime
+from functools import reduce
+from operator import or_
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ecotrade.seeding import batched
+
+from .history import latest_hashes, merkle_levels, merkle_root, proof_path, record_digest
+from .models import CarbonCredit, CreditOwnershipHistory, OwnershipHistoryNode, OwnershipHistoryRoot
+
+# Registros lidos por ida ao banco na verificação
+VERIFY_CHUNK_SIZE = 2000
+# Nós gravados por INSERT ao selar um dia
+NODE_BATCH_SIZE = 5000
+
+
+def _day_start(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _range_hashes(start_id: int, end_id: int) -> tuple[list[int], list[str]]:
+    rows = list(
+        CreditOwnershipHistory.objects.filter(id__gte=start_id, id__lte=end_id)
+        .order_by("id")
+        .values_list("id", "record_hash")
+    )
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+def seal_daily_roots(today: datetime.date | None = None) -> list[OwnershipHistoryRoot]:
+    """
+    Grava as raízes dos dias encerrados (anteriores a `today`) ainda sem raiz.
+
+    A raiz de um dia cobre, por id, tudo o que veio depois da raiz anterior
+    até o último registro do dia; o dia corrente só é selado no dia seguinte.
+    """
+    today = today or timezone.localdate()
+    last = OwnershipHistoryRoot.objects.order_by("-end_id").first()
+    start_id = last.end_id + 1 if last else 1
+
+    pending = CreditOwnershipHistory.objects.filter(id__gte=start_id, timestamp__lt=_day_start(today))
+    if last:
+        pending = pending.filter(timestamp__gte=_day_start(last.day + datetime.timedelta(days=1)))
+    days = list(
+        pending.annotate(day=TruncDate("timestamp"))
+        .order_by("day")
+        .values_list("day", flat=True)
+        .distinct()
+    )
+
+    roots = []
+    for day in days:
+        end_id = CreditOwnershipHistory.objects.filter(
+            id__gte=start_id, timestamp__lt=_day_start(day + datetime.timedelta(days=1))
+        ).aggregate(end=Max("id"))["end"]
+        ids, hashes = _range_hashes(start_id, end_id)
+        levels = merkle_levels(hashes)
+        with transaction.atomic():
+            root = OwnershipHistoryRoot.objects.create(
+                day=day,
+                start_id=start_id,
+                end_id=end_id,
+                leaf_count=len(hashes),
+                root_hash=levels[-1][0].hex(),
+            )
+            _store_tree(root, ids, levels)
+        roots.append(root)
+        start_id = end_id + 1
+    return roots
+
+
+def _store_tree(root: OwnershipHistoryRoot, ids: list[int], levels: list[list[bytes]]) -> None:
+    """Grava os nós da árvore de `root`; as folhas levam o id do registro."""
+    OwnershipHistoryNode.objects.bulk_create(
+        (
+            OwnershipHistoryNode(
+                root=root,
+                level=level,
+                position=position,
+                node_hash=node.hex(),
+                record_id=ids[position] if level == 0 else None,
+            )
+            for level, nodes in enumerate(levels)
+            for position, node in enumerate(nodes)
+        ),
+        batch_size=NODE_BATCH_SIZE,
+    )
+
+
+def inclusion_proof(record_id: int) -> dict[str, Any] | None:
+    """
+    Prova de inclusão de um registro de crédito público na raiz do seu dia.
+
+    None se o registro não existir, não for público ou ainda não estiver
+    coberto por uma raiz. Somente leitura: os nós são gravados ao selar.
+    """
+    record = CreditOwnershipHistory.objects.filter(
+        pk=record_id,
+        credit__validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        credit__is_deleted=False,
+    ).values("id", "credit_id", "previous_hash", "record_hash").first()
+    if record is None:
+        return None
+    leaf = OwnershipHistoryNode.objects.select_related("root").filter(level=0, record_id=record_id).first()
+    if leaf is None:
+        return None
+
+    root, index = leaf.root, leaf.position
+    path = proof_path(root.leaf_count, index)
+    siblings = {}
+    if path:
+        siblings = {
+            (level, position): node_hash
+            for level, position, node_hash in OwnershipHistoryNode.objects.filter(
+                reduce(or_, (Q(level=level, position=position) for level, position, _ in path)),
+                root=root,
+            ).values_list("level", "position", "node_hash")
+        }
+    return {
+        **record,
+        "day": root.day.isoformat(),
+        "root_hash": root.root_hash,
+        "leaf_index": index,
+        "leaf_count": root.leaf_count,
+        "proof": [
+            {"position": side, "hash": siblings[level, position]} for level, position, side in path
+        ],
+    }
+
+
+def _check_records(start_id: int, end_id: int | None) -> tuple[list[str], list[str]]:
+    """
+    Confere hash e encadeamento dos registros com id a partir de `start_id`.
+
+    O registro anterior de cada crédito fora do intervalo já foi verificado
+    em uma execução anterior: só o seu hash é lido. Retorna os hashes (em
+    ordem de id) e as divergências.
+    """
+    records = CreditOwnershipHistory.objects.filter(id__gte=start_id).order_by("id")
+    if end_id is not None:
+        records = records.filter(id__lte=end_id)
+
+    heads: dict[int, str] = {}
+    hashes: list[str] = []
+    problems: list[str] = []
+    for chunk in batched(records.iterator(chunk_size=VERIFY_CHUNK_SIZE), VERIFY_CHUNK_SIZE):
+        missing = {record.credit_id for record in chunk} - heads.keys()
+        heads.update(latest_hashes(CreditOwnershipHistory, missing, before_id=start_id))
+        for record in chunk:
+            if record.previous_hash != heads.get(record.credit_id, ""):
+                problems.append(f"registro {record.id}: previous_hash não é o hash do registro anterior")
+            if record_digest(record) != record.record_hash:
+                problems.append(f"registro {record.id}: conteúdo não confere com record_hash")
+            heads[record.credit_id] = record.record_hash
+            hashes.append(record.record_hash)
+    return hashes, problems
+
+
+def verify_history(full: bool = False) -> tuple[int, int, list[str]]:
+    """
+    Verifica as raízes ainda não verificadas (todas, com `full`) e os
+    registros posteriores à última raiz.
+
+    Raízes que conferem recebem `verified_at`. Retorna (raízes verificadas,
+    registros verificados, divergências).
+    """
+    roots = OwnershipHistoryRoot.objects.order_by("start_id")
+    if not full:
+        roots = roots.filter(verified_at__isnull=True)
+
+    checked_roots = checked_records = 0
+    problems: list[str] = []
+    for root in roots:
+        hashes, found = _check_records(root.start_id, root.end_id)
+        if hashes and merkle_root(hashes) != root.root_hash:
+            found.append(f"raiz de {root.day}: não confere com os registros {root.start_id}–{root.end_id}")
+        elif not hashes:
+            found.append(f"raiz de {root.day}: nenhum registro entre {root.start_id} e {root.end_id}")
+        if not found:
+            OwnershipHistoryRoot.objects.filter(pk=root.pk).update(verified_at=timezone.now())
+        problems.extend(found)
+        checked_roots += 1
+        checked_records += len(hashes)
+
+    # Registros ainda não cobertos por raiz: só hash e encadeamento
+    last_end = OwnershipHistoryRoot.objects.aggregate(end=Max("end_id"))["end"] or 0
+    hashes, found = _check_records(last_end + 1, None)
+    problems.extend(found)
+    checked_records += len(hashes)
+    return checked_roots, checked_records, problems
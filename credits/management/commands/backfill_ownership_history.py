@@ -0,0 +1,24 @@
+"""
+Management command para gravar o histórico GENESIS de créditos sem histórico.
+Uso: python manage.py backfill_ownership_history [--batch-size N]
+"""
+from django.core.management.base import BaseCommand
+
+from credits.history import DEFAULT_BATCH_SIZE, backfill_genesis
+from credits.models import CarbonCredit, CreditOwnershipHistory
+
+
+class Command(BaseCommand):
+    help = 'Cria o registro GENESIS (CREATION) de créditos sem histórico de propriedade'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Créditos por INSERT (default: {DEFAULT_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        created = backfill_genesis(CarbonCredit, CreditOwnershipHistory, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {created} registro(s) GENESIS criado(s)'))
@@ -0,0 +1,15 @@
+"""
+Management command para devolver à fila as análises abandonadas.
+Uso: python manage.py release_expired_reviews (cron)
+"""
+from django.core.management.base import BaseCommand
+
+from credits.services import release_expired_reviews
+
+
+class Command(BaseCommand):
+    help = 'Devolve a PENDING os créditos em análise com a reserva expirada'
+
+    def handle(self, *args, **options):
+        released = release_expired_reviews()
+        self.stdout.write(self.style.SUCCESS(f'✓ {released} crédito(s) devolvido(s) à fila'))
@@ -0,0 +1,17 @@
+"""
+Management command para gravar as raízes de Merkle diárias do histórico.
+Uso: python manage.py seal_ownership_history (cron, após a meia-noite)
+"""
+from django.core.management.base import BaseCommand
+
+from credits.integrity import seal_daily_roots
+
+
+class Command(BaseCommand):
+    help = 'Grava a raiz de Merkle de cada dia encerrado com registros de histórico novos'
+
+    def handle(self, *args, **options):
+        roots = seal_daily_roots()
+        for root in roots:
+            self.stdout.write(f'  {root.day}: {root.root_hash} ({root.leaf_count} registro(s))')
+        self.stdout.write(self.style.SUCCESS(f'✓ {len(roots)} raiz(es) diária(s) gravada(s)'))
@@ -1,12 +1,32 @@
 """Management command to seed CarbonCredit data."""
+from decimal import Decimal
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from faker import Faker
 from accounts.models import User
-from credits.models import CarbonCredit
+from credits.history import HistoryChain
+from credits.models import CarbonCredit, CreditOwnershipHistory
 from datetime import timedelta
+from ecotrade.seeding import add_seed_arguments, batched, finish_bulk_seed, seed_random
 import random
 
+# Brazilian regions for carbon credit origin
+REGIONS = [
+    'Amazônia, AM', 'Mata Atlântica, SP', 'Cerrado, GO',
+    'Pantanal, MS', 'Caatinga, BA', 'Pampa, RS',
+    'Vale do Paraíba, SP', 'Região Sul, PR', 'Nordeste, CE',
+    'Centro-Oeste, MT', 'Norte, PA', 'Sudeste, MG'
+]
+
+# Status distribution: 60% AVAILABLE, 30% LISTED, 10% SOLD
+STATUS_WEIGHTS = {
+    CarbonCredit.Status.AVAILABLE: 60,
+    CarbonCredit.Status.LISTED: 30,
+    CarbonCredit.Status.SOLD: 10,
+}
+
 
 class Command(BaseCommand):
     help = 'Seed database with CarbonCredit data'
@@ -18,8 +38,10 @@ class Command(BaseCommand):
             default=45,
             help='Number of credits to create (default: 45)'
         )
+        add_seed_arguments(parser)
 
     def handle(self, *args, **options):
+        rng = seed_random(options['seed'])
         fake = Faker('pt_BR')
         count = options['count']
 
@@ -31,13 +53,9 @@ class Command(BaseCommand):
             )
             return
 
-        # Brazilian regions for carbon credit origin
-        regions = [
-            'Amazônia, AM', 'Mata Atlântica, SP', 'Cerrado, GO',
-            'Pantanal, MS', 'Caatinga, BA', 'Pampa, RS',
-            'Vale do Paraíba, SP', 'Região Sul, PR', 'Nordeste, CE',
-            'Centro-Oeste, MT', 'Norte, PA', 'Sudeste, MG'
-        ]
+        if options['bulk']:
+            self._handle_bulk(list(producers.values_list('id', flat=True)), count, rng, options)
+            return
 
         created_credits = []
 
@@ -61,14 +79,13 @@ class Command(BaseCommand):
 
             # Status distribution: 60% AVAILABLE, 30% LISTED, 10% SOLD
             status_choice = random.choices(
-                [CarbonCredit.Status.AVAILABLE, CarbonCredit.Status.LISTED, CarbonCredit.Status.SOLD],
-                weights=[60, 30, 10]
+                list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values())
             )[0]
 
             credit = CarbonCredit.objects.create(
                 owner=owner,
                 amount=amount,
-                origin=random.choice(regions),
+                origin=random.choice(REGIONS),
                 generation_date=generation_date,
                 status=status_choice,
                 unit='tons CO2',
@@ -85,7 +102,6 @@ class Command(BaseCommand):
         verified = sum(1 for c in created_credits if c.is_verified)
 
         # Count ownership history entries created by signals
-        from credits.models import CreditOwnershipHistory
         history_count = CreditOwnershipHistory.objects.filter(
             credit__in=created_credits,
             transfer_type=CreditOwnershipHistory.TransferType.CREATION
@@ -99,3 +115,52 @@ class Command(BaseCommand):
                 f'✓ Created {history_count} GENESIS ownership records (via signals)'
             )
         )
+
+    def _handle_bulk(self, producer_ids, count, rng, options):
+        """
+        Bulk path: credits and their GENESIS history rows via bulk_create.
+
+        Writes the same CREATION record `track_credit_ownership` would, one
+        per credit, in the same batch.
+        """
+        batch_size = options['batch_size']
+        today = timezone.now().date()
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        created = 0
+        chain = HistoryChain(CreditOwnershipHistory)
+
+        def credits():
+            for _ in range(count):
+                yield CarbonCredit(
+                    owner_id=rng.choice(producer_ids),
+                    amount=Decimal(rng.randint(1000, 100000)) / 100,
+                    origin=rng.choice(REGIONS),
+                    generation_date=today - timedelta(days=rng.randint(30, 730)),
+                    status=rng.choices(statuses, weights=weights)[0],
+                    unit='tons CO2',
+                    is_verified=rng.random() < 0.8,
+                )
+
+        with transaction.atomic():
+            for batch in batched(credits(), batch_size):
+                CarbonCredit.objects.bulk_create(batch)
+                CreditOwnershipHistory.objects.bulk_create(chain.seal([
+                    CreditOwnershipHistory(
+                        credit_id=credit.pk,
+                        from_owner=None,  # GENESIS
+                        to_owner_id=credit.owner_id,
+                        transfer_type=CreditOwnershipHistory.TransferType.CREATION,
+                        notes=f"Crédito criado: {credit.amount} {credit.unit} de {credit.origin}",
+                    )
+                    for credit in batch
+                ]))
+                created += len(batch)
+                self.stdout.write(f'  {created}/{count}', ending='\r')
+            finish_bulk_seed()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Bulk-created {created} credits with {created} GENESIS ownership records'
+            )
+        )
@@ -1,9 +1,13 @@
 """Management command to seed CreditListing data."""
+from decimal import Decimal
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from faker import Faker
 from credits.models import CarbonCredit, CreditListing
 from datetime import timedelta
+from ecotrade.seeding import add_seed_arguments, batched, finish_bulk_seed, seed_random
 import random
 
 
@@ -17,8 +21,10 @@ class Command(BaseCommand):
             default=30,
             help='Number of listings to create (default: 30)'
         )
+        add_seed_arguments(parser)
 
     def handle(self, *args, **options):
+        rng = seed_random(options['seed'])
         fake = Faker('pt_BR')
         count = options['count']
 
@@ -43,6 +49,10 @@ class Command(BaseCommand):
                 )
             )
 
+        if options['bulk']:
+            self._handle_bulk(listable_credits, actual_count, rng, options)
+            return
+
         # Randomly select credits to list
         credits_to_list = random.sample(list(listable_credits), actual_count)
 
@@ -95,3 +105,45 @@ class Command(BaseCommand):
                 f'{active} active, {with_expiry} with expiration date'
             )
         )
+
+    def _handle_bulk(self, listable_credits, count, rng, options):
+        """
+        Bulk path: listings via bulk_create, then one UPDATE per batch to
+        move the listed credits from AVAILABLE to LISTED.
+        """
+        batch_size = options['batch_size']
+        now = timezone.now()
+        # Listings carry a copy of the credit fields the marketplace searches on
+        credits = rng.sample(
+            list(listable_credits.values_list('id', *CreditListing.CREDIT_FIELDS)), count
+        )
+        active = 0
+
+        with transaction.atomic():
+            for batch in batched(credits, batch_size):
+                listings = []
+                for credit_id, *credit_fields in batch:
+                    # Expiration date: 30-180 days in future (or None); 90% active
+                    expires_at = (
+                        now + timedelta(days=rng.randint(30, 180))
+                        if rng.random() < 0.8 else None
+                    )
+                    listings.append(CreditListing(
+                        credit_id=credit_id,
+                        **dict(zip(CreditListing.CREDIT_FIELDS, credit_fields)),
+                        price_per_unit=Decimal(rng.randint(5000, 20000)) / 100,
+                        expires_at=expires_at,
+                        is_active=rng.random() < 0.9,
+                    ))
+                CreditListing.objects.bulk_create(listings)
+                active += sum(1 for listing in listings if listing.is_active)
+
+                # .update() skips auto_now
+                CarbonCredit.objects.filter(
+                    id__in=[credit_id for credit_id, *_ in batch], status=CarbonCredit.Status.AVAILABLE
+                ).update(status=CarbonCredit.Status.LISTED, updated_at=now)
+            finish_bulk_seed()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Bulk-created {count} listings: {active} active')
+        )
@@ -0,0 +1,32 @@
+"""
+Management command para verificar a integridade do histórico de propriedade.
+Uso: python manage.py verify_ownership_history [--full]
+
+Por padrão confere só as raízes ainda não verificadas e os registros
+posteriores à última raiz; --full confere o histórico inteiro.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from credits.integrity import verify_history
+
+
+class Command(BaseCommand):
+    help = 'Verifica hashes, encadeamento e raízes de Merkle do histórico de propriedade'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Verifica também as raízes já verificadas'
+        )
+
+    def handle(self, *args, **options):
+        roots, records, problems = verify_history(full=options['full'])
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(problem))
+        if problems:
+            raise CommandError(f'{len(problems)} divergência(s) no histórico de propriedade')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Histórico íntegro ({roots} raiz(es), {records} registro(s) verificados)'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0004_carboncredit_auditor_notes_carboncredit_validated_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carboncredit',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('validation_status', 'APPROVED')), fields=['-created_at', '-id'], name='credit_public_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0005_carboncredit_public_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carboncredit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
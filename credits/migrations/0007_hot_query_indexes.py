@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0006_carboncredit_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carboncredit',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['validation_status', 'status', '-created_at', '-id'], name='credit_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carboncredit',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['validation_status', '-created_at'], name='credit_live_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carboncredit',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['owner', 'status'], name='credit_owner_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-listed_at'], name='listing_active_idx'),
+        ),
+    ]
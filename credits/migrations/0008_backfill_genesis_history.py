@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+# Copiado de credits.history (não importado): a migration deve continuar
+# fazendo o mesmo quando o app mudar. Os hashes vêm na 0009.
+LEGACY_NOTE = "Entrada retroativa para crédito legado"
+BATCH_SIZE = 5000
+
+
+def backfill(apps, schema_editor):
+    """Registro CREATION para créditos legados, antes criado pelo signal."""
+    CarbonCredit = apps.get_model("credits", "CarbonCredit")
+    CreditOwnershipHistory = apps.get_model("credits", "CreditOwnershipHistory")
+    missing = (
+        CarbonCredit._base_manager
+        .filter(~Exists(CreditOwnershipHistory.objects.filter(credit=OuterRef("pk"))))
+        .order_by("pk")
+    )
+    last_pk = 0
+    while True:
+        batch = list(missing.filter(pk__gt=last_pk).values_list("pk", "owner_id")[:BATCH_SIZE])
+        if not batch:
+            return
+        CreditOwnershipHistory.objects.bulk_create([
+            CreditOwnershipHistory(
+                credit_id=credit_id,
+                from_owner=None,  # GENESIS
+                to_owner_id=owner_id,
+                transfer_type="CREATION",
+                notes=LEGACY_NOTE,
+            )
+            for credit_id, owner_id in batch
+        ])
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+import datetime
+import hashlib
+import json
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def record_digest(record):
+    """
+    Cópia congelada de `credits.history.record_digest` no formato desta
+    migration: mudanças futuras no app não podem mudar os hashes gravados aqui.
+    """
+    payload = json.dumps(
+        [
+            record.credit_id,
+            record.from_owner_id,
+            record.to_owner_id,
+            record.transfer_type,
+            record.transaction_id,
+            None if record.price is None else f"{record.price:.2f}",
+            record.timestamp.astimezone(datetime.timezone.utc).isoformat(),
+            record.notes,
+            record.previous_hash,
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def hash_existing(apps, schema_editor):
+    """Encadeia o histórico existente: por crédito, na ordem de id."""
+    CreditOwnershipHistory = apps.get_model("credits", "CreditOwnershipHistory")
+    records = CreditOwnershipHistory.objects.order_by("credit_id", "id").iterator(chunk_size=5000)
+    batch = []
+    previous = (None, "")
+    for record in records:
+        credit_id, previous_hash = previous
+        record.previous_hash = previous_hash if record.credit_id == credit_id else ""
+        record.record_hash = record_digest(record)
+        previous = (record.credit_id, record.record_hash)
+        batch.append(record)
+        if len(batch) >= 5000:
+            CreditOwnershipHistory.objects.bulk_update(batch, ["previous_hash", "record_hash"])
+            batch = []
+    CreditOwnershipHistory.objects.bulk_update(batch, ["previous_hash", "record_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0008_backfill_genesis_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='creditownershiphistory',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='creditownershiphistory',
+            name='previous_hash',
+            field=models.CharField(blank=True, editable=False, help_text='record_hash do registro anterior do mesmo crédito (vazio no GENESIS)', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='creditownershiphistory',
+            name='record_hash',
+            field=models.CharField(default='', editable=False, help_text='SHA-256 do conteúdo do registro, incluindo previous_hash', max_length=64),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='OwnershipHistoryRoot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('start_id', models.BigIntegerField()),
+                ('end_id', models.BigIntegerField()),
+                ('leaf_count', models.PositiveIntegerField()),
+                ('root_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('verified_at', models.DateTimeField(blank=True, help_text='Última verificação bem-sucedida (verify_ownership_history)', null=True)),
+            ],
+            options={
+                'verbose_name': 'Raiz de Merkle do Histórico',
+                'verbose_name_plural': 'Raízes de Merkle do Histórico',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.RunPython(hash_existing, migrations.RunPython.noop),
+    ]
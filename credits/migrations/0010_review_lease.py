@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:32
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def lease_current_reviews(apps, schema_editor):
+    """Análises em andamento recebem uma reserva nova (antes não expiravam)."""
+    CarbonCredit = apps.get_model("credits", "CarbonCredit")
+    CarbonCredit.objects.filter(validation_status="UNDER_REVIEW").update(
+        review_lease_until=timezone.now() + timedelta(minutes=30)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0009_history_hash_chain'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carboncredit',
+            name='review_lease_until',
+            field=models.DateTimeField(blank=True, help_text='Fim da reserva do auditor em análise; expirada, o crédito volta à fila', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='carboncredit',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['validation_status', 'review_lease_until', 'created_at', 'id'], name='credit_review_queue_idx'),
+        ),
+        migrations.RunPython(lease_current_reviews, migrations.RunPython.noop),
+    ]
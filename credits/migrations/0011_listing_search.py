@@ -0,0 +1,135 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# DDL do índice de texto copiado aqui (e não importado de credits.search):
+# a migration deve continuar fazendo o mesmo quando o app mudar
+SQLITE_INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS credits_listing_fts USING fts5(
+        origin, content='credits_creditlisting', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    "DROP TRIGGER IF EXISTS credits_listing_fts_ai",
+    "DROP TRIGGER IF EXISTS credits_listing_fts_ad",
+    "DROP TRIGGER IF EXISTS credits_listing_fts_au",
+    """CREATE TRIGGER credits_listing_fts_ai AFTER INSERT ON credits_creditlisting BEGIN
+        INSERT INTO credits_listing_fts(rowid, origin) VALUES (new.id, new.origin);
+    END""",
+    """CREATE TRIGGER credits_listing_fts_ad AFTER DELETE ON credits_creditlisting BEGIN
+        INSERT INTO credits_listing_fts(credits_listing_fts, rowid, origin) VALUES ('delete', old.id, old.origin);
+    END""",
+    """CREATE TRIGGER credits_listing_fts_au AFTER UPDATE OF origin ON credits_creditlisting BEGIN
+        INSERT INTO credits_listing_fts(credits_listing_fts, rowid, origin) VALUES ('delete', old.id, old.origin);
+        INSERT INTO credits_listing_fts(rowid, origin) VALUES (new.id, new.origin);
+    END""",
+    "INSERT INTO credits_listing_fts(credits_listing_fts) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS credits_listing_fts_ai",
+    "DROP TRIGGER IF EXISTS credits_listing_fts_ad",
+    "DROP TRIGGER IF EXISTS credits_listing_fts_au",
+    "DROP TABLE IF EXISTS credits_listing_fts",
+]
+POSTGRES_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS listing_origin_search_idx ON credits_creditlisting "
+    "USING gin (to_tsvector('simple', origin)) WHERE is_active",
+]
+POSTGRES_UNINSTALL = ["DROP INDEX IF EXISTS listing_origin_search_idx"]
+
+
+class RunSQLOn(migrations.RunSQL):
+    """RunSQL aplicado só no banco `vendor` (FTS5 e GIN não são portáveis)."""
+
+    def __init__(self, vendor, sql, reverse_sql):
+        super().__init__(sql, reverse_sql)
+        self.vendor = vendor
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == self.vendor:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def copy_credit_fields(apps, schema_editor):
+    """Origem, quantidade e data de geração do crédito em cada listagem."""
+    CarbonCredit = apps.get_model("credits", "CarbonCredit")
+    CreditListing = apps.get_model("credits", "CreditListing")
+    credit = CarbonCredit.objects.filter(pk=OuterRef("credit_id"))
+    CreditListing.objects.update(**{
+        name: Subquery(credit.values(name)[:1])
+        for name in ("origin", "amount", "generation_date")
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0010_review_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creditlisting',
+            name='origin',
+            field=models.CharField(editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='creditlisting',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='creditlisting',
+            name='generation_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_credit_fields, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='creditlisting',
+            name='origin',
+            field=models.CharField(editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='creditlisting',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='creditlisting',
+            name='generation_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price_per_unit', 'id'], name='listing_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['amount', 'id'], name='listing_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['generation_date', 'id'], name='listing_vintage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['origin', 'generation_date'], name='listing_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['origin', '-listed_at'], name='listing_region_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['origin', 'price_per_unit', 'id'], name='listing_region_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creditlisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['origin', 'amount', 'id'], name='listing_region_amount_idx'),
+        ),
+        # Depois dos AlterField: no SQLite eles recriam a tabela (e os triggers)
+        RunSQLOn("sqlite", SQLITE_INSTALL, SQLITE_UNINSTALL),
+        RunSQLOn("postgresql", POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    ]
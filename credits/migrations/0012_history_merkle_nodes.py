@@ -0,0 +1,80 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:21
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Cópia congelada da árvore de credits.history (folha 0x00, nó 0x01, nó sem
+# par sobe inalterado): mudanças futuras no app não mudam os nós gravados aqui
+BATCH_SIZE = 5000
+
+
+def merkle_levels(record_hashes):
+    level = [hashlib.sha256(b"\x00" + bytes.fromhex(record_hash)).digest() for record_hash in record_hashes]
+    levels = [level]
+    while len(level) > 1:
+        level = [
+            hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest() if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(level)
+    return levels
+
+
+def store_existing_trees(apps, schema_editor):
+    """Nós das raízes já seladas: a prova de inclusão só lê nós gravados."""
+    CreditOwnershipHistory = apps.get_model("credits", "CreditOwnershipHistory")
+    OwnershipHistoryRoot = apps.get_model("credits", "OwnershipHistoryRoot")
+    OwnershipHistoryNode = apps.get_model("credits", "OwnershipHistoryNode")
+    for root in OwnershipHistoryRoot.objects.order_by("start_id").iterator():
+        rows = list(
+            CreditOwnershipHistory.objects.filter(id__gte=root.start_id, id__lte=root.end_id)
+            .order_by("id")
+            .values_list("id", "record_hash")
+        )
+        if not rows:
+            continue
+        ids = [row[0] for row in rows]
+        OwnershipHistoryNode.objects.bulk_create(
+            (
+                OwnershipHistoryNode(
+                    root=root,
+                    level=level,
+                    position=position,
+                    node_hash=node.hex(),
+                    record_id=ids[position] if level == 0 else None,
+                )
+                for level, nodes in enumerate(merkle_levels([row[1] for row in rows]))
+                for position, node in enumerate(nodes)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0011_listing_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnershipHistoryNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('node_hash', models.CharField(max_length=64)),
+                ('record_id', models.BigIntegerField(blank=True, null=True)),
+                ('root', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nodes', to='credits.ownershiphistoryroot')),
+            ],
+            options={
+                'verbose_name': 'Nó de Merkle do Histórico',
+                'verbose_name_plural': 'Nós de Merkle do Histórico',
+                'indexes': [models.Index(condition=models.Q(('record_id__isnull', False)), fields=['record_id'], name='history_node_leaf_idx')],
+                'constraints': [models.UniqueConstraint(fields=('root', 'level', 'position'), name='history_node_position_uniq')],
+            },
+        ),
+        migrations.RunPython(store_existing_trees, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
+from .history import HistoryChain
+
 
 class CarbonCreditManager(models.Manager):
     """Manager que filtra créditos deletados (soft delete)."""
@@ -28,6 +32,8 @@ class CarbonCredit(models.Model):
     origin = models.CharField(max_length=255)
     generation_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Última alteração: base dos ETags da API pública
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.AVAILABLE)
     unit = models.CharField(max_length=32, default="tons CO2")
     
@@ -55,6 +61,11 @@ class CarbonCredit(models.Model):
         blank=True,
         help_text="Observações do auditor sobre a validação"
     )
+    review_lease_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Fim da reserva do auditor em análise; expirada, o crédito volta à fila"
+    )
     
     # Campos legados (manter compatibilidade)
     is_verified = models.BooleanField(default=False, help_text="Crédito verificado por administrador")
@@ -64,6 +75,67 @@ class CarbonCredit(models.Model):
     objects = CarbonCreditManager()  # Filtra deletados por padrão
     objects_all = models.Manager()   # Inclui deletados (para admin)
 
+    class Meta:
+        indexes = [
+            # Paginação keyset da API pública: (created_at, id) dos aprovados
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="credit_public_keyset_idx",
+                condition=models.Q(validation_status="APPROVED", is_deleted=False),
+            ),
+            # Contagens por validação/status e filtro `status` da API, já na
+            # ordem da listagem. Parcial: os managers sempre filtram is_deleted=False
+            models.Index(
+                fields=["validation_status", "status", "-created_at", "-id"],
+                name="credit_live_status_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # Fila do auditor: pendentes do mais recente ao mais antigo
+            models.Index(
+                fields=["validation_status", "-created_at"],
+                name="credit_live_queue_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # Fila de revisão (credits.services.claim_next_credits): pendentes
+            # sem reserva e reservas expiradas, dos mais antigos aos mais novos
+            models.Index(
+                fields=["validation_status", "review_lease_until", "created_at", "id"],
+                name="credit_review_queue_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+            # Carteira do usuário (dashboard)
+            models.Index(
+                fields=["owner", "status"],
+                name="credit_owner_status_idx",
+                condition=models.Q(is_deleted=False),
+            ),
+        ]
+
+    # Duração da reserva de um crédito em análise (renovada ao abrir a revisão)
+    REVIEW_LEASE = timedelta(minutes=30)
+
+    # Campos que definem se/como o crédito aparece na API pública
+    PUBLIC_STATE_FIELDS = ("status", "validation_status", "is_deleted")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        deferred = instance.get_deferred_fields()
+        # Guarda o estado público carregado para invalidar só o cache afetado
+        if not deferred & set(cls.PUBLIC_STATE_FIELDS):
+            instance._loaded_public_status = instance.public_status
+        # Dono carregado: o histórico de propriedade só é gravado se mudar
+        if "owner_id" not in deferred:
+            instance._loaded_owner_id = instance.owner_id
+        return instance
+
+    @property
+    def public_status(self) -> str | None:
+        """Status sob o qual o crédito aparece na API pública (None se não aparece)."""
+        if self.validation_status == self.ValidationStatus.APPROVED and not self.is_deleted:
+            return self.status
+        return None
+
     def clean(self):
         """Validações de negócio."""
         if self.amount is not None and self.amount <= 0:
@@ -81,6 +153,10 @@ class CarbonCredit(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
+        # auto_now só é gravado se estiver em update_fields
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
         super().save(*args, **kwargs)
 
     def delete(self, using=None, keep_parents=False):
@@ -105,7 +181,11 @@ class CarbonCredit(models.Model):
         self.validated_at = timezone.now()
         self.auditor_notes = notes
         self.is_verified = True  # Marca como verificado (legado)
-        self.save()
+        self.review_lease_until = None
+        self.save(update_fields=[
+            "validation_status", "validated_by", "validated_at", "auditor_notes", "is_verified",
+            "review_lease_until",
+        ])
     
     def reject_validation(self, auditor, notes: str) -> None:
         """
@@ -120,18 +200,36 @@ class CarbonCredit(models.Model):
         self.validated_at = timezone.now()
         self.auditor_notes = notes
         self.is_verified = False
-        self.save()
+        self.review_lease_until = None
+        self.save(update_fields=[
+            "validation_status", "validated_by", "validated_at", "auditor_notes", "is_verified",
+            "review_lease_until",
+        ])
     
     def start_review(self, auditor) -> None:
         """
-        Marca o crédito como em análise por um auditor.
+        Marca o crédito como em análise por um auditor, reservado por
+        REVIEW_LEASE.
+        
+        Não confere se outro auditor já o reservou: nas views use
+        `credits.services.claim_credit`, que só assume créditos livres.
         
         Args:
             auditor: User com role AUDITOR que está revisando
         """
         self.validation_status = self.ValidationStatus.UNDER_REVIEW
         self.validated_by = auditor
-        self.save()
+        self.review_lease_until = timezone.now() + self.REVIEW_LEASE
+        self.save(update_fields=["validation_status", "validated_by", "review_lease_until"])
+    
+    def is_claimed_by_other(self, auditor) -> bool:
+        """Em análise por outro auditor, com a reserva ainda válida."""
+        return (
+            self.validation_status == self.ValidationStatus.UNDER_REVIEW
+            and self.validated_by_id != auditor.id
+            and self.review_lease_until is not None
+            and self.review_lease_until > timezone.now()
+        )
     
     @property
     def can_be_listed(self) -> bool:
@@ -159,6 +257,65 @@ class CreditListing(models.Model):
     expires_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
 
+    # Cópia dos campos do crédito buscados no marketplace: filtros, ordenação
+    # e facetas sem JOIN. Copiados na criação e mantidos pelo signal
+    # `sync_active_listings` (ver credits.search)
+    origin = models.CharField(max_length=255, editable=False)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, editable=False)
+    generation_date = models.DateField(editable=False)
+
+    class Meta:
+        # Todos parciais (is_active=True): o marketplace só lê listagens ativas
+        indexes = [
+            # Marketplace: listagens ativas da mais recente à mais antiga
+            models.Index(
+                fields=["-listed_at"],
+                name="listing_active_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Ordenação por preço, quantidade e safra (com faixas no mesmo campo)
+            models.Index(
+                fields=["price_per_unit", "id"],
+                name="listing_price_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["amount", "id"],
+                name="listing_amount_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["generation_date", "id"],
+                name="listing_vintage_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Facetas (região × safra, só o índice) e filtro por região, já
+            # na ordem de cada ordenação
+            models.Index(
+                fields=["origin", "generation_date"],
+                name="listing_region_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["origin", "-listed_at"],
+                name="listing_region_recent_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["origin", "price_per_unit", "id"],
+                name="listing_region_price_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["origin", "amount", "id"],
+                name="listing_region_amount_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+
+    # Campos do crédito copiados para a listagem
+    CREDIT_FIELDS = ("origin", "amount", "generation_date")
+
     def clean(self):
         """Validações de negócio."""
         if self.price_per_unit is not None and self.price_per_unit <= 0:
@@ -174,8 +331,15 @@ class CreditListing(models.Model):
 
     def save(self, *args, **kwargs):
         self.clean()
+        if self._state.adding and self.credit_id:
+            self.copy_credit_fields(self.credit)
         super().save(*args, **kwargs)
 
+    def copy_credit_fields(self, credit: CarbonCredit) -> None:
+        """Copia origem, quantidade e data de geração do crédito."""
+        for name in self.CREDIT_FIELDS:
+            setattr(self, name, getattr(credit, name))
+
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"Listing<{self.id}> for Credit<{self.credit_id}>"
 
@@ -224,9 +388,23 @@ class CreditOwnershipHistory(models.Model):
         blank=True,
         help_text="Preço pago na transferência (se aplicável)"
     )
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Definido na instanciação (não no INSERT) para entrar no hash
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     notes = models.TextField(blank=True)
 
+    # Encadeamento (ver credits/history.py)
+    previous_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="record_hash do registro anterior do mesmo crédito (vazio no GENESIS)"
+    )
+    record_hash = models.CharField(
+        max_length=64,
+        editable=False,
+        help_text="SHA-256 do conteúdo do registro, incluindo previous_hash"
+    )
+
     class Meta:
         ordering = ['timestamp']
         verbose_name = "Histórico de Propriedade"
@@ -239,3 +417,69 @@ class CreditOwnershipHistory(models.Model):
         from_str = self.from_owner.username if self.from_owner else "GENESIS"
         return f"{from_str} → {self.to_owner.username} ({self.transfer_type})"
 
+    def save(self, *args, **kwargs):
+        # Registro novo: encadeia ao último registro do crédito
+        if self._state.adding and not self.record_hash:
+            HistoryChain(CreditOwnershipHistory).seal([self])
+        super().save(*args, **kwargs)
+
+
+class OwnershipHistoryRoot(models.Model):
+    """
+    Raiz de Merkle diária sobre os registros de histórico novos.
+
+    Cobre os registros com id em [start_id, end_id], na ordem de id: os
+    gravados até o fim de `day` e ainda não cobertos pela raiz anterior.
+    """
+
+    day = models.DateField(unique=True)
+    start_id = models.BigIntegerField()
+    end_id = models.BigIntegerField()
+    leaf_count = models.PositiveIntegerField()
+    root_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    verified_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Última verificação bem-sucedida (verify_ownership_history)"
+    )
+
+    class Meta:
+        ordering = ['day']
+        verbose_name = "Raiz de Merkle do Histórico"
+        verbose_name_plural = "Raízes de Merkle do Histórico"
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.day}: {self.root_hash[:12]}… ({self.leaf_count} registros)"
+
+
+class OwnershipHistoryNode(models.Model):
+    """
+    Nó da árvore de Merkle de uma `OwnershipHistoryRoot`, gravado ao selar o
+    dia: a prova de inclusão lê só os O(log n) irmãos, sem refazer a árvore.
+
+    Folhas (`level` 0) guardam o id do registro; `position` é a ordem no nível.
+    """
+
+    root = models.ForeignKey(OwnershipHistoryRoot, on_delete=models.CASCADE, related_name="nodes")
+    level = models.PositiveSmallIntegerField()
+    position = models.PositiveIntegerField()
+    node_hash = models.CharField(max_length=64)
+    record_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Nó de Merkle do Histórico"
+        verbose_name_plural = "Nós de Merkle do Histórico"
+        constraints = [
+            models.UniqueConstraint(fields=["root", "level", "position"], name="history_node_position_uniq"),
+        ]
+        indexes = [
+            # Folha de um registro (prova de inclusão)
+            models.Index(
+                fields=["record_id"], name="history_node_leaf_idx", condition=models.Q(record_id__isnull=False)
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.root_id}/{self.level}/{self.position}: {self.node_hash[:12]}…"
+
@@ -0,0 +1,187 @@
+"""
+Busca do marketplace: texto na origem, faixas, ordenação e facetas.
+
+As listagens carregam uma cópia de origem, quantidade e data de geração do
+crédito (`CreditListing.CREDIT_FIELDS`), então filtros, ordenação e facetas
+usam só os índices parciais (is_active=True) de `credits_creditlisting`. A
+página ainda traz crédito e dono via select_related, mas o plano parte do
+índice da ordenação e para no LIMIT.
+
+Texto na origem:
+- SQLite: tabela FTS5 `credits_listing_fts` (conteúdo externo, mantida por
+  triggers, sem acentos: "amazonia" encontra "Amazônia"). Tabela e triggers
+  são criados pela migration `0011_listing_search`; migrations que recriam
+  `credits_creditlisting` (AlterField, RemoveField...) descartam os
+  triggers e precisam recriá-los, e o check `credits.W001` aponta a falta;
+- PostgreSQL: índice GIN sobre `to_tsvector('simple', origin)`;
+- outros bancos: `icontains` por termo.
+
+Facetas: uma consulta agrupada por (origem, ano de geração) com os mesmos
+filtros da página, somada em Python por região e por safra. O total também
+é a contagem do paginador. O resultado fica MARKETPLACE_FACETS_TIMEOUT
+segundos em cache, sob uma geração trocada a cada mudança de listagem
+(`invalidate_marketplace`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import uuid
+from collections import Counter
+from typing import Any
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, QuerySet
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import ExtractYear
+
+from .models import CreditListing
+
+FTS_TABLE = "credits_listing_fts"
+
+# Segundos em cache das facetas de uma busca
+MARKETPLACE_FACETS_TIMEOUT = 30
+# Regiões exibidas na faceta (origem é texto livre: pode haver milhares)
+MAX_REGION_FACETS = 20
+
+SORTS = {
+    "recent": ("-listed_at", "-id"),
+    "price": ("price_per_unit", "id"),
+    "-price": ("-price_per_unit", "-id"),
+    "amount": ("amount", "id"),
+    "-amount": ("-amount", "-id"),
+    "vintage": ("generation_date", "id"),
+    "-vintage": ("-generation_date", "-id"),
+}
+
+# Filtro do formulário -> lookup na listagem
+RANGE_FILTERS = {
+    "min_price": "price_per_unit__gte",
+    "max_price": "price_per_unit__lte",
+    "min_amount": "amount__gte",
+    "max_amount": "amount__lte",
+    "generated_from": "generation_date__gte",
+    "generated_to": "generation_date__lte",
+}
+
+_GENERATION_KEY = "credits:marketplace-gen"
+
+
+# ---------------------------------------------------------------------------
+# Busca
+# ---------------------------------------------------------------------------
+
+def match_origin(listings: QuerySet[CreditListing], text: str) -> QuerySet[CreditListing]:
+    """Listagens cuja origem contém todos os termos (por prefixo) de `text`."""
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return listings
+    if connection.vendor == "sqlite":
+        query = " ".join(f'"{term}"*' for term in terms)
+        return listings.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [query])
+        )
+    if connection.vendor == "postgresql":
+        query = " & ".join(f"{term}:*" for term in terms)
+        return listings.filter(id__in=RawSQL(
+            "SELECT id FROM credits_creditlisting WHERE is_active "
+            "AND to_tsvector('simple', origin) @@ to_tsquery('simple', %s)",
+            [query],
+        ))
+    for term in terms:
+        listings = listings.filter(origin__icontains=term)
+    return listings
+
+
+def filter_listings(filters: dict[str, Any]) -> QuerySet[CreditListing]:
+    """Listagens ativas com os filtros de `MarketplaceFilterForm` (sem ordem)."""
+    listings = CreditListing.objects.filter(is_active=True)
+    if filters.get("q"):
+        listings = match_origin(listings, filters["q"])
+    if filters.get("region"):
+        listings = listings.filter(origin=filters["region"])
+    if filters.get("vintage"):
+        # __year vira um BETWEEN na data: usa os índices de generation_date
+        listings = listings.filter(generation_date__year=filters["vintage"])
+    for name, lookup in RANGE_FILTERS.items():
+        if filters.get(name) is not None:
+            listings = listings.filter(**{lookup: filters[name]})
+    return listings
+
+
+def search_listings(filters: dict[str, Any]) -> QuerySet[CreditListing]:
+    """Página do marketplace: filtros, ordenação e os objetos exibidos no card."""
+    ordering = SORTS.get(filters.get("sort") or "recent", SORTS["recent"])
+    return (
+        filter_listings(filters)
+        .select_related("credit", "credit__owner", "credit__validated_by")
+        .order_by(*ordering)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Facetas
+# ---------------------------------------------------------------------------
+
+def _generation() -> str:
+    """Geração atual das facetas (token aleatório, como em api.cache)."""
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex[:12]
+        if not cache.add(_GENERATION_KEY, generation, timeout=None):
+            generation = cache.get(_GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_marketplace() -> None:
+    """
+    Descarta as facetas cacheadas: já (para leituras na mesma transação) e
+    de novo após o commit (uma leitura concorrente pode ter recacheado o
+    estado anterior nesse intervalo).
+    """
+    cache.delete(_GENERATION_KEY)
+    transaction.on_commit(lambda: cache.delete(_GENERATION_KEY))
+
+
+def _facets_key(filters: dict[str, Any]) -> str:
+    relevant = {
+        name: str(value)
+        for name, value in filters.items()
+        if name != "sort" and value not in (None, "")
+    }
+    digest = hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+    return f"credits:marketplace-facets:{_generation()}:{digest}"
+
+
+def listing_facets(filters: dict[str, Any]) -> dict[str, Any]:
+    """
+    Total e contagens por região e por safra das listagens filtradas.
+
+    {"total": n, "regions": [(origem, n), ...], "vintages": [(ano, n), ...]}
+    """
+    key = _facets_key(filters)
+    facets = cache.get(key)
+    if facets is None:
+        # Uma linha por (região, safra): o ano é extraído no banco
+        groups = (
+            filter_listings(filters)
+            .order_by()
+            .values("origin", year=ExtractYear("generation_date"))
+            .annotate(n=Count("id"))
+            .values_list("origin", "year", "n")
+        )
+        regions: Counter[str] = Counter()
+        vintages: Counter[int] = Counter()
+        for origin, year, n in groups:
+            regions[origin] += n
+            vintages[year] += n
+        facets = {
+            "total": sum(regions.values()),
+            "regions": regions.most_common(MAX_REGION_FACETS),
+            "vintages": sorted(vintages.items(), reverse=True),
+        }
+        cache.set(key, facets, MARKETPLACE_FACETS_TIMEOUT)
+    return facets
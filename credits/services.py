@@ -0,0 +1,341 @@
+"""
+Revisão de créditos pelos auditores: fila com reservas e ações em lote.
+
+Fila de revisão
+---------------
+Cada auditor pega os próximos N créditos livres (`claim_next_credits`): o
+crédito fica "Em Análise" com `validated_by` = auditor e uma reserva até
+`review_lease_until`. Créditos livres são os pendentes e os de reservas
+expiradas, então trabalho abandonado volta sozinho à fila
+(`release_expired_reviews` os devolve a PENDING para os contadores).
+
+No PostgreSQL os candidatos são travados com `SELECT ... FOR UPDATE SKIP
+LOCKED`: auditores concorrentes recebem conjuntos disjuntos sem esperar uns
+pelos outros. Sem SKIP LOCKED (SQLite), os candidatos são lidos fora da
+transação, sorteados entre os mais antigos e assumidos com um UPDATE
+condicional; o que outro auditor levou antes é simplesmente ignorado e a
+busca se repete.
+
+Contadores do dashboard
+-----------------------
+`review_counters` calcula os quatro contadores do dashboard do auditor em
+uma única agregação condicional e os mantém alguns segundos em cache. As
+ações do próprio auditor invalidam o seu cache; mudanças feitas por outros
+aparecem quando ele expira.
+
+Ações em lote
+-------------
+Aprovar, rejeitar ou assumir centenas de créditos é um único UPDATE
+condicional, em vez de um `save()` por crédito (com `clean()` e os signals
+de cada linha).
+
+Como `.update()` não dispara signals, o que os receivers fariam é feito
+aqui: deltas somados em `PlatformStats`, invalidação do cache da API pública
+após o commit (aprovações) e nenhum histórico de propriedade (o dono não
+muda).
+"""
+
+from __future__ import annotations
+
+import random
+from types import SimpleNamespace
+from typing import Any
+
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+from api.cache import invalidate_credit_statuses
+from dashboard.models import PlatformStats
+from dashboard.stats import contribution_delta, credit_contribution
+
+from .models import CarbonCredit
+
+# Créditos por requisição de revisão em lote
+MAX_BULK_REVIEW = 5000
+
+# Créditos por pedido à fila de revisão
+MAX_CLAIM = 100
+# Sem SKIP LOCKED: candidatos sorteados entre os `n * CLAIM_WINDOW` mais
+# antigos, para auditores simultâneos não disputarem sempre as mesmas linhas
+CLAIM_WINDOW = 4
+CLAIM_ATTEMPTS = 5
+
+# Segundos em cache dos contadores do dashboard do auditor
+REVIEW_COUNTERS_TIMEOUT = 30
+
+
+class ReviewError(Exception):
+    """Revisão recusada; a mensagem é exibida ao usuário."""
+
+
+class BulkAction(models.TextChoices):
+    CLAIM = "claim", "Assumir (Em Análise)"
+    APPROVE = "approve", "Aprovar"
+    REJECT = "reject", "Rejeitar"
+
+
+# ---------------------------------------------------------------------------
+# Fila de revisão
+# ---------------------------------------------------------------------------
+
+def _free(now: Any) -> Q:
+    """Créditos livres: pendentes ou com a reserva expirada."""
+    return Q(validation_status=CarbonCredit.ValidationStatus.PENDING) | Q(
+        validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW,
+        review_lease_until__lt=now,
+    )
+
+
+def review_queue(now: Any = None) -> QuerySet[CarbonCredit]:
+    """Créditos livres, dos mais antigos aos mais novos."""
+    return CarbonCredit.objects.filter(_free(now or timezone.now())).order_by("created_at", "id")
+
+
+def _pending_delta(count: int) -> dict[str, Any]:
+    """Delta de `count` créditos saindo de PENDING para UNDER_REVIEW."""
+    before = SimpleNamespace(
+        amount=0, status=None, validation_status=CarbonCredit.ValidationStatus.PENDING, is_deleted=False
+    )
+    after = SimpleNamespace(
+        amount=0, status=None, validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW, is_deleted=False
+    )
+    per_credit = contribution_delta(credit_contribution(before), credit_contribution(after))
+    return {name: value * count for name, value in per_credit.items()}
+
+
+def _claim(auditor: Any, ids: list[int], now: Any) -> list[int]:
+    """
+    Assume, dentre `ids`, os que ainda estão livres. Retorna os assumidos.
+
+    Dois UPDATEs condicionais (pendentes e reservas expiradas) para saber
+    exatamente quantos saem de PENDING. O fim da reserva, único por chamada,
+    identifica as linhas assumidas aqui.
+    """
+    lease_until = now + CarbonCredit.REVIEW_LEASE
+    changes = {
+        "validation_status": CarbonCredit.ValidationStatus.UNDER_REVIEW,
+        "validated_by": auditor,
+        "review_lease_until": lease_until,
+        "updated_at": now,
+    }
+    with transaction.atomic():
+        pending = CarbonCredit.objects.filter(
+            pk__in=ids, validation_status=CarbonCredit.ValidationStatus.PENDING
+        ).update(**changes)
+        expired = CarbonCredit.objects.filter(
+            pk__in=ids,
+            validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW,
+            review_lease_until__lt=now,
+        ).update(**changes)
+        if not pending + expired:
+            return []
+        PlatformStats.apply_deltas(_pending_delta(pending))
+        invalidate_review_counters(auditor.pk)
+        return list(
+            CarbonCredit.objects.filter(
+                pk__in=ids, validated_by=auditor, review_lease_until=lease_until
+            ).values_list("pk", flat=True)
+        )
+
+
+def claim_next_credits(auditor: Any, count: int) -> list[int]:
+    """
+    Reserva para `auditor` os próximos `count` créditos livres (até
+    MAX_CLAIM) e retorna seus ids. Menos que `count` só se a fila acabar.
+    """
+    count = max(0, min(count, MAX_CLAIM))
+    claimed: list[int] = []
+    if connection.features.has_select_for_update_skip_locked:
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                review_queue(now).select_for_update(skip_locked=True).values_list("pk", flat=True)[:count]
+            )
+            return _claim(auditor, ids, now) if ids else []
+
+    for _ in range(CLAIM_ATTEMPTS):
+        wanted = count - len(claimed)
+        if wanted <= 0:
+            break
+        now = timezone.now()
+        window = list(review_queue(now).values_list("pk", flat=True)[:wanted * CLAIM_WINDOW])
+        if not window:
+            break
+        claimed += _claim(auditor, random.sample(window, min(wanted, len(window))), now)
+    return claimed
+
+
+def claim_credit(auditor: Any, credit_id: int) -> bool:
+    """
+    Assume (ou renova) a análise de um crédito específico.
+
+    Falha (False) se outro auditor o reservou e a reserva ainda vale, ou se
+    o crédito já foi aprovado/rejeitado.
+    """
+    now = timezone.now()
+    if _claim(auditor, [credit_id], now):
+        return True
+    return renew_reviews(auditor, [credit_id]) == 1
+
+
+def renew_reviews(auditor: Any, credit_ids: list[int]) -> int:
+    """Estende as reservas do próprio auditor (ex.: ao abrir a revisão)."""
+    return CarbonCredit.objects.filter(
+        pk__in=credit_ids,
+        validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW,
+        validated_by=auditor,
+    ).update(review_lease_until=timezone.now() + CarbonCredit.REVIEW_LEASE)
+
+
+def release_reviews(credits: QuerySet[CarbonCredit]) -> int:
+    """Devolve créditos em análise à fila (PENDING, sem auditor nem reserva)."""
+    now = timezone.now()
+    with transaction.atomic():
+        released = credits.filter(validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW).update(
+            validation_status=CarbonCredit.ValidationStatus.PENDING,
+            validated_by=None,
+            review_lease_until=None,
+            updated_at=now,
+        )
+        PlatformStats.apply_deltas(_pending_delta(-released))
+    return released
+
+
+def release_expired_reviews() -> int:
+    """Devolve à fila as análises com reserva expirada (cron)."""
+    return release_reviews(CarbonCredit.objects.filter(review_lease_until__lt=timezone.now()))
+
+
+# ---------------------------------------------------------------------------
+# Contadores do dashboard
+# ---------------------------------------------------------------------------
+
+def _counters_key(auditor_id: int) -> str:
+    return f"credits:review-counters:{auditor_id}"
+
+
+def review_counters(auditor: Any) -> dict[str, int]:
+    """
+    Pendentes (de todos), e em análise, aprovados e rejeitados pelo auditor.
+
+    Uma agregação condicional sobre os pendentes e os créditos do auditor,
+    cacheada por REVIEW_COUNTERS_TIMEOUT segundos.
+    """
+    key = _counters_key(auditor.pk)
+    counters = cache.get(key)
+    if counters is None:
+        status = CarbonCredit.ValidationStatus
+        mine = Q(validated_by=auditor)
+        counters = CarbonCredit.objects.filter(Q(validation_status=status.PENDING) | mine).aggregate(
+            pending_count=Count("id", filter=Q(validation_status=status.PENDING)),
+            under_review_count=Count("id", filter=mine & Q(validation_status=status.UNDER_REVIEW)),
+            approved_by_me_count=Count("id", filter=mine & Q(validation_status=status.APPROVED)),
+            rejected_by_me_count=Count("id", filter=mine & Q(validation_status=status.REJECTED)),
+        )
+        cache.set(key, counters, REVIEW_COUNTERS_TIMEOUT)
+    return counters
+
+
+def invalidate_review_counters(auditor_id: int) -> None:
+    """Descarta os contadores cacheados do auditor após o commit."""
+    transaction.on_commit(lambda: cache.delete(_counters_key(auditor_id)))
+
+
+# ---------------------------------------------------------------------------
+# Ações em lote
+# ---------------------------------------------------------------------------
+
+def reviewable_credits(auditor: Any, action: str) -> QuerySet[CarbonCredit]:
+    """
+    Créditos em que `auditor` pode aplicar `action`.
+
+    Assumir: créditos livres (pendentes ou com reserva expirada).
+    Aprovar/rejeitar: livres ou em análise pelo próprio auditor (nunca os
+    que outro auditor mantém reservados).
+    """
+    free = _free(timezone.now())
+    if action == BulkAction.CLAIM:
+        return CarbonCredit.objects.filter(free)
+    return CarbonCredit.objects.filter(
+        free | Q(validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW, validated_by=auditor)
+    )
+
+
+def _changes(auditor: Any, action: str, notes: str, now: Any) -> dict[str, Any]:
+    """Os mesmos campos de start_review / approve_validation / reject_validation."""
+    if action == BulkAction.CLAIM:
+        return {
+            "validation_status": CarbonCredit.ValidationStatus.UNDER_REVIEW,
+            "validated_by": auditor,
+            "review_lease_until": now + CarbonCredit.REVIEW_LEASE,
+        }
+    approved = action == BulkAction.APPROVE
+    return {
+        "validation_status": (
+            CarbonCredit.ValidationStatus.APPROVED if approved else CarbonCredit.ValidationStatus.REJECTED
+        ),
+        "validated_by": auditor,
+        "validated_at": now,
+        "auditor_notes": notes,
+        "is_verified": approved,
+        "review_lease_until": None,
+    }
+
+
+def bulk_review(auditor: Any, action: str, credits: QuerySet[CarbonCredit], notes: str = "") -> int:
+    """
+    Aplica `action` aos créditos de `credits` que o auditor pode revisar
+    (até `MAX_BULK_REVIEW`). Retorna quantos foram alterados.
+
+    Levanta `ReviewError` para ação inválida, aprovação/rejeição sem
+    observações ou se algum crédito mudou durante a operação (nada é gravado).
+    """
+    if action not in BulkAction.values:
+        raise ReviewError("Ação inválida.")
+    notes = notes.strip()
+    if action == BulkAction.APPROVE and not notes:
+        raise ReviewError("❌ Adicione observações sobre a aprovação")
+    if action == BulkAction.REJECT and not notes:
+        raise ReviewError("❌ Você deve explicar o motivo da rejeição")
+
+    eligible = reviewable_credits(auditor, action)
+    now = timezone.now()
+    changes = _changes(auditor, action, notes, now)
+
+    with transaction.atomic():
+        rows = list(
+            eligible.filter(pk__in=credits.values("pk"))
+            .select_for_update()
+            .order_by("pk")
+            .values_list("pk", "amount", "status", "validation_status")[:MAX_BULK_REVIEW]
+        )
+        if not rows:
+            return 0
+
+        ids = [pk for pk, *_ in rows]
+        # Mesmo filtro da leitura: um crédito revisado por outro auditor no
+        # meio do caminho deixa a contagem menor e desfaz tudo
+        updated = eligible.filter(pk__in=ids).update(**changes, updated_at=now)
+        if updated != len(ids):
+            raise ReviewError("Alguns créditos foram alterados por outro auditor. Tente novamente.")
+
+        PlatformStats.apply_deltas(_stats_delta(rows, changes["validation_status"]))
+        invalidate_review_counters(auditor.pk)
+        if action == BulkAction.APPROVE:
+            # Passam a aparecer na API pública sob o status atual
+            statuses = {status for _, _, status, _ in rows}
+            transaction.on_commit(lambda: invalidate_credit_statuses(statuses))
+    return len(ids)
+
+
+def _stats_delta(rows: list[tuple], validation_status: str) -> dict[str, Any]:
+    """Soma dos deltas de contribuição de cada linha (antes → depois)."""
+    total: dict[str, Any] = {}
+    for _, amount, status, old_validation in rows:
+        before = SimpleNamespace(amount=amount, status=status, validation_status=old_validation, is_deleted=False)
+        after = SimpleNamespace(amount=amount, status=status, validation_status=validation_status, is_deleted=False)
+        for name, value in contribution_delta(credit_contribution(before), credit_contribution(after)).items():
+            total[name] = total.get(name, 0) + value
+    return total
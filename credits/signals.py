@@ -2,19 +2,32 @@
 
 from __future__ import annotations
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import CarbonCredit, CreditOwnershipHistory
+from api.cache import invalidate_credit_statuses
+from dashboard.models import PlatformStats, UserTradingStats
+from dashboard.stats import contribution_delta, listing_contribution
+
+from .models import CarbonCredit, CreditListing, CreditOwnershipHistory
+from .search import invalidate_marketplace
+
+# Campos do crédito que afetam suas listagens ativas
+LISTING_SOURCE_FIELDS = frozenset({"status", "is_deleted", *CreditListing.CREDIT_FIELDS})
 
 
 @receiver(post_save, sender=CarbonCredit)
-def track_credit_ownership(sender, instance, created, **kwargs):
+def track_credit_ownership(sender, instance, created, update_fields=None, **kwargs):
     """
     Cria registro de histórico de propriedade automaticamente.
 
     - Na criação: primeiro registro com from_owner=None (GENESIS)
     - Na mudança de owner: novo registro com transfer_type=SALE ou TRANSFER
+
+    O dono anterior vem de `_loaded_owner_id` (gravado em `from_db`): saves
+    que não mudam o dono não fazem nenhuma consulta. Todo crédito já tem o
+    registro GENESIS (ver `credits.history`), então não há histórico ausente.
     """
     if created:
         # Primeira entrada: criação do crédito
@@ -25,43 +38,127 @@ def track_credit_ownership(sender, instance, created, **kwargs):
             transfer_type=CreditOwnershipHistory.TransferType.CREATION,
             notes=f"Crédito criado: {instance.amount} {instance.unit} de {instance.origin}"
         )
+        instance._loaded_owner_id = instance.owner_id
+        return
+
+    if update_fields is not None and "owner" not in update_fields:
+        return
+
+    if hasattr(instance, "_loaded_owner_id"):
+        previous_owner_id = instance._loaded_owner_id
     else:
-        # Verificar se houve mudança de propriedade
-        # Buscar o owner anterior do último registro
+        # Instância não veio do banco: dono anterior pelo último registro
         last_history = instance.ownership_history.last()
+        previous_owner_id = last_history.to_owner_id if last_history else None
+    instance._loaded_owner_id = instance.owner_id
 
-        # Handle legacy credits without history (create GENESIS entry)
-        if not last_history:
-            CreditOwnershipHistory.objects.create(
-                credit=instance,
-                from_owner=None,
-                to_owner=instance.owner,
-                transfer_type=CreditOwnershipHistory.TransferType.CREATION,
-                notes="Entrada retroativa para crédito legado"
-            )
-        elif last_history.to_owner != instance.owner:
-            # Owner mudou - criar novo registro
-            # Inferir tipo de transferência baseado no status
-            transfer_type = (
-                CreditOwnershipHistory.TransferType.SALE
-                if instance.status == CarbonCredit.Status.SOLD
-                else CreditOwnershipHistory.TransferType.TRANSFER
-            )
+    if previous_owner_id is None or previous_owner_id == instance.owner_id:
+        return
+    # Para `sync_active_listings`: as listagens ativas contavam para o dono anterior
+    instance._previous_owner_id = previous_owner_id
+
+    # Owner mudou - inferir tipo de transferência baseado no status
+    transfer_type = (
+        CreditOwnershipHistory.TransferType.SALE
+        if instance.status == CarbonCredit.Status.SOLD
+        else CreditOwnershipHistory.TransferType.TRANSFER
+    )
+
+    # Buscar transação relacionada se existir
+    related_transaction = None
+    if transfer_type == CreditOwnershipHistory.TransferType.SALE:
+        # Pegar a transação mais recente COMPLETED para este crédito
+        related_transaction = instance.transactions.filter(
+            status='COMPLETED',
+            buyer_id=instance.owner_id
+        ).order_by('-timestamp').first()
+
+    CreditOwnershipHistory.objects.create(
+        credit=instance,
+        from_owner_id=previous_owner_id,
+        to_owner_id=instance.owner_id,
+        transfer_type=transfer_type,
+        transaction=related_transaction,
+        price=related_transaction.total_price if related_transaction else None,
+    )
+
+
+@receiver(post_save, sender=CarbonCredit)
+def invalidate_public_api_cache(sender, instance, created, **kwargs):
+    """
+    Invalida as páginas cacheadas de /api/credits/ afetadas pelo save.
+
+    Cobre criação, aprovação/rejeição, listagem, venda e soft delete. Só os
+    status em que o crédito aparecia antes e aparece depois são invalidados;
+    créditos fora da API (pendentes, rejeitados) não invalidam nada.
+    A invalidação ocorre após o commit, para nenhuma requisição concorrente
+    recachear o estado antigo.
+    """
+    new_status = instance.public_status
+    if created:
+        statuses = {new_status}
+    elif hasattr(instance, "_loaded_public_status"):
+        statuses = {instance._loaded_public_status, new_status}
+    else:
+        # Estado anterior desconhecido (instância não veio do banco)
+        statuses = set(CarbonCredit.Status.values)
+    instance._loaded_public_status = new_status
+
+    statuses.discard(None)
+    if statuses:
+        transaction.on_commit(lambda: invalidate_credit_statuses(statuses))
 
-            # Buscar transação relacionada se existir
-            related_transaction = None
-            if transfer_type == CreditOwnershipHistory.TransferType.SALE:
-                # Pegar a transação mais recente COMPLETED para este crédito
-                related_transaction = instance.transactions.filter(
-                    status='COMPLETED',
-                    buyer=instance.owner
-                ).order_by('-timestamp').first()
-
-            CreditOwnershipHistory.objects.create(
-                credit=instance,
-                from_owner=last_history.to_owner,
-                to_owner=instance.owner,
-                transfer_type=transfer_type,
-                transaction=related_transaction,
-                price=related_transaction.total_price if related_transaction else None,
+
+@receiver(post_delete, sender=CarbonCredit)
+def invalidate_public_api_cache_on_delete(sender, instance, **kwargs):
+    """Deleção real (hard_delete) de um crédito público."""
+    status = getattr(instance, "_loaded_public_status", instance.public_status)
+    if status:
+        transaction.on_commit(lambda: invalidate_credit_statuses({status}))
+
+
+@receiver(post_save, sender=CarbonCredit)
+def sync_active_listings(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mantém as listagens ativas coerentes com o crédito.
+
+    Crédito que deixou de estar LISTED (vendido, retirado, deletado) tem as
+    listagens ativas desativadas; nos demais casos a cópia de origem,
+    quantidade e data de geração é atualizada. Um UPDATE, só em saves que
+    podem mudar esses campos.
+    """
+    if created or (
+        update_fields is not None and not LISTING_SOURCE_FIELDS.intersection(update_fields)
+        and "owner" not in update_fields
+    ):
+        return
+
+    previous_owner_id = instance.__dict__.pop("_previous_owner_id", instance.owner_id)
+    active = CreditListing.objects.filter(credit_id=instance.pk, is_active=True)
+    if instance.status == CarbonCredit.Status.LISTED and not instance.is_deleted:
+        changed = active.update(**{name: getattr(instance, name) for name in CreditListing.CREDIT_FIELDS})
+        if changed and previous_owner_id != instance.owner_id:
+            # Listagens ativas passam a contar para o novo dono
+            UserTradingStats.apply_deltas({
+                previous_owner_id: {"listed_credits": -changed},
+                instance.owner_id: {"listed_credits": changed},
+            })
+    else:
+        changed = active.update(is_active=False)
+        if changed:
+            # .update() não dispara os signals do dashboard
+            delta = contribution_delta(
+                listing_contribution(CreditListing(is_active=True)),
+                listing_contribution(CreditListing(is_active=False)),
             )
+            UserTradingStats.apply_deltas({previous_owner_id: {"listed_credits": -changed}})
+            PlatformStats.apply_deltas({name: value * changed for name, value in delta.items()})
+    if changed:
+        invalidate_marketplace()
+
+
+@receiver(post_save, sender=CreditListing)
+@receiver(post_delete, sender=CreditListing)
+def invalidate_marketplace_facets(sender, **kwargs):
+    """Listagem criada, alterada ou removida: facetas do marketplace mudam."""
+    invalidate_marketplace()
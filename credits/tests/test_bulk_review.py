@@ -0,0 +1,121 @@
+"""Testes da revisão em lote dos auditores (credits.services)."""
+
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from credits.models import CarbonCredit
+from credits.services import BulkAction, ReviewError, bulk_review
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+
+
+class BulkReviewTests(TestCase):
+    def setUp(self):
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.other_auditor = User.objects.create_user(
+            username="other", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        CarbonCredit.objects.bulk_create([
+            CarbonCredit(
+                owner=self.producer,
+                amount=10 + i,
+                origin="Projeto A",
+                generation_date=date(2025, 1, 1),
+                status=CarbonCredit.Status.LISTED if i % 2 else CarbonCredit.Status.AVAILABLE,
+            )
+            for i in range(300)
+        ])
+        PlatformStats.rebuild()
+        self.credits = CarbonCredit.objects.all()
+
+    def assert_stats_consistent(self):
+        stats = PlatformStats.objects.get()
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+    def test_approve_in_constant_queries(self):
+        with self.assertNumQueries(5):  # savepoint, SELECT, UPDATE, stats, release
+            count = bulk_review(self.auditor, BulkAction.APPROVE, self.credits, "Projeto auditado")
+
+        self.assertEqual(count, 300)
+        approved = CarbonCredit.objects.filter(validation_status=CarbonCredit.ValidationStatus.APPROVED)
+        self.assertEqual(approved.filter(validated_by=self.auditor, is_verified=True).count(), 300)
+        self.assertFalse(approved.filter(validated_at__isnull=True).exists())
+        self.assert_stats_consistent()
+
+    def test_claim_then_reject(self):
+        subset = self.credits.filter(pk__in=list(self.credits.values_list("pk", flat=True)[:10]))
+        self.assertEqual(bulk_review(self.auditor, BulkAction.CLAIM, subset), 10)
+        self.assert_stats_consistent()
+
+        # Créditos assumidos por outro auditor ficam de fora
+        self.assertEqual(bulk_review(self.other_auditor, BulkAction.REJECT, subset, "Duplicado"), 0)
+        self.assertEqual(bulk_review(self.auditor, BulkAction.REJECT, subset, "Duplicado"), 10)
+
+        rejected = CarbonCredit.objects.filter(validation_status=CarbonCredit.ValidationStatus.REJECTED)
+        self.assertEqual(set(rejected.values_list("auditor_notes", flat=True)), {"Duplicado"})
+        self.assert_stats_consistent()
+
+    def test_notes_required(self):
+        with self.assertRaisesMessage(ReviewError, "motivo da rejeição"):
+            bulk_review(self.auditor, BulkAction.REJECT, self.credits, "  ")
+        self.assertFalse(CarbonCredit.objects.exclude(
+            validation_status=CarbonCredit.ValidationStatus.PENDING
+        ).exists())
+
+
+class BulkReviewViewTests(TestCase):
+    def setUp(self):
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.producers = [
+            User.objects.create_user(username=f"producer{i}", password="pass123", role=User.Roles.PRODUCER)
+            for i in range(2)
+        ]
+        for producer in self.producers:
+            for _ in range(3):
+                CarbonCredit.objects.create(
+                    owner=producer, amount=5, origin="Farm", generation_date=date(2025, 1, 1)
+                )
+        self.url = reverse("credits:bulk_review_credits")
+        self.client.force_login(self.auditor)
+
+    def test_selected_ids(self):
+        ids = list(CarbonCredit.objects.values_list("pk", flat=True)[:2])
+        response = self.client.post(self.url, {"action": "claim", "credit_ids": ids, "tab": "pending"})
+
+        self.assertRedirects(response, reverse("credits:auditor_dashboard") + "?tab=pending")
+        claimed = CarbonCredit.objects.filter(validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW)
+        self.assertEqual(sorted(claimed.values_list("pk", flat=True)), sorted(ids))
+
+    def test_select_all_with_owner_filter(self):
+        self.client.post(self.url, {
+            "action": "approve",
+            "notes": "Lote conferido",
+            "select_all": "1",
+            "tab": "pending",
+            "owner": "producer0",
+        })
+
+        approved = CarbonCredit.objects.filter(validation_status=CarbonCredit.ValidationStatus.APPROVED)
+        self.assertEqual({c.owner for c in approved}, {self.producers[0]})
+        self.assertEqual(approved.count(), 3)
+
+    def test_dashboard_renders_bulk_form(self):
+        response = self.client.get(reverse("credits:auditor_dashboard"), {"owner": "producer1"})
+        self.assertContains(response, 'id="bulk-review-form"')
+        self.assertContains(response, 'name="credit_ids"', count=3)
+
+    def test_requires_auditor(self):
+        self.client.force_login(self.producers[0])
+        response = self.client.post(self.url, {"action": "claim", "select_all": "1"})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,154 @@
+"""Testes do encadeamento por hash, das raízes de Merkle e da verificação."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from credits.history import merkle_levels, merkle_proof, merkle_root, verify_proof
+from credits.integrity import inclusion_proof, seal_daily_roots, verify_history
+from credits.models import (
+    CarbonCredit,
+    CreditListing,
+    CreditOwnershipHistory,
+    OwnershipHistoryNode,
+    OwnershipHistoryRoot,
+)
+from transactions.services import purchase_credit
+
+
+class MerkleTreeTests(SimpleTestCase):
+    def test_every_leaf_proves_into_root(self):
+        for size in range(1, 10):
+            hashes = [f"{i:064x}" for i in range(size)]
+            levels = merkle_levels(hashes)
+            root = merkle_root(hashes)
+            for index, record_hash in enumerate(hashes):
+                proof = merkle_proof(levels, index)
+                self.assertLessEqual(len(proof), max(1, (size - 1).bit_length()))
+                self.assertTrue(verify_proof(record_hash, proof, root), (size, index))
+                self.assertFalse(verify_proof(f"{size + 1:064x}", proof, root))
+
+    def test_root_depends_on_order(self):
+        hashes = [f"{i:064x}" for i in range(4)]
+        self.assertNotEqual(merkle_root(hashes), merkle_root(hashes[::-1]))
+
+
+class HistoryIntegrityTests(TestCase):
+    def setUp(self):
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.company.profile.add_balance(Decimal("1000.00"))
+        self.credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal("10.00"),
+            origin="Farm",
+            generation_date=date(2025, 1, 1),
+            status=CarbonCredit.Status.LISTED,
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        CreditListing.objects.create(credit=self.credit, price_per_unit=Decimal("12.34"))
+        purchase_credit(self.company, self.credit.pk)
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+
+    def test_records_are_chained(self):
+        genesis, sale = CreditOwnershipHistory.objects.filter(credit=self.credit).order_by("id")
+        self.assertEqual(genesis.previous_hash, "")
+        self.assertEqual(sale.previous_hash, genesis.record_hash)
+        self.assertEqual(len(sale.record_hash), 64)
+        self.assertEqual(verify_history(), (0, 2, []))
+
+    def test_tampering_is_detected(self):
+        sale = CreditOwnershipHistory.objects.get(transfer_type=CreditOwnershipHistory.TransferType.SALE)
+        CreditOwnershipHistory.objects.filter(pk=sale.pk).update(price=Decimal("1.00"))
+
+        _, _, problems = verify_history()
+        self.assertEqual(problems, [f"registro {sale.pk}: conteúdo não confere com record_hash"])
+
+    def test_seal_then_verify_incrementally(self):
+        [root] = seal_daily_roots(today=self.tomorrow)
+        self.assertEqual((root.day, root.leaf_count), (timezone.localdate(), 2))
+        # Dia já selado: nada novo
+        self.assertEqual(seal_daily_roots(today=self.tomorrow), [])
+
+        self.assertEqual(verify_history(), (1, 2, []))
+        root.refresh_from_db()
+        self.assertIsNotNone(root.verified_at)
+
+        # Raiz já verificada: a verificação incremental não relê os registros
+        genesis = CreditOwnershipHistory.objects.order_by("id").first()
+        CreditOwnershipHistory.objects.filter(pk=genesis.pk).update(notes="editado")
+        self.assertEqual(verify_history(), (0, 0, []))
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "divergência(s) no histórico"):
+            call_command("verify_ownership_history", full=True, stdout=out)
+        self.assertIn(f"registro {genesis.pk}", out.getvalue())
+
+    def test_root_mismatch_is_detected(self):
+        seal_daily_roots(today=self.tomorrow)
+        OwnershipHistoryRoot.objects.update(root_hash="0" * 64)
+
+        _, _, problems = verify_history()
+        self.assertEqual(len(problems), 1)
+        self.assertIn("não confere com os registros", problems[0])
+        self.assertIsNone(OwnershipHistoryRoot.objects.get().verified_at)
+
+    def test_proof_endpoint(self):
+        sale = CreditOwnershipHistory.objects.get(transfer_type=CreditOwnershipHistory.TransferType.SALE)
+        url = reverse("api:history_proof", kwargs={"record_id": sale.pk})
+        self.assertEqual(self.client.get(url).status_code, 404)  # ainda sem raiz
+
+        # O dia corrente só é selado no dia seguinte
+        out = StringIO()
+        call_command("seal_ownership_history", stdout=out)
+        self.assertIn("0 raiz(es)", out.getvalue())
+        seal_daily_roots(today=self.tomorrow)
+
+        data = self.client.get(url).json()["data"]
+        self.assertEqual(data["record_hash"], sale.record_hash)
+        self.assertEqual(data["root_hash"], OwnershipHistoryRoot.objects.get().root_hash)
+        self.assertTrue(verify_proof(data["record_hash"], data["proof"], data["root_hash"]))
+
+    def test_proofs_read_stored_nodes(self):
+        """Provas leem só os irmãos gravados ao selar, com consultas constantes."""
+        for i in range(5):
+            CarbonCredit.objects.create(
+                owner=self.producer, amount=Decimal("1.00"), origin=f"Farm {i}",
+                generation_date=date(2025, 1, 1),
+                validation_status=CarbonCredit.ValidationStatus.APPROVED,
+            )
+        [root] = seal_daily_roots(today=self.tomorrow)
+        self.assertEqual(OwnershipHistoryNode.objects.filter(root=root, level=0).count(), root.leaf_count)
+
+        for record in CreditOwnershipHistory.objects.all():
+            with self.assertNumQueries(3):
+                proof = inclusion_proof(record.pk)
+            self.assertTrue(verify_proof(proof["record_hash"], proof["proof"], root.root_hash), record.pk)
+
+    def test_proof_is_read_only(self):
+        """Sem nós gravados não há prova, e o GET público não grava nada."""
+        seal_daily_roots(today=self.tomorrow)
+        OwnershipHistoryNode.objects.all().delete()
+        sale = CreditOwnershipHistory.objects.order_by("id").last()
+
+        with self.assertNumQueries(2):
+            self.assertIsNone(inclusion_proof(sale.pk))
+        self.assertFalse(OwnershipHistoryNode.objects.exists())
+
+    def test_proof_hidden_for_non_public_credit(self):
+        seal_daily_roots(today=self.tomorrow)
+        CarbonCredit.objects.filter(pk=self.credit.pk).update(is_deleted=True)
+        sale = CreditOwnershipHistory.objects.order_by("id").last()
+        response = self.client.get(reverse("api:history_proof", kwargs={"record_id": sale.pk}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,156 @@
+"""Testes da busca do marketplace (credits.search)."""
+
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.urls import reverse
+
+from accounts.models import User
+from credits.checks import check_search_triggers
+from credits.models import CarbonCredit, CreditListing
+from credits.search import listing_facets, search_listings
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+
+
+class MarketplaceSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.amazonia = self.list_credit("Amazônia, AM", 100, date(2023, 5, 1), 50)
+        self.cerrado = self.list_credit("Cerrado, GO", 20, date(2024, 2, 1), 80)
+        self.amazonia_recent = self.list_credit("Amazônia, PA", 300, date(2024, 8, 1), 70)
+
+    def list_credit(self, origin, amount, generation_date, price):
+        credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            origin=origin,
+            amount=amount,
+            generation_date=generation_date,
+            status=CarbonCredit.Status.LISTED,
+        )
+        return CreditListing.objects.create(credit=credit, price_per_unit=price)
+
+    def search(self, **filters):
+        return list(search_listings(filters))
+
+    def test_listing_copies_credit_fields(self):
+        self.assertEqual(self.amazonia.origin, "Amazônia, AM")
+        self.assertEqual(self.amazonia.amount, Decimal("100"))
+        self.assertEqual(self.amazonia.generation_date, date(2023, 5, 1))
+
+    def test_text_search_ignores_accents_and_matches_prefixes(self):
+        self.assertEqual(
+            self.search(q="amazonia", sort="price"), [self.amazonia, self.amazonia_recent]
+        )
+        self.assertEqual(self.search(q="cerr"), [self.cerrado])
+        self.assertEqual(self.search(q="amazonia pa"), [self.amazonia_recent])
+        self.assertEqual(self.search(q="pantanal"), [])
+
+    def test_ranges_and_sorting(self):
+        self.assertEqual(
+            self.search(min_price=Decimal("60"), sort="-price"), [self.cerrado, self.amazonia_recent]
+        )
+        self.assertEqual(self.search(min_amount=Decimal("50"), max_amount=Decimal("200")), [self.amazonia])
+        self.assertEqual(
+            self.search(generated_from=date(2024, 1, 1), sort="vintage"), [self.cerrado, self.amazonia_recent]
+        )
+        self.assertEqual(self.search(vintage=2023), [self.amazonia])
+        self.assertEqual(self.search(region="Cerrado, GO"), [self.cerrado])
+
+    def test_facets_single_query_then_cached(self):
+        with self.assertNumQueries(1):
+            facets = listing_facets({"q": "amazonia"})
+        self.assertEqual(facets["total"], 2)
+        self.assertEqual(sorted(facets["regions"]), [("Amazônia, AM", 1), ("Amazônia, PA", 1)])
+        self.assertEqual(facets["vintages"], [(2024, 1), (2023, 1)])
+        # A ordenação não muda as facetas
+        with self.assertNumQueries(0):
+            listing_facets({"q": "amazonia", "sort": "-price"})
+
+    def test_facets_group_by_year_in_the_database(self):
+        """Datas diferentes da mesma região e safra viram uma única linha."""
+        self.list_credit("Amazônia, AM", 5, date(2023, 11, 20), 60)
+        facets = listing_facets({"region": "Amazônia, AM"})
+        self.assertEqual(facets["vintages"], [(2023, 2)])
+        self.assertEqual(facets["regions"], [("Amazônia, AM", 2)])
+
+    def test_new_listing_invalidates_facets(self):
+        self.assertEqual(listing_facets({})["total"], 3)
+        self.list_credit("Mata Atlântica, SP", 10, date(2022, 1, 1), 40)
+        self.assertEqual(listing_facets({})["total"], 4)
+
+    def test_sold_credit_leaves_marketplace(self):
+        PlatformStats.rebuild()
+        credit = self.cerrado.credit
+        credit.status = CarbonCredit.Status.SOLD
+        credit.save(update_fields=["status"])
+
+        self.cerrado.refresh_from_db()
+        self.assertFalse(self.cerrado.is_active)
+        self.assertEqual(listing_facets({})["total"], 2)
+        stats = PlatformStats.objects.get()
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+
+class SearchTriggersCheckTests(TestCase):
+    """Os triggers do FTS5 existem depois do migrate, e o check aponta a falta."""
+
+    def test_triggers_exist_after_migrate(self):
+        self.assertEqual(check_search_triggers(databases=["default"]), [])
+
+    @skipUnlessDBFeature("can_rollback_ddl")
+    def test_missing_trigger_is_reported(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("triggers da busca só existem no SQLite")
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER credits_listing_fts_au")
+
+        [warning] = check_search_triggers(databases=["default"])
+
+        self.assertEqual(warning.id, "credits.W001")
+        self.assertIn("credits_listing_fts_au", warning.msg)
+
+
+class MarketplaceViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        for i in range(12):
+            credit = CarbonCredit.objects.create(
+                owner=producer,
+                origin="Amazônia, AM" if i % 2 else "Cerrado, GO",
+                amount=10 + i,
+                generation_date=date(2024, 1, 1),
+                status=CarbonCredit.Status.LISTED,
+            )
+            CreditListing.objects.create(credit=credit, price_per_unit=10 + i)
+
+    def test_filters_facets_and_pagination(self):
+        url = reverse("credits:credits_marketplace")
+
+        response = self.client.get(url, {"q": "amazonia", "sort": "-price"})
+        self.assertEqual(response.status_code, 200)
+        listings = list(response.context["listings"])
+        self.assertEqual(len(listings), 6)
+        self.assertEqual(listings[0].price_per_unit, Decimal("21"))
+        self.assertEqual(response.context["facets"]["total"], 6)
+        self.assertContains(response, "?q=amazonia&amp;sort=-price&amp;region=")
+
+        response = self.client.get(url, {"sort": "price", "page": 2})
+        self.assertTrue(response.context["is_paginated"])
+        self.assertEqual([l.price_per_unit for l in response.context["listings"]], [Decimal("20"), Decimal("21")])
+        self.assertContains(response, "?sort=price&amp;page=1")
+
+    def test_invalid_filters_are_ignored(self):
+        response = self.client.get(reverse("credits:credits_marketplace"), {"min_price": "abc"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["facets"]["total"], 12)
@@ -0,0 +1,117 @@
+"""Testes do signal de histórico de propriedade e do backfill GENESIS."""
+
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from credits.models import CarbonCredit, CreditOwnershipHistory
+
+HISTORY_TABLE = CreditOwnershipHistory._meta.db_table
+
+
+class OwnershipHistorySignalTests(TestCase):
+    def setUp(self):
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        created = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=10,
+            origin="Test Farm",
+            generation_date=date(2025, 1, 1),
+        )
+        self.credit = CarbonCredit.objects.get(pk=created.pk)
+
+    def history_queries(self, queries):
+        return [q["sql"] for q in queries if HISTORY_TABLE in q["sql"]]
+
+    def test_saves_without_owner_change_skip_history(self):
+        """Revisão, aprovação e listagem não consultam o histórico."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.credit.start_review(self.auditor)
+            self.credit.approve_validation(self.auditor, "ok")
+            self.credit.status = CarbonCredit.Status.LISTED
+            self.credit.save(update_fields=["status"])
+            self.credit.origin = "Renamed Farm"
+            self.credit.save()
+
+        self.assertEqual(self.history_queries(ctx.captured_queries), [])
+        self.assertEqual(self.credit.ownership_history.count(), 1)
+
+    def test_owner_change_records_transfer(self):
+        self.credit.owner = self.company
+        with CaptureQueriesContext(connection) as ctx:
+            self.credit.save()
+
+        # Hash do registro anterior (encadeamento) e o INSERT do novo
+        self.assertEqual(len(self.history_queries(ctx.captured_queries)), 2)
+        transfer = self.credit.ownership_history.last()
+        self.assertEqual(transfer.transfer_type, CreditOwnershipHistory.TransferType.TRANSFER)
+        self.assertEqual((transfer.from_owner, transfer.to_owner), (self.producer, self.company))
+
+        # O dono gravado passa a ser a referência do próximo save
+        self.credit.owner = self.producer
+        self.credit.save()
+        back = self.credit.ownership_history.last()
+        self.assertEqual((back.from_owner, back.to_owner), (self.company, self.producer))
+
+    def test_unloaded_instance_falls_back_to_last_record(self):
+        """Instância montada à mão (sem from_db): dono anterior pelo histórico."""
+        detached = CarbonCredit(
+            pk=self.credit.pk,
+            owner=self.company,
+            amount=self.credit.amount,
+            origin=self.credit.origin,
+            generation_date=self.credit.generation_date,
+            created_at=self.credit.created_at,
+        )
+        detached.save()
+
+        transfer = self.credit.ownership_history.last()
+        self.assertEqual((transfer.from_owner, transfer.to_owner), (self.producer, self.company))
+
+
+class BackfillOwnershipHistoryTests(TestCase):
+    def setUp(self):
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        # bulk_create não dispara o signal: créditos "legados" sem histórico
+        self.legacy = CarbonCredit.objects.bulk_create([
+            CarbonCredit(
+                owner=self.producer,
+                amount=5,
+                origin=f"Legacy {i}",
+                generation_date=date(2024, 1, 1),
+                is_deleted=i == 2,
+            )
+            for i in range(3)
+        ])
+        self.tracked = CarbonCredit.objects.create(
+            owner=self.producer, amount=5, origin="Tracked", generation_date=date(2025, 1, 1)
+        )
+
+    def test_backfill_creates_missing_genesis_once(self):
+        out = StringIO()
+        call_command("backfill_ownership_history", batch_size=2, stdout=out)
+        self.assertIn("3 registro(s) GENESIS", out.getvalue())
+
+        for credit in [*self.legacy, self.tracked]:
+            genesis = CreditOwnershipHistory.objects.get(credit_id=credit.pk)
+            self.assertEqual(genesis.transfer_type, CreditOwnershipHistory.TransferType.CREATION)
+            self.assertIsNone(genesis.from_owner)
+            self.assertEqual(genesis.to_owner, self.producer)
+
+        call_command("backfill_ownership_history", stdout=out)
+        self.assertIn("0 registro(s) GENESIS", out.getvalue())
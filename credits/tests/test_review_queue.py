@@ -0,0 +1,185 @@
+"""Testes da fila de revisão com reservas (credits.services)."""
+
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from credits.models import CarbonCredit
+from credits.services import claim_credit, claim_next_credits, release_expired_reviews, review_counters
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+
+
+class ReviewQueueTests(TestCase):
+    def setUp(self):
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.other_auditor = User.objects.create_user(
+            username="other", password="pass123", role=User.Roles.AUDITOR
+        )
+        producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        CarbonCredit.objects.bulk_create([
+            CarbonCredit(owner=producer, amount=5, origin="Farm", generation_date=date(2025, 1, 1))
+            for _ in range(30)
+        ])
+        PlatformStats.rebuild()
+
+    def assert_stats_consistent(self):
+        stats = PlatformStats.objects.get()
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+    def expire(self, ids):
+        CarbonCredit.objects.filter(pk__in=ids).update(
+            review_lease_until=timezone.now() - timedelta(minutes=1)
+        )
+
+    def test_auditors_claim_disjoint_sets(self):
+        first = claim_next_credits(self.auditor, 12)
+        second = claim_next_credits(self.other_auditor, 12)
+
+        self.assertEqual((len(first), len(second)), (12, 12))
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(
+            CarbonCredit.objects.filter(validated_by=self.auditor, review_lease_until__isnull=False).count(), 12
+        )
+        # Restam 6 na fila
+        self.assertEqual(len(claim_next_credits(self.auditor, 50)), 6)
+        self.assertEqual(claim_next_credits(self.other_auditor, 5), [])
+        self.assert_stats_consistent()
+
+    def test_expired_lease_returns_to_queue(self):
+        held = claim_next_credits(self.auditor, 30)
+        self.assertFalse(claim_credit(self.other_auditor, held[0]))
+
+        self.expire(held[:3])
+        self.assertTrue(claim_credit(self.other_auditor, held[0]))
+        self.assertEqual(sorted(claim_next_credits(self.other_auditor, 10)), sorted(held[1:3]))
+        self.assert_stats_consistent()
+
+    def test_release_expired_reviews(self):
+        held = claim_next_credits(self.auditor, 10)
+        self.expire(held[:4])
+
+        out = StringIO()
+        call_command("release_expired_reviews", stdout=out)
+        self.assertIn("4 crédito(s) devolvido(s)", out.getvalue())
+
+        released = CarbonCredit.objects.filter(pk__in=held[:4])
+        self.assertFalse(released.exclude(validation_status=CarbonCredit.ValidationStatus.PENDING).exists())
+        self.assertFalse(released.filter(validated_by__isnull=False).exists())
+        self.assertEqual(release_expired_reviews(), 0)
+        self.assert_stats_consistent()
+
+    def test_approve_clears_lease(self):
+        [credit_id] = claim_next_credits(self.auditor, 1)
+        credit = CarbonCredit.objects.get(pk=credit_id)
+        self.assertTrue(credit.is_claimed_by_other(self.other_auditor))
+        self.assertFalse(credit.is_claimed_by_other(self.auditor))
+
+        credit.approve_validation(self.auditor, "ok")
+        credit.refresh_from_db()
+        self.assertIsNone(credit.review_lease_until)
+        self.assert_stats_consistent()
+
+
+class ReviewQueueViewTests(TestCase):
+    def setUp(self):
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.other_auditor = User.objects.create_user(
+            username="other", password="pass123", role=User.Roles.AUDITOR
+        )
+        producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        for _ in range(3):
+            CarbonCredit.objects.create(owner=producer, amount=5, origin="Farm", generation_date=date(2025, 1, 1))
+        self.client.force_login(self.auditor)
+
+    def test_claim_next_view(self):
+        response = self.client.post(reverse("credits:claim_next_credits"), {"count": "2"})
+
+        self.assertRedirects(response, reverse("credits:auditor_dashboard") + "?tab=under_review")
+        self.assertEqual(CarbonCredit.objects.filter(validated_by=self.auditor).count(), 2)
+
+    def test_other_auditor_cannot_approve_claimed_credit(self):
+        [credit_id] = claim_next_credits(self.other_auditor, 1)
+        url = reverse("credits:review_credit", kwargs={"pk": credit_id})
+
+        response = self.client.post(url, {"action": "approve", "notes": "ok"})
+
+        self.assertRedirects(response, reverse("credits:auditor_dashboard"))
+        credit = CarbonCredit.objects.get(pk=credit_id)
+        self.assertEqual(credit.validation_status, CarbonCredit.ValidationStatus.UNDER_REVIEW)
+        self.assertEqual(credit.validated_by, self.other_auditor)
+
+
+class ReviewCountersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        other = User.objects.create_user(username="other", password="pass123", role=User.Roles.AUDITOR)
+        producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        statuses = [
+            (CarbonCredit.ValidationStatus.PENDING, None),
+            (CarbonCredit.ValidationStatus.PENDING, None),
+            (CarbonCredit.ValidationStatus.UNDER_REVIEW, self.auditor),
+            (CarbonCredit.ValidationStatus.APPROVED, self.auditor),
+            (CarbonCredit.ValidationStatus.APPROVED, other),
+            (CarbonCredit.ValidationStatus.REJECTED, self.auditor),
+        ]
+        CarbonCredit.objects.bulk_create([
+            CarbonCredit(
+                owner=producer,
+                amount=5,
+                origin="Farm",
+                generation_date=date(2025, 1, 1),
+                validation_status=validation_status,
+                validated_by=validated_by,
+            )
+            for validation_status, validated_by in statuses
+        ])
+
+    def test_single_aggregate_then_cached(self):
+        expected = {
+            "pending_count": 2,
+            "under_review_count": 1,
+            "approved_by_me_count": 1,
+            "rejected_by_me_count": 1,
+        }
+        with self.assertNumQueries(1):
+            self.assertEqual(review_counters(self.auditor), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(review_counters(self.auditor), expected)
+
+    def test_own_actions_invalidate(self):
+        review_counters(self.auditor)
+        with self.captureOnCommitCallbacks(execute=True):
+            claim_next_credits(self.auditor, 1)
+
+        counters = review_counters(self.auditor)
+        self.assertEqual((counters["pending_count"], counters["under_review_count"]), (1, 2))
+
+    def test_dashboard_queries(self):
+        self.client.force_login(self.auditor)
+        url = reverse("credits:auditor_dashboard")
+        self.client.get(url)
+        # Sessão, usuário, COUNT e página (contadores em cache)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.context["pending_count"], 2)
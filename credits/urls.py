@@ -21,6 +21,8 @@ urlpatterns = [
     
     # Auditoria (apenas auditores)
     path("audit/dashboard/", views.auditor_dashboard, name="auditor_dashboard"),
+    path("audit/bulk-review/", views.bulk_review_credits, name="bulk_review_credits"),
+    path("audit/claim/", views.claim_next_credits_view, name="claim_next_credits"),
     path("audit/<int:pk>/review/", views.review_credit, name="review_credit"),
     path("audit/<int:pk>/view/", views.view_credit, name="view_credit"),
 ]
@@ -14,11 +14,26 @@ from django.core.paginator import Paginator
 from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
+from django.utils.http import urlencode
+from django.views.decorators.http import require_POST
 from django.views.generic import CreateView, DetailView, ListView
 
 from accounts.models import User
-from .forms import CarbonCreditForm, CreditListingForm
+from .forms import CarbonCreditForm, CreditListingForm, MarketplaceFilterForm
 from .models import CarbonCredit, CreditListing
+from .search import listing_facets, search_listings
+from .services import (
+    MAX_BULK_REVIEW,
+    MAX_CLAIM,
+    BulkAction,
+    ReviewError,
+    bulk_review,
+    claim_credit,
+    claim_next_credits,
+    invalidate_review_counters,
+    renew_reviews,
+    review_counters,
+)
 
 
 class ProducerRequiredMixin:
@@ -37,9 +52,10 @@ class ProducerRequiredMixin:
 
 
 class MarketplaceListView(ListView):
-    """Página do marketplace: mostra apenas listagens ativas de créditos LISTED.
+    """Página do marketplace: listagens ativas com busca, filtros e facetas.
 
-    Paginação: 10 itens por página.
+    Paginação: 10 itens por página. A contagem do paginador vem do total
+    das facetas (uma consulta agrupada, em cache), sem um COUNT à parte.
     """
 
     model = CreditListing
@@ -48,16 +64,24 @@ class MarketplaceListView(ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        # select_related otimiza joins para acessar credit e owner sem múltiplas queries
-        # Mostra todos os créditos listados, mas com indicador de status de validação
-        return (
-            CreditListing.objects.select_related("credit", "credit__owner", "credit__validated_by")
-            .filter(
-                is_active=True,
-                credit__status=CarbonCredit.Status.LISTED
-            )
-            .order_by("-listed_at")
-        )
+        self.filter_form = MarketplaceFilterForm(self.request.GET)
+        # Campos inválidos ficam de fora de cleaned_data (e da busca)
+        self.filter_form.is_valid()
+        self.filters = self.filter_form.cleaned_data
+        self.facets = listing_facets(self.filters)
+        return search_listings(self.filters)
+
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        paginator.count = self.facets["total"]  # cached_property: dispensa o COUNT
+        return paginator
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["filter_form"] = self.filter_form
+        ctx["filters"] = self.filters
+        ctx["facets"] = self.facets
+        return ctx
 
 
 class CreditDetailView(DetailView):
@@ -198,58 +222,55 @@ def credit_history(request, pk: int):
 # AUDITOR VIEWS
 # =========================
 
-@login_required
-def auditor_dashboard(request):
-    """Dashboard para auditores visualizarem créditos para validação."""
-    if request.user.role != User.Roles.AUDITOR:
-        raise PermissionDenied("Acesso restrito a auditores")
-    
-    # Determina a aba atual
-    current_tab = request.GET.get('tab', 'pending')
-    
-    # Filtra créditos baseado na aba
-    if current_tab == 'pending':
+def _auditor_tab_credits(auditor, tab: str, owner: str = ""):
+    """Créditos de uma aba do dashboard do auditor (opcionalmente de um produtor)."""
+    if tab == 'pending':
         credits = CarbonCredit.objects.filter(
             validation_status=CarbonCredit.ValidationStatus.PENDING
         ).select_related('owner', 'validated_by').order_by('-created_at')
-    elif current_tab == 'under_review':
+    elif tab == 'under_review':
         # Mostra apenas créditos em análise pelo auditor atual
         credits = CarbonCredit.objects.filter(
             validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW,
-            validated_by=request.user
+            validated_by=auditor
         ).select_related('owner', 'validated_by').order_by('-created_at')
     else:  # history
         credits = CarbonCredit.objects.filter(
-            validated_by=request.user
+            validated_by=auditor
         ).exclude(
             validation_status=CarbonCredit.ValidationStatus.PENDING
         ).select_related('owner').order_by('-validated_at')
+    if owner:
+        credits = credits.filter(owner__username=owner)
+    return credits
+
+
+@login_required
+def auditor_dashboard(request):
+    """Dashboard para auditores visualizarem créditos para validação."""
+    if request.user.role != User.Roles.AUDITOR:
+        raise PermissionDenied("Acesso restrito a auditores")
+    
+    # Determina a aba atual e o filtro por produtor (lotes de um projeto)
+    current_tab = request.GET.get('tab', 'pending')
+    owner_filter = request.GET.get('owner', '').strip()
+    credits = _auditor_tab_credits(request.user, current_tab, owner_filter)
 
     paginator = Paginator(credits, 12)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Estatísticas
+    # Contadores: uma agregação, cacheada por auditor (services.review_counters)
     context = {
         'current_tab': current_tab,
+        'owner_filter': owner_filter,
+        'bulk_actions': BulkAction.choices if current_tab in ('pending', 'under_review') else (),
+        'max_bulk_review': MAX_BULK_REVIEW,
+        'max_claim': MAX_CLAIM,
         'credits': page_obj,
         'page_obj': page_obj,
         'is_paginated': page_obj.paginator.num_pages > 1,
-        'pending_count': CarbonCredit.objects.filter(
-            validation_status=CarbonCredit.ValidationStatus.PENDING
-        ).count(),
-        'under_review_count': CarbonCredit.objects.filter(
-            validation_status=CarbonCredit.ValidationStatus.UNDER_REVIEW,
-            validated_by=request.user
-        ).count(),
-        'approved_by_me_count': CarbonCredit.objects.filter(
-            validated_by=request.user,
-            validation_status=CarbonCredit.ValidationStatus.APPROVED
-        ).count(),
-        'rejected_by_me_count': CarbonCredit.objects.filter(
-            validated_by=request.user,
-            validation_status=CarbonCredit.ValidationStatus.REJECTED
-        ).count(),
+        **review_counters(request.user),
     }
     
     return render(request, "credits/auditor_dashboard.html", context)
@@ -263,6 +284,10 @@ def review_credit(request, pk):
     
     credit = get_object_or_404(CarbonCredit, pk=pk)
     
+    # Quem está com o crédito em análise renova a reserva ao abrir a revisão
+    if request.method == "GET" and renew_reviews(request.user, [credit.pk]):
+        credit.refresh_from_db(fields=['review_lease_until'])
+    
     # Se o crédito já foi revisado por outro auditor, apenas mostrar
     if credit.validation_status in [CarbonCredit.ValidationStatus.APPROVED, 
                                      CarbonCredit.ValidationStatus.REJECTED]:
@@ -276,9 +301,17 @@ def review_credit(request, pk):
         
         from django.contrib import messages
         
+        if action in ('approve', 'reject') and credit.is_claimed_by_other(request.user):
+            messages.error(request, f"❌ Este crédito está em análise por {credit.validated_by.username}")
+            return redirect('credits:auditor_dashboard')
+        
         if action == 'start_review':
-            credit.start_review(request.user)
-            messages.success(request, "✅ Você marcou este crédito como 'Em Análise'")
+            if claim_credit(request.user, credit.pk):
+                credit.refresh_from_db()
+                messages.success(request, "✅ Você marcou este crédito como 'Em Análise'")
+            else:
+                credit.refresh_from_db()
+                messages.error(request, "❌ Este crédito já está em análise por outro auditor ou foi validado")
             
         elif action == 'approve':
             if not notes:
@@ -286,6 +319,7 @@ def review_credit(request, pk):
                 return render(request, "credits/review_credit.html", {'credit': credit})
             
             credit.approve_validation(request.user, notes)
+            invalidate_review_counters(request.user.pk)
             
             # Email de aprovação de crédito removido (não necessário)
             
@@ -298,6 +332,7 @@ def review_credit(request, pk):
                 return render(request, "credits/review_credit.html", {'credit': credit})
             
             credit.reject_validation(request.user, notes)
+            invalidate_review_counters(request.user.pk)
             
             # Email de rejeição de crédito removido (não necessário)
             
@@ -307,6 +342,60 @@ def review_credit(request, pk):
     return render(request, "credits/review_credit.html", {'credit': credit})
 
 
+@login_required
+@require_POST
+def bulk_review_credits(request):
+    """
+    Revisão em lote a partir do dashboard do auditor.
+
+    Aplica a ação aos créditos marcados ou, com `select_all`, a todos os da
+    aba/filtro atual (até MAX_BULK_REVIEW), em um único UPDATE.
+    """
+    if request.user.role != User.Roles.AUDITOR:
+        raise PermissionDenied("Acesso restrito a auditores")
+
+    tab = request.POST.get('tab', 'pending')
+    owner_filter = request.POST.get('owner', '').strip()
+    if request.POST.get('select_all'):
+        credits = _auditor_tab_credits(request.user, tab, owner_filter)
+    else:
+        ids = [value for value in request.POST.getlist('credit_ids') if value.isdigit()]
+        credits = CarbonCredit.objects.filter(pk__in=ids)
+
+    action = request.POST.get('action', '')
+    try:
+        count = bulk_review(request.user, action, credits, request.POST.get('notes', ''))
+    except ReviewError as exc:
+        messages.error(request, str(exc))
+    else:
+        if count:
+            messages.success(request, f"✅ {BulkAction(action).label}: {count} crédito(s)")
+        else:
+            messages.info(request, "Nenhum crédito selecionado pode receber esta ação.")
+
+    query = urlencode({'tab': tab, **({'owner': owner_filter} if owner_filter else {})})
+    return redirect(f"{reverse('credits:auditor_dashboard')}?{query}")
+
+
+@login_required
+@require_POST
+def claim_next_credits_view(request):
+    """Reserva para o auditor os próximos créditos livres da fila de revisão."""
+    if request.user.role != User.Roles.AUDITOR:
+        raise PermissionDenied("Acesso restrito a auditores")
+
+    try:
+        count = int(request.POST.get('count', 10))
+    except ValueError:
+        count = 10
+    claimed = claim_next_credits(request.user, count)
+    if claimed:
+        messages.success(request, f"✅ {len(claimed)} crédito(s) reservado(s) para sua análise")
+    else:
+        messages.info(request, "Não há créditos livres na fila de revisão.")
+    return redirect(f"{reverse('credits:auditor_dashboard')}?tab=under_review")
+
+
 @login_required
 def view_credit(request, pk):
     """View simples para visualizar detalhes de um crédito."""
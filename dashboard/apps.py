@@ -5,3 +5,8 @@ class DashboardConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "dashboard"
 
+    def ready(self):
+        """Conecta os signals de estatísticas quando o app está pronto."""
+        from .signals import connect_signals
+
+        connect_signals()
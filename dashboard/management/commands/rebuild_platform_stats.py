@@ -0,0 +1,57 @@
+"""
+Management command para reconstruir as estatísticas materializadas.
+Uso: python manage.py rebuild_platform_stats [--check]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard.models import PlatformStats
+from dashboard.signals import platform_stats_changed
+from dashboard.stats import compute_platform_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula PlatformStats do zero e reporta drift em relação aos contadores incrementais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas verifica drift, sem gravar (retorna erro se houver diferença)'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            current = PlatformStats.objects.select_for_update().filter(
+                pk=PlatformStats.SINGLETON_PK
+            ).first()
+            expected = compute_platform_stats()
+
+            drift = {
+                name: (getattr(current, name) if current else None, value)
+                for name, value in expected.items()
+                if current is None or getattr(current, name) != value
+            }
+
+            for name, (stored, value) in sorted(drift.items()):
+                self.stdout.write(
+                    self.style.WARNING(f'Drift em {name}: armazenado={stored} recalculado={value}')
+                )
+
+            if options['check']:
+                if drift:
+                    raise CommandError(f'{len(drift)} contador(es) divergente(s)')
+                self.stdout.write(self.style.SUCCESS('✓ PlatformStats consistente'))
+                return
+
+            PlatformStats.objects.update_or_create(
+                pk=PlatformStats.SINGLETON_PK, defaults=expected
+            )
+            if drift:
+                platform_stats_changed.send(sender=PlatformStats, fields=list(drift))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ PlatformStats reconstruído ({len(drift)} contador(es) corrigido(s))'
+            )
+        )
@@ -0,0 +1,84 @@
+"""
+Management command para reconstruir os contadores de negociação por usuário.
+Uso: python manage.py rebuild_user_stats [--check] [--user ID ...]
+"""
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard.models import UserTradingStats
+from dashboard.stats import compute_user_stats
+
+# Usuários com drift listados na saída (o total sempre é reportado)
+MAX_REPORTED = 20
+
+# Totais de transações podem ter frações de centavo (quantidade × preço) e o
+# SQLite soma decimais em ponto flutuante: recalcular arredonda o total, e o
+# arredondamento do rebuild anterior e o deste podem divergir em um centavo
+DECIMAL_TOLERANCE = Decimal("0.01")
+
+
+def _differs(stored, value) -> bool:
+    if isinstance(value, Decimal):
+        return abs(stored - value) > DECIMAL_TOLERANCE
+    return stored != value
+
+
+class Command(BaseCommand):
+    help = 'Recalcula UserTradingStats do zero e reporta drift em relação aos contadores incrementais'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas verifica drift, sem gravar (retorna erro se houver diferença)'
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            nargs='+',
+            dest='users',
+            help='Restringe aos usuários com estes ids'
+        )
+
+    def handle(self, *args, **options):
+        fields = UserTradingStats.counter_fields()
+        with transaction.atomic():
+            stored = UserTradingStats.objects.select_for_update().values('user_id', *fields)
+            if options['users']:
+                stored = stored.filter(user_id__in=options['users'])
+            current = {row.pop('user_id'): row for row in stored}
+            expected = compute_user_stats(options['users'])
+
+            # Usuário sem linha não é drift: o `load` seguinte recalcula
+            drift = {
+                user_id: {name: (current[user_id][name], value) for name, value in counters.items()
+                          if _differs(current[user_id][name], value)}
+                for user_id, counters in expected.items()
+                if user_id in current
+            }
+            drift = {user_id: changes for user_id, changes in drift.items() if changes}
+
+            for user_id in sorted(drift)[:MAX_REPORTED]:
+                for name, (stored_value, value) in sorted(drift[user_id].items()):
+                    self.stdout.write(self.style.WARNING(
+                        f'Drift no usuário {user_id}, {name}: armazenado={stored_value} recalculado={value}'
+                    ))
+            if len(drift) > MAX_REPORTED:
+                self.stdout.write(self.style.WARNING(f'... e mais {len(drift) - MAX_REPORTED} usuário(s)'))
+
+            if options['check']:
+                if drift:
+                    raise CommandError(f'{len(drift)} usuário(s) com contadores divergentes')
+                self.stdout.write(self.style.SUCCESS(f'✓ UserTradingStats consistente ({len(current)} usuário(s))'))
+                return
+
+            UserTradingStats.store(expected)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ UserTradingStats reconstruído para {len(expected)} usuário(s) '
+                f'({len(drift)} com drift corrigido)'
+            )
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:10
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users_total', models.BigIntegerField(default=0)),
+                ('producers', models.BigIntegerField(default=0)),
+                ('companies', models.BigIntegerField(default=0)),
+                ('auditors', models.BigIntegerField(default=0)),
+                ('active_auditors', models.BigIntegerField(default=0)),
+                ('applications_pending', models.BigIntegerField(default=0)),
+                ('applications_approved', models.BigIntegerField(default=0)),
+                ('applications_rejected', models.BigIntegerField(default=0)),
+                ('credits_total', models.BigIntegerField(default=0)),
+                ('credits_co2', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=20)),
+                ('credits_pending_validation', models.BigIntegerField(default=0)),
+                ('credits_approved', models.BigIntegerField(default=0)),
+                ('approved_co2', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=20)),
+                ('approved_available', models.BigIntegerField(default=0)),
+                ('approved_listed', models.BigIntegerField(default=0)),
+                ('approved_sold', models.BigIntegerField(default=0)),
+                ('listings_active', models.BigIntegerField(default=0)),
+                ('transactions_completed', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estatísticas da Plataforma',
+                'verbose_name_plural': 'Estatísticas da Plataforma',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_balance_ledger'),
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTradingStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trading_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('purchases', models.BigIntegerField(default=0)),
+                ('sales', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estatísticas de Negociação',
+                'verbose_name_plural': 'Estatísticas de Negociação',
+            },
+        ),
+    ]
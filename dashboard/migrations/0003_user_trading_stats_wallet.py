@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:49
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def drop_stale_rows(apps, schema_editor):
+    # Linhas antigas teriam os contadores novos zerados; sem linha, o
+    # `load` seguinte recalcula do zero
+    apps.get_model("dashboard", "UserTradingStats").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_user_trading_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertradingstats',
+            name='available_co2',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=20),
+        ),
+        migrations.AddField(
+            model_name='usertradingstats',
+            name='listed_credits',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usertradingstats',
+            name='purchased_co2',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=20),
+        ),
+        migrations.AddField(
+            model_name='usertradingstats',
+            name='sales_revenue',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=20),
+        ),
+        migrations.RunPython(drop_stale_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,206 @@
+"""Models do dashboard: estatísticas materializadas da plataforma e por usuário."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+
+class PlatformStats(models.Model):
+    """
+    Linha única com os contadores públicos da plataforma.
+
+    Mantida por deltas (ver `dashboard.signals`) nas mesmas transações que
+    alteram usuários, créditos, listagens e transações, para que as páginas de
+    estatísticas façam uma única leitura por chave primária em vez de vários
+    COUNT/SUM. `rebuild_platform_stats` recalcula do zero e detecta drift.
+    """
+
+    SINGLETON_PK = 1
+
+    # Usuários
+    users_total = models.BigIntegerField(default=0)
+    producers = models.BigIntegerField(default=0)
+    companies = models.BigIntegerField(default=0)
+    auditors = models.BigIntegerField(default=0)
+    active_auditors = models.BigIntegerField(default=0)
+
+    # Candidaturas de auditor
+    applications_pending = models.BigIntegerField(default=0)
+    applications_approved = models.BigIntegerField(default=0)
+    applications_rejected = models.BigIntegerField(default=0)
+
+    # Créditos (não deletados)
+    credits_total = models.BigIntegerField(default=0)
+    credits_co2 = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal("0"))
+    credits_pending_validation = models.BigIntegerField(default=0)
+    credits_approved = models.BigIntegerField(default=0)
+    approved_co2 = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal("0"))
+    approved_available = models.BigIntegerField(default=0)
+    approved_listed = models.BigIntegerField(default=0)
+    approved_sold = models.BigIntegerField(default=0)
+
+    # Marketplace
+    listings_active = models.BigIntegerField(default=0)
+    transactions_completed = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estatísticas da Plataforma"
+        verbose_name_plural = "Estatísticas da Plataforma"
+
+    @classmethod
+    def counter_fields(cls) -> list[str]:
+        """Nomes de todos os contadores (exclui pk e updated_at)."""
+        return [
+            f.name for f in cls._meta.concrete_fields
+            if f.name not in ("id", "updated_at")
+        ]
+
+    @classmethod
+    def load(cls) -> PlatformStats:
+        """Lê a linha única; se não existir (banco novo/limpo), reconstrói."""
+        stats = cls.objects.filter(pk=cls.SINGLETON_PK).first()
+        if stats is None:
+            stats = cls.rebuild()
+        return stats
+
+    @classmethod
+    def rebuild(cls) -> PlatformStats:
+        """Recalcula todos os contadores a partir das tabelas de origem."""
+        from .stats import compute_platform_stats
+
+        from .signals import platform_stats_changed
+
+        stats, _ = cls.objects.update_or_create(
+            pk=cls.SINGLETON_PK, defaults=compute_platform_stats()
+        )
+        platform_stats_changed.send(sender=cls, fields=cls.counter_fields())
+        return stats
+
+    @classmethod
+    def apply_deltas(cls, deltas: dict[str, int | Decimal]) -> None:
+        """Aplica deltas atômicos (UPDATE ... SET campo = campo + delta)."""
+        from .signals import platform_stats_changed
+
+        changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+        if not changes:
+            return
+        changed_fields = list(changes)
+        # .update() não aciona auto_now; updated_at versiona a linha (ETag)
+        changes["updated_at"] = timezone.now()
+        if not cls.objects.filter(pk=cls.SINGLETON_PK).update(**changes):
+            # Linha ausente: o rebuild já enxerga a alteração corrente
+            cls.rebuild()
+        else:
+            platform_stats_changed.send(sender=cls, fields=changed_fields)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"PlatformStats<{self.updated_at}>"
+
+
+class UserTradingStats(models.Model):
+    """
+    Contadores de negociação de um usuário (uma linha por usuário).
+
+    Como `PlatformStats`, mantidos por deltas (`F()`) na mesma transação que
+    altera créditos e transações (ver `dashboard.signals` e
+    `transactions.services`), para que dashboard e histórico leiam uma linha
+    em vez de SUM/COUNT sobre todo o histórico do usuário. A linha nasce com
+    o usuário; se faltar, `load` recalcula. `rebuild_user_stats` recalcula
+    todas e detecta drift.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="trading_stats",
+    )
+    # Transações em qualquer status, como compradora e como vendedora
+    purchases = models.BigIntegerField(default=0)
+    sales = models.BigIntegerField(default=0)
+
+    # Carteira (créditos não deletados do usuário)
+    available_co2 = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal("0"))
+    listed_credits = models.BigIntegerField(default=0)
+
+    # Transações concluídas
+    purchased_co2 = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal("0"))
+    sales_revenue = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal("0"))
+
+    class Meta:
+        verbose_name = "Estatísticas de Negociação"
+        verbose_name_plural = "Estatísticas de Negociação"
+
+    @classmethod
+    def counter_fields(cls) -> list[str]:
+        """Nomes de todos os contadores (exclui o usuário)."""
+        return [f.name for f in cls._meta.concrete_fields if f.name != "user"]
+
+    @classmethod
+    def load(cls, user_id: int) -> UserTradingStats:
+        """Lê a linha do usuário; se não existir, reconstrói."""
+        stats = cls.objects.filter(pk=user_id).first()
+        if stats is None:
+            stats = cls.rebuild(user_id)
+        return stats
+
+    @classmethod
+    def rebuild(cls, user_id: int) -> UserTradingStats:
+        """Recalcula os contadores do usuário a partir das tabelas de origem."""
+        from .stats import compute_user_stats
+
+        stats, _ = cls.objects.update_or_create(pk=user_id, defaults=compute_user_stats([user_id])[user_id])
+        return stats
+
+    @classmethod
+    def rebuild_all(cls) -> int:
+        """Recalcula as linhas de todos os usuários. Retorna quantas."""
+        from .stats import compute_user_stats
+
+        return cls.store(compute_user_stats())
+
+    @classmethod
+    def store(cls, stats: dict[int, dict[str, int | Decimal]], batch_size: int = 5000) -> int:
+        """Grava contadores já calculados (user_id -> contadores), upsert em lotes."""
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, **counters) for user_id, counters in stats.items()],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=cls.counter_fields(),
+        )
+        return len(stats)
+
+    @classmethod
+    def apply_deltas(cls, deltas: dict[int, dict[str, int | Decimal]]) -> None:
+        """
+        Aplica deltas de vários usuários (user_id -> {campo: delta}) com um
+        único UPDATE. Usuários sem linha são ignorados: o `load` seguinte
+        recalcula e já enxerga a alteração corrente.
+        """
+        fields = sorted({name for delta in deltas.values() for name, value in delta.items() if value})
+        if not fields:
+            return
+        changes = {}
+        for name in fields:
+            increment = Case(
+                *[
+                    When(user_id=user_id, then=Value(deltas[user_id][name]))
+                    for user_id in sorted(deltas)
+                    if deltas[user_id].get(name)
+                ],
+                default=Value(0),
+                output_field=cls._meta.get_field(name).clone(),
+            )
+            changes[name] = F(name) + increment
+        cls.objects.filter(user_id__in=deltas).update(**changes)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"UserTradingStats<{self.user_id}>"
@@ -0,0 +1,87 @@
+"""Signals que mantêm `PlatformStats` e `UserTradingStats` atualizados por deltas."""
+
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal
+
+from accounts.models import User
+
+from .models import PlatformStats, UserTradingStats
+from .stats import TRACKED_MODELS, USER_TRACKED_MODELS, contribution_delta, user_contribution_delta
+
+# Enviado após alterar contadores; `fields` lista os contadores afetados
+# (usado pelo cache da API pública)
+platform_stats_changed = Signal()
+
+# Atributos temporários com as contribuições da linha antes do save
+_OLD_CONTRIBUTION_ATTR = "_platform_stats_old"
+_OLD_USER_CONTRIBUTION_ATTR = "_user_stats_old"
+
+
+def _tracked_fields(sender) -> set[str]:
+    """Campos de `sender` (ou de relacionados, `fk__campo`) que afetam algum dos contadores."""
+    fields = set(TRACKED_MODELS.get(sender, (None, ()))[1])
+    return fields | set(USER_TRACKED_MODELS.get(sender, (None, ()))[1])
+
+
+def capture_old_contribution(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda as contribuições da linha como está no banco antes do UPDATE.
+
+    Uma consulta serve aos dois contadores. Saves com `update_fields` que não
+    tocam campos rastreados (ex.: last_login) não fazem a consulta extra.
+    """
+    if instance._state.adding or instance.pk is None:
+        return
+    fields = _tracked_fields(sender)
+    if update_fields is not None and not set(update_fields) & {name.split("__")[0] for name in fields}:
+        return
+    related = {name.split("__")[0] for name in fields if "__" in name}
+    old = sender._base_manager.select_related(*related).filter(pk=instance.pk).only(*fields).first()
+    if sender in TRACKED_MODELS:
+        contribution, _ = TRACKED_MODELS[sender]
+        setattr(instance, _OLD_CONTRIBUTION_ATTR, contribution(old) if old else {})
+    if sender in USER_TRACKED_MODELS:
+        contribution, _ = USER_TRACKED_MODELS[sender]
+        setattr(instance, _OLD_USER_CONTRIBUTION_ATTR, contribution(old) if old else {})
+
+
+def apply_save_delta(sender, instance, created, **kwargs):
+    """Aplica a diferença entre as contribuições nova e anterior."""
+    if sender in USER_TRACKED_MODELS:
+        contribution, _ = USER_TRACKED_MODELS[sender]
+        old = {} if created else instance.__dict__.pop(_OLD_USER_CONTRIBUTION_ATTR, None)
+        if old is not None:
+            UserTradingStats.apply_deltas(user_contribution_delta(old, contribution(instance)))
+    if sender in TRACKED_MODELS:
+        contribution, _ = TRACKED_MODELS[sender]
+        old = {} if created else instance.__dict__.pop(_OLD_CONTRIBUTION_ATTR, None)
+        if old is not None:
+            # Linha única e disputada: atualizada por último
+            PlatformStats.apply_deltas(contribution_delta(old, contribution(instance)))
+
+
+def apply_delete_delta(sender, instance, **kwargs):
+    """Remove as contribuições de uma linha apagada."""
+    if sender in USER_TRACKED_MODELS:
+        contribution, _ = USER_TRACKED_MODELS[sender]
+        UserTradingStats.apply_deltas(user_contribution_delta(contribution(instance), {}))
+    if sender in TRACKED_MODELS:
+        contribution, _ = TRACKED_MODELS[sender]
+        PlatformStats.apply_deltas(contribution_delta(contribution(instance), {}))
+
+
+def create_user_trading_stats(sender, instance, created, **kwargs):
+    """Usuário novo começa com contadores zerados (evita o rebuild no primeiro `load`)."""
+    if created:
+        UserTradingStats.objects.create(user=instance)
+
+
+def connect_signals() -> None:
+    for model in TRACKED_MODELS.keys() | USER_TRACKED_MODELS.keys():
+        uid = f"platform_stats_{model._meta.label_lower}"
+        pre_save.connect(capture_old_contribution, sender=model, dispatch_uid=uid)
+        post_save.connect(apply_save_delta, sender=model, dispatch_uid=uid)
+        post_delete.connect(apply_delete_delta, sender=model, dispatch_uid=uid)
+    post_save.connect(create_user_trading_stats, sender=User, dispatch_uid="user_trading_stats")
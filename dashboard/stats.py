@@ -0,0 +1,255 @@
+"""
+Cálculo das estatísticas da plataforma e por usuário.
+
+Cada model rastreado tem uma função de "contribuição": quanto uma linha, no
+estado atual, soma a cada contador de `PlatformStats`. O delta de um save é a
+contribuição nova menos a antiga, e o rebuild é a soma das contribuições,
+feita em uma agregação condicional por tabela.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Callable, Iterable
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import AuditorApplication, User
+from credits.models import CarbonCredit, CreditListing
+from transactions.models import Transaction
+
+Contribution = dict[str, Any]
+
+
+def user_contribution(user: Any) -> Contribution:
+    return {
+        "users_total": 1,
+        "producers": int(user.role == User.Roles.PRODUCER),
+        "companies": int(user.role == User.Roles.COMPANY),
+        "auditors": int(user.role == User.Roles.AUDITOR),
+        "active_auditors": int(user.role == User.Roles.AUDITOR and bool(user.is_active)),
+    }
+
+
+def application_contribution(application: Any) -> Contribution:
+    return {
+        "applications_pending": int(application.status == AuditorApplication.Status.PENDING),
+        "applications_approved": int(application.status == AuditorApplication.Status.APPROVED),
+        "applications_rejected": int(application.status == AuditorApplication.Status.REJECTED),
+    }
+
+
+def credit_contribution(credit: Any) -> Contribution:
+    if credit.is_deleted:
+        return {}
+    amount = Decimal(str(credit.amount))
+    approved = credit.validation_status == CarbonCredit.ValidationStatus.APPROVED
+    return {
+        "credits_total": 1,
+        "credits_co2": amount,
+        "credits_pending_validation": int(
+            credit.validation_status == CarbonCredit.ValidationStatus.PENDING
+        ),
+        "credits_approved": int(approved),
+        "approved_co2": amount if approved else Decimal("0"),
+        "approved_available": int(approved and credit.status == CarbonCredit.Status.AVAILABLE),
+        "approved_listed": int(approved and credit.status == CarbonCredit.Status.LISTED),
+        "approved_sold": int(approved and credit.status == CarbonCredit.Status.SOLD),
+    }
+
+
+def listing_contribution(listing: Any) -> Contribution:
+    return {"listings_active": int(bool(listing.is_active))}
+
+
+def transaction_contribution(txn: Any) -> Contribution:
+    return {"transactions_completed": int(txn.status == Transaction.Status.COMPLETED)}
+
+
+# Model -> (função de contribuição, campos que afetam a contribuição)
+TRACKED_MODELS: dict[type, tuple[Callable[[Any], Contribution], tuple[str, ...]]] = {
+    User: (user_contribution, ("role", "is_active")),
+    AuditorApplication: (application_contribution, ("status",)),
+    CarbonCredit: (
+        credit_contribution,
+        ("amount", "status", "validation_status", "is_deleted"),
+    ),
+    CreditListing: (listing_contribution, ("is_active",)),
+    Transaction: (transaction_contribution, ("status",)),
+}
+
+
+def contribution_delta(old: Contribution, new: Contribution) -> Contribution:
+    """Diferença campo a campo entre duas contribuições."""
+    return {key: new.get(key, 0) - old.get(key, 0) for key in old.keys() | new.keys()}
+
+
+def compute_platform_stats() -> dict[str, Any]:
+    """Recalcula todos os contadores do zero (uma agregação por tabela)."""
+    zero = Value(Decimal("0"), output_field=DecimalField(max_digits=20, decimal_places=2))
+    approved = Q(validation_status=CarbonCredit.ValidationStatus.APPROVED)
+
+    stats: dict[str, Any] = {}
+    stats.update(User.objects.aggregate(
+        users_total=Count("id"),
+        producers=Count("id", filter=Q(role=User.Roles.PRODUCER)),
+        companies=Count("id", filter=Q(role=User.Roles.COMPANY)),
+        auditors=Count("id", filter=Q(role=User.Roles.AUDITOR)),
+        active_auditors=Count("id", filter=Q(role=User.Roles.AUDITOR, is_active=True)),
+    ))
+    stats.update(AuditorApplication.objects.aggregate(
+        applications_pending=Count("id", filter=Q(status=AuditorApplication.Status.PENDING)),
+        applications_approved=Count("id", filter=Q(status=AuditorApplication.Status.APPROVED)),
+        applications_rejected=Count("id", filter=Q(status=AuditorApplication.Status.REJECTED)),
+    ))
+    # CarbonCredit.objects já exclui deletados
+    stats.update(CarbonCredit.objects.aggregate(
+        credits_total=Count("id"),
+        credits_co2=Coalesce(Sum("amount"), zero),
+        credits_pending_validation=Count(
+            "id", filter=Q(validation_status=CarbonCredit.ValidationStatus.PENDING)
+        ),
+        credits_approved=Count("id", filter=approved),
+        approved_co2=Coalesce(Sum("amount", filter=approved), zero),
+        approved_available=Count("id", filter=approved & Q(status=CarbonCredit.Status.AVAILABLE)),
+        approved_listed=Count("id", filter=approved & Q(status=CarbonCredit.Status.LISTED)),
+        approved_sold=Count("id", filter=approved & Q(status=CarbonCredit.Status.SOLD)),
+    ))
+    stats.update(CreditListing.objects.aggregate(
+        listings_active=Count("id", filter=Q(is_active=True)),
+    ))
+    stats.update(Transaction.objects.aggregate(
+        transactions_completed=Count("id", filter=Q(status=Transaction.Status.COMPLETED)),
+    ))
+    # SQLite soma decimais em ponto flutuante: arredonda para a precisão do
+    # campo, senão o --check acusa drift em bases grandes
+    for name in ("credits_co2", "approved_co2"):
+        stats[name] = Decimal(stats[name]).quantize(Decimal("0.01"))
+    return stats
+
+
+# Contribuição por usuário: user_id -> contadores de `UserTradingStats`
+UserContribution = dict[int, Contribution]
+
+CENT = Decimal("0.01")
+
+
+def credit_user_contribution(credit: Any) -> UserContribution:
+    if credit.is_deleted or credit.status != CarbonCredit.Status.AVAILABLE:
+        return {}
+    return {credit.owner_id: {"available_co2": Decimal(str(credit.amount))}}
+
+
+def listing_user_contribution(listing: Any) -> UserContribution:
+    """Listagem ativa conta para o dono atual do crédito."""
+    if not listing.is_active:
+        return {}
+    return {listing.credit.owner_id: {"listed_credits": 1}}
+
+
+def transaction_user_contribution(txn: Any) -> UserContribution:
+    completed = txn.status == Transaction.Status.COMPLETED
+    return {
+        txn.buyer_id: {
+            "purchases": 1,
+            "purchased_co2": Decimal(str(txn.amount)) if completed else Decimal("0"),
+        },
+        txn.seller_id: {
+            "sales": 1,
+            "sales_revenue": Decimal(str(txn.total_price)) if completed else Decimal("0"),
+        },
+    }
+
+
+# Model -> (contribuição por usuário, campos que afetam a contribuição);
+# `credit__owner` é lido por JOIN junto com a linha antiga
+USER_TRACKED_MODELS: dict[type, tuple[Callable[[Any], UserContribution], tuple[str, ...]]] = {
+    CarbonCredit: (credit_user_contribution, ("owner", "amount", "status", "is_deleted")),
+    CreditListing: (listing_user_contribution, ("is_active", "credit__owner")),
+    Transaction: (
+        transaction_user_contribution,
+        ("buyer", "seller", "amount", "total_price", "status"),
+    ),
+}
+
+
+def user_contribution_delta(old: UserContribution, new: UserContribution) -> UserContribution:
+    """Diferença por usuário entre duas contribuições (usuários sem mudança ficam de fora)."""
+    deltas = {}
+    for user_id in old.keys() | new.keys():
+        delta = contribution_delta(old.get(user_id, {}), new.get(user_id, {}))
+        if any(delta.values()):
+            deltas[user_id] = delta
+    return deltas
+
+
+def sum_user_deltas(deltas: Iterable[UserContribution]) -> UserContribution:
+    """Soma deltas por usuário e por campo."""
+    total: UserContribution = {}
+    for delta in deltas:
+        for user_id, fields in delta.items():
+            target = total.setdefault(user_id, {})
+            for name, value in fields.items():
+                target[name] = target.get(name, 0) + value
+    return total
+
+
+def compute_user_stats(user_ids: Iterable[int] | None = None) -> dict[int, dict[str, Any]]:
+    """
+    Recalcula os contadores do zero para `user_ids` (ou todos os usuários):
+    uma agregação agrupada por dono (créditos e listagens), comprador e
+    vendedor.
+    """
+    zero = Value(Decimal("0"), output_field=DecimalField(max_digits=20, decimal_places=2))
+    completed = Q(status=Transaction.Status.COMPLETED)
+    users = User.objects.all()
+    credits = CarbonCredit.objects.all()  # já exclui deletados
+    listings = CreditListing.objects.all()
+    purchases = Transaction.objects.all()
+    sales = Transaction.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        users = users.filter(pk__in=user_ids)
+        credits = credits.filter(owner_id__in=user_ids)
+        listings = listings.filter(credit__owner_id__in=user_ids)
+        purchases = purchases.filter(buyer_id__in=user_ids)
+        sales = sales.filter(seller_id__in=user_ids)
+
+    stats: dict[int, dict[str, Any]] = {
+        user_id: {
+            "purchases": 0,
+            "sales": 0,
+            "available_co2": Decimal("0"),
+            "listed_credits": 0,
+            "purchased_co2": Decimal("0"),
+            "sales_revenue": Decimal("0"),
+        }
+        for user_id in users.values_list("pk", flat=True)
+    }
+    rows = [
+        credits.filter(status=CarbonCredit.Status.AVAILABLE).values("owner_id").annotate(
+            available_co2=Coalesce(Sum("amount"), zero),
+        ),
+        listings.filter(is_active=True).values("credit__owner_id").annotate(
+            listed_credits=Count("id"),
+        ),
+        purchases.values("buyer_id").annotate(
+            purchases=Count("id"),
+            purchased_co2=Coalesce(Sum("amount", filter=completed), zero),
+        ),
+        sales.values("seller_id").annotate(
+            sales=Count("id"),
+            sales_revenue=Coalesce(Sum("total_price", filter=completed), zero),
+        ),
+    ]
+    for key, grouped in zip(("owner_id", "credit__owner_id", "buyer_id", "seller_id"), rows):
+        for row in grouped.order_by():
+            user_id = row.pop(key)
+            if user_id in stats:
+                stats[user_id].update(row)
+    # Mesma precisão do campo (SQLite soma decimais em ponto flutuante)
+    for counters in stats.values():
+        for name in ("available_co2", "purchased_co2", "sales_revenue"):
+            counters[name] = Decimal(counters[name]).quantize(CENT)
+    return stats
@@ -0,0 +1,108 @@
+"""Testes das estatísticas materializadas (PlatformStats)."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from accounts.models import AuditorApplication, User
+from credits.models import CarbonCredit, CreditListing
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+
+
+class PlatformStatsTests(TestCase):
+    """Contadores incrementais batem com o recálculo completo."""
+
+    def setUp(self):
+        caches["api"].clear()
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.company.profile.add_balance(Decimal("10000.00"))
+
+    def assertStatsConsistent(self):
+        stats = PlatformStats.objects.get(pk=PlatformStats.SINGLETON_PK)
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+    def test_counters_follow_credit_lifecycle(self):
+        """Criação, aprovação, listagem, compra e soft delete mantêm os contadores."""
+        credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal("10.50"),
+            origin="Farm",
+            generation_date="2025-10-01",
+        )
+        other = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal("3.00"),
+            origin="Farm",
+            generation_date="2025-10-01",
+        )
+        self.assertStatsConsistent()
+
+        credit.approve_validation(self.auditor, "ok")
+        CreditListing.objects.create(credit=credit, price_per_unit=Decimal("10.00"))
+        credit.status = CarbonCredit.Status.LISTED
+        credit.save(update_fields=["status"])
+        self.assertStatsConsistent()
+
+        self.client.force_login(self.company)
+        self.client.post(reverse("credits:credit_buy", kwargs={"pk": credit.pk}))
+        other.delete()
+        self.assertStatsConsistent()
+
+        stats = PlatformStats.load()
+        self.assertEqual(stats.approved_sold, 1)
+        self.assertEqual(stats.transactions_completed, 1)
+        self.assertEqual(stats.credits_total, 1)
+        self.assertEqual(stats.approved_co2, Decimal("10.50"))
+
+    def test_counters_follow_users_and_applications(self):
+        """Mudança de papel, desativação e candidaturas atualizam contadores."""
+        application = AuditorApplication.objects.create(
+            user=self.company, full_name="Company", justification="..."
+        )
+        self.assertStatsConsistent()
+
+        application.approve(self.auditor)
+        self.auditor.is_active = False
+        self.auditor.save()
+        self.assertStatsConsistent()
+
+        self.producer.delete()
+        self.assertStatsConsistent()
+
+    def test_stats_endpoints_single_query(self):
+        """Endpoints de estatísticas fazem uma única leitura por PK."""
+        PlatformStats.rebuild()
+        with self.assertNumQueries(1):
+            response = Client().get(reverse("api:stats"))
+        self.assertEqual(response.json()["data"]["total_producers"], 1)
+
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        """Comando reporta drift com --check e corrige sem ele."""
+        PlatformStats.rebuild()
+        PlatformStats.objects.update(producers=99)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_platform_stats", "--check", stdout=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_platform_stats", stdout=out)
+        self.assertIn("producers", out.getvalue())
+        call_command("rebuild_platform_stats", "--check", stdout=StringIO())
+        self.assertEqual(PlatformStats.load().producers, 1)
@@ -0,0 +1,114 @@
+"""Testes do orçamento de consultas por view (ecotrade.middleware)."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from credits.models import CarbonCredit
+from ecotrade.middleware import QueryBudgetExceeded, QueryReport
+from transactions.models import Transaction
+
+
+class QueryInspectorMiddlewareTests(TestCase):
+    """Server-Timing, orçamento por view e detecção de N+1."""
+
+    def setUp(self):
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+
+    def _validated_credits(self, start, stop):
+        """Créditos aprovados, cada um por um auditor diferente."""
+        for i in range(start, stop):
+            auditor = User.objects.create_user(
+                username=f"auditor{i}", password="pass123", role=User.Roles.AUDITOR
+            )
+            CarbonCredit.objects.create(
+                owner=self.producer,
+                amount=Decimal("10.00"),
+                origin=f"Farm {i}",
+                generation_date="2025-10-01",
+                validation_status=CarbonCredit.ValidationStatus.APPROVED,
+                validated_by=auditor,
+            )
+
+    def _sales(self, count):
+        for i in range(count):
+            credit = CarbonCredit.objects.create(
+                owner=self.producer,
+                amount=Decimal("5.00"),
+                origin=f"Farm {i}",
+                generation_date="2025-10-01",
+            )
+            Transaction.objects.create(
+                credit=credit,
+                buyer=self.company,
+                seller=self.producer,
+                amount=Decimal("5.00"),
+                total_price=Decimal("250.00"),
+                status=Transaction.Status.COMPLETED,
+            )
+
+    def test_server_timing_header(self):
+        """Toda resposta informa consultas e tempo no banco."""
+        resp = self.client.get(reverse("dashboard:landing"))
+        self.assertRegex(resp["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+        self.assertEqual(resp.query_report.view_name, "dashboard:landing")
+
+    def test_producer_dashboard_query_count_is_constant(self):
+        """validated_by vem no mesmo SELECT dos créditos."""
+        self.client.login(username="producer", password="pass123")
+        self._validated_credits(0, 2)
+        few = self.client.get(reverse("dashboard:index")).query_report.count
+        self._validated_credits(2, 8)
+        many = self.client.get(reverse("dashboard:index")).query_report.count
+        self.assertEqual(few, many)
+
+    def test_history_query_count_is_constant(self):
+        """Crédito, comprador e vendedor vêm no mesmo SELECT das transações."""
+        self.client.login(username="company", password="pass123")
+        self._sales(1)
+        few = self.client.get(reverse("transactions:transaction_history")).query_report.count
+        self._sales(10)
+        many = self.client.get(reverse("transactions:transaction_history")).query_report.count
+        self.assertEqual(few, many)
+
+    @override_settings(QUERY_BUDGETS={"dashboard:landing": 0}, QUERY_BUDGET_STRICT=True)
+    def test_budget_exceeded_raises_in_strict_mode(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "dashboard:landing"):
+            self.client.get(reverse("dashboard:landing"))
+
+    @override_settings(QUERY_BUDGETS={"dashboard:landing": 0}, QUERY_BUDGET_STRICT=False)
+    def test_budget_exceeded_logs_outside_strict_mode(self):
+        with self.assertLogs("ecotrade.queries", level="WARNING") as logs:
+            resp = self.client.get(reverse("dashboard:landing"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("orçamento: 0", logs.output[0])
+
+    async def test_asgi_requests_are_measured(self):
+        """Sob ASGI as consultas da view (em outra thread) também são contadas."""
+        await self.async_client.aforce_login(self.producer)
+        resp = await self.async_client.get(reverse("dashboard:index"))
+
+        self.assertEqual(resp.query_report.view_name, "dashboard:index")
+        self.assertGreater(resp.query_report.count, 0)
+        self.assertIn(f'desc="{resp.query_report.count} queries"', resp["Server-Timing"])
+
+    @override_settings(QUERY_BUDGETS={"dashboard:landing": 0}, QUERY_BUDGET_STRICT=True)
+    async def test_asgi_budget_exceeded_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "dashboard:landing"):
+            await self.async_client.get(reverse("dashboard:landing"))
+
+    def test_repeated_selects_are_flagged(self):
+        """O mesmo SELECT repetido com parâmetros diferentes é apontado como N+1."""
+        sql = 'SELECT "accounts_user"."id" FROM "accounts_user" WHERE "accounts_user"."id" = %s'
+        report = QueryReport(view_name="x", budget=100, statements=[(sql, 0.001)] * 3)
+        self.assertEqual(report.repeated(3), [(sql, 3)])
+        self.assertEqual(report.repeated(4), [])
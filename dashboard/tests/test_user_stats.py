@@ -0,0 +1,147 @@
+"""Testes dos contadores de negociação por usuário (UserTradingStats)."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from credits.models import CarbonCredit, CreditListing
+from dashboard.models import UserTradingStats
+from dashboard.stats import compute_user_stats
+from transactions.models import Transaction
+from transactions.services import checkout
+
+
+class UserTradingStatsTests(TestCase):
+    """Contadores incrementais batem com o recálculo completo."""
+
+    def setUp(self):
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.auditor = User.objects.create_user(
+            username="auditor", password="pass123", role=User.Roles.AUDITOR
+        )
+        self.company.profile.add_balance(Decimal("10000.00"))
+
+    def assertStatsConsistent(self):
+        stored = {stats.user_id: stats for stats in UserTradingStats.objects.all()}
+        for user_id, counters in compute_user_stats().items():
+            for name, value in counters.items():
+                self.assertEqual(getattr(stored[user_id], name), value, f"{user_id}.{name}")
+
+    def create_credit(self, amount="10.00"):
+        credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal(amount),
+            origin="Farm",
+            generation_date="2025-10-01",
+        )
+        credit.approve_validation(self.auditor, "ok")
+        return credit
+
+    def list_credit(self, credit, price="10.00"):
+        self.client.force_login(self.producer)
+        self.client.post(
+            reverse("credits:credit_list_for_sale", kwargs={"pk": credit.pk}), {"price_per_unit": price}
+        )
+        return CreditListing.objects.get(credit=credit, is_active=True)
+
+    def test_counters_follow_credit_lifecycle(self):
+        """Criação, listagem, compra, checkout, transferência e soft delete."""
+        bought, carted, moved, deleted = (self.create_credit(amount) for amount in ("10.50", "2", "3", "4"))
+        self.assertStatsConsistent()
+
+        self.list_credit(bought)
+        cart_listing = self.list_credit(carted, price="20.00")
+        self.list_credit(moved)
+        self.assertStatsConsistent()
+        self.assertEqual(UserTradingStats.load(self.producer.pk).listed_credits, 3)
+
+        self.client.force_login(self.company)
+        self.client.post(reverse("credits:credit_buy", kwargs={"pk": bought.pk}))
+        checkout(self.company, [cart_listing.pk])
+        self.assertStatsConsistent()
+
+        # Transferência de um crédito listado: a listagem passa a contar para o novo dono
+        moved.owner = self.company
+        moved.save()
+        deleted.delete()
+        self.assertStatsConsistent()
+
+        producer = UserTradingStats.load(self.producer.pk)
+        self.assertEqual((producer.sales, producer.listed_credits), (2, 0))
+        self.assertEqual(producer.sales_revenue, Decimal("145.00"))
+        self.assertEqual(producer.available_co2, Decimal("0.00"))
+        company = UserTradingStats.load(self.company.pk)
+        self.assertEqual((company.purchases, company.purchased_co2), (2, Decimal("12.50")))
+
+    def test_transaction_status_and_delete(self):
+        """Conclusão e remoção de transações salvas fora dos serviços."""
+        credit = self.create_credit()
+        txn = Transaction.objects.create(
+            buyer=self.company, seller=self.producer, credit=credit,
+            amount=credit.amount, total_price=Decimal("100.00"), status=Transaction.Status.PENDING,
+        )
+        self.assertStatsConsistent()
+
+        txn.status = Transaction.Status.COMPLETED
+        txn.save()
+        self.assertStatsConsistent()
+        self.assertEqual(UserTradingStats.load(self.producer.pk).sales_revenue, Decimal("100.00"))
+
+        txn.delete()
+        self.assertStatsConsistent()
+
+    def test_dashboard_reads_counters(self):
+        """Dashboard lê os contadores; consultas não crescem com o histórico."""
+        self.client.force_login(self.producer)
+
+        def dashboard_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse("dashboard:index"))
+            return response, len(ctx.captured_queries)
+
+        _, few = dashboard_queries()
+        credit = self.create_credit()
+        for _ in range(10):
+            Transaction.objects.create(
+                buyer=self.company, seller=self.producer, credit=credit,
+                amount=Decimal("1.00"), total_price=Decimal("10.00"), status=Transaction.Status.COMPLETED,
+            )
+        response, many = dashboard_queries()
+
+        self.assertEqual(few, many)
+        self.assertEqual(response.context["total_sales"], Decimal("100.00"))
+        self.assertEqual(response.context["my_credits"], Decimal("10.00"))
+
+    def test_missing_row_is_rebuilt_on_load(self):
+        credit = self.create_credit()
+        UserTradingStats.objects.filter(pk=self.producer.pk).delete()
+
+        self.assertEqual(UserTradingStats.load(self.producer.pk).available_co2, credit.amount)
+
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        """Comando reporta drift com --check e corrige sem ele."""
+        self.create_credit()
+        UserTradingStats.objects.filter(pk=self.producer.pk).update(available_co2=99, sales=3)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_user_stats", "--check", stdout=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_user_stats", stdout=out)
+        self.assertIn(f"usuário {self.producer.pk}, available_co2", out.getvalue())
+        call_command("rebuild_user_stats", "--check", stdout=StringIO())
+        self.assertEqual(UserTradingStats.load(self.producer.pk).available_co2, Decimal("10.00"))
@@ -1,3 +1,11 @@
+"""
+Ponto de entrada ASGI.
+
+Sirva o projeto por aqui (ex.: `uvicorn ecotrade.asgi:application`) para que o
+SSE de transações públicas rode como stream assíncrono: conexões ociosas
+ficam suspensas no event loop em vez de ocupar uma thread de worker.
+"""
+
 import os
 
 from django.core.asgi import get_asgi_application
@@ -5,4 +13,3 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecotrade.settings")
 
 application = get_asgi_application()
-
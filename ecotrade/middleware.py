@@ -0,0 +1,164 @@
+"""
+Inspeção de consultas SQL por requisição.
+
+`QueryInspectorMiddleware` registra cada consulta executada pela view,
+agrupa as consultas pelo formato (SQL sem os parâmetros) para apontar padrões
+N+1 e aplica um orçamento de consultas por view:
+
+- `QUERY_BUDGETS`: limite por nome de view (`"app:nome"`); as demais usam
+  `QUERY_BUDGET_DEFAULT`.
+- `QUERY_N_PLUS_ONE_THRESHOLD`: repetições do mesmo SELECT que caracterizam N+1.
+- `QUERY_BUDGET_STRICT`: levanta `QueryBudgetExceeded` em vez de apenas logar
+  (ligado durante `manage.py test`).
+
+Toda resposta recebe o cabeçalho `Server-Timing` com o número de consultas e
+o tempo gasto no banco e na view.
+
+Sob ASGI o ORM não roda na thread do event loop: as conexões são por thread,
+e views síncronas (e o ORM das assíncronas, via `sync_to_async`) rodam na
+thread da requisição. O gravador é instalado nessa thread em `process_view`
+e removido nela mesma quando a resposta volta.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("ecotrade.queries")
+
+# Listas IN de tamanho variável viram um único formato
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+
+class QueryBudgetExceeded(Exception):
+    """A view estourou o orçamento de consultas ou executou um N+1."""
+
+
+@dataclass
+class QueryReport:
+    """Consultas executadas durante uma requisição."""
+
+    view_name: str | None
+    budget: int
+    statements: list[tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def duration(self) -> float:
+        """Tempo total no banco, em segundos."""
+        return sum(duration for _, duration in self.statements)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Formatos de SELECT executados `threshold` vezes ou mais."""
+        shapes = Counter(
+            _IN_LIST.sub("IN (%s...)", sql)
+            for sql, _ in self.statements
+            if sql.lstrip().upper().startswith("SELECT")
+        )
+        return [(sql, count) for sql, count in shapes.most_common() if count >= threshold]
+
+    def problems(self, threshold: int) -> list[str]:
+        problems = []
+        if self.count > self.budget:
+            problems.append(f"{self.count} consultas (orçamento: {self.budget})")
+        for sql, count in self.repeated(threshold):
+            problems.append(f"possível N+1, {count}x: {sql[:200]}")
+        return problems
+
+
+class _Recorder:
+    """`execute_wrapper` que anota SQL e duração de cada consulta."""
+
+    def __init__(self, report: QueryReport) -> None:
+        self.report = report
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.report.statements.append((sql, time.perf_counter() - started))
+
+
+def _budget_for(view_name: str | None) -> int:
+    return settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+class QueryInspectorMiddleware:
+    """
+    Mede as consultas de cada requisição, sob WSGI ou ASGI.
+
+    Em streams (SSE) só conta o que roda até a view devolver a resposta: o
+    conteúdo é gerado depois, fora do middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        report = QueryReport(view_name=None, budget=_budget_for(None))
+        started = time.perf_counter()
+        with connection.execute_wrapper(_Recorder(report)):
+            response = self.get_response(request)
+        return self._finish(request, response, report, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        report = QueryReport(view_name=None, budget=_budget_for(None))
+        request._query_recording = (report, ExitStack())
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _, recording = request.__dict__.pop("_query_recording")
+            # Na thread em que process_view instalou o gravador
+            await sync_to_async(recording.close)()
+        return self._finish(request, response, report, time.perf_counter() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Só sob ASGI: roda na thread da requisição (sync_to_async), a mesma da view
+        recording = getattr(request, "_query_recording", None)
+        if recording is not None:
+            report, stack = recording
+            stack.enter_context(connection.execute_wrapper(_Recorder(report)))
+        return None
+
+    def _finish(self, request, response, report: QueryReport, elapsed: float):
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            report.view_name = match.view_name
+            report.budget = _budget_for(match.view_name)
+
+        response["Server-Timing"] = (
+            f'db;dur={report.duration * 1000:.1f};desc="{report.count} queries", '
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+        response.query_report = report
+
+        problems = report.problems(settings.QUERY_N_PLUS_ONE_THRESHOLD)
+        if problems:
+            message = f"{report.view_name or request.path}: " + "; ".join(problems)
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
@@ -0,0 +1,114 @@
+"""
+Utilitários compartilhados pelos comandos seed_*.
+
+O modo `--bulk` troca os `objects.create` linha a linha por `bulk_create` em
+lotes. Como `bulk_create` não dispara signals, os comandos gravam eles mesmos
+as linhas que os signals criariam (Profile, histórico GENESIS/SALE) e, ao
+final, recalculam os contadores derivados com `finish_bulk_seed`.
+"""
+
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from typing import Iterable, Iterator, TypeVar
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.db import models
+
+T = TypeVar("T")
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class FastPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 com poucas iterações, apenas para dados de teste.
+
+    Mantém o algoritmo `pbkdf2_sha256`: o hash continua válido com as
+    configurações normais (as iterações ficam no próprio hash) e o Django o
+    regrava com o custo completo no primeiro login.
+    """
+
+    iterations = 1000
+
+
+FAST_PASSWORD_HASHERS = [
+    "ecotrade.seeding.FastPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+]
+
+
+def add_seed_arguments(parser) -> None:
+    """Opções comuns aos comandos seed_*."""
+    parser.add_argument(
+        '--bulk',
+        action='store_true',
+        help='Insere em lotes com bulk_create (muito mais rápido; sem signals)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f'Linhas por lote no modo --bulk (default: {DEFAULT_BATCH_SIZE})'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Semente do gerador aleatório (dados reproduzíveis)'
+    )
+
+
+def seed_random(seed: int | None) -> random.Random:
+    """
+    Fixa as sementes do `random` global e do Faker, e retorna um gerador
+    dedicado para o caminho em lote.
+    """
+    if seed is not None:
+        from faker import Faker
+
+        random.seed(seed)
+        Faker.seed(seed)
+    return random.Random(seed)
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Divide um iterável em listas de até `size` itens."""
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@contextmanager
+def auto_now_disabled(model: type[models.Model], *field_names: str) -> Iterator[None]:
+    """
+    Desliga `auto_now`/`auto_now_add` temporariamente, para que o `bulk_create`
+    grave datas históricas geradas pelo seed.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    try:
+        for field in fields:
+            field.auto_now = field.auto_now_add = False
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def finish_bulk_seed() -> None:
+    """Recalcula o que os signals manteriam (estatísticas, caches da API e do marketplace)."""
+    from api.cache import invalidate_all
+    from credits.search import invalidate_marketplace
+    from dashboard.models import PlatformStats, UserTradingStats
+
+    PlatformStats.rebuild()
+    UserTradingStats.rebuild_all()
+    invalidate_all()
+    invalidate_marketplace()
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 import django_stubs_ext
 
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "ecotrade.middleware.QueryInspectorMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -49,6 +51,33 @@ MIDDLEWARE = [
     "django_browser_reload.middleware.BrowserReloadMiddleware",
 ]
 
+# Orçamento de consultas SQL por view (ecotrade.middleware). Em produção os
+# excessos e padrões N+1 vão para o log; nos testes viram exceção.
+TESTING = sys.argv[1:2] == ["test"]
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT", "1" if TESTING else "0") == "1"
+QUERY_BUDGET_DEFAULT = int(os.environ.get("QUERY_BUDGET_DEFAULT", "30"))
+QUERY_N_PLUS_ONE_THRESHOLD = 5
+QUERY_BUDGETS = {
+    "dashboard:landing": 4,
+    "dashboard:index": 5,
+    "accounts:admin_dashboard": 6,
+    "credits:credits_marketplace": 6,
+    "credits:credit_history": 8,
+    "credits:auditor_dashboard": 6,
+    "credits:bulk_review_credits": 8,
+    "credits:claim_next_credits": 10,
+    "credits:credit_buy": 16,
+    "transactions:transaction_history": 4,
+    "transactions:cart": 5,
+    "transactions:cart_checkout": 19,
+    "transactions:bids": 6,
+    "api:credits_list": 4,
+    "api:credit_detail": 4,
+    "api:stats": 3,
+    "api:history_proof": 3,
+    "api:market_candles": 1,
+}
+
 
 ROOT_URLCONF = "ecotrade.urls"
 
@@ -71,16 +100,45 @@ TEMPLATES = [
 
 
 WSGI_APPLICATION = "ecotrade.wsgi.application"
+ASGI_APPLICATION = "ecotrade.asgi.application"
 
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # BEGIN IMMEDIATE: a transação pega o lock de escrita ao começar e
+        # espera pelo timeout, em vez de falhar com "database is locked" ao
+        # passar de leitura para escrita (ex.: revisão em lote concorrente)
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
 
 
+# ==============================================================================
+# CACHE
+# ==============================================================================
+
+# "api" guarda as respostas prontas da API pública (ver api/cache.py).
+# Entradas são invalidadas por eventos (aprovação, venda, etc.); o TIMEOUT é
+# apenas uma rede de segurança. Com vários processos use um backend
+# compartilhado, ex.:
+#   API_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   API_CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": {
+        "BACKEND": os.environ.get(
+            "API_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("API_CACHE_LOCATION", "ecotrade-api"),
+        "TIMEOUT": int(os.environ.get("API_CACHE_TIMEOUT", "3600")),
+    },
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
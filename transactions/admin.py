@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Transaction
+from .models import Bid, Transaction
 
 
 @admin.register(Transaction)
@@ -9,3 +9,9 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ("status",)
     search_fields = ("buyer__username", "seller__username")
 
+
+@admin.register(Bid)
+class BidAdmin(admin.ModelAdmin):
+    list_display = ("id", "buyer", "quantity", "filled", "limit_price", "status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("buyer__username",)
@@ -0,0 +1,292 @@
+"""
+Candles de preço (OHLC, VWAP e volume) por hora e por dia.
+
+O preço de uma transação é `total_price / amount` (R$ por tCO₂e). Cada
+transação COMPLETED entra em dois candles: o da sua hora e o do seu dia
+(UTC). Gráficos leem só `PriceCandle` (no máximo MAX_CANDLES linhas pelo
+índice único (interval, bucket_start)), nunca as transações.
+
+- `record_trades`: incremental, dentro da transação da compra. Um único
+  INSERT ... ON CONFLICT DO UPDATE (SQLite e PostgreSQL) cria ou atualiza
+  os candles a partir dos valores gravados (máximo/mínimo, CASE para
+  abertura e fechamento), então compras concorrentes no mesmo intervalo
+  não perdem atualizações. Nos demais bancos: UPDATE e, para candles
+  ausentes, INSERT.
+- `rebuild_candles`: recalcula um período de dias a partir das transações
+  (uma passada ordenada por (timestamp, id)). O `backfill_price_candles`
+  divide o histórico em fatias de dias e as recalcula em paralelo.
+
+Abertura e fechamento seguem (timestamp, id): no empate de horário, a
+transação mais nova fecha o candle nos dois caminhos.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Iterable
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, QuerySet, Value, When
+from django.db.models.functions import Greatest, Least
+
+from .models import PriceCandle, Transaction
+
+INTERVALS = (PriceCandle.Interval.HOUR, PriceCandle.Interval.DAY)
+
+# Linhas devolvidas por consulta de gráfico (≈ 3 semanas de horas, 1,4 ano de dias)
+MAX_CANDLES = 500
+
+PRICE_PLACES = Decimal("0.0001")
+
+# Campos lidos para os gráficos
+CHART_FIELDS = ("bucket_start", "open", "high", "low", "close", "volume", "notional", "trades")
+
+REBUILD_BATCH_SIZE = 2000
+
+
+def bucket_start(moment: datetime, interval: str) -> datetime:
+    """Início (UTC) da hora ou do dia que contém `moment`."""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if interval == PriceCandle.Interval.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def trade_price(amount: Decimal, total_price: Decimal) -> Decimal:
+    return (total_price / amount).quantize(PRICE_PLACES)
+
+
+# ---------------------------------------------------------------------------
+# Incremental (compra)
+# ---------------------------------------------------------------------------
+
+def record_trade(txn: Transaction) -> None:
+    """Soma a transação `txn` aos candles da sua hora e do seu dia."""
+    record_trades([txn])
+
+
+def record_trades(txns: Iterable[Transaction]) -> None:
+    """
+    Soma as transações COMPLETED de `txns` aos seus candles.
+
+    As transações são agregadas por candle antes de gravar: um checkout com
+    dezenas de itens é um único INSERT ... ON CONFLICT. Deve rodar na mesma
+    transação de banco que grava as transações.
+    """
+    trades = sorted(
+        (
+            (txn.timestamp, txn.pk or 0, txn.amount, txn.total_price)
+            for txn in txns
+            if txn.status == Transaction.Status.COMPLETED and txn.amount > 0
+        ),
+        key=lambda trade: trade[:2],
+    )
+    candles = fold_trades((at, amount, total_price) for at, _, amount, total_price in trades)
+    if not candles:
+        return
+    if connection.vendor in _UPSERT_FUNCTIONS:
+        _upsert(candles)
+        return
+
+    missing = [candle for candle in candles if not _merge(candle)]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            PriceCandle.objects.bulk_create(missing)
+    except IntegrityError:
+        # Algum foi criado por uma compra concorrente entre o UPDATE e o INSERT
+        for candle in missing:
+            if not _merge(candle):
+                PriceCandle.objects.bulk_create([candle])
+
+
+def fold_trades(trades: Iterable[tuple[datetime, Decimal, Decimal]]) -> list[PriceCandle]:
+    """Candles (não gravados) de (timestamp, amount, total_price) em ordem cronológica."""
+    candles: dict[tuple[str, datetime], PriceCandle] = {}
+    for at, amount, total_price in trades:
+        price = trade_price(amount, total_price)
+        for interval in INTERVALS:
+            key = (interval, bucket_start(at, interval))
+            candle = candles.get(key)
+            if candle is None:
+                candles[key] = PriceCandle(
+                    interval=interval,
+                    bucket_start=key[1],
+                    open=price,
+                    high=price,
+                    low=price,
+                    close=price,
+                    volume=amount,
+                    notional=total_price,
+                    trades=1,
+                    first_trade_at=at,
+                    last_trade_at=at,
+                )
+                continue
+            candle.high = max(candle.high, price)
+            candle.low = min(candle.low, price)
+            candle.close = price
+            candle.volume += amount
+            candle.notional += total_price
+            candle.trades += 1
+            candle.last_trade_at = at
+    return list(candles.values())
+
+
+# Máximo/mínimo escalares por banco, para o INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_FUNCTIONS = {"sqlite": ("MAX", "MIN"), "postgresql": ("GREATEST", "LEAST")}
+
+_UPSERT_COLUMNS = (
+    "interval", "bucket_start", "open", "high", "low", "close",
+    "volume", "notional", "trades", "first_trade_at", "last_trade_at",
+)
+
+
+def _upsert(candles: list[PriceCandle]) -> None:
+    """
+    Funde os candles parciais nos gravados com um único INSERT ... ON
+    CONFLICT DO UPDATE: sem consulta prévia nem savepoint, e sem corrida na
+    criação do candle.
+    """
+    ops = connection.ops
+    greatest, least = _UPSERT_FUNCTIONS[connection.vendor]
+    table = ops.quote_name(PriceCandle._meta.db_table)
+    col = {name: ops.quote_name(name) for name in _UPSERT_COLUMNS}
+    old = {name: f"{table}.{quoted}" for name, quoted in col.items()}
+    new = {name: f"excluded.{quoted}" for name, quoted in col.items()}
+
+    row = "(" + ", ".join(["%s"] * len(_UPSERT_COLUMNS)) + ")"
+    params: list[Any] = []
+    for candle in candles:
+        params += [
+            candle.interval,
+            ops.adapt_datetimefield_value(candle.bucket_start),
+            candle.open,
+            candle.high,
+            candle.low,
+            candle.close,
+            candle.volume,
+            candle.notional,
+            candle.trades,
+            ops.adapt_datetimefield_value(candle.first_trade_at),
+            ops.adapt_datetimefield_value(candle.last_trade_at),
+        ]
+    sql = f"""
+        INSERT INTO {table} ({", ".join(col.values())}) VALUES {", ".join([row] * len(candles))}
+        ON CONFLICT ({col["interval"]}, {col["bucket_start"]}) DO UPDATE SET
+            {col["open"]} = CASE WHEN {new["first_trade_at"]} < {old["first_trade_at"]}
+                THEN {new["open"]} ELSE {old["open"]} END,
+            {col["high"]} = {greatest}({old["high"]}, {new["high"]}),
+            {col["low"]} = {least}({old["low"]}, {new["low"]}),
+            {col["close"]} = CASE WHEN {new["last_trade_at"]} >= {old["last_trade_at"]}
+                THEN {new["close"]} ELSE {old["close"]} END,
+            {col["volume"]} = {old["volume"]} + {new["volume"]},
+            {col["notional"]} = {old["notional"]} + {new["notional"]},
+            {col["trades"]} = {old["trades"]} + {new["trades"]},
+            {col["first_trade_at"]} = {least}({old["first_trade_at"]}, {new["first_trade_at"]}),
+            {col["last_trade_at"]} = {greatest}({old["last_trade_at"]}, {new["last_trade_at"]})
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _merge(candle: PriceCandle) -> int:
+    """UPDATE que funde `candle` no candle gravado do mesmo intervalo (0 se não houver)."""
+    return PriceCandle.objects.filter(interval=candle.interval, bucket_start=candle.bucket_start).update(
+        open=Case(
+            When(first_trade_at__gt=candle.first_trade_at, then=Value(candle.open)), default=F("open")
+        ),
+        high=Greatest(F("high"), Value(candle.high)),
+        low=Least(F("low"), Value(candle.low)),
+        close=Case(
+            When(last_trade_at__lte=candle.last_trade_at, then=Value(candle.close)), default=F("close")
+        ),
+        volume=F("volume") + candle.volume,
+        notional=F("notional") + candle.notional,
+        trades=F("trades") + candle.trades,
+        first_trade_at=Least(F("first_trade_at"), Value(candle.first_trade_at)),
+        last_trade_at=Greatest(F("last_trade_at"), Value(candle.last_trade_at)),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Recálculo (backfill)
+# ---------------------------------------------------------------------------
+
+def compute_candles(first_day: date, last_day: date) -> list[PriceCandle]:
+    """Candles (não gravados) das transações COMPLETED de `first_day` a `last_day`."""
+    trades = (
+        Transaction.objects.filter(
+            status=Transaction.Status.COMPLETED,
+            timestamp__gte=day_start(first_day),
+            timestamp__lt=day_start(last_day + timedelta(days=1)),
+            amount__gt=0,
+        )
+        .order_by("timestamp", "id")
+        .values_list("timestamp", "amount", "total_price")
+    )
+    return fold_trades(trades.iterator(chunk_size=REBUILD_BATCH_SIZE))
+
+
+def rebuild_candles(first_day: date, last_day: date) -> int:
+    """
+    Substitui os candles de `first_day` a `last_day` (inclusive) pelos
+    recalculados. Retorna quantos candles foram gravados.
+
+    A leitura das transações fica fora da transação de escrita, para que
+    fatias em paralelo só disputem o banco na troca dos candles. Uma compra
+    no período durante o recálculo pode ficar de fora: recalcular dias
+    encerrados, ou de novo depois.
+    """
+    candles = compute_candles(first_day, last_day)
+    with transaction.atomic():
+        PriceCandle.objects.filter(
+            bucket_start__gte=day_start(first_day),
+            bucket_start__lt=day_start(last_day + timedelta(days=1)),
+        ).delete()
+        PriceCandle.objects.bulk_create(candles, batch_size=REBUILD_BATCH_SIZE)
+    return len(candles)
+
+
+def day_shards(first_day: date, last_day: date, days: int) -> list[tuple[date, date]]:
+    """Divide [first_day, last_day] em fatias de até `days` dias."""
+    shards = []
+    start = first_day
+    while start <= last_day:
+        end = min(start + timedelta(days=days - 1), last_day)
+        shards.append((start, end))
+        start = end + timedelta(days=1)
+    return shards
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+def price_candles(
+    interval: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = MAX_CANDLES,
+) -> list[PriceCandle]:
+    """
+    Até `limit` candles de `interval` em [start, end), em ordem cronológica.
+
+    Sem `start`, devolve os mais recentes.
+    """
+    # first/last_trade_at ficam de fora: conversões de data custam caro por linha
+    candles: QuerySet[PriceCandle] = PriceCandle.objects.filter(interval=interval).only(*CHART_FIELDS)
+    if start is not None:
+        candles = candles.filter(bucket_start__gte=start)
+    if end is not None:
+        candles = candles.filter(bucket_start__lt=end)
+    limit = max(1, min(limit, MAX_CANDLES))
+    if start is not None:
+        return list(candles.order_by("bucket_start")[:limit])
+    return list(candles.order_by("-bucket_start")[:limit])[::-1]
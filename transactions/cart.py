@@ -0,0 +1,52 @@
+"""
+Carrinho de compras da empresa, guardado na sessão.
+
+Guarda só os ids das listagens; preços e disponibilidade são lidos do banco
+ao exibir o carrinho e de novo no checkout (`transactions.services.checkout`).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+CART_SESSION_KEY = "cart"
+
+# Itens por carrinho (limita o tamanho da sessão e do checkout)
+MAX_CART_ITEMS = 100
+
+
+class Cart:
+    """Listagens no carrinho da sessão `session`, na ordem em que foram adicionadas."""
+
+    def __init__(self, session: Any) -> None:
+        self.session = session
+
+    @property
+    def listing_ids(self) -> list[int]:
+        return list(self.session.get(CART_SESSION_KEY, []))
+
+    def __len__(self) -> int:
+        return len(self.session.get(CART_SESSION_KEY, []))
+
+    def __contains__(self, listing_id: int) -> bool:
+        return listing_id in self.session.get(CART_SESSION_KEY, [])
+
+    def add(self, listing_id: int) -> bool:
+        """Adiciona a listagem; False se o carrinho estiver cheio."""
+        ids = self.listing_ids
+        if listing_id in ids:
+            return True
+        if len(ids) >= MAX_CART_ITEMS:
+            return False
+        self._save(ids + [listing_id])
+        return True
+
+    def remove(self, listing_ids: Iterable[int]) -> None:
+        removed = set(listing_ids)
+        self._save([pk for pk in self.listing_ids if pk not in removed])
+
+    def clear(self) -> None:
+        self.session.pop(CART_SESSION_KEY, None)
+
+    def _save(self, ids: list[int]) -> None:
+        self.session[CART_SESSION_KEY] = ids
@@ -0,0 +1,252 @@
+"""
+Barramento de eventos em memória para transações concluídas.
+
+Substitui o polling por cliente do SSE: cada transação COMPLETED é publicada
+uma única vez (após o commit) e distribuída para todos os assinantes.
+O custo no banco passa a ser proporcional ao número de negociações, e não ao
+número de navegadores conectados.
+
+Os eventos mais recentes ficam num ring buffer para que clientes que
+reconectam com `Last-Event-ID` recebam exatamente o que perderam. Cursores
+mais antigos que o buffer são atendidos pelo banco, em páginas por id até
+alcançar a assinatura ao vivo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import queue
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Iterator
+
+from .models import Transaction
+
+# Tamanho máximo da fila de cada assinante. Clientes lentos perdem os eventos
+# mais antigos em vez de fazer a memória do processo crescer sem limite.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Quantidade de eventos recentes mantidos para replay em reconexões
+REPLAY_BUFFER_SIZE = 500
+
+# Transações lidas por consulta no replay pelo banco
+REPLAY_PAGE_SIZE = 500
+
+# Item entregue aos assinantes: (id da transação, mensagem SSE serializada)
+EventItem = tuple[int, str]
+
+
+def build_transaction_event(txn: Any) -> dict[str, Any]:
+    """
+    Monta o payload público (anonimizado) de uma transação.
+
+    NÃO inclui dados pessoais (nomes de fazendas, usernames), apenas papéis.
+    """
+    return {
+        "id": txn.id,
+        "timestamp": txn.timestamp.isoformat(),
+        "buyer_role": txn.buyer.get_role_display(),
+        "seller_role": txn.seller.get_role_display(),
+        # Mesma precisão das colunas (decimal_places=2), mesmo para valores
+        # ainda não recarregados do banco
+        "amount": f"{txn.amount:.2f}",
+        "total_price": f"{txn.total_price:.2f}",
+    }
+
+
+def format_sse_message(event: dict[str, Any]) -> str:
+    """Serializa um evento no formato de mensagem SSE, com campo `id:`."""
+    return f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+
+
+class Subscription:
+    """Fila de eventos de um único assinante (uma conexão SSE)."""
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self._queue: queue.Queue[EventItem] = queue.Queue(maxsize=maxsize)
+
+    def deliver(self, item: EventItem) -> None:
+        """Enfileira o evento, descartando o mais antigo se a fila estiver cheia."""
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float | None = None) -> EventItem | None:
+        """Aguarda o próximo evento; retorna None se o timeout expirar."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """
+    Assinatura para streams ASGI, entregue via `asyncio.Queue`.
+
+    `deliver` pode ser chamado de qualquer thread (ex.: worker síncrono que
+    executou `buy_credit`); o evento é repassado ao event loop do assinante.
+    """
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[EventItem] = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, item: EventItem) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(item)
+
+    def deliver(self, item: EventItem) -> None:
+        """Agenda a entrega no event loop do assinante (thread-safe)."""
+        try:
+            self._loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            # Event loop já encerrado (cliente desconectado)
+            pass
+
+    async def get(self, timeout: float | None = None) -> EventItem | None:
+        """Aguarda o próximo evento sem bloquear o loop; None no timeout."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class TransactionEventBus:
+    """
+    Publicador in-process com fan-out para todos os assinantes.
+
+    Thread-safe: `publish` pode ser chamado de qualquer worker enquanto
+    conexões SSE assinam/cancelam em paralelo.
+    """
+
+    def __init__(self, replay_buffer_size: int = REPLAY_BUFFER_SIZE) -> None:
+        self._subscribers: set[Subscription | AsyncSubscription] = set()
+        self._buffer: deque[EventItem] = deque(maxlen=replay_buffer_size)
+        self._lock = threading.Lock()
+
+    def resume(
+        self,
+        subscription: Subscription | AsyncSubscription,
+        last_event_id: int | None,
+    ) -> list[EventItem] | None:
+        """
+        Registra o assinante e retorna os eventos publicados após `last_event_id`.
+
+        Registro e leitura do buffer acontecem sob o mesmo lock, então cada
+        evento chega exatamente uma vez: ou no replay, ou na fila.
+        Retorna None se `last_event_id` não estiver mais no buffer (o chamador
+        deve buscar no banco).
+        """
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is None:
+                return []
+            for position, (event_id, _) in enumerate(self._buffer):
+                if event_id == last_event_id:
+                    return list(self._buffer)[position + 1:]
+            return None
+
+    def subscribe(self, subscription: Subscription | None = None) -> Subscription:
+        """Registra um assinante síncrono e retorna sua assinatura."""
+        subscription = subscription or Subscription()
+        self.resume(subscription, None)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription | AsyncSubscription) -> None:
+        """Remove um assinante (idempotente)."""
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: dict[str, Any]) -> None:
+        """Serializa o evento uma única vez, guarda no buffer e entrega a todos."""
+        item = (event["id"], format_sse_message(event))
+        with self._lock:
+            self._buffer.append(item)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(item)
+
+
+# Instância única por processo
+event_bus = TransactionEventBus()
+
+
+def publish_transaction(txn: Any) -> None:
+    """
+    Agenda a publicação de uma transação para depois do commit.
+
+    O payload é montado imediatamente (os objetos relacionados já estão em
+    memória), mas só é distribuído se a transação do banco for confirmada.
+    """
+    from django.db import transaction
+
+    event = build_transaction_event(txn)
+    transaction.on_commit(lambda: event_bus.publish(event))
+
+
+def _missed_transactions(last_event_id: int):
+    """Uma página (keyset pela PK) para reconexões mais antigas que o buffer."""
+    return (
+        Transaction.objects.filter(
+            status=Transaction.Status.COMPLETED,
+            id__gt=last_event_id,
+        )
+        .select_related("buyer", "seller")
+        .order_by("id")[:REPLAY_PAGE_SIZE]
+    )
+
+
+def load_missed_events(last_event_id: int) -> list[EventItem]:
+    """Uma página de eventos após `last_event_id`, lida do banco."""
+    return [
+        (txn.id, format_sse_message(build_transaction_event(txn)))
+        for txn in _missed_transactions(last_event_id)
+    ]
+
+
+async def aload_missed_events(last_event_id: int) -> list[EventItem]:
+    """Versão assíncrona de `load_missed_events` (ORM assíncrono)."""
+    return [
+        (txn.id, format_sse_message(build_transaction_event(txn)))
+        async for txn in _missed_transactions(last_event_id)
+    ]
+
+
+def iter_missed_events(last_event_id: int) -> Iterator[list[EventItem]]:
+    """
+    Todos os eventos após `last_event_id`, página a página, até uma página
+    incompleta. O assinante já está registrado (`resume`): o que for
+    confirmado depois da última página chega pela fila, então nada se perde
+    entre o replay e os eventos ao vivo.
+    """
+    while True:
+        page = load_missed_events(last_event_id)
+        if page:
+            yield page
+            last_event_id = page[-1][0]
+        if len(page) < REPLAY_PAGE_SIZE:
+            return
+
+
+async def aiter_missed_events(last_event_id: int) -> AsyncIterator[list[EventItem]]:
+    """Versão assíncrona de `iter_missed_events`."""
+    while True:
+        page = await aload_missed_events(last_event_id)
+        if page:
+            yield page
+            last_event_id = page[-1][0]
+        if len(page) < REPLAY_PAGE_SIZE:
+            return
@@ -1,8 +1,47 @@
+from decimal import Decimal
+
 from django import forms
 
-from .models import Transaction
+from .models import Bid, Transaction
+
+INPUT_CLASS = (
+    "w-full px-4 py-3 bg-white/5 border border-white/10 rounded-lg text-white placeholder-gray-500 "
+    "focus:border-tucupi-green-500 focus:ring-2 focus:ring-tucupi-green-500/50 focus:outline-none transition"
+)
+
 
 class TransactionForm(forms.ModelForm):
     class Meta:
         model = Transaction
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class BidForm(forms.ModelForm):
+    """Ordem de compra limitada: quantidade (tCO₂e) e preço máximo por tCO₂e.
+
+    O comprador é definido na view com o usuário autenticado.
+    """
+    class Meta:
+        model = Bid
+        fields = ["quantity", "limit_price"]
+        widgets = {
+            "quantity": forms.NumberInput(attrs={"class": INPUT_CLASS, "placeholder": "100.00", "step": "0.01"}),
+            "limit_price": forms.NumberInput(attrs={"class": INPUT_CLASS, "placeholder": "45.00", "step": "0.01"}),
+        }
+
+    def clean_quantity(self):
+        quantity = self.cleaned_data["quantity"]
+        if quantity <= 0:
+            raise forms.ValidationError("A quantidade deve ser maior que zero.")
+        return quantity
+
+    def clean_limit_price(self):
+        limit_price = self.cleaned_data["limit_price"]
+        if limit_price <= 0:
+            raise forms.ValidationError("O preço limite deve ser maior que zero.")
+        return limit_price
+
+    @property
+    def max_cost(self) -> Decimal:
+        """Custo se a ordem for toda executada no preço limite."""
+        return self.cleaned_data["quantity"] * self.cleaned_data["limit_price"]
@@ -0,0 +1,82 @@
+"""
+Management command para recalcular os candles de preço a partir das transações.
+Uso: python manage.py backfill_price_candles [--since AAAA-MM-DD] [--until AAAA-MM-DD]
+                                             [--shard-days N] [--workers N]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+
+from transactions.candles import bucket_start, day_shards, rebuild_candles
+from transactions.models import PriceCandle, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os candles de preço (hora e dia) em fatias de dias, em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            default=None,
+            help='Primeiro dia (default: dia da primeira transação concluída)'
+        )
+        parser.add_argument(
+            '--until',
+            type=date.fromisoformat,
+            default=None,
+            help='Último dia, inclusive (default: dia da última transação concluída)'
+        )
+        parser.add_argument(
+            '--shard-days',
+            type=int,
+            default=7,
+            help='Dias por fatia (default: 7)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Fatias recalculadas ao mesmo tempo (default: 4)'
+        )
+
+    def handle(self, *args, **options):
+        if options['shard_days'] < 1 or options['workers'] < 1:
+            raise CommandError('--shard-days e --workers devem ser ao menos 1.')
+
+        bounds = Transaction.objects.filter(status=Transaction.Status.COMPLETED).aggregate(
+            first=Min('timestamp'), last=Max('timestamp')
+        )
+        since = options['since'] or (bounds['first'] and self._utc_day(bounds['first']))
+        until = options['until'] or (bounds['last'] and self._utc_day(bounds['last']))
+        if since is None or until is None:
+            self.stdout.write(self.style.WARNING('Nenhuma transação concluída para recalcular.'))
+            return
+        if since > until:
+            raise CommandError('--since deve ser anterior a --until.')
+
+        shards = day_shards(since, until, options['shard_days'])
+        self.stdout.write(f'Recalculando {since} a {until} em {len(shards)} fatia(s)...')
+
+        if options['workers'] == 1:
+            written = sum(rebuild_candles(*shard) for shard in shards)
+        else:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                written = sum(pool.map(self._rebuild_shard, shards))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {written} candle(s) gravado(s)'))
+
+    @staticmethod
+    def _utc_day(moment):
+        return bucket_start(moment, PriceCandle.Interval.DAY).date()
+
+    @staticmethod
+    def _rebuild_shard(shard):
+        # Cada thread usa sua própria conexão; fechada ao terminar a fatia
+        try:
+            return rebuild_candles(*shard)
+        finally:
+            connection.close()
@@ -0,0 +1,73 @@
+"""
+Management command que roda o motor de casamento de ordens de compra.
+Uso: python manage.py run_matching_engine [--interval SEGUNDOS] [--batch-size N]
+                                          [--reload-every SEGUNDOS] [--once]
+
+Deve haver um único processo rodando o motor (ver transactions.matching).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.matching import MAX_FILLS_PER_BATCH, MatchingEngine
+
+
+class Command(BaseCommand):
+    help = 'Casa ordens de compra com listagens ativas em micro-lotes e liquida as execuções'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.2,
+            help='Espera entre lotes quando não há o que casar, em segundos (default: 0.2)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=MAX_FILLS_PER_BATCH,
+            help=f'Execuções liquidadas por transação (default: {MAX_FILLS_PER_BATCH})'
+        )
+        parser.add_argument(
+            '--reload-every',
+            type=float,
+            default=300,
+            help='Remonta o livro a partir do banco a cada N segundos (default: 300)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Casa o que cruza agora e sai'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['interval'] < 0:
+            raise CommandError('--batch-size deve ser ao menos 1 e --interval não pode ser negativo.')
+
+        engine = MatchingEngine(batch_size=options['batch_size'])
+        engine.load()
+        self.stdout.write(
+            f'Livro carregado: {len(engine.book.bids)} ordem(ns) de compra, '
+            f'{len(engine.book.asks)} crédito(s) à venda'
+        )
+
+        settled = 0
+        loaded_at = time.monotonic()
+        try:
+            while True:
+                if time.monotonic() - loaded_at >= options['reload_every']:
+                    engine.load()
+                    loaded_at = time.monotonic()
+
+                txns = engine.run_batch()
+                if txns:
+                    settled += len(txns)
+                    self.stdout.write(self.style.SUCCESS(f'✓ {len(txns)} execução(ões) liquidada(s)'))
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {settled} execução(ões) no total'))
@@ -1,13 +1,34 @@
 """Management command to seed Transaction data."""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
 from django.utils import timezone
 from faker import Faker
 from accounts.models import User
-from credits.models import CarbonCredit
+from credits.history import HistoryChain
+from credits.models import CarbonCredit, CreditOwnershipHistory
 from transactions.models import Transaction
+from transactions.services import line_total
 from datetime import timedelta
+from ecotrade.seeding import (
+    add_seed_arguments,
+    auto_now_disabled,
+    batched,
+    finish_bulk_seed,
+    seed_random,
+)
 import random
 
+# Status distribution: 40% PENDING, 50% COMPLETED, 10% CANCELLED
+STATUS_WEIGHTS = {
+    Transaction.Status.PENDING: 40,
+    Transaction.Status.COMPLETED: 50,
+    Transaction.Status.CANCELLED: 10,
+}
+
 
 class Command(BaseCommand):
     help = 'Seed database with Transaction data'
@@ -19,8 +40,10 @@ class Command(BaseCommand):
             default=35,
             help='Number of transactions to create (default: 35)'
         )
+        add_seed_arguments(parser)
 
     def handle(self, *args, **options):
+        rng = seed_random(options['seed'])
         fake = Faker('pt_BR')
         count = options['count']
 
@@ -47,6 +70,10 @@ class Command(BaseCommand):
             )
             return
 
+        if options['bulk']:
+            self._handle_bulk(list(companies.values_list('id', flat=True)), count, rng, options)
+            return
+
         created_transactions = []
 
         self.stdout.write(f'Creating {count} Transaction records...')
@@ -72,12 +99,10 @@ class Command(BaseCommand):
                 max_value=200
             )
 
-            total_price = amount * price_per_unit
+            total_price = line_total(amount, price_per_unit)
 
-            # Status distribution: 40% PENDING, 50% COMPLETED, 10% CANCELLED
             status_choice = random.choices(
-                [Transaction.Status.PENDING, Transaction.Status.COMPLETED, Transaction.Status.CANCELLED],
-                weights=[40, 50, 10]
+                list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values())
             )[0]
 
             # Create transaction (timestamp set by auto_now_add)
@@ -105,6 +130,9 @@ class Command(BaseCommand):
 
             created_transactions.append(transaction)
 
+        # Timestamps were rewritten after creation: rebuild the price candles
+        call_command('backfill_price_candles', workers=1, stdout=self.stdout)
+
         # Summary stats
         total = len(created_transactions)
         pending = sum(1 for t in created_transactions if t.status == Transaction.Status.PENDING)
@@ -112,7 +140,6 @@ class Command(BaseCommand):
         cancelled = sum(1 for t in created_transactions if t.status == Transaction.Status.CANCELLED)
 
         # Count ownership history entries created via signals
-        from credits.models import CreditOwnershipHistory
         completed_txn_ids = [t.id for t in created_transactions if t.status == Transaction.Status.COMPLETED]
         sale_history_count = CreditOwnershipHistory.objects.filter(
             transaction_id__in=completed_txn_ids,
@@ -126,3 +153,98 @@ class Command(BaseCommand):
                 f'✓ Created {sale_history_count} SALE ownership records (via signals)'
             )
         )
+
+    def _handle_bulk(self, company_ids, count, rng, options):
+        """
+        Bulk path: transactions and SALE history rows via bulk_create.
+
+        Credits are kept in memory as (owner, amount) so ownership evolves as
+        in the sequential path: the seller is the current owner and a
+        COMPLETED transaction hands the credit to the buyer. The resulting
+        owners/statuses are written back at the end, one UPDATE per new owner.
+        """
+        batch_size = options['batch_size']
+        now = timezone.now()
+        credit_rows = list(CarbonCredit.objects.values_list('id', 'owner_id', 'amount'))
+        credit_ids = [row[0] for row in credit_rows]
+        owners = {row[0]: row[1] for row in credit_rows}
+        amounts = {row[0]: row[2] for row in credit_rows}
+        sold = set()
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        totals = dict.fromkeys(statuses, 0)
+
+        # Timestamps spread over the past 6 months in creation order, so the
+        # latest sale of a credit is also the most recent one
+        window_start = now - timedelta(days=180)
+        step = timedelta(days=179) / max(count, 1)
+
+        def transactions():
+            for i in range(count):
+                buyer_id = rng.choice(company_ids)
+                credit_id = rng.choice(credit_ids)
+                seller_id = owners[credit_id]
+                # Ensure seller is different from buyer
+                if seller_id == buyer_id:
+                    continue
+                amount = amounts[credit_id]
+                status = rng.choices(statuses, weights=weights)[0]
+                totals[status] += 1
+                if status == Transaction.Status.COMPLETED:
+                    owners[credit_id] = buyer_id
+                    sold.add(credit_id)
+                yield Transaction(
+                    buyer_id=buyer_id,
+                    seller_id=seller_id,
+                    credit_id=credit_id,
+                    amount=amount,
+                    total_price=line_total(amount, Decimal(rng.randint(5000, 20000)) / 100),
+                    status=status,
+                    timestamp=window_start + step * i,
+                )
+
+        created = 0
+        chain = HistoryChain(CreditOwnershipHistory)
+        with db_transaction.atomic(), auto_now_disabled(Transaction, 'timestamp'):
+            for batch in batched(transactions(), batch_size):
+                Transaction.objects.bulk_create(batch)
+                # Same SALE record track_credit_ownership writes on a sale,
+                # hash-chained to the credit's previous record
+                CreditOwnershipHistory.objects.bulk_create(chain.seal([
+                    CreditOwnershipHistory(
+                        credit_id=txn.credit_id,
+                        from_owner_id=txn.seller_id,
+                        to_owner_id=txn.buyer_id,
+                        transfer_type=CreditOwnershipHistory.TransferType.SALE,
+                        transaction_id=txn.pk,
+                        price=txn.total_price,
+                    )
+                    for txn in batch
+                    if txn.status == Transaction.Status.COMPLETED
+                ]))
+                created += len(batch)
+                self.stdout.write(f'  {created}/{count}', ending='\r')
+
+            # One UPDATE per new owner (companies are few, credits are many)
+            sold_by_owner = defaultdict(list)
+            for credit_id in sold:
+                sold_by_owner[owners[credit_id]].append(credit_id)
+            for owner_id, ids in sold_by_owner.items():
+                for chunk in batched(ids, batch_size):
+                    CarbonCredit.objects.filter(id__in=chunk).update(
+                        owner_id=owner_id, status=CarbonCredit.Status.SOLD, updated_at=now
+                    )
+            finish_bulk_seed()
+            # Price candles are rebuilt from the inserted transactions
+            call_command('backfill_price_candles', workers=1, stdout=self.stdout)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ Bulk-created {created} transactions: '
+                f'{totals[Transaction.Status.PENDING]} pending, '
+                f'{totals[Transaction.Status.COMPLETED]} completed, '
+                f'{totals[Transaction.Status.CANCELLED]} cancelled\n'
+                f'✓ Created {totals[Transaction.Status.COMPLETED]} SALE ownership records '
+                f'and transferred {len(sold)} credits'
+            )
+        )
@@ -0,0 +1,512 @@
+"""
+Livro de ofertas em memória e motor de casamento em micro-lotes.
+
+Ofertas de compra são as `Bid` abertas (empresa, quantidade e preço limite);
+ofertas de venda são as `CreditListing` ativas (crédito inteiro, preço por
+tCO₂e). Cada lado fica em heaps com prioridade preço-tempo:
+
+- compras: maior `limit_price` primeiro, no empate a mais antiga;
+- vendas: menor `price_per_unit` primeiro, no empate a mais antiga.
+
+Créditos não são fracionados: uma compra leva créditos inteiros que caibam
+no que lhe falta. O preço de cada execução é o da ordem que já estava no
+livro (a mais antiga das duas).
+
+`MatchingEngine` roda em um único processo (`run_matching_engine`). A cada
+lote lê as ordens e listagens novas (duas consultas), casa as que chegaram
+contra o livro e liquida as execuções em uma única transação do banco. As
+novas são as criadas desde a mais recente já lida menos `SYNC_WINDOW`, sem
+as já vistas: ids e horários são atribuídos antes do commit, então uma
+linha pode ficar visível depois de outra mais nova. O banco é a fonte da
+verdade: o livro é remontado dele ao iniciar, e ordens canceladas
+ou créditos vendidos por compra direta são descobertos na liquidação, que
+confere tudo dentro da transação de escrita e devolve ao livro a
+contraparte das execuções recusadas.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Iterable
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from accounts.ledger import credit_balances
+from accounts.models import Profile
+from credits.models import CarbonCredit, CreditListing
+
+from .models import Bid, Transaction
+from .services import (
+    CheckoutError,
+    Sale,
+    is_available,
+    line_total,
+    load_listings,
+    lock_credits,
+    settle_sales,
+)
+
+# Execuções por lote (limita o tamanho da transação de liquidação)
+MAX_FILLS_PER_BATCH = 500
+
+# Atraso máximo entre criar uma ordem ou listagem e o commit dela; linhas que
+# demorem mais só entram no livro na próxima leitura completa (`load`)
+SYNC_WINDOW = timedelta(seconds=30)
+
+
+@dataclass(slots=True, eq=False)
+class BookBid:
+    """Ordem de compra no livro; `remaining` já desconta as execuções do lote."""
+
+    id: int
+    buyer_id: int
+    limit_price: Decimal
+    remaining: Decimal
+    created_at: datetime
+    # Entrada válida nos heaps (-1: aguardando em `pending` ou fora do livro)
+    rest_seq: int = -1
+
+
+@dataclass(slots=True, eq=False)
+class BookAsk:
+    """Listagem ativa no livro (id da `CreditListing`)."""
+
+    id: int
+    credit_id: int
+    seller_id: int
+    amount: Decimal
+    price: Decimal
+    listed_at: datetime
+    rest_seq: int = -1
+
+
+@dataclass(slots=True)
+class Fill:
+    """Execução: o crédito inteiro de `ask` comprado por `bid` a `price` por tCO₂e."""
+
+    bid: BookBid
+    ask: BookAsk
+    price: Decimal
+
+    @property
+    def total_price(self) -> Decimal:
+        return line_total(self.ask.amount, self.price)
+
+
+def size_class(quantity: Decimal) -> int:
+    """Classe de tamanho: c tal que 2^(c-1) <= quantidade < 2^c (0 abaixo de 1 tCO₂e)."""
+    return int(quantity).bit_length()
+
+
+class OrderBook:
+    """
+    Livro de ofertas com prioridade preço-tempo.
+
+    Ordens novas (ou devolvidas por execuções recusadas) esperam em
+    `pending` e são casadas, na ordem de chegada, contra as que já estão no
+    livro. Como créditos não são fracionados, uma ordem sem contraparte que
+    caiba fica no livro mesmo cruzando o preço de outra; só uma ordem que
+    chega pode gerar execuções, então o que está parado não é revisto.
+
+    Cada lado guarda um heap por classe de tamanho (potências de 2): a
+    melhor contraparte que cabe está no topo de uma das classes menores, ou
+    na classe do limite, a única percorrida além do topo. Cada entrada
+    leva um número de sequência, e só a entrada registrada na ordem
+    (`rest_seq`) vale: remover ou mudar de classe não mexe nos heaps, e
+    entradas velhas são descartadas quando chegam ao topo.
+    """
+
+    def __init__(self) -> None:
+        self.bids: dict[int, BookBid] = {}
+        self.asks: dict[int, BookAsk] = {}
+        self.pending: deque[BookBid | BookAsk] = deque()
+        self._bid_heaps: dict[int, list[tuple[Decimal, datetime, int, int, BookBid]]] = defaultdict(list)
+        self._ask_heaps: dict[int, list[tuple[Decimal, datetime, int, int, BookAsk]]] = defaultdict(list)
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.bids) + len(self.asks)
+
+    def add_bid(self, bid: BookBid) -> None:
+        if bid.id in self.bids or bid.remaining <= 0:
+            return
+        bid.rest_seq = -1
+        self.bids[bid.id] = bid
+        self.pending.append(bid)
+
+    def add_ask(self, ask: BookAsk) -> None:
+        if ask.id in self.asks:
+            return
+        ask.rest_seq = -1
+        self.asks[ask.id] = ask
+        self.pending.append(ask)
+
+    def remove_bid(self, bid_id: int) -> None:
+        bid = self.bids.pop(bid_id, None)
+        if bid is not None:
+            bid.rest_seq = -1
+
+    def remove_ask(self, listing_id: int) -> None:
+        ask = self.asks.pop(listing_id, None)
+        if ask is not None:
+            ask.rest_seq = -1
+
+    def return_bid(self, bid: BookBid, amount: Decimal) -> None:
+        """Devolve a quantidade de uma execução recusada; a ordem volta a casar."""
+        bid.remaining += amount
+        if self.bids.get(bid.id) is not bid:
+            self.add_bid(bid)
+        elif bid.rest_seq >= 0:
+            bid.rest_seq = -1
+            self.pending.append(bid)
+
+    def return_ask(self, ask: BookAsk) -> None:
+        """Devolve a venda de uma execução recusada; ela volta a casar."""
+        self.add_ask(ask)
+
+    def best_bid(self) -> BookBid | None:
+        """Melhor compra parada no livro (de qualquer tamanho)."""
+        tops = [self._top(heap) for heap in self._bid_heaps.values()]
+        return min((top for top in tops if top), default=(None,))[-1]
+
+    def best_ask(self) -> BookAsk | None:
+        """Melhor venda parada no livro (de qualquer tamanho)."""
+        tops = [self._top(heap) for heap in self._ask_heaps.values()]
+        return min((top for top in tops if top), default=(None,))[-1]
+
+    @staticmethod
+    def _top(heap: list) -> tuple | None:
+        while heap and heap[0][-1].rest_seq != heap[0][3]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def match(self, limit: int = MAX_FILLS_PER_BATCH) -> list[Fill]:
+        """
+        Casa as ordens que chegaram, em ordem de chegada, até `limit` execuções.
+
+        Uma compra leva, uma a uma, a melhor venda (menor preço, depois a
+        mais antiga) que caiba no que lhe falta e não passe do seu limite;
+        uma venda vai para a melhor compra (maior limite, depois a mais
+        antiga) com espaço para o crédito inteiro. O que sobra fica no livro.
+        """
+        fills: list[Fill] = []
+        while self.pending and len(fills) < limit:
+            order = self.pending.popleft()
+            if isinstance(order, BookBid):
+                if self.bids.get(order.id) is not order or order.rest_seq >= 0:
+                    continue
+                while order.remaining > 0 and len(fills) < limit:
+                    ask = self._best_ask(order)
+                    if ask is None:
+                        break
+                    fills.append(self._fill(order, ask))
+                if order.remaining <= 0:
+                    del self.bids[order.id]
+                elif len(fills) >= limit:
+                    # Pode haver mais o que levar: continua no próximo lote
+                    self.pending.appendleft(order)
+                else:
+                    self._rest_bid(order)
+            else:
+                if self.asks.get(order.id) is not order or order.rest_seq >= 0:
+                    continue
+                bid = self._best_bid(order)
+                if bid is None:
+                    self._rest_ask(order)
+                    continue
+                fills.append(self._fill(bid, order))
+                if bid.remaining <= 0:
+                    del self.bids[bid.id]
+                    bid.rest_seq = -1
+                elif size_class(bid.remaining) != size_class(bid.remaining + order.amount):
+                    self._rest_bid(bid)
+        return fills
+
+    def _fill(self, bid: BookBid, ask: BookAsk) -> Fill:
+        self.asks.pop(ask.id, None)
+        ask.rest_seq = -1
+        bid.remaining -= ask.amount
+        # Vale o preço da ordem que chegou primeiro ao livro
+        price = bid.limit_price if bid.created_at < ask.listed_at else ask.price
+        return Fill(bid, ask, price)
+
+    def _rest_bid(self, bid: BookBid) -> None:
+        bid.rest_seq = next(self._seq)
+        entry = (-bid.limit_price, bid.created_at, bid.id, bid.rest_seq, bid)
+        heapq.heappush(self._bid_heaps[size_class(bid.remaining)], entry)
+
+    def _rest_ask(self, ask: BookAsk) -> None:
+        ask.rest_seq = next(self._seq)
+        entry = (ask.price, ask.listed_at, ask.id, ask.rest_seq, ask)
+        heapq.heappush(self._ask_heaps[size_class(ask.amount)], entry)
+
+    def _best_ask(self, bid: BookBid) -> BookAsk | None:
+        """Melhor venda que cabe em `bid`: classes até a do seu restante."""
+        boundary = size_class(bid.remaining)
+        best = None
+        for rest_class, heap in self._ask_heaps.items():
+            if rest_class > boundary:
+                continue
+            entry = self._first_fit(
+                heap,
+                fits=lambda ask: ask.amount <= bid.remaining and ask.seller_id != bid.buyer_id,
+                crosses=lambda ask: ask.price <= bid.limit_price,
+                bound=best,
+            )
+            if entry is not None:
+                best = entry
+        return None if best is None else best[-1]
+
+    def _best_bid(self, ask: BookAsk) -> BookBid | None:
+        """Melhor compra com espaço para o crédito de `ask`: classes a partir da dele."""
+        boundary = size_class(ask.amount)
+        best = None
+        for rest_class, heap in self._bid_heaps.items():
+            if rest_class < boundary:
+                continue
+            entry = self._first_fit(
+                heap,
+                fits=lambda bid: bid.remaining >= ask.amount and bid.buyer_id != ask.seller_id,
+                crosses=lambda bid: bid.limit_price >= ask.price,
+                bound=best,
+            )
+            if entry is not None:
+                best = entry
+        return None if best is None else best[-1]
+
+    def _first_fit(
+        self,
+        heap: list,
+        fits: Callable[[Any], bool],
+        crosses: Callable[[Any], bool],
+        bound: tuple | None,
+    ) -> tuple | None:
+        """
+        Primeira entrada do heap, em prioridade, que cabe e cruza o preço e
+        vem antes de `bound` (a melhor candidata das outras classes).
+
+        As entradas percorridas voltam ao heap; a escolhida sai depois, por
+        remoção preguiçosa, quando a execução é feita.
+        """
+        skipped = []
+        found = None
+        while self._top(heap):
+            entry = heap[0]
+            if (bound is not None and entry > bound) or not crosses(entry[-1]):
+                break
+            if fits(entry[-1]):
+                found = entry
+                break
+            skipped.append(heapq.heappop(heap))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return found
+
+
+class _Arrivals:
+    """
+    Ids já lidos de um lado do livro. Só os criados dentro de `SYNC_WINDOW`
+    antes do mais recente são guardados: são os únicos que a próxima
+    leitura devolve de novo.
+    """
+
+    def __init__(self) -> None:
+        self.latest: datetime | None = None
+        self.seen: dict[int, datetime] = {}
+
+    def window(self, field: str) -> dict[str, datetime]:
+        """Filtro da próxima leitura (vazio antes da primeira: lê tudo)."""
+        return {} if self.latest is None else {f"{field}__gte": self.latest - SYNC_WINDOW}
+
+    def add(self, pk: int, at: datetime) -> bool:
+        """Registra `pk`; False se já tinha sido lido."""
+        if pk in self.seen:
+            return False
+        self.seen[pk] = at
+        if self.latest is None or at > self.latest:
+            self.latest = at
+        return True
+
+    def prune(self) -> None:
+        if self.latest is not None:
+            horizon = self.latest - SYNC_WINDOW
+            self.seen = {pk: at for pk, at in self.seen.items() if at >= horizon}
+
+
+class MatchingEngine:
+    """
+    Livro de ofertas de um processo, sincronizado com o banco a cada lote.
+
+    Deve haver um único motor rodando: dois livros casariam as mesmas ordens
+    (a liquidação recusaria as repetidas, mas desperdiçando lotes).
+    """
+
+    def __init__(self, batch_size: int = MAX_FILLS_PER_BATCH) -> None:
+        self.batch_size = batch_size
+        self.book = OrderBook()
+        self._bids_seen = _Arrivals()
+        self._listings_seen = _Arrivals()
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Remonta o livro a partir das ordens abertas e das listagens ativas."""
+        with self._lock:
+            self._reload()
+
+    def _reload(self) -> None:
+        self.book = OrderBook()
+        self._bids_seen = _Arrivals()
+        self._listings_seen = _Arrivals()
+        self._stale = False
+        self._sync()
+
+    def _sync(self) -> None:
+        """Acrescenta ao livro as ordens e listagens ainda não vistas."""
+        bids = (
+            Bid.objects.filter(status=Bid.Status.OPEN, **self._bids_seen.window("created_at"))
+            .order_by("created_at", "pk")
+            .values_list("pk", "buyer_id", "limit_price", "quantity", "filled", "created_at")
+        )
+        arrivals: list[tuple[datetime, BookBid | BookAsk]] = []
+        for pk, buyer_id, limit_price, quantity, filled, created_at in bids:
+            if self._bids_seen.add(pk, created_at):
+                arrivals.append((created_at, BookBid(pk, buyer_id, limit_price, quantity - filled, created_at)))
+
+        listings = (
+            CreditListing.objects.filter(
+                is_active=True,
+                credit__status=CarbonCredit.Status.LISTED,
+                credit__validation_status=CarbonCredit.ValidationStatus.APPROVED,
+                credit__is_deleted=False,
+                **self._listings_seen.window("listed_at"),
+            )
+            .order_by("listed_at", "pk")
+            .values_list("pk", "credit_id", "credit__owner_id", "amount", "price_per_unit", "listed_at")
+        )
+        for pk, credit_id, seller_id, amount, price, listed_at in listings:
+            if self._listings_seen.add(pk, listed_at):
+                arrivals.append((listed_at, BookAsk(pk, credit_id, seller_id, amount, price, listed_at)))
+        self._bids_seen.prune()
+        self._listings_seen.prune()
+
+        # Na ordem de chegada ao livro, como se tivessem chegado uma a uma
+        arrivals.sort(key=lambda arrival: arrival[0])
+        for _, order in arrivals:
+            if isinstance(order, BookBid):
+                self.book.add_bid(order)
+            else:
+                self.book.add_ask(order)
+
+    def run_batch(self) -> list[Transaction]:
+        """Lê as ordens novas, casa o que cruza e liquida. Retorna as transações gravadas."""
+        with self._lock:
+            if self._stale:
+                self._reload()
+            else:
+                self._sync()
+            fills = self.book.match(self.batch_size)
+            if not fills:
+                return []
+            try:
+                return self._settle(fills)
+            except CheckoutError:
+                # Algo mudou entre a conferência e a escrita: o lote volta
+                # ao livro na próxima leitura completa do banco
+                self._stale = True
+                return []
+            except BaseException:
+                self._stale = True
+                raise
+
+    def _settle(self, fills: list[Fill]) -> list[Transaction]:
+        """
+        Liquida `fills` em uma única transação.
+
+        Confere, dentro da transação de escrita, se cada listagem continua à
+        venda, se cada ordem continua aberta e se o comprador tem saldo
+        (uma ordem sem saldo para a próxima execução é cancelada). As
+        execuções recusadas devolvem a contraparte ao livro.
+        """
+        with transaction.atomic():
+            lock_credits(fill.ask.credit_id for fill in fills)
+            listings = {listing.pk: listing for listing in load_listings(fill.ask.id for fill in fills)}
+            open_bids = set(
+                Bid.objects.filter(pk__in={fill.bid.id for fill in fills}, status=Bid.Status.OPEN)
+                .values_list("pk", flat=True)
+            )
+            # Saldos travados em ordem de id até o commit: uma compra direta ou
+            # checkout do mesmo comprador espera, e o débito em lote abaixo
+            # (sem a checagem de saldo de `move_balance`) não fica negativo
+            profiles = {
+                profile.user_id: profile
+                for profile in Profile.objects.select_for_update(of=("self",))
+                .select_related("user")
+                .filter(user_id__in={fill.bid.buyer_id for fill in fills})
+                .order_by("user_id")
+            }
+            balances = {user_id: profile.balance for user_id, profile in profiles.items()}
+
+            accepted: list[Fill] = []
+            cancelled: set[int] = set()
+            for fill in fills:
+                bid, ask = fill.bid, fill.ask
+                listing = listings.get(ask.id)
+                if listing is None or not is_available(listing, bid.buyer_id):
+                    # Vendida por compra direta ou retirada: sai do livro
+                    if bid.id in open_bids and bid.id not in cancelled:
+                        self.book.return_bid(bid, ask.amount)
+                elif bid.id not in open_bids or bid.id in cancelled:
+                    self.book.remove_bid(bid.id)
+                    self.book.return_ask(ask)
+                elif balances.get(bid.buyer_id, Decimal("0")) < fill.total_price:
+                    cancelled.add(bid.id)
+                    self.book.remove_bid(bid.id)
+                    self.book.return_ask(ask)
+                else:
+                    balances[bid.buyer_id] -= fill.total_price
+                    accepted.append(fill)
+
+            filled: dict[int, Decimal] = defaultdict(Decimal)
+            spent: dict[int, Decimal] = defaultdict(Decimal)
+            for fill in accepted:
+                filled[fill.bid.id] += fill.ask.amount
+                spent[fill.bid.buyer_id] -= fill.total_price
+            self._update_bids(filled, cancelled, {fill.bid.id: fill.bid for fill in accepted})
+            if not accepted:
+                return []
+
+            credit_balances(spent)
+            return settle_sales([
+                Sale(listings[fill.ask.id], profiles[fill.bid.buyer_id].user, fill.total_price, fill.bid.id)
+                for fill in accepted
+            ])
+
+    @staticmethod
+    def _update_bids(filled: dict[int, Decimal], cancelled: Iterable[int], bids: dict[int, BookBid]) -> None:
+        """Um UPDATE para as quantidades executadas e o novo status de cada ordem."""
+        cancelled = set(cancelled)
+        ids = filled.keys() | cancelled
+        if not ids:
+            return
+        done = [bid_id for bid_id, bid in bids.items() if bid.remaining <= 0 and bid_id not in cancelled]
+        updated = Bid.objects.filter(pk__in=ids, status=Bid.Status.OPEN).update(
+            filled=F("filled") + Case(
+                *[When(pk=bid_id, then=Value(amount)) for bid_id, amount in filled.items()],
+                default=Value(Decimal("0")),
+            ),
+            status=Case(
+                When(pk__in=cancelled, then=Value(Bid.Status.CANCELLED)),
+                When(pk__in=done, then=Value(Bid.Status.FILLED)),
+                default=Value(Bid.Status.OPEN),
+            ),
+        )
+        if updated != len(ids):
+            raise CheckoutError("Ordem de compra cancelada durante a liquidação.")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0007_hot_query_indexes'),
+        ('transactions', '0002_alter_transaction_options_alter_transaction_amount_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', '-timestamp'], name='txn_status_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['buyer', '-timestamp'], name='txn_buyer_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['seller', '-timestamp'], name='txn_seller_time_idx'),
+        ),
+    ]
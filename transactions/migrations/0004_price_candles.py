@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceCandle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(choices=[('HOUR', 'Hora'), ('DAY', 'Dia')], max_length=8)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('high', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('low', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('close', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('volume', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('notional', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('trades', models.BigIntegerField()),
+                ('first_trade_at', models.DateTimeField()),
+                ('last_trade_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Candle de Preço',
+                'verbose_name_plural': 'Candles de Preço',
+                'constraints': [models.UniqueConstraint(fields=('interval', 'bucket_start'), name='price_candle_bucket_uniq')],
+            },
+        ),
+    ]
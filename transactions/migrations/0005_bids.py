@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_price_candles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bid',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Quantidade (tCO₂e)')),
+                ('filled', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Executado (tCO₂e)')),
+                ('limit_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Preço limite (R$/tCO₂e)')),
+                ('status', models.CharField(choices=[('OPEN', 'Aberta'), ('FILLED', 'Executada'), ('CANCELLED', 'Cancelada')], default='OPEN', max_length=16, verbose_name='Status')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bids', to=settings.AUTH_USER_MODEL, verbose_name='Comprador')),
+            ],
+            options={
+                'verbose_name': 'Ordem de compra',
+                'verbose_name_plural': 'Ordens de compra',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='bid',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='fills', to='transactions.bid', verbose_name='Ordem de compra'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['buyer', '-created_at'], name='bid_buyer_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['-limit_price'], name='bid_open_price_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0011_listing_search'),
+        ('transactions', '0005_bids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='txn_buyer_time_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='txn_seller_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['buyer', '-timestamp', '-id'], name='txn_buyer_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['seller', '-timestamp', '-id'], name='txn_seller_time_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 05:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_history_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status', 'OPEN')), fields=['created_at'], name='bid_open_time_idx'),
+        ),
+    ]
@@ -56,14 +56,142 @@ class Transaction(models.Model):
         default=Status.PENDING,
         verbose_name="Status"
     )
+    # Ordem de compra executada pelo motor de casamento (vazio na compra direta)
+    bid = models.ForeignKey(
+        "transactions.Bid",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="fills",
+        verbose_name="Ordem de compra"
+    )
 
     class Meta:
         ordering = ["-timestamp"]
         verbose_name = "Transação"
         verbose_name_plural = "Transações"
+        indexes = [
+            # Feed público / SSE (status=COMPLETED, mais recentes primeiro)
+            models.Index(fields=["status", "-timestamp"], name="txn_status_time_idx"),
+            # Histórico (keyset por timestamp, id) e dashboard por participante
+            models.Index(fields=["buyer", "-timestamp", "-id"], name="txn_buyer_time_idx"),
+            models.Index(fields=["seller", "-timestamp", "-id"], name="txn_seller_time_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Txn#{self.id} - {self.buyer.username} ← {self.seller.username} ({self.status})"
 
 
+class Bid(models.Model):
+    """
+    Ordem de compra limitada de uma empresa no livro de ofertas.
+
+    A empresa quer até `quantity` tCO₂e pagando no máximo `limit_price` por
+    tCO₂e. As ofertas de venda são as `CreditListing` ativas: o motor de
+    casamento (`transactions.matching`) compra créditos inteiros que caibam
+    no que falta, e cada execução vira uma `Transaction` ligada à ordem.
+    """
+
+    class Status(models.TextChoices):
+        OPEN = "OPEN", "Aberta"
+        FILLED = "FILLED", "Executada"
+        CANCELLED = "CANCELLED", "Cancelada"
+
+    buyer = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.PROTECT,
+        related_name="bids",
+        verbose_name="Comprador"
+    )
+    quantity = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Quantidade (tCO₂e)"
+    )
+    filled = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Executado (tCO₂e)"
+    )
+    limit_price = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Preço limite (R$/tCO₂e)"
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.OPEN,
+        verbose_name="Status"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criada em")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Ordem de compra"
+        verbose_name_plural = "Ordens de compra"
+        indexes = [
+            # Ordens da empresa, mais recentes primeiro
+            models.Index(fields=["buyer", "-created_at"], name="bid_buyer_time_idx"),
+            # Profundidade do livro: ordens abertas por preço
+            models.Index(
+                fields=["-limit_price"], name="bid_open_price_idx", condition=models.Q(status="OPEN")
+            ),
+            # Leitura incremental do motor: ordens abertas por chegada
+            models.Index(
+                fields=["created_at"], name="bid_open_time_idx", condition=models.Q(status="OPEN")
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Bid#{self.id} - {self.buyer_id}: {self.quantity} @ {self.limit_price} ({self.status})"
+
+    @property
+    def remaining(self):
+        return self.quantity - self.filled
+
+
+class PriceCandle(models.Model):
+    """
+    Preço por tCO₂e negociado em um intervalo (hora ou dia, em UTC).
+
+    Abertura, máxima, mínima e fechamento do preço unitário
+    (`total_price / amount`) das transações COMPLETED do intervalo, com
+    volume e valor financeiro para o VWAP. Atualizado pela compra
+    (`transactions.candles.record_trade`) e recalculado por
+    `backfill_price_candles`.
+    """
+
+    class Interval(models.TextChoices):
+        HOUR = "HOUR", "Hora"
+        DAY = "DAY", "Dia"
+
+    interval = models.CharField(max_length=8, choices=Interval.choices)
+    bucket_start = models.DateTimeField()
+    open = models.DecimalField(max_digits=14, decimal_places=4)
+    high = models.DecimalField(max_digits=14, decimal_places=4)
+    low = models.DecimalField(max_digits=14, decimal_places=4)
+    close = models.DecimalField(max_digits=14, decimal_places=4)
+    # Soma de amount (tCO₂e) e de total_price (R$): VWAP = notional / volume
+    volume = models.DecimalField(max_digits=20, decimal_places=2)
+    notional = models.DecimalField(max_digits=20, decimal_places=2)
+    trades = models.BigIntegerField()
+    # Data/hora da primeira e da última transação: decidem abertura e
+    # fechamento quando uma transação chega fora de ordem
+    first_trade_at = models.DateTimeField()
+    last_trade_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Candle de Preço"
+        verbose_name_plural = "Candles de Preço"
+        constraints = [
+            models.UniqueConstraint(fields=["interval", "bucket_start"], name="price_candle_bucket_uniq"),
+        ]
+
+    @property
+    def vwap(self):
+        return self.notional / self.volume if self.volume else None
 
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.interval} {self.bucket_start:%Y-%m-%d %H:%M} C={self.close}"
@@ -0,0 +1,468 @@
+"""
+Compra de créditos com UPDATEs condicionais, sem SELECT FOR UPDATE.
+
+A leitura do crédito e da listagem acontece fora da transação. Dentro dela,
+cada passo é um UPDATE que só afeta a linha se o estado ainda for o lido:
+
+1. `CarbonCredit ... WHERE status='LISTED' AND owner=<vendedor>` reivindica o
+   crédito (quem perde a corrida recebe 0 linhas e desiste na hora);
+2. o saldo do comprador é debitado com `F()` e `balance >= total`;
+3. saldo do vendedor, listagem, transação, lançamentos do ledger,
+   histórico (encadeado ao último registro, lido junto com o crédito),
+   candles de preço, `PlatformStats` e `UserTradingStats`.
+
+`checkout` compra um carrinho inteiro em uma única transação, com os mesmos
+passos em lote (`settle_sales`): um UPDATE para todos os créditos, um débito,
+um UPDATE para todos os vendedores e `bulk_create` do resto. O motor de
+casamento (`transactions.matching`) liquida cada lote de execuções também
+por `settle_sales`.
+
+Como `.update()` e `bulk_create` não disparam signals, o que os receivers
+fariam (histórico SALE, contadores, cache da API) é gravado aqui. Erros
+transitórios do banco (lock, deadlock, serialização) são repetidos até
+`MAX_ATTEMPTS` vezes, com espera exponencial.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Callable, Iterable, NamedTuple, TypeVar
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from accounts.ledger import credit_balances, move_balance
+from accounts.models import BalanceLedgerEntry
+from api.cache import invalidate_credit_statuses
+from credits.history import HistoryChain
+from credits.models import CarbonCredit, CreditListing, CreditOwnershipHistory
+from credits.search import invalidate_marketplace
+from dashboard.models import PlatformStats, UserTradingStats
+from dashboard.stats import (
+    UserContribution,
+    contribution_delta,
+    credit_contribution,
+    credit_user_contribution,
+    listing_contribution,
+    listing_user_contribution,
+    sum_user_deltas,
+    transaction_contribution,
+    transaction_user_contribution,
+    user_contribution_delta,
+)
+
+from .candles import record_trade, record_trades
+from .events import publish_transaction
+from .models import Transaction
+
+T = TypeVar("T")
+
+MAX_ATTEMPTS = 3
+# Espera antes da 2ª tentativa (dobra a cada nova tentativa, com jitter)
+RETRY_BACKOFF = 0.02
+
+CENT = Decimal("0.01")
+
+UNAVAILABLE = "Este crédito não está disponível para compra."
+SOLD_DURING_CHECKOUT = "Alguns itens foram vendidos enquanto você finalizava a compra. Revise o carrinho."
+
+
+class PurchaseError(Exception):
+    """Compra recusada; a mensagem é exibida ao usuário."""
+
+
+class CheckoutError(PurchaseError):
+    """Checkout recusado; `unavailable` traz as listagens que saíram de venda."""
+
+    def __init__(self, message: str, unavailable: Iterable[int] = ()) -> None:
+        super().__init__(message)
+        self.unavailable = set(unavailable)
+
+
+def line_total(amount: Decimal, price: Decimal) -> Decimal:
+    """
+    Valor de uma venda (quantidade × preço) arredondado ao centavo.
+
+    Arredondado antes de qualquer UPDATE ou lançamento: os saldos mudam por
+    `F()`, sem passar pelo `DecimalField`, e o SQLite gravaria as frações.
+    """
+    return (amount * price).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def purchase_credit(buyer: Any, credit_id: int) -> Transaction:
+    """
+    Compra o crédito `credit_id` para `buyer` (Company).
+
+    Levanta `CarbonCredit.DoesNotExist` se o crédito não existir e
+    `PurchaseError` se a compra não puder ser feita.
+    """
+    return _retrying(_purchase, buyer, credit_id)
+
+
+def _retrying(operation: Callable[..., T], *args: Any) -> T:
+    """Executa `operation`, repetindo erros transitórios do banco."""
+    # Dentro de uma transação externa não há como repetir só a compra
+    attempts = 1 if connection.in_atomic_block else MAX_ATTEMPTS
+    attempt = 1
+    while True:
+        try:
+            return operation(*args)
+        except OperationalError:
+            if attempt >= attempts:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            attempt += 1
+
+
+def _load(credit_id: int) -> CarbonCredit:
+    """Crédito, dono, listagem ativa e último hash do histórico em uma única consulta."""
+    active = CreditListing.objects.filter(credit=OuterRef("pk"), is_active=True).order_by("-listed_at")
+    last_record = CreditOwnershipHistory.objects.filter(credit=OuterRef("pk")).order_by("-id")
+    return (
+        CarbonCredit.objects.select_related("owner")
+        .annotate(
+            listing_pk=Subquery(active.values("pk")[:1]),
+            listing_price=Subquery(active.values("price_per_unit")[:1]),
+            history_head=Subquery(last_record.values("record_hash")[:1]),
+        )
+        .get(pk=credit_id)
+    )
+
+
+def _purchase(buyer: Any, credit_id: int) -> Transaction:
+    credit = _load(credit_id)
+
+    if credit.status != CarbonCredit.Status.LISTED:
+        raise PurchaseError(UNAVAILABLE)
+    if credit.validation_status != CarbonCredit.ValidationStatus.APPROVED:
+        raise PurchaseError(
+            "⚠️ Este crédito ainda não foi aprovado por um auditor e não pode ser comprado. "
+            "Aguarde a validação para realizar a compra."
+        )
+    if credit.listing_pk is None:
+        raise PurchaseError("Não foi encontrada uma listagem ativa para este crédito.")
+    if credit.owner_id == buyer.id:
+        raise PurchaseError("Você não pode comprar seu próprio crédito.")
+
+    total_price = line_total(credit.amount, credit.listing_price)
+    profile = buyer.profile
+    if not profile.can_buy(total_price):
+        raise PurchaseError(_insufficient(profile.balance, total_price))
+
+    seller = credit.owner
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = CarbonCredit.objects.filter(
+            pk=credit.pk,
+            owner_id=seller.id,
+            status=CarbonCredit.Status.LISTED,
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        ).update(owner=buyer, status=CarbonCredit.Status.SOLD, updated_at=now)
+        if not claimed:
+            raise PurchaseError(UNAVAILABLE)
+
+        if not move_balance(buyer, -total_price):
+            profile.refresh_from_db(fields=["balance"])
+            raise PurchaseError(_insufficient(profile.balance, total_price))
+        move_balance(seller, total_price)
+
+        if not CreditListing.objects.filter(pk=credit.listing_pk, is_active=True).update(is_active=False):
+            raise PurchaseError("Não foi encontrada uma listagem ativa para este crédito.")
+
+        # bulk_create: sem post_save, os contadores vão no apply_deltas abaixo
+        [txn] = Transaction.objects.bulk_create([
+            Transaction(
+                buyer=buyer,
+                seller=seller,
+                credit=credit,
+                amount=credit.amount,
+                total_price=total_price,
+                status=Transaction.Status.COMPLETED,
+            )
+        ])
+        BalanceLedgerEntry.objects.bulk_create([
+            BalanceLedgerEntry(
+                user=buyer, kind=BalanceLedgerEntry.Kind.PURCHASE, amount=-total_price, transaction=txn
+            ),
+            BalanceLedgerEntry(
+                user=seller, kind=BalanceLedgerEntry.Kind.SALE, amount=total_price, transaction=txn
+            ),
+        ])
+        # O último registro lido continua o último: o UPDATE acima garantiu
+        # que o dono não mudou desde a leitura
+        chain = HistoryChain(CreditOwnershipHistory)
+        chain.heads[credit.pk] = credit.history_head or ""
+        CreditOwnershipHistory.objects.bulk_create(chain.seal([
+            CreditOwnershipHistory(
+                credit=credit,
+                from_owner=seller,
+                to_owner=buyer,
+                transfer_type=CreditOwnershipHistory.TransferType.SALE,
+                transaction=txn,
+                price=total_price,
+            )
+        ]))
+
+        record_trade(txn)
+        UserTradingStats.apply_deltas(_user_stats_delta(credit, txn))
+        # Linha única e disputada por todas as compras: atualizada por último
+        PlatformStats.apply_deltas(_stats_delta(credit, txn))
+        transaction.on_commit(
+            lambda: invalidate_credit_statuses({CarbonCredit.Status.LISTED, CarbonCredit.Status.SOLD})
+        )
+        invalidate_marketplace()
+        # Notifica os streams SSE públicos somente após o commit
+        publish_transaction(txn)
+
+    profile.balance -= total_price
+    return txn
+
+
+# ---------------------------------------------------------------------------
+# Checkout do carrinho
+# ---------------------------------------------------------------------------
+
+def checkout(buyer: Any, listing_ids: Iterable[int]) -> list[Transaction]:
+    """
+    Compra todas as listagens `listing_ids` para `buyer` em uma única
+    transação do banco: ou todas são compradas, ou nenhuma.
+
+    Mesmos UPDATEs condicionais de `purchase_credit`, mas em lote (ver
+    `settle_sales`): o custo em consultas não cresce com o número de itens.
+
+    Levanta `CheckoutError` (com as listagens indisponíveis, se houver) se o
+    checkout não puder ser feito.
+    """
+    return _retrying(_checkout, buyer, sorted(set(listing_ids)))
+
+
+def load_listings(listing_ids: Iterable[int]) -> list[CreditListing]:
+    """Listagens com crédito, dono e último hash do histórico, em ordem de crédito."""
+    last_record = CreditOwnershipHistory.objects.filter(credit=OuterRef("credit_id")).order_by("-id")
+    return list(
+        CreditListing.objects.filter(pk__in=listing_ids)
+        .select_related("credit", "credit__owner")
+        .annotate(history_head=Subquery(last_record.values("record_hash")[:1]))
+        .order_by("credit_id")
+    )
+
+
+def is_available(listing: CreditListing, buyer_id: int) -> bool:
+    """A listagem (de `load_listings`) ainda pode ser comprada por `buyer_id`."""
+    credit = listing.credit
+    return (
+        listing.is_active
+        and credit.status == CarbonCredit.Status.LISTED
+        and credit.validation_status == CarbonCredit.ValidationStatus.APPROVED
+        and not credit.is_deleted
+        and credit.owner_id != buyer_id
+    )
+
+
+def _checkout(buyer: Any, listing_ids: list[int]) -> list[Transaction]:
+    if not listing_ids:
+        raise CheckoutError("Seu carrinho está vazio.")
+    listings = load_listings(listing_ids)
+
+    unavailable = set(listing_ids) - {listing.pk for listing in listings}
+    unavailable.update(listing.pk for listing in listings if not is_available(listing, buyer.id))
+    if unavailable:
+        raise CheckoutError(
+            f"{len(unavailable)} item(ns) do carrinho não está(ão) mais disponível(is) para compra.",
+            unavailable,
+        )
+
+    sales = [Sale(listing, buyer, line_total(listing.credit.amount, listing.price_per_unit)) for listing in listings]
+    total_price = sum((sale.total_price for sale in sales), Decimal("0.00"))
+    profile = buyer.profile
+    if not profile.can_buy(total_price):
+        raise CheckoutError(_insufficient(profile.balance, total_price))
+
+    with transaction.atomic():
+        lock_credits(listing.credit_id for listing in listings)
+        if not move_balance(buyer, -total_price):
+            profile.refresh_from_db(fields=["balance"])
+            raise CheckoutError(_insufficient(profile.balance, total_price))
+        txns = settle_sales(sales)
+
+    profile.balance -= total_price
+    return txns
+
+
+# ---------------------------------------------------------------------------
+# Liquidação em lote (checkout e motor de casamento)
+# ---------------------------------------------------------------------------
+
+class Sale(NamedTuple):
+    """Venda validada: listagem (de `load_listings`), comprador, valor total e ordem de compra."""
+
+    listing: CreditListing
+    buyer: Any
+    total_price: Decimal
+    bid_id: int | None = None
+
+
+def lock_credits(credit_ids: Iterable[int]) -> None:
+    """
+    Trava os créditos em ordem de id (SELECT ... FOR UPDATE): lotes com
+    créditos em comum esperam um pelo outro em vez de entrar em deadlock.
+
+    No SQLite a transação IMMEDIATE já serializa as escritas.
+    """
+    if connection.features.has_select_for_update:
+        list(
+            CarbonCredit.objects.select_for_update()
+            .filter(pk__in=list(credit_ids))
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+
+def settle_sales(sales: list[Sale]) -> list[Transaction]:
+    """
+    Grava as vendas `sales` dentro da transação de quem chama, que já
+    validou os itens e debitou os compradores (valores de `line_total`).
+
+    Um UPDATE reivindica todos os créditos (dono conferido por vendedor), um
+    UPDATE credita todos os vendedores, e transações, lançamentos e
+    histórico entram em `bulk_create`. Levanta `CheckoutError` se algum
+    crédito ou listagem mudou desde a leitura.
+    """
+    now = timezone.now()
+    owned_by_seller: dict[int, list[int]] = defaultdict(list)
+    bought_by: dict[int, list[int]] = defaultdict(list)
+    proceeds: dict[int, Decimal] = defaultdict(Decimal)
+    for sale in sales:
+        credit = sale.listing.credit
+        owned_by_seller[credit.owner_id].append(credit.pk)
+        bought_by[sale.buyer.id].append(credit.pk)
+        proceeds[credit.owner_id] += sale.total_price
+
+    owned = Q(pk__in=[])
+    for seller_id, credit_ids in owned_by_seller.items():
+        owned |= Q(pk__in=credit_ids, owner_id=seller_id)
+    claimed = CarbonCredit.objects.filter(
+        owned,
+        status=CarbonCredit.Status.LISTED,
+        validation_status=CarbonCredit.ValidationStatus.APPROVED,
+    ).update(
+        owner_id=Case(*[When(pk__in=ids, then=Value(buyer_id)) for buyer_id, ids in bought_by.items()]),
+        status=CarbonCredit.Status.SOLD,
+        updated_at=now,
+    )
+    if claimed != len(sales):
+        raise CheckoutError(SOLD_DURING_CHECKOUT)
+    credit_balances(proceeds)
+
+    deactivated = CreditListing.objects.filter(
+        pk__in=[sale.listing.pk for sale in sales], is_active=True
+    ).update(is_active=False)
+    if deactivated != len(sales):
+        raise CheckoutError(SOLD_DURING_CHECKOUT)
+
+    # bulk_create: sem post_save, os contadores vão no apply_deltas abaixo
+    txns = Transaction.objects.bulk_create([
+        Transaction(
+            buyer=sale.buyer,
+            seller=sale.listing.credit.owner,
+            credit=sale.listing.credit,
+            amount=sale.listing.credit.amount,
+            total_price=sale.total_price,
+            status=Transaction.Status.COMPLETED,
+            bid_id=sale.bid_id,
+        )
+        for sale in sales
+    ])
+    BalanceLedgerEntry.objects.bulk_create([
+        entry
+        for txn in txns
+        for entry in (
+            BalanceLedgerEntry(
+                user=txn.buyer, kind=BalanceLedgerEntry.Kind.PURCHASE, amount=-txn.total_price, transaction=txn
+            ),
+            BalanceLedgerEntry(
+                user=txn.seller, kind=BalanceLedgerEntry.Kind.SALE, amount=txn.total_price, transaction=txn
+            ),
+        )
+    ])
+    chain = HistoryChain(CreditOwnershipHistory)
+    for sale in sales:
+        chain.heads[sale.listing.credit_id] = sale.listing.history_head or ""
+    CreditOwnershipHistory.objects.bulk_create(chain.seal([
+        CreditOwnershipHistory(
+            credit=txn.credit,
+            from_owner=txn.seller,
+            to_owner=txn.buyer,
+            transfer_type=CreditOwnershipHistory.TransferType.SALE,
+            transaction=txn,
+            price=txn.total_price,
+        )
+        for txn in txns
+    ]))
+
+    record_trades(txns)
+    UserTradingStats.apply_deltas(
+        sum_user_deltas(_user_stats_delta(sale.listing.credit, txn) for sale, txn in zip(sales, txns))
+    )
+    PlatformStats.apply_deltas(
+        _sum_deltas(_stats_delta(sale.listing.credit, txn) for sale, txn in zip(sales, txns))
+    )
+    transaction.on_commit(
+        lambda: invalidate_credit_statuses({CarbonCredit.Status.LISTED, CarbonCredit.Status.SOLD})
+    )
+    invalidate_marketplace()
+    for txn in txns:
+        publish_transaction(txn)
+    return txns
+
+
+def _stats_delta(credit: CarbonCredit, txn: Transaction) -> dict[str, Any]:
+    """Deltas de crédito (LISTED → SOLD), listagem e transação somados."""
+    sold = CarbonCredit(
+        amount=credit.amount,
+        status=CarbonCredit.Status.SOLD,
+        validation_status=credit.validation_status,
+        is_deleted=credit.is_deleted,
+    )
+    return _sum_deltas([
+        contribution_delta(credit_contribution(credit), credit_contribution(sold)),
+        contribution_delta(
+            listing_contribution(CreditListing(is_active=True)),
+            listing_contribution(CreditListing(is_active=False)),
+        ),
+        transaction_contribution(txn),
+    ])
+
+
+def _user_stats_delta(credit: CarbonCredit, txn: Transaction) -> UserContribution:
+    """Deltas por usuário: a listagem do vendedor sai do ar e a transação conta para os dois."""
+    sold = CarbonCredit(
+        owner_id=txn.buyer_id,
+        amount=credit.amount,
+        status=CarbonCredit.Status.SOLD,
+        is_deleted=credit.is_deleted,
+    )
+    return sum_user_deltas([
+        user_contribution_delta(credit_user_contribution(credit), credit_user_contribution(sold)),
+        user_contribution_delta(listing_user_contribution(CreditListing(credit=credit, is_active=True)), {}),
+        transaction_user_contribution(txn),
+    ])
+
+
+def _sum_deltas(deltas: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    total: dict[str, Any] = {}
+    for delta in deltas:
+        for name, value in delta.items():
+            total[name] = total.get(name, 0) + value
+    return total
+
+
+def _insufficient(balance: Decimal, total_price: Decimal) -> str:
+    return (
+        f"Saldo insuficiente. Você tem R$ {balance:.2f}, "
+        f"mas precisa de R$ {total_price:.2f}."
+    )
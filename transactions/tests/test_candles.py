@@ -0,0 +1,195 @@
+"""Testes dos candles de preço (transactions.candles)."""
+
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from credits.models import CarbonCredit
+from transactions import candles
+from transactions.candles import day_shards, price_candles, record_trade
+from transactions.models import PriceCandle, Transaction
+from transactions.services import purchase_credit
+
+from .test_services import PurchaseFixtureMixin
+
+User = get_user_model()
+
+HOUR = PriceCandle.Interval.HOUR
+DAY = PriceCandle.Interval.DAY
+
+
+def at(day, hour, minute=0):
+    return datetime(2025, 3, day, hour, minute, tzinfo=dt_timezone.utc)
+
+
+class CandleFixtureMixin:
+    def setUp(self):
+        self.buyer = User.objects.create_user(username="company", role=User.Roles.COMPANY)
+        self.seller = User.objects.create_user(username="producer", role=User.Roles.PRODUCER)
+        self.credit = CarbonCredit.objects.create(
+            owner=self.seller, amount=10, origin="Farm", generation_date=date(2025, 1, 1)
+        )
+
+    def trade(self, when, amount, price, status=Transaction.Status.COMPLETED):
+        txn = Transaction.objects.create(
+            buyer=self.buyer,
+            seller=self.seller,
+            credit=self.credit,
+            amount=Decimal(amount),
+            total_price=Decimal(amount) * Decimal(price),
+            status=status,
+        )
+        Transaction.objects.filter(pk=txn.pk).update(timestamp=when)
+        txn.timestamp = when
+        return txn
+
+    def candle(self, interval, start):
+        return PriceCandle.objects.get(interval=interval, bucket_start=start)
+
+
+class RecordTradeTests(CandleFixtureMixin, TestCase):
+    def test_ohlc_vwap_and_volume(self):
+        for when, amount, price in [
+            (at(1, 10, 5), 10, 50),
+            (at(1, 10, 40), 30, 70),
+            (at(1, 10, 20), 20, 40),
+            (at(1, 13, 0), 40, 60),
+        ]:
+            record_trade(self.trade(when, amount, price))
+
+        hour = self.candle(HOUR, at(1, 10))
+        self.assertEqual(
+            (hour.open, hour.high, hour.low, hour.close),
+            (Decimal("50"), Decimal("70"), Decimal("40"), Decimal("70")),
+        )
+        self.assertEqual((hour.volume, hour.trades), (Decimal("60"), 3))
+        # (10·50 + 30·70 + 20·40) / 60
+        self.assertEqual(hour.vwap.quantize(Decimal("0.01")), Decimal("56.67"))
+
+        day = self.candle(DAY, at(1, 0))
+        self.assertEqual((day.open, day.close, day.trades), (Decimal("50"), Decimal("60"), 4))
+        self.assertEqual(PriceCandle.objects.count(), 3)
+
+    def test_out_of_order_trade_becomes_open(self):
+        record_trade(self.trade(at(1, 10, 30), 10, 50))
+        record_trade(self.trade(at(1, 10, 10), 10, 45))
+
+        hour = self.candle(HOUR, at(1, 10))
+        self.assertEqual((hour.open, hour.close), (Decimal("45"), Decimal("50")))
+        self.assertEqual(hour.first_trade_at, at(1, 10, 10))
+
+    def test_update_then_insert_fallback(self):
+        """Bancos sem ON CONFLICT: UPDATE e INSERT dos candles ausentes, mesmo resultado."""
+        with mock.patch.dict(candles._UPSERT_FUNCTIONS, clear=True):
+            record_trade(self.trade(at(1, 10, 30), 10, 50))
+            record_trade(self.trade(at(1, 10, 10), 10, 45))
+            record_trade(self.trade(at(1, 11, 0), 10, 60))
+
+        hour = self.candle(HOUR, at(1, 10))
+        self.assertEqual(
+            (hour.open, hour.low, hour.close, hour.trades), (Decimal("45"), Decimal("45"), Decimal("50"), 2)
+        )
+        day = self.candle(DAY, at(1, 0))
+        self.assertEqual((day.high, day.close, day.trades), (Decimal("60"), Decimal("60"), 3))
+
+    def test_only_completed_trades(self):
+        record_trade(self.trade(at(1, 10), 10, 50, status=Transaction.Status.PENDING))
+        self.assertFalse(PriceCandle.objects.exists())
+
+
+class PurchaseCandleTests(PurchaseFixtureMixin, TestCase):
+    def test_purchase_records_trade(self):
+        txn = purchase_credit(self.company, self.credit.pk)
+
+        day = PriceCandle.objects.get(interval=DAY)
+        self.assertEqual((day.close, day.volume, day.trades), (Decimal("50"), txn.amount, 1))
+        self.assertTrue(PriceCandle.objects.filter(interval=HOUR, last_trade_at=txn.timestamp).exists())
+
+
+class BackfillTests(CandleFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.trades = [
+            (at(1, 9), 10, 50),
+            (at(1, 9, 30), 10, 55),
+            (at(2, 14), 5, 80),
+            (at(9, 23, 59), 20, 30),
+        ]
+
+    def snapshot(self):
+        return sorted(
+            PriceCandle.objects.values_list(
+                "interval", "bucket_start", "open", "high", "low", "close", "volume", "trades"
+            )
+        )
+
+    def test_backfill_matches_incremental(self):
+        for when, amount, price in self.trades:
+            record_trade(self.trade(when, amount, price))
+        incremental = self.snapshot()
+        PriceCandle.objects.update(close=0)
+
+        out = StringIO()
+        call_command("backfill_price_candles", workers=1, shard_days=3, stdout=out)
+
+        self.assertIn("6 candle(s) gravado(s)", out.getvalue())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_backfill_only_touches_requested_days(self):
+        for when, amount, price in self.trades:
+            self.trade(when, amount, price)
+
+        call_command(
+            "backfill_price_candles", since=date(2025, 3, 2), until=date(2025, 3, 9), workers=1, stdout=StringIO()
+        )
+
+        self.assertEqual(
+            sorted(PriceCandle.objects.filter(interval=DAY).values_list("bucket_start", flat=True)),
+            [at(2, 0), at(9, 0)],
+        )
+
+    def test_day_shards(self):
+        self.assertEqual(
+            day_shards(date(2025, 3, 1), date(2025, 3, 8), 3),
+            [
+                (date(2025, 3, 1), date(2025, 3, 3)),
+                (date(2025, 3, 4), date(2025, 3, 6)),
+                (date(2025, 3, 7), date(2025, 3, 8)),
+            ],
+        )
+
+
+class CandlesEndpointTests(CandleFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 11):
+            record_trade(self.trade(at(day, 12), 10, 40 + day))
+
+    def test_daily_candles(self):
+        url = reverse("api:market_candles")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"from": "2025-03-03", "to": "2025-03-06"})
+
+        data = response.json()
+        self.assertEqual(data["interval"], "day")
+        self.assertEqual([c["time"][:10] for c in data["data"]], ["2025-03-03", "2025-03-04", "2025-03-05"])
+        self.assertEqual(data["data"][0]["close"], 43.0)
+        self.assertEqual(data["data"][0]["vwap"], 43.0)
+
+    def test_latest_candles_in_order(self):
+        candles = price_candles(HOUR, limit=3)
+        self.assertEqual([c.bucket_start for c in candles], [at(8, 12), at(9, 12), at(10, 12)])
+
+        response = self.client.get(reverse("api:market_candles"), {"interval": "hour", "limit": "2"})
+        self.assertEqual([c["close"] for c in response.json()["data"]], [49.0, 50.0])
+
+    def test_invalid_params(self):
+        url = reverse("api:market_candles")
+        self.assertEqual(self.client.get(url, {"interval": "week"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"from": "ontem"}).status_code, 400)
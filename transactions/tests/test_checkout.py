@@ -0,0 +1,174 @@
+"""Testes do carrinho e do checkout em lote (transactions.services.checkout)."""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.ledger import balance_from_ledger
+from credits.integrity import verify_history
+from credits.models import CarbonCredit, CreditListing, CreditOwnershipHistory
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+from transactions.cart import CART_SESSION_KEY
+from transactions.models import PriceCandle, Transaction
+from transactions.services import CheckoutError, checkout
+
+User = get_user_model()
+
+
+class CheckoutFixtureMixin:
+    """Dois produtores com créditos aprovados e listados; empresa com saldo."""
+
+    def setUp(self):
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.company.profile.add_balance(Decimal("100000.00"))
+        self.producers = [
+            User.objects.create_user(username=f"producer{i}", password="pass123", role=User.Roles.PRODUCER)
+            for i in range(2)
+        ]
+        self.listings = [
+            self.list_credit(self.producers[i % 2], amount=Decimal("10.00"), price=Decimal(20 + i))
+            for i in range(6)
+        ]
+
+    def list_credit(self, owner, amount, price):
+        credit = CarbonCredit.objects.create(
+            owner=owner,
+            amount=amount,
+            origin="Test Farm",
+            generation_date="2025-01-01",
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        listing = CreditListing.objects.create(credit=credit, price_per_unit=price)
+        credit.status = CarbonCredit.Status.LISTED
+        credit.save()
+        return listing
+
+
+class CheckoutTests(CheckoutFixtureMixin, TestCase):
+    def test_settles_every_item_at_once(self):
+        ids = [listing.pk for listing in self.listings]
+        txns = checkout(self.company, ids)
+
+        self.assertEqual(len(txns), 6)
+        # 10 × (20 + 21 + ... + 25)
+        total = Decimal("1350.00")
+        self.assertEqual(sum(txn.total_price for txn in txns), total)
+        self.assertFalse(CreditListing.objects.filter(pk__in=ids, is_active=True).exists())
+        self.assertEqual(
+            CarbonCredit.objects.filter(owner=self.company, status=CarbonCredit.Status.SOLD).count(), 6
+        )
+
+        self.company.profile.refresh_from_db()
+        self.assertEqual(self.company.profile.balance, Decimal("100000.00") - total)
+        # producer0: 20 + 22 + 24; producer1: 21 + 23 + 25
+        expected = {self.producers[0]: Decimal("660.00"), self.producers[1]: Decimal("690.00")}
+        for producer, proceeds in expected.items():
+            producer.profile.refresh_from_db()
+            self.assertEqual(producer.profile.balance, proceeds)
+            self.assertEqual(balance_from_ledger(producer), proceeds)
+        self.assertEqual(balance_from_ledger(self.company), self.company.profile.balance)
+
+        self.assertEqual(
+            CreditOwnershipHistory.objects.filter(
+                transfer_type=CreditOwnershipHistory.TransferType.SALE, to_owner=self.company
+            ).count(),
+            6,
+        )
+        self.assertEqual(verify_history()[2], [])
+        self.assertEqual(PriceCandle.objects.get(interval=PriceCandle.Interval.DAY).trades, 6)
+        stats = PlatformStats.objects.get()
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+    def test_query_count_does_not_grow_with_items(self):
+        with self.assertNumQueries(13):
+            checkout(self.company, [self.listings[0].pk])
+        with self.assertNumQueries(13):
+            checkout(self.company, [listing.pk for listing in self.listings[1:]])
+
+    def test_unavailable_item_aborts_everything(self):
+        sold = self.listings[2]
+        sold.is_active = False
+        sold.save()
+
+        with self.assertRaises(CheckoutError) as ctx:
+            checkout(self.company, [listing.pk for listing in self.listings])
+
+        self.assertEqual(ctx.exception.unavailable, {sold.pk})
+        self.assertFalse(Transaction.objects.exists())
+        self.company.profile.refresh_from_db()
+        self.assertEqual(self.company.profile.balance, Decimal("100000.00"))
+
+    def test_insufficient_balance(self):
+        poor = User.objects.create_user(username="poor", password="pass123", role=User.Roles.COMPANY)
+        with self.assertRaisesMessage(CheckoutError, "Saldo insuficiente"):
+            checkout(poor, [listing.pk for listing in self.listings])
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_own_listing_is_rejected(self):
+        own = self.list_credit(self.producers[0], Decimal("1.00"), Decimal("1.00"))
+        with self.assertRaises(CheckoutError) as ctx:
+            checkout(self.producers[0], [own.pk])
+        self.assertEqual(ctx.exception.unavailable, {own.pk})
+
+
+class CartViewTests(CheckoutFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.company)
+
+    def add(self, listing):
+        return self.client.post(reverse("transactions:cart_add", kwargs={"listing_id": listing.pk}))
+
+    def test_add_view_and_checkout(self):
+        for listing in self.listings[:3]:
+            self.assertRedirects(self.add(listing), reverse("transactions:cart"))
+
+        response = self.client.get(reverse("transactions:cart"))
+        self.assertEqual(len(response.context["items"]), 3)
+        self.assertEqual(response.context["total"], Decimal("630.00"))
+
+        response = self.client.post(reverse("transactions:cart_checkout"))
+        self.assertRedirects(response, reverse("transactions:transaction_history"))
+        self.assertEqual(Transaction.objects.filter(buyer=self.company).count(), 3)
+        self.assertNotIn(CART_SESSION_KEY, self.client.session)
+
+    def test_checkout_drops_sold_items_from_cart(self):
+        for listing in self.listings[:2]:
+            self.add(listing)
+        CreditListing.objects.filter(pk=self.listings[0].pk).update(is_active=False)
+
+        response = self.client.post(reverse("transactions:cart_checkout"))
+
+        self.assertRedirects(response, reverse("transactions:cart"))
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(self.client.session[CART_SESSION_KEY], [self.listings[1].pk])
+
+    def test_unapproved_or_deleted_listing_is_not_available(self):
+        pending = self.listings[0]
+        CarbonCredit.objects.filter(pk=pending.credit_id).update(
+            validation_status=CarbonCredit.ValidationStatus.PENDING
+        )
+        self.add(pending)
+        self.assertNotIn(CART_SESSION_KEY, self.client.session)
+
+        # Deixou de estar à venda depois de entrar no carrinho
+        for listing in self.listings[1:3]:
+            self.add(listing)
+        CarbonCredit.objects.filter(pk=self.listings[1].credit_id).update(is_deleted=True)
+
+        response = self.client.get(reverse("transactions:cart"))
+        self.assertEqual([item["available"] for item in response.context["items"]], [False, True])
+        self.assertEqual(response.context["total"], Decimal("220.00"))
+        self.assertEqual(response.context["unavailable_count"], 1)
+
+    def test_producer_cannot_use_cart(self):
+        self.client.force_login(self.producers[0])
+        response = self.add(self.listings[1])
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(CART_SESSION_KEY, self.client.session)
@@ -0,0 +1,253 @@
+"""Testes do barramento de eventos de transações (SSE)."""
+
+import asyncio
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase
+from django.urls import reverse
+
+from credits.models import CarbonCredit, CreditListing
+from transactions.events import Subscription, TransactionEventBus, event_bus
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+def _payload(message):
+    """Extrai o JSON do campo `data:` de uma mensagem SSE."""
+    if isinstance(message, bytes):
+        message = message.decode()
+    data_line = next(line for line in message.splitlines() if line.startswith("data: "))
+    return json.loads(data_line[len("data: "):])
+
+
+class TransactionEventBusTests(TestCase):
+    """Testes do fan-out em memória."""
+
+    def test_publish_fans_out_to_all_subscribers(self):
+        """Cada assinante recebe a mesma mensagem uma única vez."""
+        bus = TransactionEventBus()
+        subs = [bus.subscribe() for _ in range(5)]
+
+        bus.publish({"id": 1})
+
+        for sub in subs:
+            event_id, message = sub.get(timeout=0)
+            self.assertEqual(event_id, 1)
+            self.assertEqual(_payload(message), {"id": 1})
+            self.assertIsNone(sub.get(timeout=0))
+
+    def test_unsubscribe_stops_delivery(self):
+        """Assinante removido não recebe novos eventos."""
+        bus = TransactionEventBus()
+        sub = bus.subscribe()
+        bus.unsubscribe(sub)
+
+        bus.publish({"id": 1})
+
+        self.assertIsNone(sub.get(timeout=0))
+        self.assertEqual(bus.subscriber_count, 0)
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Fila cheia descarta o evento mais antigo."""
+        bus = TransactionEventBus()
+        sub = bus.subscribe(Subscription(maxsize=2))
+
+        for i in range(3):
+            bus.publish({"id": i})
+
+        ids = [sub.get(timeout=0)[0] for _ in range(2)]
+        self.assertEqual(ids, [1, 2])
+
+
+class BuyCreditPublishesEventTests(TestCase):
+    """buy_credit publica a transação no barramento após o commit."""
+
+    def setUp(self):
+        self.client = Client()
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.company.profile.add_balance(Decimal("10000.00"))
+        self.credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal("10.00"),
+            origin="Test Farm",
+            generation_date="2025-10-01",
+            status=CarbonCredit.Status.LISTED,
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        CreditListing.objects.create(
+            credit=self.credit, price_per_unit=Decimal("50.00"), is_active=True
+        )
+        self.subscription = event_bus.subscribe()
+
+    def tearDown(self):
+        event_bus.unsubscribe(self.subscription)
+
+    def test_event_published_on_commit(self):
+        """Evento só é distribuído quando o commit acontece."""
+        self.client.force_login(self.company)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.client.post(reverse("credits:credit_buy", kwargs={"pk": self.credit.id}))
+            self.assertIsNone(self.subscription.get(timeout=0))
+
+        for callback in callbacks:
+            callback()
+
+        event_id, message = self.subscription.get(timeout=0)
+        data = _payload(message)
+        self.assertEqual(event_id, data["id"])
+        self.assertEqual(data["amount"], "10.00")
+        self.assertEqual(data["total_price"], "500.00")
+        self.assertEqual(data["buyer_role"], "Empresa")
+        self.assertEqual(data["seller_role"], "Produtor")
+
+
+class AsyncPublicTransactionsSSETests(TestCase):
+    """Stream SSE servido via ASGI (AsyncClient)."""
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_async_stream_receives_published_event(self):
+        """Stream assíncrono entrega eventos publicados e libera a assinatura ao desconectar."""
+        client = AsyncClient()
+        response = await client.get(reverse("transactions:public_transactions_sse"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        stream = response.streaming_content
+        self.assertTrue(hasattr(stream, "__anext__"))
+
+        session_chunk = await anext(stream)
+        self.assertIn(b"event: session", session_chunk)
+        self.assertEqual(await anext(stream), b": connected\n\n")
+
+        subscribers_before = event_bus.subscriber_count
+        next_chunk = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        self.assertEqual(event_bus.subscriber_count, subscribers_before + 1)
+
+        event_bus.publish({"id": 42})
+        chunk = await asyncio.wait_for(next_chunk, timeout=1)
+        self.assertEqual(_payload(chunk), {"id": 42})
+
+        # Desconexão: o handler ASGI cancela a task que consome o stream
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(event_bus.subscriber_count, subscribers_before)
+        self.assertIsNone(await cache.aget("sse_active_127.0.0.1"))
+
+    def test_wsgi_falls_back_to_sync_stream(self):
+        """Sob WSGI o endpoint usa o gerador síncrono."""
+        response = Client().get(reverse("transactions:public_transactions_sse"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"event: session", next(response.streaming_content))
+        response.close()
+
+
+class SSEReplayTests(TestCase):
+    """Reconexão com Last-Event-ID recebe exatamente os eventos perdidos."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_resume_returns_events_after_cursor(self):
+        """Replay vem do buffer; cursor fora do buffer retorna None."""
+        bus = TransactionEventBus(replay_buffer_size=3)
+        for i in range(1, 5):
+            bus.publish({"id": i})
+
+        self.assertEqual([i for i, _ in bus.resume(Subscription(), 2)], [3, 4])
+        self.assertEqual(bus.resume(Subscription(), 4), [])
+        self.assertIsNone(bus.resume(Subscription(), 1))  # já saiu do buffer
+        self.assertEqual(bus.resume(Subscription(), None), [])
+
+    def _open_stream(self, last_event_id):
+        response = Client().get(
+            reverse("transactions:public_transactions_sse"),
+            HTTP_LAST_EVENT_ID=str(last_event_id),
+        )
+        stream = iter(response.streaming_content)
+        self.assertIn(b"event: session", next(stream))
+        self.assertEqual(next(stream), b": connected\n\n")
+        return response, stream
+
+    def test_replay_from_buffer_without_queries(self):
+        """Eventos ainda no buffer são reenviados sem consultar o banco."""
+        for event_id in (900001, 900002, 900003):
+            event_bus.publish({"id": event_id})
+
+        response, stream = self._open_stream(900001)
+        with self.assertNumQueries(0):
+            chunks = [next(stream), next(stream)]
+        response.close()
+
+        self.assertEqual([_payload(c)["id"] for c in chunks], [900002, 900003])
+        self.assertTrue(chunks[0].startswith(b"id: 900002\n"))
+
+    def _transactions(self, statuses):
+        producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        credit = CarbonCredit.objects.create(
+            owner=producer,
+            amount=Decimal("10.00"),
+            origin="Test Farm",
+            generation_date="2025-10-01",
+        )
+        return [
+            Transaction.objects.create(
+                buyer=company,
+                seller=producer,
+                credit=credit,
+                amount=Decimal("10.00"),
+                total_price=Decimal("500.00"),
+                status=status,
+            )
+            for status in statuses
+        ]
+
+    def test_replay_falls_back_to_single_query(self):
+        """Cursor mais antigo que o buffer usa uma única consulta indexada."""
+        txns = self._transactions([
+            Transaction.Status.COMPLETED,
+            Transaction.Status.PENDING,
+            Transaction.Status.COMPLETED,
+        ])
+
+        response, stream = self._open_stream(0)
+        with self.assertNumQueries(1):
+            chunks = [next(stream), next(stream)]
+        response.close()
+
+        self.assertEqual([_payload(c)["id"] for c in chunks], [txns[0].id, txns[2].id])
+
+    def test_replay_pages_until_caught_up(self):
+        """Mais eventos perdidos que uma página: o banco é lido até o fim, sem lacuna."""
+        txns = self._transactions([Transaction.Status.COMPLETED] * 5)
+
+        with mock.patch("transactions.events.REPLAY_PAGE_SIZE", 2):
+            response, stream = self._open_stream(0)
+            with self.assertNumQueries(3):
+                chunks = [next(stream) for _ in txns]
+            event_bus.publish({"id": txns[-1].id})  # já reenviado pelo banco
+            event_bus.publish({"id": 900100})
+            chunks.append(next(stream))
+        response.close()
+
+        self.assertEqual([_payload(c)["id"] for c in chunks], [txn.id for txn in txns] + [900100])
@@ -0,0 +1,285 @@
+"""Testes do livro de ofertas e do motor de casamento (transactions.matching)."""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.ledger import balance_from_ledger
+from credits.integrity import verify_history
+from credits.models import CarbonCredit, CreditListing
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+from transactions.matching import BookAsk, BookBid, MatchingEngine, OrderBook
+from transactions.models import Bid, Transaction
+from transactions.services import purchase_credit
+
+User = get_user_model()
+
+T0 = datetime(2025, 3, 1, 12, tzinfo=dt_timezone.utc)
+
+
+def bid(pk, limit, quantity, minute=0, buyer=100):
+    return BookBid(pk, buyer, Decimal(limit), Decimal(quantity), T0 + timedelta(minutes=minute))
+
+
+def ask(pk, price, amount, minute=0, seller=200):
+    return BookAsk(pk, pk, seller, Decimal(amount), Decimal(price), T0 + timedelta(minutes=minute))
+
+
+class OrderBookTests(TestCase):
+    def test_price_time_priority(self):
+        book = OrderBook()
+        for order in [ask(1, 30, 10, minute=2), ask(2, 25, 10, minute=3), ask(3, 30, 10, minute=1)]:
+            book.add_ask(order)
+        book.add_bid(bid(1, 40, 20, minute=5))
+
+        fills = book.match()
+
+        # Mais barata primeiro; no empate de preço, a mais antiga
+        self.assertEqual([fill.ask.id for fill in fills], [2, 3])
+        self.assertEqual(book.best_ask().id, 1)
+        self.assertIsNone(book.best_bid())
+
+    def test_resting_order_sets_the_price(self):
+        book = OrderBook()
+        book.add_bid(bid(1, 40, 10, minute=0))
+        book.add_ask(ask(1, 30, 10, minute=1))
+        book.add_ask(ask(2, 20, 10, minute=-1))
+        book.add_bid(bid(2, 50, 10, minute=2))
+
+        fills = {fill.ask.id: fill for fill in book.match()}
+
+        # A venda 2 já estava no livro quando a compra 2 (melhor) chegou;
+        # a compra 1 já estava quando a venda 1 chegou
+        self.assertEqual(fills[2].price, Decimal("20"))
+        self.assertEqual((fills[1].bid.id, fills[1].price), (1, Decimal("40")))
+
+    def test_credits_are_not_split(self):
+        book = OrderBook()
+        book.add_ask(ask(1, 20, 30))
+        book.add_ask(ask(2, 25, 10))
+        book.add_bid(bid(1, 50, 15, minute=1))
+        book.add_bid(bid(2, 40, 30, minute=2))
+
+        fills = book.match()
+
+        # O crédito de 30 não cabe na primeira compra e fica para a segunda
+        self.assertEqual([(fill.bid.id, fill.ask.id) for fill in fills], [(1, 2), (2, 1)])
+        self.assertEqual(book.best_bid().remaining, Decimal("5"))
+
+    def test_no_cross_and_no_self_trade(self):
+        book = OrderBook()
+        book.add_ask(ask(1, 30, 10, seller=100))
+        book.add_ask(ask(2, 45, 10))
+        book.add_bid(bid(1, 40, 10, buyer=100))
+
+        self.assertEqual(book.match(), [])
+        self.assertEqual(len(book), 3)
+
+    def test_match_respects_limit(self):
+        book = OrderBook()
+        for pk in range(1, 6):
+            book.add_ask(ask(pk, 20, 1))
+        book.add_bid(bid(1, 20, 5, minute=1))
+
+        self.assertEqual(len(book.match(limit=2)), 2)
+        self.assertEqual(book.bids[1].remaining, Decimal("3"))
+        self.assertEqual(len(book.match()), 3)
+
+
+class MatchingFixtureMixin:
+    def setUp(self):
+        self.company = User.objects.create_user(username="company", password="pass123", role=User.Roles.COMPANY)
+        self.company.profile.add_balance(Decimal("10000.00"))
+        self.producer = User.objects.create_user(username="producer", role=User.Roles.PRODUCER)
+        self.engine = MatchingEngine()
+
+    def list_credit(self, amount, price, pk=None):
+        credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal(amount),
+            origin="Test Farm",
+            generation_date="2025-01-01",
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        listing = CreditListing.objects.create(pk=pk, credit=credit, price_per_unit=Decimal(price))
+        credit.status = CarbonCredit.Status.LISTED
+        credit.save()
+        return listing
+
+    def place(self, quantity, limit, buyer=None, pk=None):
+        return Bid.objects.create(
+            pk=pk, buyer=buyer or self.company, quantity=Decimal(quantity), limit_price=Decimal(limit)
+        )
+
+
+class MatchingEngineTests(MatchingFixtureMixin, TestCase):
+    def test_batch_settles_fills(self):
+        cheap = self.list_credit(10, 20)
+        other = self.list_credit(10, 30)
+        expensive = self.list_credit(10, 60)
+        order = self.place(25, 50)
+
+        txns = self.engine.run_batch()
+
+        self.assertEqual({txn.credit_id for txn in txns}, {cheap.credit_id, other.credit_id})
+        self.assertTrue(all(txn.bid_id == order.pk for txn in txns))
+        order.refresh_from_db()
+        self.assertEqual((order.filled, order.status), (Decimal("20.00"), Bid.Status.OPEN))
+        self.assertTrue(CreditListing.objects.get(pk=expensive.pk).is_active)
+
+        # Ordem posterior às listagens: paga o preço delas
+        self.company.profile.refresh_from_db()
+        self.assertEqual(self.company.profile.balance, Decimal("9500.00"))
+        self.assertEqual(balance_from_ledger(self.company), Decimal("9500.00"))
+        self.assertEqual(balance_from_ledger(self.producer), Decimal("500.00"))
+        self.assertEqual(verify_history()[2], [])
+        stats = PlatformStats.objects.get()
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+    def test_filled_bid_and_new_orders_between_batches(self):
+        self.engine.load()
+        order = self.place(20, 50)
+        self.list_credit(10, 20)
+        self.assertEqual(len(self.engine.run_batch()), 1)
+
+        self.list_credit(10, 25)
+        self.assertEqual(len(self.engine.run_batch()), 1)
+
+        order.refresh_from_db()
+        self.assertEqual((order.filled, order.status), (Decimal("20.00"), Bid.Status.FILLED))
+        self.assertEqual(self.engine.run_batch(), [])
+
+    def test_query_count_does_not_grow_with_fills(self):
+        for _ in range(2):
+            self.list_credit(1, 20)
+        self.place(2, 20)
+        with self.assertNumQueries(18):
+            self.assertEqual(len(self.engine.run_batch()), 2)
+
+        for _ in range(10):
+            self.list_credit(1, 20)
+        self.place(10, 20)
+        with self.assertNumQueries(18):
+            self.assertEqual(len(self.engine.run_batch()), 10)
+
+    def test_rows_committed_out_of_id_order_are_loaded(self):
+        self.engine.load()
+        self.place(10, 10, pk=100)
+        self.list_credit(10, 60, pk=100)
+        self.assertEqual(self.engine.run_batch(), [])
+
+        # Ids menores que os já lidos, visíveis só agora (commit atrasado)
+        late = self.place(10, 50, pk=50)
+        cheap = self.list_credit(10, 20, pk=50)
+        [txn] = self.engine.run_batch()
+
+        self.assertEqual((txn.bid_id, txn.credit_id), (late.pk, cheap.credit_id))
+        self.assertEqual(len(self.engine.book.bids), 1)
+
+    def test_credit_sold_directly_returns_bid_to_book(self):
+        first = self.list_credit(10, 20)
+        self.engine.load()
+        purchase_credit(self.company, first.credit_id)
+        self.place(10, 50)
+        second = self.list_credit(10, 30)
+
+        # A primeira listagem já foi vendida: a ordem volta ao livro...
+        self.assertEqual(self.engine.run_batch(), [])
+        # ...e é executada contra a segunda no lote seguinte
+        [txn] = self.engine.run_batch()
+        self.assertEqual(txn.credit_id, second.credit_id)
+
+    def test_cancelled_bid_returns_ask_to_book(self):
+        listing = self.list_credit(10, 20)
+        order = self.place(10, 50)
+        self.engine.load()
+        Bid.objects.filter(pk=order.pk).update(status=Bid.Status.CANCELLED)
+        later = self.place(10, 40)
+
+        # A execução da ordem cancelada é recusada e a venda volta ao livro
+        self.assertEqual(self.engine.run_batch(), [])
+        [txn] = self.engine.run_batch()
+
+        self.assertEqual((txn.bid_id, txn.credit_id), (later.pk, listing.credit_id))
+
+    def test_bid_without_balance_is_cancelled(self):
+        poor = User.objects.create_user(username="poor", role=User.Roles.COMPANY)
+        order = self.place(10, 50, buyer=poor)
+        self.list_credit(10, 20)
+
+        self.assertEqual(self.engine.run_batch(), [])
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, Bid.Status.CANCELLED)
+        self.assertEqual(len(self.engine.book.asks), 1)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_book_is_rebuilt_from_database(self):
+        self.list_credit(10, 20)
+        self.list_credit(10, 45)
+        order = self.place(30, 30)
+        self.engine.run_batch()
+
+        restarted = MatchingEngine()
+        restarted.load()
+
+        self.assertEqual(restarted.book.match(), [])
+        self.assertEqual(restarted.book.best_bid().id, order.pk)
+        self.assertEqual(restarted.book.best_bid().remaining, Decimal("20.00"))
+        self.assertEqual(restarted.book.best_ask().price, Decimal("45.00"))
+
+    def test_command_drains_crossing_orders(self):
+        for _ in range(3):
+            self.list_credit(10, 20)
+        self.place(30, 20)
+
+        out = StringIO()
+        call_command("run_matching_engine", once=True, batch_size=2, stdout=out)
+
+        self.assertIn("✓ 3 execução(ões) no total", out.getvalue())
+        self.assertEqual(Bid.objects.get().status, Bid.Status.FILLED)
+
+
+class BidViewTests(MatchingFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.company)
+
+    def test_place_and_cancel_bid(self):
+        self.list_credit(10, 20)
+        response = self.client.post(reverse("transactions:bids"), {"quantity": "50", "limit_price": "30"})
+        self.assertRedirects(response, reverse("transactions:bids"))
+        order = Bid.objects.get()
+        self.assertEqual((order.buyer, order.remaining), (self.company, Decimal("50.00")))
+
+        response = self.client.get(reverse("transactions:bids"))
+        self.assertEqual(list(response.context["bids"]), [order])
+        self.assertEqual(response.context["bid_levels"][0]["quantity"], Decimal("50"))
+        self.assertEqual(response.context["ask_levels"][0]["price_per_unit"], Decimal("20.00"))
+
+        self.client.post(reverse("transactions:bid_cancel", kwargs={"pk": order.pk}))
+        order.refresh_from_db()
+        self.assertEqual(order.status, Bid.Status.CANCELLED)
+
+    def test_bid_larger_than_balance_is_rejected(self):
+        response = self.client.post(reverse("transactions:bids"), {"quantity": "1000", "limit_price": "20"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Saldo insuficiente", str(response.context["form"].non_field_errors()))
+        self.assertFalse(Bid.objects.exists())
+
+    def test_cannot_cancel_someone_elses_bid(self):
+        other = User.objects.create_user(username="other", role=User.Roles.COMPANY)
+        order = self.place(10, 20, buyer=other)
+
+        self.client.post(reverse("transactions:bid_cancel", kwargs={"pk": order.pk}))
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, Bid.Status.OPEN)
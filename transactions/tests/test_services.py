@@ -0,0 +1,151 @@
+"""Testes da compra com UPDATEs condicionais (transactions.services)."""
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+
+from accounts.ledger import balance_from_ledger
+from accounts.models import Profile
+from credits.models import CarbonCredit, CreditListing, CreditOwnershipHistory
+from dashboard.models import PlatformStats
+from dashboard.stats import compute_platform_stats
+from transactions import services
+from transactions.models import Transaction
+from transactions.services import PurchaseError, purchase_credit
+
+User = get_user_model()
+
+
+class PurchaseFixtureMixin:
+    """Produtor com um crédito aprovado e listado; empresa com saldo."""
+
+    def setUp(self):
+        self.producer = User.objects.create_user(
+            username="producer", password="pass123", role=User.Roles.PRODUCER
+        )
+        self.company = User.objects.create_user(
+            username="company", password="pass123", role=User.Roles.COMPANY
+        )
+        self.company.profile.add_balance(Decimal("10000.00"))
+        self.credit = CarbonCredit.objects.create(
+            owner=self.producer,
+            amount=Decimal("100.00"),
+            origin="Test Farm",
+            generation_date="2025-10-29",
+            validation_status=CarbonCredit.ValidationStatus.APPROVED,
+        )
+        self.listing = CreditListing.objects.create(
+            credit=self.credit, price_per_unit=Decimal("50.00")
+        )
+        self.credit.status = CarbonCredit.Status.LISTED
+        self.credit.save()
+
+
+class PurchaseCreditTests(PurchaseFixtureMixin, TestCase):
+    def test_purchase_moves_balances_and_ownership(self):
+        txn = purchase_credit(self.company, self.credit.pk)
+
+        self.assertEqual(txn.total_price, Decimal("5000.00"))
+        self.assertEqual(txn.seller, self.producer)
+        self.company.profile.refresh_from_db()
+        self.producer.profile.refresh_from_db()
+        self.assertEqual(self.company.profile.balance, Decimal("5000.00"))
+        self.assertEqual(self.producer.profile.balance, Decimal("5000.00"))
+
+        self.credit.refresh_from_db()
+        self.assertEqual(self.credit.owner, self.company)
+        self.assertEqual(self.credit.status, CarbonCredit.Status.SOLD)
+        self.listing.refresh_from_db()
+        self.assertFalse(self.listing.is_active)
+
+        sale = self.credit.ownership_history.last()
+        self.assertEqual(sale.transfer_type, CreditOwnershipHistory.TransferType.SALE)
+        self.assertEqual((sale.from_owner, sale.to_owner), (self.producer, self.company))
+        self.assertEqual((sale.transaction, sale.price), (txn, Decimal("5000.00")))
+
+    def test_platform_stats_stay_consistent(self):
+        """Os deltas aplicados à mão batem com o recálculo completo."""
+        purchase_credit(self.company, self.credit.pk)
+
+        stats = PlatformStats.objects.get()
+        for name, value in compute_platform_stats().items():
+            self.assertEqual(getattr(stats, name), value, name)
+
+    def test_sub_cent_total_is_rounded_before_writing(self):
+        """1.05 × 0.50 = 0.525: gravado como 0.53 na transação, nos saldos e no ledger."""
+        CarbonCredit.objects.filter(pk=self.credit.pk).update(amount=Decimal("1.05"))
+        CreditListing.objects.filter(pk=self.listing.pk).update(price_per_unit=Decimal("0.50"))
+
+        txn = purchase_credit(self.company, self.credit.pk)
+
+        self.assertEqual(txn.total_price, Decimal("0.53"))
+        with connection.cursor() as cursor:
+            # Valores crus do banco, sem o arredondamento do DecimalField na leitura
+            cursor.execute("SELECT total_price FROM transactions_transaction WHERE id = %s", [txn.pk])
+            self.assertEqual(Decimal(str(cursor.fetchone()[0])), Decimal("0.53"))
+            cursor.execute(
+                "SELECT balance FROM accounts_profile WHERE user_id IN (%s, %s)",
+                [self.producer.pk, self.company.pk],
+            )
+            raw = sorted(Decimal(str(balance)) for (balance,) in cursor.fetchall())
+        self.assertEqual(raw, [Decimal("0.53"), Decimal("9999.47")])
+        for user in (self.company, self.producer):
+            self.assertEqual(balance_from_ledger(user), Profile.objects.get(user=user).balance)
+
+    def test_lost_race_changes_nothing(self):
+        """Crédito vendido entre a leitura e o UPDATE: 0 linhas, nada gravado."""
+        stale = services._load(self.credit.pk)
+        CarbonCredit.objects.filter(pk=self.credit.pk).update(status=CarbonCredit.Status.SOLD)
+
+        with mock.patch.object(services, "_load", return_value=stale):
+            with self.assertRaisesMessage(PurchaseError, services.UNAVAILABLE):
+                purchase_credit(self.company, self.credit.pk)
+
+        self.company.profile.refresh_from_db()
+        self.assertEqual(self.company.profile.balance, Decimal("10000.00"))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_balance_spent_concurrently_rolls_back_claim(self):
+        """Saldo gasto em outra requisição: o débito condicional falha e desfaz tudo."""
+        buyer = User.objects.get(pk=self.company.pk)
+        buyer.profile.balance  # carrega o Profile com o saldo antigo
+        type(buyer.profile).objects.filter(pk=buyer.profile.pk).update(balance=Decimal("10.00"))
+
+        with self.assertRaisesMessage(PurchaseError, "Saldo insuficiente. Você tem R$ 10.00"):
+            purchase_credit(buyer, self.credit.pk)
+
+        self.credit.refresh_from_db()
+        self.assertEqual(self.credit.status, CarbonCredit.Status.LISTED)
+        self.assertEqual(self.credit.owner, self.producer)
+        self.assertTrue(CreditListing.objects.get(pk=self.listing.pk).is_active)
+
+
+class PurchaseRetryTests(PurchaseFixtureMixin, TransactionTestCase):
+    """Repetição de erros transitórios (fora de transação externa)."""
+
+    def test_transient_error_is_retried(self):
+        real = services._purchase
+        calls = []
+
+        def flaky(buyer, credit_id):
+            calls.append(credit_id)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return real(buyer, credit_id)
+
+        with mock.patch.object(services, "_purchase", side_effect=flaky), \
+                mock.patch.object(services, "RETRY_BACKOFF", 0):
+            txn = purchase_credit(self.company, self.credit.pk)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(txn.status, Transaction.Status.COMPLETED)
+
+    def test_gives_up_after_max_attempts(self):
+        with mock.patch.object(services, "_purchase", side_effect=OperationalError("locked")) as call, \
+                mock.patch.object(services, "RETRY_BACKOFF", 0):
+            with self.assertRaises(OperationalError):
+                purchase_credit(self.company, self.credit.pk)
+        self.assertEqual(call.call_count, services.MAX_ATTEMPTS)
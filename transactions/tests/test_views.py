@@ -1,12 +1,14 @@
 """Testes das views de transações."""
 
 from decimal import Decimal
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from credits.models import CarbonCredit, CreditListing
+from dashboard.models import UserTradingStats
 from transactions.models import Transaction
 
 User = get_user_model()
@@ -228,3 +230,42 @@ class TransactionHistoryViewTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(len(resp.context["transactions"]), 0)
         self.assertContains(resp, "ainda não tem transações")
+
+    def test_history_pages_by_keyset(self):
+        """Páginas seguem `next_before` sem repetir, misturando compras e vendas."""
+        other = User.objects.create_user(username="other", role=User.Roles.COMPANY)
+        for price in ("10.00", "20.00", "30.00"):
+            Transaction.objects.create(
+                buyer=other, seller=self.company, credit=self.credit,
+                amount=Decimal("1.00"), total_price=Decimal(price),
+            )
+        self.client.force_login(self.company)
+
+        seen = []
+        url = reverse("transactions:transaction_history")
+        with mock.patch("transactions.views.HISTORY_PER_PAGE", 2):
+            while url:
+                resp = self.client.get(url)
+                seen.extend(txn.pk for txn in resp.context["transactions"])
+                next_before = resp.context["next_before"]
+                url = f"{reverse('transactions:transaction_history')}?before={next_before}" if next_before else None
+
+        expected = Transaction.objects.filter(pk__in=seen).order_by("-timestamp", "-id")
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, [txn.pk for txn in expected])
+        self.assertEqual((resp.context["total_purchases"], resp.context["total_sales"]), (2, 3))
+
+    def test_history_counts_come_from_counters(self):
+        """Totais vêm de UserTradingStats, mantido a cada transação criada."""
+        self.assertEqual(UserTradingStats.load(self.company.pk).purchases, 2)
+        Transaction.objects.create(
+            buyer=self.company, seller=self.producer, credit=self.credit,
+            amount=Decimal("1.00"), total_price=Decimal("10.00"),
+        )
+        UserTradingStats.objects.filter(pk=self.producer.pk).delete()
+        self.client.force_login(self.company)
+
+        resp = self.client.get(reverse("transactions:transaction_history"))
+
+        self.assertEqual(resp.context["total_purchases"], 3)
+        self.assertEqual(UserTradingStats.load(self.producer.pk).sales, 3)
@@ -10,6 +10,16 @@ urlpatterns = [
     # Histórico de transações (compras e vendas do usuário)
     path("", views.transaction_history, name="transaction_history"),
 
+    # Carrinho e checkout (Company-only)
+    path("cart/", views.cart_view, name="cart"),
+    path("cart/add/<int:listing_id>/", views.cart_add, name="cart_add"),
+    path("cart/remove/<int:listing_id>/", views.cart_remove, name="cart_remove"),
+    path("cart/checkout/", views.cart_checkout, name="cart_checkout"),
+
+    # Ordens de compra limitadas (Company-only)
+    path("bids/", views.bids_view, name="bids"),
+    path("bids/<int:pk>/cancel/", views.bid_cancel, name="bid_cancel"),
+
     # Public transactions page (no auth required)
     path("public/", views.public_transactions_view, name="public_transactions"),
 
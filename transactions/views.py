@@ -4,24 +4,46 @@ from __future__ import annotations
 
 import json
 import time
+import uuid
 from decimal import Decimal
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
-from django.db import transaction
-from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
-from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
+from django.db.models import Count, F, Q, Subquery, Sum
+from django.db.models.expressions import RawSQL
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_http_methods
 
 from accounts.models import User
 from accounts.views import company_required
 from credits.models import CarbonCredit, CreditListing
-
+from dashboard.models import UserTradingStats
+
+from .cart import MAX_CART_ITEMS, Cart
+from .events import (
+    AsyncSubscription,
+    Subscription,
+    aiter_missed_events,
+    event_bus,
+    iter_missed_events,
+)
+from .forms import BidForm
+from .models import Bid
 from .models import Transaction as TransactionModel
+from .services import CheckoutError, PurchaseError, checkout, is_available, line_total, purchase_credit
+
+# Níveis de preço exibidos em cada lado do livro de ofertas
+BOOK_DEPTH = 10
+# Ordens recentes listadas na página de ordens
+BIDS_PER_PAGE = 50
+# Transações por página do histórico
+HISTORY_PER_PAGE = 50
 
 
 @require_http_methods(["POST"])
@@ -40,78 +62,18 @@ def buy_credit(request: HttpRequest, pk: int) -> HttpResponse:
     7. Atualiza status do crédito para SOLD
     8. Desativa o listing
     
-    Tudo em transação atômica para garantir consistência e evitar race conditions.
+    Cada passo é um UPDATE condicional (ver `transactions.services`): compras
+    concorrentes do mesmo crédito não esperam por lock, a perdedora só recebe
+    "indisponível".
     """
-    # Executar tudo em transação atômica com SELECT FOR UPDATE
-    with transaction.atomic():
-        # SELECT FOR UPDATE previne race conditions
-        credit = get_object_or_404(
-            CarbonCredit.objects.select_for_update(),
-            pk=pk
-        )
-        
-        # Validações
-        if credit.status != CarbonCredit.Status.LISTED:
-            messages.error(request, "Este crédito não está disponível para compra.")
-            return redirect("credits:credit_detail", pk=pk)
-        
-        # Validar que o crédito foi aprovado por um auditor
-        if credit.validation_status != CarbonCredit.ValidationStatus.APPROVED:
-            messages.error(
-                request, 
-                "⚠️ Este crédito ainda não foi aprovado por um auditor e não pode ser comprado. "
-                "Aguarde a validação para realizar a compra."
-            )
-            return redirect("credits:credit_detail", pk=pk)
-        
-        # Buscar listing ativo
-        try:
-            listing = CreditListing.objects.get(credit=credit, is_active=True)
-        except CreditListing.DoesNotExist:
-            messages.error(request, "Não foi encontrada uma listagem ativa para este crédito.")
-            return redirect("credits:credit_detail", pk=pk)
-        
-        # Validar que o comprador não é o dono
-        if credit.owner == request.user:
-            messages.error(request, "Você não pode comprar seu próprio crédito.")
-            return redirect("credits:credit_detail", pk=pk)
-        
-        # Calcular valor total
-        total_price = credit.amount * listing.price_per_unit
-        
-        # Verificar saldo do comprador
-        buyer_profile = request.user.profile
-        if not buyer_profile.can_buy(total_price):
-            messages.error(
-                request, 
-                f"Saldo insuficiente. Você tem R$ {buyer_profile.balance:.2f}, "
-                f"mas precisa de R$ {total_price:.2f}."
-            )
-            return redirect("credits:credit_detail", pk=pk)
-        
-        # Criar transação
-        txn = TransactionModel.objects.create(
-            buyer=request.user,
-            seller=credit.owner,
-            credit=credit,
-            amount=credit.amount,
-            total_price=total_price,
-            status=TransactionModel.Status.COMPLETED,
-        )
-        
-        # Desativar listing ANTES de mudar status (validação não permite salvar listing de crédito SOLD)
-        listing.is_active = False
-        listing.save()
-        
-        # Processar pagamento (deduzir do comprador, adicionar ao vendedor)
-        buyer_profile.deduct_balance(total_price)
-        credit.owner.profile.add_balance(total_price)
-        
-        # Transferir propriedade
-        credit.owner = request.user
-        credit.status = CarbonCredit.Status.SOLD
-        credit.save()
-    
+    try:
+        txn = purchase_credit(request.user, pk)
+    except CarbonCredit.DoesNotExist:
+        raise Http404("Crédito não encontrado")
+    except PurchaseError as exc:
+        messages.error(request, str(exc))
+        return redirect("credits:credit_detail", pk=pk)
+
     messages.success(
         request,
         f"✅ Crédito adquirido com sucesso! Transação #{txn.id} concluída. "
@@ -120,32 +82,221 @@ def buy_credit(request: HttpRequest, pk: int) -> HttpResponse:
     return redirect("transactions:transaction_history")
 
 
+@company_required
+def cart_view(request: HttpRequest) -> HttpResponse:
+    """
+    Carrinho da empresa (Company-only): itens, total e o que saiu de venda.
+
+    Uma consulta para todas as listagens do carrinho.
+    """
+    cart = Cart(request.session)
+    listings = {
+        listing.pk: listing
+        for listing in CreditListing.objects.filter(pk__in=cart.listing_ids).select_related("credit")
+    }
+    items = []
+    total = Decimal("0.00")
+    for listing_id in cart.listing_ids:
+        listing = listings.get(listing_id)
+        if listing is None:
+            continue
+        available = is_available(listing, request.user.id)
+        subtotal = line_total(listing.credit.amount, listing.price_per_unit)
+        if available:
+            total += subtotal
+        items.append({"listing": listing, "subtotal": subtotal, "available": available})
+
+    context = {
+        "items": items,
+        "total": total,
+        "unavailable_count": sum(1 for item in items if not item["available"]),
+        "balance": request.user.profile.balance,
+    }
+    return render(request, "transactions/cart.html", context)
+
+
+@require_http_methods(["POST"])
+@company_required
+def cart_add(request: HttpRequest, listing_id: int) -> HttpResponse:
+    """Adiciona uma listagem ativa ao carrinho e volta para a página de origem."""
+    listing = CreditListing.objects.filter(pk=listing_id).select_related("credit").first()
+    if listing is not None and listing.credit.owner_id == request.user.id:
+        messages.error(request, "❌ Você não pode comprar seu próprio crédito.")
+    elif listing is None or not is_available(listing, request.user.id):
+        messages.error(request, "❌ Este crédito não está mais à venda.")
+    elif not Cart(request.session).add(listing.pk):
+        messages.error(request, f"❌ O carrinho aceita no máximo {MAX_CART_ITEMS} itens.")
+    else:
+        messages.success(request, f"✅ Crédito #{listing.credit_id} adicionado ao carrinho.")
+
+    next_url = request.POST.get("next", "")
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect("transactions:cart")
+
+
+@require_http_methods(["POST"])
+@company_required
+def cart_remove(request: HttpRequest, listing_id: int) -> HttpResponse:
+    Cart(request.session).remove([listing_id])
+    return redirect("transactions:cart")
+
+
+@require_http_methods(["POST"])
+@company_required
+def cart_checkout(request: HttpRequest) -> HttpResponse:
+    """
+    Compra todos os itens do carrinho em uma única transação (Company-only).
+
+    Tudo ou nada: se algum item saiu de venda, ele é retirado do carrinho e
+    nada é comprado, para a empresa revisar o novo total.
+    """
+    cart = Cart(request.session)
+    try:
+        txns = checkout(request.user, cart.listing_ids)
+    except CheckoutError as exc:
+        cart.remove(exc.unavailable)
+        messages.error(request, f"❌ {exc}")
+        return redirect("transactions:cart")
+
+    cart.clear()
+    total = sum(txn.total_price for txn in txns)
+    messages.success(
+        request,
+        f"✅ {len(txns)} crédito(s) adquirido(s) em uma única compra. "
+        f"Total: R$ {total:.2f} | Saldo restante: R$ {request.user.profile.balance:.2f}"
+    )
+    return redirect("transactions:transaction_history")
+
+
+@company_required
+def bids_view(request: HttpRequest) -> HttpResponse:
+    """
+    Ordens de compra da empresa e profundidade do livro (Company-only).
+
+    POST cria uma ordem limitada; o motor de casamento
+    (`run_matching_engine`) a executa contra as listagens ativas.
+    """
+    form = BidForm(request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        if not request.user.profile.can_buy(form.max_cost):
+            form.add_error(
+                None,
+                f"Saldo insuficiente para a ordem toda no preço limite (R$ {form.max_cost:.2f}). "
+                f"Saldo atual: R$ {request.user.profile.balance:.2f}",
+            )
+        else:
+            bid = form.save(commit=False)
+            bid.buyer = request.user
+            bid.save()
+            messages.success(
+                request,
+                f"✅ Ordem #{bid.id} registrada: até {bid.quantity} tCO₂e a no máximo "
+                f"R$ {bid.limit_price:.2f}/tCO₂e.",
+            )
+            return redirect("transactions:bids")
+
+    # Um nível por preço, somando o que falta executar em cada lado
+    bid_levels = (
+        Bid.objects.filter(status=Bid.Status.OPEN)
+        .values("limit_price")
+        .annotate(quantity=Sum(F("quantity") - F("filled")), orders=Count("id"))
+        .order_by("-limit_price")[:BOOK_DEPTH]
+    )
+    ask_levels = (
+        CreditListing.objects.filter(is_active=True)
+        .values("price_per_unit")
+        .annotate(quantity=Sum("amount"), orders=Count("id"))
+        .order_by("price_per_unit")[:BOOK_DEPTH]
+    )
+    context = {
+        "form": form,
+        "bids": request.user.bids.all()[:BIDS_PER_PAGE],
+        "bid_levels": bid_levels,
+        "ask_levels": ask_levels,
+    }
+    return render(request, "transactions/bids.html", context)
+
+
+@require_http_methods(["POST"])
+@company_required
+def bid_cancel(request: HttpRequest, pk: int) -> HttpResponse:
+    """Cancela uma ordem ainda aberta da empresa; execuções já liquidadas ficam."""
+    cancelled = Bid.objects.filter(pk=pk, buyer=request.user, status=Bid.Status.OPEN).update(
+        status=Bid.Status.CANCELLED
+    )
+    if cancelled:
+        messages.success(request, f"✓ Ordem #{pk} cancelada.")
+    else:
+        messages.error(request, "❌ Esta ordem não está mais aberta.")
+    return redirect("transactions:bids")
+
+
 @login_required
 def transaction_history(request: HttpRequest) -> HttpResponse:
     """
     View de histórico de transações do usuário.
 
-    Mostra tanto compras quanto vendas do usuário logado,
-    ordenadas por data (mais recente primeiro).
+    Mostra tanto compras quanto vendas do usuário logado, da mais recente
+    para a mais antiga, `HISTORY_PER_PAGE` por página. `?before=<id>` abre
+    a página seguinte à transação `id` (paginação keyset: a página 1.000
+    custa o mesmo que a primeira). Os totais vêm de `UserTradingStats`.
     """
     user = request.user
+    try:
+        before = int(request.GET["before"])
+    except (KeyError, ValueError):
+        before = None
 
-    # Buscar compras e vendas do usuário
-    purchases = TransactionModel.objects.filter(buyer=user)
-    sales = TransactionModel.objects.filter(seller=user)
-
-    # Combinar e ordenar por timestamp
-    all_transactions = (purchases | sales).distinct().order_by("-timestamp")
+    page = _history_page(user.pk, before, HISTORY_PER_PAGE + 1)
+    has_more = len(page) > HISTORY_PER_PAGE
+    page = page[:HISTORY_PER_PAGE]
+    stats = UserTradingStats.load(user.pk)
 
     context = {
-        "transactions": all_transactions,
-        "total_purchases": purchases.count(),
-        "total_sales": sales.count(),
+        "transactions": page,
+        "total_purchases": stats.purchases,
+        "total_sales": stats.sales,
+        "before": before,
+        "next_before": page[-1].pk if has_more else None,
     }
 
     return render(request, "transactions/history.html", context)
 
 
+def _history_page(user_id: int, before: int | None, limit: int) -> list[TransactionModel]:
+    """
+    Até `limit` transações do usuário (compras e vendas) anteriores à
+    transação `before`, mais recentes primeiro, em uma única consulta.
+
+    Em vez de `buyer = X OR seller = X` (que não usa índice), cada papel é
+    um ramo que lê só as `limit` primeiras linhas do seu índice
+    (`txn_buyer_time_idx` / `txn_seller_time_idx`); o UNION ALL dos dois
+    ramos escolhe as linhas, que vêm com crédito e participantes no JOIN.
+    Comprador e vendedor nunca coincidem, então não há duplicatas.
+    """
+    branches = []
+    for role in ("buyer_id", "seller_id"):
+        queryset = TransactionModel.objects.filter(**{role: user_id})
+        if before is not None:
+            anchor = Subquery(TransactionModel.objects.filter(pk=before).values("timestamp"))
+            # `timestamp <= anchor` em separado vira faixa no índice; o OR só desempata
+            queryset = queryset.filter(Q(timestamp__lte=anchor), Q(timestamp__lt=anchor) | Q(pk__lt=before))
+        sql, params = queryset.order_by("-timestamp", "-id").values("pk")[:limit].query.sql_with_params()
+        branches.append((f"SELECT * FROM ({sql}) AS {role}_page", params))
+
+    # SQLite não aceita LIMIT direto nos ramos de um UNION: cada um vai numa subconsulta
+    union = RawSQL(
+        " UNION ALL ".join(sql for sql, _ in branches),
+        [param for _, params in branches for param in params],
+    )
+    return list(
+        TransactionModel.objects.filter(pk__in=union)
+        .select_related("credit", "buyer", "seller")
+        .order_by("-timestamp", "-id")[:limit]
+    )
+
+
 def public_transactions_view(request: HttpRequest) -> HttpResponse:
     """
     Public-facing view showing recent completed transactions.
@@ -172,35 +323,64 @@ def _get_client_ip(request: HttpRequest) -> str:
     return request.META.get('REMOTE_ADDR', 'unknown')
 
 
-def _sse_event_stream(client_ip: str, rate_limit_key: str, session_key: str) -> Iterator[str]:
+def _parse_last_event_id(request: HttpRequest) -> int | None:
+    """
+    Read the resume cursor sent by a reconnecting client.
+
+    Browsers send the `Last-Event-ID` header on automatic reconnection; the
+    public page reconnects manually and passes `last_event_id` instead.
+    """
+    raw = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id", "")
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+def _sse_event_stream(
+    rate_limit_key: str, session_key: str, last_event_id: int | None = None
+) -> Iterator[str]:
     """
     Generator for SSE events streaming new completed transactions.
 
-    Polls DB every 2s for new transactions, sends heartbeat every 30s.
-    Uses Django cache to track last seen transaction timestamp per client.
+    Subscribes to the in-process event bus instead of polling the DB: each
+    completed transaction is published once by `buy_credit` (after commit) and
+    fanned out to every open stream. Sends heartbeat every 30s.
+
+    Events carry an `id:` field. When resuming from `last_event_id`, missed
+    events are replayed from the bus ring buffer, or from the DB in keyset
+    pages by primary key (until a short page) if the cursor is older than
+    the buffer.
     """
     # Send immediate connection confirmation to trigger onopen quickly
     yield ": connected\n\n"
 
-    cache_key = f"sse_last_txn_{client_ip}"
     heartbeat_interval = 30  # seconds
-    poll_interval = 2  # seconds
     refresh_interval = 10  # seconds - refresh both rate limit and session
     last_heartbeat = time.time()
     last_refresh = time.time()
 
-    # Get initial last transaction timestamp
-    last_txn_time = cache.get(cache_key)
-    if not last_txn_time:
-        # First connection - get most recent transaction time
-        latest_txn = TransactionModel.objects.filter(
-            status=TransactionModel.Status.COMPLETED
-        ).order_by("-timestamp").first()
-        last_txn_time = latest_txn.timestamp if latest_txn else timezone.now()
-        cache.set(cache_key, last_txn_time, timeout=3600)  # 1 hour
-
+    subscription = Subscription()
+    replay = event_bus.resume(subscription, last_event_id)
     try:
+        pages = [replay] if replay is not None else iter_missed_events(last_event_id)
+        # Events read from the DB may also arrive through the subscription
+        replayed_ids: set[int] = set()
+        for page in pages:
+            for event_id, message in page:
+                replayed_ids.add(event_id)
+                yield message
+
         while True:
+            # Block until a transaction is published or the next housekeeping is due
+            wait = min(
+                last_heartbeat + heartbeat_interval,
+                last_refresh + refresh_interval,
+            ) - time.time()
+            item = subscription.get(timeout=max(wait, 0))
+            if item is not None and item[0] not in replayed_ids:
+                yield item[1]
+
             current_time = time.time()
 
             # Send heartbeat to keep connection alive
@@ -217,40 +397,77 @@ def _sse_event_stream(client_ip: str, rate_limit_key: str, session_key: str) ->
                     cache.set(session_key, session_data, timeout=60)
                 last_refresh = current_time
 
-            # Check for new transactions since last check
-            new_transactions = TransactionModel.objects.filter(
-                status=TransactionModel.Status.COMPLETED,
-                timestamp__gt=last_txn_time
-            ).select_related("buyer", "seller", "credit").order_by("timestamp")
-
-            if new_transactions.exists():
-                for txn in new_transactions:
-                    # Build anonymized transaction data (NO personal info like farm names)
-                    data = {
-                        "id": txn.id,
-                        "timestamp": txn.timestamp.isoformat(),
-                        "buyer_role": txn.buyer.get_role_display(),
-                        "seller_role": txn.seller.get_role_display(),
-                        "amount": str(txn.amount),
-                        "total_price": str(txn.total_price),
-                        # "credit_origin" removed for privacy - no farm names exposed
-                    }
-                    yield f"data: {json.dumps(data)}\n\n"
-                    last_txn_time = txn.timestamp
-
-                # Update cache with latest transaction time
-                cache.set(cache_key, last_txn_time, timeout=3600)
-
-            # Sleep before next poll
-            time.sleep(poll_interval)
-
     except GeneratorExit:
         # Client disconnected - cleanup
         pass
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+async def _async_sse_event_stream(
+    rate_limit_key: str, session_key: str, last_event_id: int | None = None
+) -> AsyncIterator[str]:
+    """
+    ASGI-native version of `_sse_event_stream`.
+
+    Waits on an `asyncio.Queue` fed by the event bus, so an idle stream costs
+    one suspended coroutine instead of a blocked worker thread.
+    """
+    yield ": connected\n\n"
+
+    heartbeat_interval = 30  # seconds
+    refresh_interval = 10  # seconds - refresh both rate limit and session
+    last_heartbeat = time.time()
+    last_refresh = time.time()
+
+    subscription = AsyncSubscription()
+    replay = event_bus.resume(subscription, last_event_id)
+    try:
+        replayed_ids: set[int] = set()
+        if replay is not None:
+            for event_id, message in replay:
+                replayed_ids.add(event_id)
+                yield message
+        else:
+            async for page in aiter_missed_events(last_event_id):
+                for event_id, message in page:
+                    replayed_ids.add(event_id)
+                    yield message
+
+        while True:
+            wait = min(
+                last_heartbeat + heartbeat_interval,
+                last_refresh + refresh_interval,
+            ) - time.time()
+            item = await subscription.get(timeout=max(wait, 0))
+            if item is not None and item[0] not in replayed_ids:
+                yield item[1]
+
+            current_time = time.time()
+
+            if current_time - last_heartbeat >= heartbeat_interval:
+                yield ": heartbeat\n\n"
+                last_heartbeat = current_time
+
+            if current_time - last_refresh >= refresh_interval:
+                await cache.aset(rate_limit_key, True, timeout=30)
+                session_data = await cache.aget(session_key)
+                if session_data:
+                    await cache.aset(session_key, session_data, timeout=60)
+                last_refresh = current_time
+    finally:
+        # Runs on normal close and when the ASGI handler cancels the stream
+        # after the client disconnects
+        event_bus.unsubscribe(subscription)
+
+
+def _sse_session_event(session_id: str) -> str:
+    """SSE event carrying the session ID used for rate-limit-free reconnection."""
+    return f"event: session\ndata: {json.dumps({'session_id': session_id})}\n\n"
 
 
 @never_cache
-def public_transactions_sse(request: HttpRequest) -> HttpResponse:
+async def public_transactions_sse(request: HttpRequest) -> HttpResponse:
     """
     SSE endpoint for real-time transaction updates.
 
@@ -258,22 +475,27 @@ def public_transactions_sse(request: HttpRequest) -> HttpResponse:
     - Clients get a session ID on first connection (stored in localStorage)
     - Reconnections within 60s with valid session ID bypass rate limit
     - Prevents abuse while allowing legitimate page refreshes
+
+    Served through `ecotrade.asgi`, the stream is an async generator and idle
+    connections hold no thread. Under WSGI (runserver, test Client) it falls
+    back to the blocking generator, since WSGI cannot stream async iterators.
     """
     client_ip = _get_client_ip(request)
     session_id = request.GET.get('session_id', '')
+    last_event_id = _parse_last_event_id(request)
 
     rate_limit_key = f"sse_active_{client_ip}"
     session_key = f"sse_session_{session_id}" if session_id else None
 
     # Check if this is a valid reconnection
     is_valid_reconnection = False
-    if session_key and cache.get(session_key):
+    if session_key and await cache.aget(session_key):
         is_valid_reconnection = True
         # Clean up old rate limit to allow reconnection
-        cache.delete(rate_limit_key)
+        await cache.adelete(rate_limit_key)
 
     # Check if client already has an active connection (rate limiting)
-    if cache.get(rate_limit_key) and not is_valid_reconnection:
+    if await cache.aget(rate_limit_key) and not is_valid_reconnection:
         return HttpResponse(
             "Too many connections. Only 1 SSE connection per IP allowed.",
             status=429,
@@ -282,31 +504,39 @@ def public_transactions_sse(request: HttpRequest) -> HttpResponse:
 
     # Generate new session ID if not reconnecting
     if not is_valid_reconnection:
-        import uuid
         session_id = str(uuid.uuid4())
         session_key = f"sse_session_{session_id}"
 
     # Mark connection as active
-    cache.set(rate_limit_key, True, timeout=5)
+    await cache.aset(rate_limit_key, True, timeout=5)
     # Store session with 60s timeout (allows reconnections within this window)
-    cache.set(session_key, {'ip': client_ip, 'connected_at': time.time()}, timeout=60)
+    await cache.aset(session_key, {'ip': client_ip, 'connected_at': time.time()}, timeout=60)
 
-    def event_stream_wrapper():
+    async def async_event_stream_wrapper() -> AsyncIterator[str]:
         """Wrapper to ensure cache cleanup and send session ID."""
         try:
-            # Send session ID to client on connection
-            yield f"event: session\ndata: {json.dumps({'session_id': session_id})}\n\n"
-            # Stream transaction updates
-            yield from _sse_event_stream(client_ip, rate_limit_key, session_key)
+            yield _sse_session_event(session_id)
+            async for chunk in _async_sse_event_stream(rate_limit_key, session_key, last_event_id):
+                yield chunk
         finally:
             # Clean up rate limit on disconnect
-            cache.delete(rate_limit_key)
             # Keep session alive for 60s to allow reconnection
+            await cache.adelete(rate_limit_key)
 
-    response = StreamingHttpResponse(
-        event_stream_wrapper(),
-        content_type="text/event-stream"
-    )
+    def event_stream_wrapper() -> Iterator[str]:
+        """Wrapper to ensure cache cleanup and send session ID."""
+        try:
+            yield _sse_session_event(session_id)
+            yield from _sse_event_stream(rate_limit_key, session_key, last_event_id)
+        finally:
+            cache.delete(rate_limit_key)
+
+    if isinstance(request, ASGIRequest):
+        stream: Iterator[str] | AsyncIterator[str] = async_event_stream_wrapper()
+    else:
+        stream = event_stream_wrapper()
+
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
     response["Cache-Control"] = "no-cache"
     response["X-Accel-Buffering"] = "no"  # Disable nginx buffering
-    return response
\ No newline at end of file
+    return response